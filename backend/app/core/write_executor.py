@@ -0,0 +1,186 @@
+"""
+Single-writer executor for SQLite
+All mutating service calls are queued here and run one at a time on the
+pool's writer connection. Jobs that arrive together share one transaction
+(group commit); each job runs inside its own SAVEPOINT so a failing job
+rolls back alone without affecting the rest of the batch.
+"""
+
+import asyncio
+import itertools
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple
+
+from app.db import ConnectionPool, get_pool
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_SIZE = 32
+GROUP_COMMIT_WINDOW_SECONDS = 0.002
+
+
+class _JobConnection:
+    """
+    Connection handed to a queued job.
+
+    The executor owns the real transaction, so commit() and rollback() are
+    scoped to the job's savepoint: commit() keeps the work done so far,
+    rollback() discards everything since the last commit().
+    """
+
+    def __init__(self, conn: sqlite3.Connection, savepoint: str):
+        self._conn = conn
+        self._savepoint = savepoint
+
+    def commit(self) -> None:
+        self._conn.execute(f"RELEASE {self._savepoint}")
+        self._conn.execute(f"SAVEPOINT {self._savepoint}")
+
+    def rollback(self) -> None:
+        self._conn.execute(f"ROLLBACK TO {self._savepoint}")
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._conn, name)
+
+
+_Job = Tuple[Callable[..., Any], tuple, dict, Future]
+
+
+class WriteExecutor:
+    """Serializes write jobs onto the writer connection with group commit"""
+
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        max_batch: int = MAX_BATCH_SIZE,
+        window: float = GROUP_COMMIT_WINDOW_SECONDS,
+    ):
+        self.pool = pool
+        self.max_batch = max_batch
+        self.window = window
+        self._queue: "queue.Queue[Optional[_Job]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._savepoints = itertools.count()
+        self._stats = {"jobs": 0, "failed": 0, "batches": 0, "max_batch": 0}
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="sqlite-writer", daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """
+        Queue fn(db, *args, **kwargs) for the writer thread.
+        Returns a Future resolved once the job's batch has committed.
+        """
+        future: Future = Future()
+        self._ensure_started()
+        self._queue.put((fn, args, kwargs, future))
+        return future
+
+    def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Blocking submit() for sync endpoints"""
+        return self.submit(fn, *args, **kwargs).result()
+
+    async def run_async(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Awaitable submit() for async endpoints"""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def stats(self) -> dict:
+        return {**self._stats, "queued": self._queue.qsize()}
+
+    def shutdown(self, timeout: Optional[float] = None) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def _collect_batch(self, first: _Job) -> Tuple[List[_Job], bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                job = (
+                    self._queue.get(timeout=remaining)
+                    if remaining > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+            if job is None:
+                return batch, True
+            batch.append(job)
+        return batch, False
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, stop = self._collect_batch(first)
+            self._run_batch(batch)
+            if stop:
+                return
+
+    def _run_batch(self, batch: List[_Job]) -> None:
+        outcomes: List[Tuple[Future, bool, Any]] = []
+        try:
+            with self.pool.writer() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                for fn, args, kwargs, future in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    savepoint = f"job_{next(self._savepoints)}"
+                    conn.execute(f"SAVEPOINT {savepoint}")
+                    try:
+                        result = fn(_JobConnection(conn, savepoint), *args, **kwargs)
+                        conn.execute(f"RELEASE {savepoint}")
+                        outcomes.append((future, True, result))
+                    except BaseException as e:
+                        conn.execute(f"ROLLBACK TO {savepoint}")
+                        conn.execute(f"RELEASE {savepoint}")
+                        outcomes.append((future, False, e))
+                conn.commit()
+        except Exception as e:
+            # Nothing in this batch was committed
+            logger.error(f"Write batch of {len(batch)} failed to commit: {e}", exc_info=True)
+            for _, _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            self._stats["failed"] += len(batch)
+            return
+
+        self._stats["batches"] += 1
+        self._stats["max_batch"] = max(self._stats["max_batch"], len(outcomes))
+        for future, ok, value in outcomes:
+            self._stats["jobs"] += 1
+            if ok:
+                future.set_result(value)
+            else:
+                self._stats["failed"] += 1
+                future.set_exception(value)
+
+
+_executor: Optional[WriteExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_write_executor() -> WriteExecutor:
+    """Process-wide writer executor bound to the connection pool"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = WriteExecutor(get_pool())
+    return _executor
@@ -3,13 +3,18 @@ FastAPI Database Connection Manager
 Handles SQLite connection with WAL mode and explicit transactions
 """
 
+import queue
 import sqlite3
 import sys
+import threading
+import time
 from pathlib import Path
-from typing import Generator
+from typing import Any, Dict, Generator, List, Optional
 from contextlib import contextmanager
 import logging
 
+from fastapi import Request
+
 logger = logging.getLogger(__name__)
 
 # Determine Base Directory (Handles PyInstaller vs Script)
@@ -65,6 +70,18 @@ def init_db(conn: sqlite3.Connection):
         "017_fy_wise_unique_constraints.sql",
         "018_standardize_numeric_precision.sql",
         "019_add_missing_invoice_fields.sql",
+        "021_reconciliation_ledger_mv.sql",
+        "022_srv_bulk_ingest.sql",
+        "023_ingestion_ledger.sql",
+        "024_dashboard_snapshot.sql",
+        "025_activity_feed_indexes.sql",
+        "026_settings_version.sql",
+        "027_srv_items_po_key.sql",
+        "028_search_index.sql",
+        "029_typeahead_log.sql",
+        "030_lot_rollup.sql",
+        "031_document_financial_year.sql",
+        "032_srv_receipt_totals.sql",
     ]
 
     cursor = conn.cursor()
@@ -106,50 +123,237 @@ def validate_database_path():
         logger.info(f"Database path validated: {DATABASE_PATH}")
 
 
-def get_connection() -> sqlite3.Connection:
-    """Get a new database connection with row factory"""
-    try:
-        conn = sqlite3.connect(str(DATABASE_PATH), check_same_thread=False)
-        conn.row_factory = sqlite3.Row
+# Per-connection PRAGMAs, applied once when a connection is opened.
+# synchronous=NORMAL is durable under WAL except for the last commits on power loss.
+CONNECTION_PRAGMAS = (
+    ("foreign_keys", "ON"),
+    ("synchronous", "NORMAL"),
+    ("cache_size", "-16000"),  # ~16 MB page cache per connection
+    ("mmap_size", "268435456"),  # 256 MB memory-mapped reads
+    ("temp_store", "MEMORY"),
+    ("busy_timeout", "5000"),
+)
+
+READER_POOL_SIZE = 8
+POOL_TIMEOUT_SECONDS = 30.0
 
-        # CRITICAL: Enable Foreign Keys and WAL mode
-        conn.execute("PRAGMA foreign_keys = ON")
+
+def _open_connection(path: Path, readonly: bool = False) -> sqlite3.Connection:
+    """Open a connection and apply CONNECTION_PRAGMAS"""
+    conn = sqlite3.connect(str(path), check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+
+    if not readonly:
+        # journal_mode is persistent in the file; only the writer needs to assert it
         conn.execute("PRAGMA journal_mode = WAL")
+    for pragma, value in CONNECTION_PRAGMAS:
+        conn.execute(f"PRAGMA {pragma} = {value}")
+    if readonly:
+        conn.execute("PRAGMA query_only = ON")
 
-        # CRITICAL FIX: Commit to persist PRAGMA settings
-        conn.commit()
+    # Verify Foreign Keys are actually enabled
+    fk_status = conn.execute("PRAGMA foreign_keys").fetchone()[0]
+    if fk_status != 1:
+        logger.error(f"CRITICAL: Foreign Keys failed to enable! Status: {fk_status}")
+        conn.close()
+        raise RuntimeError(
+            "Foreign Key enforcement failed - database integrity at risk"
+        )
+    return conn
 
-        # Verify Foreign Keys are actually enabled
-        fk_status = conn.execute("PRAGMA foreign_keys").fetchone()[0]
-        if fk_status != 1:
-            logger.error(
-                f"CRITICAL: Foreign Keys failed to enable! Status: {fk_status}"
-            )
-            raise RuntimeError(
-                "Foreign Key enforcement failed - database integrity at risk"
-            )
-
-        logger.debug(f"Connection established: FK={fk_status}, WAL=enabled")
+
+def get_connection() -> sqlite3.Connection:
+    """Get a new (unpooled) database connection with row factory"""
+    try:
+        conn = _open_connection(DATABASE_PATH)
+        logger.debug("Connection established: FK=1, WAL=enabled")
         return conn
     except sqlite3.Error as e:
         logger.error(f"Failed to connect to database: {e}")
         raise
 
 
-def get_db() -> Generator[sqlite3.Connection, None, None]:
-    """Dependency for FastAPI routes"""
-    conn = get_connection()
-    try:
+class ConnectionPool:
+    """
+    Bounded SQLite connection pool.
+
+    Readers: up to `max_readers` query_only connections, opened lazily and
+    reused LIFO. Writer: one connection guarded by a lock, since SQLite
+    allows a single writer at a time anyway.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_readers: int = READER_POOL_SIZE,
+        timeout: float = POOL_TIMEOUT_SECONDS,
+    ):
+        self.path = path
+        self.max_readers = max_readers
+        self.timeout = timeout
+        self._idle_readers: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._readers_opened = 0
+        self._writer: Optional[sqlite3.Connection] = None
+        self._writer_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._metrics = {
+            "reader_acquired": 0,
+            "writer_acquired": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "wait_ms_total": 0.0,
+            "wait_ms_max": 0.0,
+        }
+
+    def _record_wait(self, started: float) -> None:
+        waited_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._metrics["waits"] += 1
+            self._metrics["wait_ms_total"] += waited_ms
+            self._metrics["wait_ms_max"] = max(self._metrics["wait_ms_max"], waited_ms)
+
+    def _timed_out(self, role: str) -> None:
+        with self._lock:
+            self._metrics["timeouts"] += 1
+        raise TimeoutError(
+            f"Timed out after {self.timeout}s waiting for a {role} database connection"
+        )
+
+    @contextmanager
+    def reader(self) -> Generator[sqlite3.Connection, None, None]:
+        """Lease a read-only connection"""
+        conn = None
+        try:
+            conn = self._idle_readers.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._readers_opened < self.max_readers
+                if can_open:
+                    self._readers_opened += 1
+            if can_open:
+                try:
+                    conn = _open_connection(self.path, readonly=True)
+                except Exception:
+                    with self._lock:
+                        self._readers_opened -= 1
+                    raise
+            else:
+                started = time.perf_counter()
+                try:
+                    conn = self._idle_readers.get(timeout=self.timeout)
+                except queue.Empty:
+                    self._timed_out("reader")
+                self._record_wait(started)
+
+        with self._lock:
+            self._metrics["reader_acquired"] += 1
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle_readers.put(conn)
+
+    @contextmanager
+    def writer(self) -> Generator[sqlite3.Connection, None, None]:
+        """Lease the single writer connection"""
+        if not self._writer_lock.acquire(blocking=False):
+            started = time.perf_counter()
+            if not self._writer_lock.acquire(timeout=self.timeout):
+                self._timed_out("writer")
+            self._record_wait(started)
+
+        try:
+            if self._writer is None:
+                self._writer = _open_connection(self.path)
+            with self._lock:
+                self._metrics["writer_acquired"] += 1
+            yield self._writer
+        finally:
+            if self._writer is not None and self._writer.in_transaction:
+                self._writer.rollback()
+            self._writer_lock.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            metrics = dict(self._metrics)
+            readers_opened = self._readers_opened
+        idle = self._idle_readers.qsize()
+        metrics["wait_ms_total"] = round(metrics["wait_ms_total"], 2)
+        metrics["wait_ms_max"] = round(metrics["wait_ms_max"], 2)
+        return {
+            "readers": {
+                "max": self.max_readers,
+                "open": readers_opened,
+                "idle": idle,
+                "in_use": readers_opened - idle,
+            },
+            "writer": {
+                "open": self._writer is not None,
+                "in_use": self._writer_lock.locked(),
+            },
+            **metrics,
+        }
+
+    def close(self) -> None:
+        """Close idle readers and the writer (used on shutdown and in tests)"""
+        while True:
+            try:
+                self._idle_readers.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._readers_opened = 0
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Process-wide connection pool, created on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DATABASE_PATH)
+    return _pool
+
+
+def get_db(request: Request) -> Generator[sqlite3.Connection, None, None]:
+    """
+    Dependency for FastAPI routes.
+    GET/HEAD requests lease a pooled read-only connection; everything else
+    leases the writer and commits (or rolls back) around the request.
+    """
+    pool = get_pool()
+    if request.method in ("GET", "HEAD"):
+        with pool.reader() as conn:
+            yield conn
+        return
+
+    with pool.writer() as conn:
+        try:
+            yield conn
+            conn.commit()
+            logger.debug("Transaction committed successfully")
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Transaction rolled back due to error: {e}")
+            raise
+
+
+def get_read_db() -> Generator[sqlite3.Connection, None, None]:
+    """
+    Dependency for read-only routes that are not GETs (POST lookups and
+    exports with a request body): always a pooled reader, never the writer.
+    """
+    with get_pool().reader() as conn:
         yield conn
-        conn.commit()
-        logger.debug("Transaction committed successfully")
-    except Exception as e:
-        conn.rollback()
-        logger.error(f"Transaction rolled back due to error: {e}")
-        raise
-    finally:
-        conn.close()
-        logger.debug("Database connection closed")
 
 
 @contextmanager
@@ -174,6 +378,22 @@ def db_transaction(conn: sqlite3.Connection):
         raise
 
 
+def select_in(
+    db: sqlite3.Connection, sql: str, values: List, chunk_size: int = 500, params: tuple = ()
+) -> List:
+    """
+    Run `sql` with its IN ({}) placeholder expanded, in chunks under SQLite's
+    variable limit. `params` bind the placeholders that precede the IN list.
+    """
+    rows = []
+    for start in range(0, len(values), chunk_size):
+        chunk = values[start : start + chunk_size]
+        rows.extend(
+            db.execute(sql.format(",".join("?" * len(chunk))), (*params, *chunk)).fetchall()
+        )
+    return rows
+
+
 def verify_wal_mode():
     """Verify that the database is using WAL mode"""
     conn = get_connection()
@@ -188,3 +408,153 @@ def verify_wal_mode():
         logger.error(f"Failed to verify WAL mode: {e}")
     finally:
         conn.close()
+
+
+def ensure_reconciliation_ledger():
+    """Install and populate reconciliation_ledger_mv on databases created before it existed"""
+    from app.services.reconciliation_ledger import (
+        install_ledger,
+        ledger_table_exists,
+        rebuild_reconciliation_ledger,
+    )
+
+    conn = get_connection()
+    try:
+        if ledger_table_exists(conn):
+            return
+        logger.info("reconciliation_ledger_mv missing. Installing and rebuilding...")
+        install_ledger(conn, MIGRATIONS_DIR)
+        with db_transaction(conn):
+            rebuild_reconciliation_ledger(conn)
+    except Exception as e:
+        logger.error(f"Failed to install reconciliation ledger: {e}")
+        raise
+    finally:
+        conn.close()
+
+
+def ensure_lot_rollup():
+    """Install and populate lot_rollup on databases created before it existed"""
+    from app.services.lot_rollup import install_lot_rollup, rebuild_lot_rollup, rollup_table_exists
+
+    conn = get_connection()
+    try:
+        if rollup_table_exists(conn):
+            return
+        logger.info("lot_rollup missing. Installing and rebuilding...")
+        install_lot_rollup(conn, MIGRATIONS_DIR)
+        with db_transaction(conn):
+            rebuild_lot_rollup(conn)
+    except Exception as e:
+        logger.error(f"Failed to install lot rollup: {e}")
+        raise
+    finally:
+        conn.close()
+
+
+def ensure_document_financial_year():
+    """Apply migration 031 (generated financial_year on DCs and invoices) on databases created before it existed"""
+    from app.services.number_availability import install_financial_year
+
+    conn = get_connection()
+    try:
+        # No-op once applied, apart from dropping indexes left by its first version
+        install_financial_year(conn, MIGRATIONS_DIR)
+        conn.commit()
+    except Exception as e:
+        logger.error(f"Failed to install document financial year: {e}")
+        raise
+    finally:
+        conn.close()
+
+
+def ensure_dashboard_snapshot():
+    """Install and populate dashboard_snapshot on databases created before it existed"""
+    from app.services.dashboard_snapshot import (
+        install_snapshot,
+        rebuild_dashboard_snapshot,
+        snapshot_table_exists,
+    )
+
+    conn = get_connection()
+    try:
+        if snapshot_table_exists(conn):
+            return
+        logger.info("dashboard_snapshot missing. Installing and rebuilding...")
+        install_snapshot(conn, MIGRATIONS_DIR)
+        with db_transaction(conn):
+            rebuild_dashboard_snapshot(conn)
+    except Exception as e:
+        logger.error(f"Failed to install dashboard snapshot: {e}")
+        raise
+    finally:
+        conn.close()
+
+
+def _apply_migration_if_missing(name: str, filename: str, purpose: str):
+    """Apply one migration script unless the table / index it creates already exists"""
+    conn = get_connection()
+    try:
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone()
+        if exists:
+            return
+        logger.info(f"{name} missing. Applying {filename}...")
+        with open(MIGRATIONS_DIR / filename, "r", encoding="utf-8") as f:
+            conn.executescript(f.read())
+    except Exception as e:
+        logger.error(f"Failed to install {purpose}: {e}")
+        raise
+    finally:
+        conn.close()
+
+
+def ensure_srv_trigger_guards():
+    """Apply migration 022 (guarded SRV receipt triggers) on databases created before it existed"""
+    _apply_migration_if_missing("trigger_guards", "022_srv_bulk_ingest.sql", "SRV trigger guards")
+
+
+def ensure_srv_receipt_totals():
+    """Apply migration 032 (active-SRV receipt totals in the srv_items triggers) on databases created before it existed"""
+    _apply_migration_if_missing("trg_srv_items_receipts_insert", "032_srv_receipt_totals.sql", "SRV receipt triggers")
+
+
+def ensure_ingestion_ledger():
+    """Apply migration 023 (upload content-hash ledger) on databases created before it existed"""
+    _apply_migration_if_missing("ingestion_ledger", "023_ingestion_ledger.sql", "ingestion ledger")
+
+
+def ensure_activity_feed_indexes():
+    """Apply migration 025 (created_at indexes for the activity feed) on databases created before it existed"""
+    _apply_migration_if_missing("idx_srvs_created_at", "025_activity_feed_indexes.sql", "activity feed indexes")
+
+
+def ensure_settings_version():
+    """Apply migration 026 (settings change counter for the settings cache) on databases created before it existed"""
+    _apply_migration_if_missing("settings_version", "026_settings_version.sql", "settings version triggers")
+
+
+def ensure_srv_items_po_key():
+    """Apply migration 027 (integer po_key on srv_items) on databases created before it existed"""
+    _apply_migration_if_missing("idx_srv_items_po_key", "027_srv_items_po_key.sql", "srv_items po_key")
+
+
+def ensure_search_index():
+    """Build the FTS5 search index (migration 028) if missing or from before PO items had rows of their own"""
+    from app.services.search import rebuild_search_index, search_index_current
+
+    conn = get_connection()
+    try:
+        if search_index_current(conn):
+            return
+        logger.info("search index missing or outdated. Rebuilding from 028_search_index.sql...")
+        rebuild_search_index(conn, MIGRATIONS_DIR)
+    except Exception as e:
+        logger.error(f"Failed to install search index: {e}")
+        raise
+    finally:
+        conn.close()
+
+
+def ensure_typeahead_log():
+    """Apply migration 029 (change log for the typeahead index) on databases created before it existed"""
+    _apply_migration_if_missing("typeahead_log", "029_typeahead_log.sql", "typeahead log")
@@ -75,3 +75,14 @@ def forbidden(message: str, reason: Optional[str] = None) -> HTTPException:
         logger.warning(f"Forbidden: {message}")
 
     return HTTPException(status_code=403, detail=message)
+
+
+def too_many_requests(message: str, retry_after: Optional[int] = None) -> HTTPException:
+    """
+    429 Too Many Requests - Server is at capacity for this kind of work
+    Use for: full background job queues
+    """
+    logger.warning(f"Too Many Requests: {message}")
+
+    headers = {"Retry-After": str(retry_after)} if retry_after else None
+    return HTTPException(status_code=429, detail=message, headers=headers)
@@ -8,6 +8,10 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 
+from app.db import get_pool
+from app.services.report_jobs import shutdown_report_jobs
+from app.services.typeahead import get_typeahead_index
+
 # Import Routers
 from app.routers import (
     health,
@@ -16,7 +20,12 @@ from app.routers import (
     dc,
     invoice,
     reports,
-    srv
+    srv,
+    documents,
+    search,
+    reconciliation,
+    common,
+    settings as settings_router,
 )
 
 # Setup structured logging
@@ -45,6 +54,28 @@ app.include_router(dc.router, prefix="/api/dc", tags=["Delivery Challans"])
 app.include_router(invoice.router, prefix="/api/invoice", tags=["Invoices"])
 app.include_router(srv.router, prefix="/api/srv", tags=["SRVs"])
 app.include_router(reports.router, prefix="/api/reports", tags=["Reports"])
+app.include_router(documents.router, prefix="/api/documents", tags=["Documents"])
+app.include_router(search.router, prefix="/api/search", tags=["Search"])
+app.include_router(reconciliation.router, prefix="/api/reconciliation", tags=["Reconciliation"])
+app.include_router(common.router, prefix="/api/common", tags=["Common"])
+app.include_router(settings_router.router, prefix="/api/settings", tags=["Settings"])
+
+
+@app.on_event("startup")
+def load_typeahead_index():
+    """Build the typeahead index before the first request needs it"""
+    try:
+        with get_pool().reader() as db:
+            get_typeahead_index().rebuild(db)
+    except Exception as e:
+        # Not fatal: the first typeahead request retries the build
+        logger.warning(f"Typeahead index not loaded at startup: {e}")
+
+
+@app.on_event("shutdown")
+def stop_report_jobs():
+    """Cancel running report jobs and delete their result files"""
+    shutdown_report_jobs()
 
 
 @app.get("/")
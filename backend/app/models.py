@@ -3,7 +3,7 @@ Pydantic Models for API Request/Response
 """
 
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Literal
 
 # ============================================================
 # PURCHASE ORDER MODELS
@@ -352,3 +352,150 @@ class SettingsUpdate(BaseModel):
 
     key: str
     value: str
+
+
+# ============================================================
+# BULK DOCUMENT EXPORT MODELS
+# ============================================================
+
+
+class BulkExportRequest(BaseModel):
+    """Documents for a bulk export: explicit numbers, or every document in a date range"""
+
+    invoice_numbers: Optional[List[str]] = None
+    dc_numbers: Optional[List[str]] = None
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    kinds: List[Literal["invoice", "dc"]] = ["invoice", "dc"]  # Used with the date range
+    layout: Literal["zip", "workbook"] = "zip"  # One file per document, or one sheet per document
+
+
+# ============================================================
+# REPORT JOB MODELS
+# ============================================================
+
+
+class ReportJobRequest(BaseModel):
+    """A report to run in the background; dates default to the last 30 days"""
+
+    report: Literal["reconciliation", "sales", "dc_register", "invoice_register", "pending", "po_register"]
+    format: Literal["xlsx", "csv", "jsonl", "parquet"] = "xlsx"
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+
+
+class ReportJobStatus(BaseModel):
+    job_id: str
+    report: str
+    format: str
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    status: Literal["queued", "running", "succeeded", "failed", "cancelled"]
+    rows_written: int = 0
+    error: Optional[str] = None
+    filename: Optional[str] = None
+    size_bytes: Optional[int] = None
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    expires_at: Optional[str] = None
+
+
+# ============================================================
+# SEARCH MODELS
+# ============================================================
+
+
+class SearchResult(BaseModel):
+    """One global search hit"""
+
+    id: str
+    type: Literal["PO", "DC", "Invoice", "SRV"]
+    number: str
+    date: Optional[str] = None
+    party: Optional[str] = None
+    amount: Optional[float] = None
+    type_label: str
+    status: Optional[str] = None
+
+
+class SearchResponse(BaseModel):
+    results: List[SearchResult]
+
+
+TypeaheadKind = Literal["po", "dc", "invoice", "srv", "material"]
+
+
+class TypeaheadSuggestion(BaseModel):
+    kind: TypeaheadKind
+    value: str
+
+
+class TypeaheadResponse(BaseModel):
+    suggestions: List[TypeaheadSuggestion]
+
+
+class ReconciliationItem(BaseModel):
+    """One PO item: ordered from the PO, the rest summed over its lots"""
+
+    po_item_id: str
+    po_item_no: int
+    material_code: Optional[str] = None
+    material_description: Optional[str] = None
+    drg_no: Optional[str] = None
+    unit: Optional[str] = None
+    ordered_qty: float
+    dispatched_qty: float
+    received_qty: float
+    rejected_qty: float
+    invoiced_qty: float
+    remaining_qty: float
+    lot_count: int
+
+
+class ReconciliationLot(BaseModel):
+    """One delivery lot; lot_no 0 collects lines recorded without a lot"""
+
+    po_item_id: str
+    po_item_no: int
+    lot_no: int
+    material_code: Optional[str] = None
+    material_description: Optional[str] = None
+    drg_no: Optional[str] = None
+    unit: Optional[str] = None
+    ordered_qty: float
+    dispatched_qty: float
+    received_qty: float
+    rejected_qty: float
+    invoiced_qty: float
+    remaining_qty: float
+
+
+class ReconciliationLots(BaseModel):
+    po_number: int
+    lots: List[ReconciliationLot]
+
+
+NumberedDocType = Literal["DC", "Invoice"]
+
+
+class NumberCheck(BaseModel):
+    type: NumberedDocType
+    number: str
+    date: Optional[str] = Field(None, description="YYYY-MM-DD; today when omitted")
+
+
+class NumberCheckRequest(BaseModel):
+    checks: List[NumberCheck] = Field(..., max_length=500)
+
+
+class NumberAvailability(BaseModel):
+    type: NumberedDocType
+    number: str
+    financial_year: str
+    exists: bool
+    existing_financial_year: Optional[str] = None
+
+
+class NumberCheckResponse(BaseModel):
+    results: List[NumberAvailability]
@@ -0,0 +1,32 @@
+"""
+Common Router
+Cross-document helpers: DC / invoice number availability
+"""
+
+from fastapi import APIRouter, Depends, Query
+from app.db import get_db, get_read_db
+from app.models import NumberAvailability, NumberCheckRequest, NumberCheckResponse, NumberedDocType
+from app.services.number_availability import check_numbers
+from typing import Optional
+import sqlite3
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+@router.get("/check-duplicate", response_model=NumberAvailability)
+def check_duplicate(
+    type: NumberedDocType,
+    number: str,
+    date: Optional[str] = Query(None, description="YYYY-MM-DD; today when omitted"),
+    db: sqlite3.Connection = Depends(get_db),
+):
+    """Whether one DC / invoice number is already used (numbers never repeat across FYs)"""
+    return check_numbers(db, [{"type": type, "number": number, "date": date}])[0]
+
+
+@router.post("/check-duplicate", response_model=NumberCheckResponse)
+def check_duplicates(request: NumberCheckRequest, db: sqlite3.Connection = Depends(get_read_db)):
+    """Availability of many candidate numbers in one call, in request order (read-only despite POST)"""
+    return {"results": check_numbers(db, [check.model_dump() for check in request.checks])}
@@ -3,157 +3,77 @@ Dashboard Router
 Summary statistics and recent activity
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
 from app.db import get_db
+from app.core.write_executor import get_write_executor
 from app.models import DashboardSummary
+from app.services import activity_feed, dashboard_snapshot
+from app.services.dc_invoice_links import count_uninvoiced_dcs
 import sqlite3
-from typing import List, Dict, Any
-from datetime import datetime
+from typing import List, Dict, Any, Optional
 
 router = APIRouter()
 
 
 @router.get("/summary", response_model=DashboardSummary)
-def get_dashboard_summary(db: sqlite3.Connection = Depends(get_db)):
-    """Get dashboard summary statistics"""
+def get_dashboard_summary(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: sqlite3.Connection = Depends(get_db),
+):
+    """
+    Get dashboard summary statistics.
+    Served from the trigger-maintained dashboard_snapshot with an ETag; a
+    poll carrying a matching If-None-Match gets an empty 304.
+    """
     try:
-        # 1. Total Sales (Month)
-        # Using active invoices. Try to filter by current month if created_at is standard.
-        current_month = datetime.now().strftime("%Y-%m")
-        sales_row = db.execute(
-            """
-            SELECT SUM(total_invoice_value) FROM gst_invoices 
-            WHERE strftime('%Y-%m', created_at) = ?
-        """,
-            (current_month,),
-        ).fetchone()
-        total_sales = sales_row[0] if sales_row and sales_row[0] else 0.0
-
-        # 2. Pending POs
-        pending_pos = db.execute(
-            "SELECT COUNT(*) FROM purchase_orders WHERE po_status = 'New' OR po_status IS NULL"
-        ).fetchone()[0]
+        summary = dashboard_snapshot.get_dashboard_summary(db)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # 3. New POs Today
-        current_date = datetime.now().strftime("%Y-%m-%d")
-        new_pos_today = db.execute(
-            """
-            SELECT COUNT(*) FROM purchase_orders 
-            WHERE date(created_at) = ?
-        """,
-            (current_date,),
-        ).fetchone()[0]
+    etag = dashboard_snapshot.summary_etag(summary)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return summary
 
-        # 4. Active Challans (Uninvoiced)
-        active_challans = db.execute("""
-            SELECT COUNT(DISTINCT dc.dc_number)
-            FROM delivery_challans dc
-            LEFT JOIN gst_invoices i ON dc.dc_number = i.linked_dc_numbers
-            WHERE i.invoice_number IS NULL
-        """).fetchone()[0]
 
-        # 5. Total PO Value (All Time)
-        value_row = db.execute("SELECT SUM(po_value) FROM purchase_orders").fetchone()
-        total_po_value = value_row[0] if value_row and value_row[0] else 0.0
-
-        # 6. Global Reconciliation Snapshot
-        # 6. Global Reconciliation Snapshot (Optimized)
-        # Query tables directly instead of heavy view join
-
-        # Total Ordered
-        ord_row = db.execute("SELECT SUM(ord_qty) FROM purchase_order_items").fetchone()
-        total_order = ord_row[0] if ord_row and ord_row[0] else 0.0
-
-        # Total Delivered (from DC Items)
-        deliv_row = db.execute(
-            "SELECT SUM(dispatch_qty) FROM delivery_challan_items"
-        ).fetchone()
-        total_deliv = deliv_row[0] if deliv_row and deliv_row[0] else 0.0
-
-        # Total Received (from SRV Items)
-        recvd_row = db.execute("SELECT SUM(received_qty) FROM srv_items").fetchone()
-        total_recvd = recvd_row[0] if recvd_row and recvd_row[0] else 0.0
-
-        return {
-            "total_sales_month": total_sales,
-            "sales_growth": 0.0,
-            "pending_pos": pending_pos,
-            "new_pos_today": new_pos_today,
-            "active_challans": active_challans,
-            "active_challans_growth": "Stable",
-            "total_po_value": total_po_value,
-            "po_value_growth": 0.0,
-            "active_po_count": pending_pos,  # Mapping pending to active for now, or use separate Active Status count
-            "total_ordered": total_order,
-            "total_delivered": total_deliv,
-            "total_received": total_recvd,
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+@router.post("/summary/rebuild")
+async def rebuild_dashboard_summary():
+    """Recompute dashboard_snapshot from source tables"""
+
+    def _rebuild(db: sqlite3.Connection):
+        if not dashboard_snapshot.snapshot_table_exists(db):
+            raise HTTPException(status_code=409, detail="dashboard_snapshot is not installed")
+        return dashboard_snapshot.rebuild_dashboard_snapshot(db)
+
+    rows = await get_write_executor().run_async(_rebuild)
+    return {"success": True, "rows": rows}
 
 
 @router.get("/activity")
 def get_recent_activity(
-    limit: int = 10, db: sqlite3.Connection = Depends(get_db)
+    response: Response,
+    limit: int = Query(10, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: sqlite3.Connection = Depends(get_db),
 ) -> List[Dict[str, Any]]:
-    """Get recent activity (POs, DCs, Invoices)"""
+    """
+    Get recent activity (POs, DCs, Invoices, SRVs), newest first.
+    The next page's cursor is returned in the X-Next-Cursor header.
+    """
     try:
-        activities = []
-
-        # Recent POs
-        po_rows = db.execute(
-            """
-            SELECT 'PO' as type, po_number as number, po_date as date, supplier_name as party, po_value as amount, 
-                   COALESCE(po_status, 'New') as status, created_at
-            FROM purchase_orders 
-            ORDER BY created_at DESC LIMIT ?
-        """,
-            (limit,),
-        ).fetchall()
-        for row in po_rows:
-            activities.append(dict(row))
-
-        # Recent Invoices
-        inv_rows = db.execute(
-            """
-            SELECT 'Invoice' as type, invoice_number as number, invoice_date as date, customer_gstin as party, 
-                   total_invoice_value as amount, 'Paid' as status, created_at
-            FROM gst_invoices
-            ORDER BY created_at DESC LIMIT ?
-        """,
-            (limit,),
-        ).fetchall()
-        for row in inv_rows:
-            # Clean up party name if possible or keep generic
-            r = dict(row)
-            r["party"] = r["party"] or "Client"
-            activities.append(r)
-
-        # Recent DCs
-        dc_rows = db.execute(
-            """
-            SELECT 'DC' as type, dc_number as number, dc_date as date, consignee_name as party, 
-                   0 as amount, 'Dispatched' as status, created_at
-            FROM delivery_challans
-            ORDER BY created_at DESC LIMIT ?
-        """,
-            (limit,),
-        ).fetchall()
-        for row in dc_rows:
-            activities.append(dict(row))
-
-        # Sort combined list by created_at desc
-        # Note: created_at might be null for scraped data, fallback to date
-        def sort_key(x):
-            return x["created_at"] or x["date"] or ""
-
-        activities.sort(key=sort_key, reverse=True)
-
-        return activities[:limit]
-
+        items, next_cursor = activity_feed.get_activity_page(db, limit=limit, cursor=cursor)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return items
+
 
 @router.get("/insights")
 def get_dashboard_insights(db: sqlite3.Connection = Depends(get_db)):
@@ -178,12 +98,7 @@ def get_dashboard_insights(db: sqlite3.Connection = Depends(get_db)):
             )
 
         # Rule 2: Uninvoiced Challans
-        uninvoiced = db.execute("""
-            SELECT COUNT(DISTINCT dc.dc_number)
-            FROM delivery_challans dc
-            LEFT JOIN gst_invoices i ON dc.dc_number = i.linked_dc_numbers
-            WHERE i.invoice_number IS NULL
-        """).fetchone()[0]
+        uninvoiced = count_uninvoiced_dcs(db)
 
         if uninvoiced > 0:
             insights.append(
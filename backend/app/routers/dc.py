@@ -3,15 +3,21 @@ Delivery Challan Router
 """
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
 from app.db import get_db
 from app.models import DCListItem, DCCreate, DCStats
 from app.errors import not_found, internal_error
 from app.core.exceptions import DomainError, map_error_code_to_http_status
+from app.core.write_executor import get_write_executor
 from app.services.dc import (
     create_dc as service_create_dc,
     update_dc as service_update_dc,
     check_dc_has_invoice,
 )
+from app.services.dc_invoice_links import count_invoiced_dcs, invoiced_sql
+from app.services.document_cache import KIND_DC, get_document_cache
+from app.services.document_export import load_dc_documents
+from app.services.excel_service import XLSX_MEDIA_TYPE
 from typing import List, Optional
 import sqlite3
 import logging
@@ -30,9 +36,7 @@ def get_dc_stats(db: sqlite3.Connection = Depends(get_db)):
         ).fetchone()[0]
 
         # Completed (Linked to Invoice)
-        completed = db.execute("""
-            SELECT COUNT(DISTINCT dc_number) FROM gst_invoice_dc_links
-        """).fetchone()[0]
+        completed = count_invoiced_dcs(db)
 
         # Total Value
         total_value = db.execute("""
@@ -62,14 +66,14 @@ def list_dcs(po: Optional[int] = None, db: sqlite3.Connection = Depends(get_db))
     """List all Delivery Challans, optionally filtered by PO"""
 
     # Optimized query with JOIN to eliminate N+1 problem
-    query = """
+    query = f"""
         SELECT 
             dc.dc_number, 
             dc.dc_date, 
             dc.po_number, 
             dc.consignee_name, 
             dc.created_at,
-            (SELECT COUNT(*) FROM gst_invoice_dc_links WHERE dc_number = dc.dc_number) as is_linked,
+            {invoiced_sql()} as is_linked,
             COALESCE(SUM(dci.dispatch_qty * poi.po_rate), 0) as total_value
         FROM delivery_challans dc
         LEFT JOIN delivery_challan_items dci ON dc.dc_number = dci.dc_number
@@ -130,6 +134,15 @@ def download_dc_excel(dc_number: str, db: sqlite3.Connection = Depends(get_db)):
 
         from app.services.excel_service import ExcelService
 
+        # Invoiced DCs are frozen: serve the cached render
+        if check_dc_has_invoice(dc_number, db):
+            path = get_document_cache().get_or_render(
+                KIND_DC, dc_number, dc_data["header"], dc_data["items"], db
+            )
+            return FileResponse(
+                path, media_type=XLSX_MEDIA_TYPE, filename=f"DC_{dc_number}.xlsx"
+            )
+
         # Use exact generator
         return ExcelService.generate_exact_dc_excel(
             dc_data["header"], dc_data["items"], db
@@ -142,90 +155,14 @@ def download_dc_excel(dc_number: str, db: sqlite3.Connection = Depends(get_db)):
 @router.get("/{dc_number}")
 def get_dc_detail(dc_number: str, db: sqlite3.Connection = Depends(get_db)):
     """Get Delivery Challan detail with items"""
-
-    # Get DC header with PO Date
-    dc_row = db.execute(
-        """
-        SELECT dc.*, po.po_date
-        FROM delivery_challans dc
-        LEFT JOIN purchase_orders po ON dc.po_number = po.po_number
-        WHERE dc.dc_number = ?
-    """,
-        (dc_number,),
-    ).fetchone()
-
-    if not dc_row:
+    documents = load_dc_documents(db, [dc_number])
+    if dc_number not in documents:
         raise not_found(f"Delivery Challan {dc_number} not found", "DC")
-
-    # Get DC items with PO item details
-    items = db.execute(
-        """
-        SELECT 
-            dci.id,
-            dci.dispatch_qty as dispatched_quantity,
-            dci.hsn_code,
-            dci.hsn_rate,
-            dci.lot_no,
-            dci.po_item_id,
-            poi.po_item_no,
-            poi.material_code,
-            poi.material_description,
-            poi.unit,
-            poi.po_rate,
-            pod.dely_qty as lot_ordered_qty,
-            (
-                SELECT COALESCE(SUM(si.received_qty), 0)
-                FROM srv_items si
-                JOIN srvs s ON si.srv_number = s.srv_number
-                WHERE s.is_active = 1 
-                  AND si.po_item_no = poi.po_item_no
-                  AND si.challan_no = dci.dc_number
-            ) as received_quantity
-        FROM delivery_challan_items dci
-        JOIN purchase_order_items poi ON dci.po_item_id = poi.id
-        LEFT JOIN purchase_order_deliveries pod ON dci.po_item_id = pod.po_item_id AND dci.lot_no = pod.lot_no
-        WHERE dci.dc_number = ?
-    """,
-        (dc_number,),
-    ).fetchall()
-
-    result_items = []
-    for item in items:
-        item_dict = dict(item)
-
-        # Calculate remaining info
-        po_item_id = item_dict["po_item_id"]
-        lot_no = item_dict["lot_no"]
-        lot_ordered = item_dict["lot_ordered_qty"] or 0
-        item_dict["received_quantity"] = item_dict.get("received_quantity", 0)
-
-        if lot_no:
-            total_dispatched = db.execute(
-                """
-                SELECT COALESCE(SUM(dispatch_qty), 0) FROM delivery_challan_items 
-                WHERE po_item_id = ? AND lot_no = ?
-             """,
-                (po_item_id, lot_no),
-            ).fetchone()[0]
-        else:
-            total_dispatched = db.execute(
-                """
-                SELECT COALESCE(SUM(dispatch_qty), 0) FROM delivery_challan_items 
-                WHERE po_item_id = ?
-             """,
-                (po_item_id,),
-            ).fetchone()[0]
-
-        item_dict["remaining_post_dc"] = max(0, lot_ordered - total_dispatched)
-        result_items.append(item_dict)
-
-    return {"header": dict(dc_row), "items": result_items}
+    return documents[dc_number]
 
 
 @router.post("/")
-def create_dc(
-    dc: DCCreate, items: List[dict], db: sqlite3.Connection = Depends(get_db)
-):
+def create_dc(dc: DCCreate, items: List[dict]):
     """
     Create new Delivery Challan with items
     items format: [{
@@ -237,126 +174,94 @@ def create_dc(
     }]
     """
 
-    # Validate Uniqueness
-    from app.core.validation import validate_unique_number, get_financial_year
-
-    fy = get_financial_year(dc.dc_date)
-    validate_unique_number(
-        db, "delivery_challans", "dc_number", "financial_year", dc.dc_number, fy
-    )
+    def _create(db: sqlite3.Connection):
+        # The service checks FY uniqueness inside the write, so check and insert are atomic
+        return service_create_dc(dc, items, db)
 
-    # Use service layer with transaction protection
+    # Serialized through the single writer; the job rolls back on any error
     try:
-        # CRITICAL: Use BEGIN IMMEDIATE for SQLite concurrency protection
-        db.execute("BEGIN IMMEDIATE")
-
-        try:
-            result = service_create_dc(dc, items, db)
-            db.commit()
-
-            # Service returns ServiceResult - extract data
-            if result.success:
-                return result.data
-            else:
-                # Should not happen if service raises DomainError
-                raise HTTPException(
-                    status_code=500, detail=result.message or "Unknown error"
-                )
-
-        except DomainError as e:
-            # Convert domain error to HTTP response
-            db.rollback()
-            status_code = map_error_code_to_http_status(e.error_code)
+        result = get_write_executor().run(_create)
+
+        # Service returns ServiceResult - extract data
+        if result.success:
+            return result.data
+        else:
+            # Should not happen if service raises DomainError
             raise HTTPException(
-                status_code=status_code,
-                detail={
-                    "message": e.message,
-                    "error_code": e.error_code.value,
-                    "details": e.details,
-                },
+                status_code=500, detail=result.message or "Unknown error"
             )
-        except Exception:
-            db.rollback()
-            raise
 
+    except DomainError as e:
+        # Convert domain error to HTTP response
+        status_code = map_error_code_to_http_status(e.error_code)
+        raise HTTPException(
+            status_code=status_code,
+            detail={
+                "message": e.message,
+                "error_code": e.error_code.value,
+                "details": e.details,
+            },
+        )
     except sqlite3.IntegrityError as e:
         logger.error(f"DC creation failed due to integrity error: {e}", exc_info=e)
         raise internal_error(f"Database integrity error: {str(e)}", e)
 
 
 @router.put("/{dc_number}")
-def update_dc(
-    dc_number: str,
-    dc: DCCreate,
-    items: List[dict],
-    db: sqlite3.Connection = Depends(get_db),
-):
+def update_dc(dc_number: str, dc: DCCreate, items: List[dict]):
     """Update existing Delivery Challan - BLOCKED if invoice exists"""
 
-    # Use service layer with transaction protection
+    # Serialized through the single writer; the job rolls back on any error
     try:
-        # CRITICAL: Use BEGIN IMMEDIATE for SQLite concurrency protection
-        db.execute("BEGIN IMMEDIATE")
-
-        try:
-            result = service_update_dc(dc_number, dc, items, db)
-            db.commit()
-
-            # Service returns ServiceResult - extract data
-            if result.success:
-                return result.data
-            else:
-                # Should not happen if service raises DomainError
-                raise HTTPException(
-                    status_code=500, detail=result.message or "Unknown error"
-                )
-
-        except DomainError as e:
-            # Convert domain error to HTTP response
-            db.rollback()
-            status_code = map_error_code_to_http_status(e.error_code)
+        result = get_write_executor().run(
+            lambda db: service_update_dc(dc_number, dc, items, db)
+        )
+        get_document_cache().invalidate(KIND_DC, dc_number)
+
+        # Service returns ServiceResult - extract data
+        if result.success:
+            return result.data
+        else:
+            # Should not happen if service raises DomainError
             raise HTTPException(
-                status_code=status_code,
-                detail={
-                    "message": e.message,
-                    "error_code": e.error_code.value,
-                    "details": e.details,
-                },
+                status_code=500, detail=result.message or "Unknown error"
             )
-        except Exception:
-            db.rollback()
-            raise
 
+    except DomainError as e:
+        # Convert domain error to HTTP response
+        status_code = map_error_code_to_http_status(e.error_code)
+        raise HTTPException(
+            status_code=status_code,
+            detail={
+                "message": e.message,
+                "error_code": e.error_code.value,
+                "details": e.details,
+            },
+        )
     except sqlite3.IntegrityError as e:
         logger.error(f"DC update failed due to integrity error: {e}", exc_info=e)
         raise internal_error(f"Database integrity error: {str(e)}", e)
 
 
 @router.delete("/{dc_number}")
-def delete_dc(dc_number: str, db: sqlite3.Connection = Depends(get_db)):
+def delete_dc(dc_number: str):
     """
     Delete a Delivery Challan
     CRITICAL: Validates invoice linkage before deletion
     """
-    try:
-        # Use BEGIN IMMEDIATE for transaction safety
-        db.execute("BEGIN IMMEDIATE")
-
-        from app.services.dc import delete_dc as service_delete_dc
+    from app.services.dc import delete_dc as service_delete_dc
 
-        result = service_delete_dc(dc_number, db)
-
-        db.commit()
+    try:
+        result = get_write_executor().run(lambda db: service_delete_dc(dc_number, db))
+        get_document_cache().invalidate(KIND_DC, dc_number)
         return result.data
 
-    except (ResourceNotFoundError, ConflictError) as e:
-        db.rollback()
+    except DomainError as e:
         status_code = map_error_code_to_http_status(e.error_code)
         raise HTTPException(
             status_code=status_code,
             detail={"message": e.message, "error_code": e.error_code.value},
         )
     except Exception as e:
-        db.rollback()
         logger.error(f"Error deleting DC {dc_number}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,34 @@
+"""
+Documents Router
+Bulk export of invoices and delivery challans
+"""
+
+from fastapi import APIRouter, Depends
+from app.db import get_read_db
+from app.models import BulkExportRequest
+from app.services.document_export import build_bulk_export
+from app.utils.file_stream import spooled_file_response
+import sqlite3
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+@router.post("/export")
+def bulk_export_documents(request: BulkExportRequest, db: sqlite3.Connection = Depends(get_read_db)):
+    """
+    Download many invoices / DCs at once, as a ZIP of workbooks or one
+    workbook with a sheet per document.
+    """
+    spool, filename, media_type = build_bulk_export(
+        db,
+        invoice_numbers=request.invoice_numbers,
+        dc_numbers=request.dc_numbers,
+        start_date=request.start_date,
+        end_date=request.end_date,
+        kinds=tuple(request.kinds),
+        layout=request.layout,
+    )
+    logger.info(f"Bulk export {filename} built")
+    return spooled_file_response(spool, filename, media_type)
@@ -4,7 +4,7 @@ Provides health, readiness, and metrics endpoints for monitoring
 """
 
 from fastapi import APIRouter, Depends, HTTPException
-from app.db import get_db
+from app.db import get_db, get_pool
 import sqlite3
 from datetime import datetime
 from typing import Dict, Any
@@ -129,6 +129,7 @@ def metrics() -> Dict[str, Any]:
     - System metrics (CPU, memory)
     - Application uptime
     - Process info
+    - Database connection pool usage and wait times
     """
     try:
         # Get process info
@@ -157,6 +158,7 @@ def metrics() -> Dict[str, Any]:
                 if os.name != "nt"
                 else psutil.disk_usage("C:\\").percent,
             },
+            "database_pool": get_pool().stats(),
         }
     except Exception as e:
         logger.error(f"Metrics collection failed: {e}", exc_info=True)
@@ -4,11 +4,16 @@ Implements strict accounting rules with audit-safe transaction handling
 """
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
 from app.db import get_db
 from app.models import InvoiceListItem, InvoiceStats
 from app.errors import not_found, internal_error
 from app.core.exceptions import DomainError, map_error_code_to_http_status
+from app.core.write_executor import get_write_executor
 from app.services.invoice import create_invoice as service_create_invoice
+from app.services.document_cache import KIND_INVOICE, get_document_cache
+from app.services.document_export import invoice_document_header
+from app.services.excel_service import XLSX_MEDIA_TYPE
 from typing import List, Optional
 import sqlite3
 import logging
@@ -157,11 +162,12 @@ def download_invoice_excel(
         data = get_invoice_detail(invoice_number, db)
         logger.info(f"Invoice data fetched successfully for {invoice_number}")
 
-        from app.services.excel_service import ExcelService
-
-        # Use exact generator
-        return ExcelService.generate_exact_invoice_excel(
-            data["header"], data["items"], db
+        # Invoices are immutable once issued: serve the cached render
+        path = get_document_cache().get_or_render(
+            KIND_INVOICE, invoice_number, data["header"], data["items"], db
+        )
+        return FileResponse(
+            path, media_type=XLSX_MEDIA_TYPE, filename=f"Invoice_{invoice_number}.xlsx"
         )
 
     except Exception as e:
@@ -184,38 +190,8 @@ def get_invoice_detail(invoice_number: str, db: sqlite3.Connection = Depends(get
         if not invoice_row:
             raise not_found(f"Invoice {invoice_number} not found", "Invoice")
 
-        # CRITICAL FIX: Convert to dict IMMEDIATELY while DB is open
-        header_dict = dict(invoice_row)
-        header_dict["buyers_order_no"] = header_dict.get("po_numbers")
-        header_dict["buyers_order_date"] = header_dict.get("po_date")
-        header_dict["dc_number"] = header_dict.get("linked_dc_numbers")
-
-        # Fetch buyer details from settings if not in invoice
-        if not header_dict.get("buyer_name") or not header_dict.get("buyer_gstin"):
-            settings_rows = db.execute(
-                "SELECT key, value FROM business_settings"
-            ).fetchall()
-            settings = {row["key"]: row["value"] for row in settings_rows}
-
-            # Apply settings as fallback
-            if not header_dict.get("buyer_name"):
-                header_dict["buyer_name"] = settings.get(
-                    "buyer_name", "M/S Bharat Heavy Electrical Ltd."
-                )
-            if not header_dict.get("buyer_address"):
-                header_dict["buyer_address"] = settings.get(
-                    "buyer_address", "BHEL, Bhopal"
-                )
-            if not header_dict.get("buyer_gstin"):
-                header_dict["buyer_gstin"] = settings.get(
-                    "buyer_gstin", "23AAACB4146P1ZN"
-                )
-            if not header_dict.get("buyer_state"):
-                header_dict["buyer_state"] = settings.get("buyer_state", "MP")
-            if not header_dict.get("place_of_supply"):
-                header_dict["place_of_supply"] = settings.get(
-                    "buyer_place_of_supply", "BHOPAL, MP"
-                )
+        # Layout fields and buyer fallbacks from settings, shared with bulk export
+        header_dict = invoice_document_header(invoice_row, db)
 
         # Fetch invoice items
         # CRITICAL FIX: Join on BOTH po_item_no AND po_number to prevent row multiplication
@@ -270,9 +246,7 @@ def get_invoice_detail(invoice_number: str, db: sqlite3.Connection = Depends(get
 
 
 @router.post("/")
-def create_invoice(
-    request: EnhancedInvoiceCreate, db: sqlite3.Connection = Depends(get_db)
-):
+def create_invoice(request: EnhancedInvoiceCreate):
     """
     Create Invoice from Delivery Challan
 
@@ -280,59 +254,40 @@ def create_invoice(
     - 1 DC → 1 Invoice (enforced via INVARIANT DC-2)
     - Invoice items are 1-to-1 mapping from DC items
     - Backend recomputes all monetary values (INVARIANT INV-2)
-    - Transaction uses BEGIN IMMEDIATE for collision safety
+    - Runs on the single writer connection, so number checks cannot race
     """
 
     # Convert Pydantic model to dict for service layer
     invoice_data = request.dict()
 
-    # Validate FY Uniqueness
-    from app.core.validation import validate_unique_number, get_financial_year
-
-    fy = get_financial_year(request.invoice_date)
-    validate_unique_number(
-        db,
-        "gst_invoices",
-        "invoice_number",
-        "financial_year",
-        request.invoice_number,
-        fy,
-    )
+    def _create(db: sqlite3.Connection):
+        # The service checks FY uniqueness inside the write, so check and insert are atomic
+        return service_create_invoice(invoice_data, db)
 
-    # Use service layer with transaction protection
+    # Serialized through the single writer; the job rolls back on any error
     try:
-        # CRITICAL: Use BEGIN IMMEDIATE for SQLite concurrency protection
-        db.execute("BEGIN IMMEDIATE")
+        result = get_write_executor().run(_create)
 
-        try:
-            result = service_create_invoice(invoice_data, db)
-            db.commit()
-
-            # Service returns ServiceResult - extract data
-            if result.success:
-                return result.data
-            else:
-                # Should not happen if service raises DomainError
-                raise HTTPException(
-                    status_code=500, detail=result.message or "Unknown error"
-                )
-
-        except DomainError as e:
-            # Convert domain error to HTTP response
-            db.rollback()
-            status_code = map_error_code_to_http_status(e.error_code)
+        # Service returns ServiceResult - extract data
+        if result.success:
+            return result.data
+        else:
+            # Should not happen if service raises DomainError
             raise HTTPException(
-                status_code=status_code,
-                detail={
-                    "message": e.message,
-                    "error_code": e.error_code.value,
-                    "details": e.details,
-                },
+                status_code=500, detail=result.message or "Unknown error"
             )
-        except Exception:
-            db.rollback()
-            raise
 
+    except DomainError as e:
+        # Convert domain error to HTTP response
+        status_code = map_error_code_to_http_status(e.error_code)
+        raise HTTPException(
+            status_code=status_code,
+            detail={
+                "message": e.message,
+                "error_code": e.error_code.value,
+                "details": e.details,
+            },
+        )
     except sqlite3.IntegrityError as e:
         logger.error(f"Invoice creation failed due to integrity error: {e}", exc_info=e)
         raise internal_error(f"Database integrity error: {str(e)}", e)
@@ -3,15 +3,21 @@ Purchase Order Router
 CRUD operations and HTML upload/scraping
 """
 
-from fastapi import APIRouter, Depends, UploadFile, File
+from fastapi import APIRouter, Depends, UploadFile, File, Query, Response
 from app.db import get_db
 from app.models import POListItem, PODetail, POStats
 from app.errors import bad_request, internal_error
-from typing import List
+from app.core.write_executor import get_write_executor
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+import asyncio
+import json
 import sqlite3
 from bs4 import BeautifulSoup
-from app.services.po_scraper import extract_po_header, extract_items
+from app.services.po_scraper import PARSER_VERSION, extract_po_header, extract_items
 from app.services.ingest_po import POIngestionService
+from app.services.po_batch_ingest import ingest_po_files
+from app.services.ingestion_ledger import KIND_PO, content_hash, find_previous, record_outcome
 from app.services.srv_po_linker import update_srvs_on_po_upload
 
 from app.services.po_service import po_service
@@ -26,15 +32,44 @@ def get_po_stats(db: sqlite3.Connection = Depends(get_db)):
 
 
 @router.get("/", response_model=List[POListItem])
-def list_pos(db: sqlite3.Connection = Depends(get_db)):
-    """List all Purchase Orders with quantity details"""
-    return po_service.list_pos(db)
+def list_pos(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    sort: str = "created_at",
+    order: str = "desc",
+    status: Optional[str] = None,
+    q: Optional[str] = None,
+    db: sqlite3.Connection = Depends(get_db),
+):
+    """
+    List Purchase Orders with quantity details.
+    Without `limit` the full list is returned (legacy behaviour); with `limit`
+    the next page's cursor is returned in the X-Next-Cursor header.
+    """
+    items, next_cursor = po_service.list_pos_page(
+        db, limit=limit, cursor=cursor, sort=sort, order=order, status=status, q=q
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return items
 
 
 @router.get("/{po_number}", response_model=PODetail)
-def get_po_detail(po_number: int, db: sqlite3.Connection = Depends(get_db)):
-    """Get Purchase Order detail with items and deliveries"""
-    return po_service.get_po_detail(db, po_number)
+def get_po_detail(
+    po_number: int,
+    fields: Optional[str] = None,
+    db: sqlite3.Connection = Depends(get_db),
+):
+    """
+    Get Purchase Order detail with items and deliveries.
+    `fields` is a comma-separated projection, e.g. `fields=items` skips the
+    per-item deliveries array.
+    """
+    projection = None
+    if fields is not None:
+        projection = {f.strip() for f in fields.split(",") if f.strip()}
+    return po_service.get_po_detail(db, po_number, fields=projection)
 
 
 @router.get("/{po_number}/dc")
@@ -63,17 +98,68 @@ def check_po_has_dc(po_number: int, db: sqlite3.Connection = Depends(get_db)):
         return {"has_dc": False}
 
 
+def _ingest_and_link(
+    db: sqlite3.Connection, po_header: dict, po_items: list, filename: str, digest: str
+):
+    """Write job: ingest one parsed PO, link any SRVs that were waiting for it, record it in the ledger"""
+    success, warnings = POIngestionService().ingest_po(db, po_header, po_items)
+
+    linked_srvs_count = 0
+    if success:
+        po_number = str(po_header.get("PURCHASE ORDER"))
+        linked_srvs_count = update_srvs_on_po_upload(po_number, db)
+
+    if linked_srvs_count > 0:
+        warnings.append(
+            f"\u2705 Linked {linked_srvs_count} existing SRV(s) to PO {po_header.get('PURCHASE ORDER')}"
+        )
+
+    result = {
+        "success": success,
+        "po_number": po_header.get("PURCHASE ORDER"),
+        "warnings": warnings,
+        "linked_srvs": linked_srvs_count,
+        "unchanged": False,
+    }
+    if success:
+        record_outcome(
+            db, KIND_PO, digest, PARSER_VERSION, filename, [result["po_number"]], result
+        )
+    return result
+
+
+def _previous_upload(digest: str):
+    """Ledger lookup on a pooled reader; run off the event loop"""
+    with get_write_executor().pool.reader() as db:
+        return find_previous(db, KIND_PO, [digest], PARSER_VERSION).get(digest)
+
+
 @router.post("/upload")
 async def upload_po_html(
-    file: UploadFile = File(...), db: sqlite3.Connection = Depends(get_db)
+    file: UploadFile = File(...),
+    force: bool = Query(False, description="Re-ingest even if this exact file was ingested before"),
 ):
-    """Upload and parse PO HTML file"""
+    """
+    Upload and parse PO HTML file.
+    A file already ingested unchanged returns its previous result with
+    "unchanged": true and is not parsed again, unless force=true.
+    """
 
     if not file.filename.endswith(".html"):
         raise bad_request("Only HTML files are supported")
 
-    # Read and parse HTML
     content = await file.read()
+    digest = content_hash(content)
+    if not force:
+        previous = await asyncio.get_running_loop().run_in_executor(None, _previous_upload, digest)
+        if previous:
+            return {
+                **previous["outcome"],
+                "unchanged": True,
+                "ingested_at": previous["ingested_at"],
+            }
+
+    # Parse HTML
     soup = BeautifulSoup(content, "lxml")
 
     # Extract data using existing scraper logic
@@ -83,148 +169,45 @@ async def upload_po_html(
     if not po_header.get("PURCHASE ORDER"):
         raise bad_request("Could not extract PO number from HTML")
 
-    # Ingest into database
-    ingestion_service = POIngestionService()
+    # Ingest into database. PO upload is "create or update": an existing
+    # (number, FY) is overwritten by the ingestion service, not rejected.
     try:
-        # Validate FY Uniqueness
-        from app.core.validation import get_financial_year
-
-        po_num = po_header.get("PURCHASE ORDER")
-        po_date = po_header.get("DATE")
-        if po_num and po_date:
-            fy = get_financial_year(po_date)
-            # Check for existing PO with same number and FY
-            # Note: If updating existing PO is allowed, logic might need adjustment.
-            # But duplicate upload usually implies overwrite or error.
-            # Current ingestion service checks for existence and updates if found.
-            # If we enforce uniqueness, we block overwrite?
-            # User requirement: "Validate... if duplicate found -> HTTP 400" implied for creation.
-            # But PO Upload is typically "Create OR Update".
-            # If so, validation should strictly block only if we DON'T want updates.
-            # If updates are allowed, validate_unique_number might be too strict unless we exclude current ID.
-            # But we don't have current ID yet (it's in the file).
-
-            # Let's check if it exists:
-            existing = db.execute(
-                "SELECT id FROM purchase_orders WHERE po_number = ? AND financial_year = ?",
-                (po_num, fy),
-            ).fetchone()
-            if existing:
-                # If it exists, ingestion service usually updates it.
-                # Does user want to BLOCK duplicate uploads or ALLOW updates?
-                # "Integrate FY Validation... Ensure INSERT fails if (Number + FY) exists."
-                # This implies blocking duplicates is desired for strictness.
-                # BUT POs are often re-uploaded.
-                # I will Log warning instead of blocking for PO Upload to avoid breaking workflow?
-                # Or check logic: if explicitly "Create", block. If "Upload", allow update?
-                # PO Router has only "Upload".
-                pass
-
-        # DB transaction is already active via get_db dependency
-        success, warnings = ingestion_service.ingest_po(db, po_header, po_items)
-
-        # Update any SRVs that were waiting for this PO
-        po_number = str(po_header.get("PURCHASE ORDER"))
-        linked_srvs_count = update_srvs_on_po_upload(po_number, db)
-
-        if linked_srvs_count > 0:
-            warnings.append(
-                f"\u2705 Linked {linked_srvs_count} existing SRV(s) to PO {po_number}"
-            )
-
-        return {
-            "success": success,
-            "po_number": po_header.get("PURCHASE ORDER"),
-            "warnings": warnings,
-            "linked_srvs": linked_srvs_count,
-        }
+        return await get_write_executor().run_async(
+            _ingest_and_link, po_header, po_items, file.filename, digest
+        )
     except Exception as e:
         raise internal_error(f"Failed to ingest PO: {str(e)}", e)
 
 
 @router.post("/upload/batch")
 async def upload_po_batch(
-    files: List[UploadFile] = File(...), db: sqlite3.Connection = Depends(get_db)
+    files: List[UploadFile] = File(...),
+    stream: bool = Query(False, description="Stream per-file progress as NDJSON"),
+    force: bool = Query(False, description="Re-ingest files even if ingested before unchanged"),
 ):
-    """Upload and parse multiple PO HTML files"""
-
-    results = []
-    successful = 0
-    failed = 0
-    total_linked_srvs = 0
-
-    ingestion_service = POIngestionService()
-
-    for file in files:
-        result = {
-            "filename": file.filename,
-            "success": False,
-            "po_number": None,
-            "message": "",
-            "linked_srvs": 0,
-        }
-
-        try:
-            # Validate file type
-            if not file.filename.endswith(".html"):
-                result["message"] = "Only HTML files are supported"
-                failed += 1
-                results.append(result)
-                continue
-
-            # Read and parse HTML
-            content = await file.read()
-            soup = BeautifulSoup(content, "lxml")
-
-            # Extract data
-            po_header = extract_po_header(soup)
-            po_items = extract_items(soup)
-
-            if not po_header.get("PURCHASE ORDER"):
-                result["message"] = "Could not extract PO number from HTML"
-                failed += 1
-                results.append(result)
-                continue
-
-            # Ingest into database
-            success, warnings = ingestion_service.ingest_po(db, po_header, po_items)
-
-            if success:
-                # Update any SRVs that were waiting for this PO
-                po_number = str(po_header.get("PURCHASE ORDER"))
-                linked_srvs_count = update_srvs_on_po_upload(po_number, db)
-                total_linked_srvs += linked_srvs_count
-
-                result["success"] = True
-                result["po_number"] = po_header.get("PURCHASE ORDER")
-                result["linked_srvs"] = linked_srvs_count
-
-                message = (
-                    warnings[0]
-                    if warnings
-                    else f"Successfully ingested PO {po_header.get('PURCHASE ORDER')}"
-                )
-                if linked_srvs_count > 0:
-                    message += f" (Linked {linked_srvs_count} SRV(s))"
-                result["message"] = message
-                successful += 1
-            else:
-                result["message"] = "Failed to ingest PO"
-                failed += 1
-
-        except Exception as e:
-            result["message"] = f"Error: {str(e)}"
-            failed += 1
-
-        results.append(result)
-
-    return {
-        "total": len(files),
-        "successful": successful,
-        "failed": failed,
-        "total_linked_srvs": total_linked_srvs,
-        "results": results,
-    }
+    """
+    Upload and parse multiple PO HTML files.
+    Files are parsed in a process pool and written in a single transaction.
+    With stream=true the response is NDJSON: one "parsed" event per file,
+    then a "complete" event with the same summary as the plain response.
+    Files ingested before unchanged are skipped unless force=true.
+    """
+    payload = [(file.filename, await file.read()) for file in files]
+    events = ingest_po_files(payload, force=force)
+
+    if stream:
+
+        async def ndjson():
+            async for event in events:
+                yield json.dumps(event) + "\n"
+
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    summary = None
+    async for event in events:
+        summary = event
+    summary.pop("event")
+    return summary
 
 
 @router.get("/{po_number}/download")
@@ -0,0 +1,40 @@
+"""
+Reconciliation Router
+Per-item and per-lot ordered / dispatched / received / rejected / invoiced
+quantities for a PO, read from lot_rollup
+"""
+
+from fastapi import APIRouter, Depends
+from app.db import get_db
+from app.errors import not_found
+from app.models import ReconciliationItem, ReconciliationLots
+from app.services.lot_rollup import get_po_items, get_po_lots
+from typing import List
+import sqlite3
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+def _require_po(db: sqlite3.Connection, po_number: int) -> None:
+    if not db.execute("SELECT 1 FROM purchase_orders WHERE po_number = ?", (po_number,)).fetchone():
+        raise not_found(f"PO {po_number} not found", "PO")
+
+
+@router.get("/po/{po_number}", response_model=List[ReconciliationItem])
+def get_po_reconciliation(po_number: int, db: sqlite3.Connection = Depends(get_db)):
+    """Item-level totals for a PO"""
+    items = get_po_items(db, po_number)
+    if not items:
+        _require_po(db, po_number)
+    return items
+
+
+@router.get("/po/{po_number}/lots", response_model=ReconciliationLots)
+def get_po_lot_reconciliation(po_number: int, db: sqlite3.Connection = Depends(get_db)):
+    """Lot-level quantities for a PO, with remaining (undispatched) quantity per lot"""
+    lots = get_po_lots(db, po_number)
+    if not lots:
+        _require_po(db, po_number)
+    return {"po_number": po_number, "lots": lots}
@@ -3,36 +3,46 @@ Reports Router - Unified Deterministic Reporting
 Routes requests to report_service and handles file exports.
 """
 
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse, StreamingResponse
 from app.db import get_db
-from app.services import report_service
+from app.errors import internal_error
+from app.models import ReportJobRequest, ReportJobStatus
+from app.services import report_export, report_service
+from app.services.report_jobs import get_report_jobs
+from app.services.dc_invoice_links import count_uninvoiced_dcs
+from datetime import datetime, timedelta
 import sqlite3
-import pandas as pd
-import io
-from typing import Optional
+import logging
+from typing import List, Optional
 
+logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-def export_df_to_excel(df: pd.DataFrame, filename: str) -> StreamingResponse:
-    """Helper to stream DataFrame as Excel"""
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-        df.to_excel(writer, index=False, sheet_name="Report")
-        # Auto-adjust columns
-        worksheet = writer.sheets["Report"]
-        for i, col in enumerate(df.columns):
-            width = max(df[col].astype(str).map(len).max(), len(col)) + 4
-            worksheet.set_column(i, i, width)
+def resolve_export_format(fmt: Optional[str], export: bool) -> Optional[str]:
+    """File format to export, or None for a JSON response (`export=true` means xlsx)"""
+    if fmt is None:
+        return "xlsx" if export else None
+    fmt = fmt.lower()
+    return None if fmt == "json" else fmt
 
-    output.seek(0)
-    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
-    return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers=headers,
-    )
+
+def export_report(
+    report: str,
+    filename_stem: str,
+    fmt: str,
+    db: sqlite3.Connection,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+) -> StreamingResponse:
+    """
+    Stream a report file straight from its query cursor.
+    Rows go from fetchmany chunks into a spooled temp file, so no DataFrame
+    or in-memory copy of the file is built.
+    """
+    cursor = report_service.open_report_cursor(report, db, start_date, end_date)
+    return report_export.export_cursor(cursor, fmt, filename_stem)
 
 
 @router.get("/reconciliation")
@@ -40,6 +50,7 @@ def get_reconciliation_report(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     export: bool = False,
+    fmt: Optional[str] = Query(None, alias="format", description="json | xlsx | csv | jsonl | parquet"),
     db: sqlite3.Connection = Depends(get_db),
 ):
     """PO vs Delivered vs Received vs Rejected"""
@@ -52,9 +63,12 @@ def get_reconciliation_report(
         start_date = start.strftime("%Y-%m-%d")
         end_date = end.strftime("%Y-%m-%d")
 
+    export_format = resolve_export_format(fmt, export)
+    if export_format:
+        return export_report(
+            "reconciliation", f"PO_Reconciliation_{start_date}_{end_date}", export_format, db, start_date, end_date
+        )
     df = report_service.get_po_reconciliation_by_date(start_date, end_date, db)
-    if export:
-        return export_df_to_excel(df, f"PO_Reconciliation_{start_date}_{end_date}.xlsx")
     return df.fillna(0).to_dict(orient="records")
 
 
@@ -63,6 +77,7 @@ def get_sales_report(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     export: bool = False,
+    fmt: Optional[str] = Query(None, alias="format", description="json | xlsx | csv | jsonl | parquet"),
     db: sqlite3.Connection = Depends(get_db),
 ):
     """Monthly Sales Summary"""
@@ -74,9 +89,12 @@ def get_sales_report(
         start_date = start.strftime("%Y-%m-%d")
         end_date = end.strftime("%Y-%m-%d")
 
+    export_format = resolve_export_format(fmt, export)
+    if export_format:
+        return export_report(
+            "sales", f"Monthly_Sales_{start_date}_{end_date}", export_format, db, start_date, end_date
+        )
     df = report_service.get_monthly_sales_summary(start_date, end_date, db)
-    if export:
-        return export_df_to_excel(df, f"Monthly_Sales_{start_date}_{end_date}.xlsx")
     return df.fillna(0).to_dict(orient="records")
 
 
@@ -85,6 +103,7 @@ def get_dc_register(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     export: bool = False,
+    fmt: Optional[str] = Query(None, alias="format", description="json | xlsx | csv | jsonl | parquet"),
     db: sqlite3.Connection = Depends(get_db),
 ):
     """DC Register"""
@@ -96,9 +115,12 @@ def get_dc_register(
         start_date = start.strftime("%Y-%m-%d")
         end_date = end.strftime("%Y-%m-%d")
 
+    export_format = resolve_export_format(fmt, export)
+    if export_format:
+        return export_report(
+            "dc_register", f"DC_Register_{start_date}_{end_date}", export_format, db, start_date, end_date
+        )
     df = report_service.get_dc_register(start_date, end_date, db)
-    if export:
-        return export_df_to_excel(df, f"DC_Register_{start_date}_{end_date}.xlsx")
     # Drop rows where dc_number is null to prevent phantom rows
     df_clean = df.dropna(subset=['dc_number'])
     return df_clean.fillna("").to_dict(orient="records")
@@ -109,6 +131,7 @@ def get_invoice_register(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     export: bool = False,
+    fmt: Optional[str] = Query(None, alias="format", description="json | xlsx | csv | jsonl | parquet"),
     db: sqlite3.Connection = Depends(get_db),
 ):
     """Invoice Register"""
@@ -120,9 +143,12 @@ def get_invoice_register(
         start_date = start.strftime("%Y-%m-%d")
         end_date = end.strftime("%Y-%m-%d")
 
+    export_format = resolve_export_format(fmt, export)
+    if export_format:
+        return export_report(
+            "invoice_register", f"Invoice_Register_{start_date}_{end_date}", export_format, db, start_date, end_date
+        )
     df = report_service.get_invoice_register(start_date, end_date, db)
-    if export:
-        return export_df_to_excel(df, f"Invoice_Register_{start_date}_{end_date}.xlsx")
     # Drop rows where invoice_number is null to prevent phantom rows
     df_clean = df.dropna(subset=['invoice_number'])
     return df_clean.fillna("").to_dict(orient="records")
@@ -157,20 +183,22 @@ def download_po_summary(
 
 
 @router.get("/pending")
-def get_pending_items(export: bool = False, db: sqlite3.Connection = Depends(get_db)):
+def get_pending_items(
+    export: bool = False,
+    fmt: Optional[str] = Query(None, alias="format", description="json | xlsx | csv | jsonl | parquet"),
+    db: sqlite3.Connection = Depends(get_db),
+):
     """Pending PO Items"""
-    df = report_service.get_pending_po_items(db)
-    if export:
+    export_format = resolve_export_format(fmt, export)
+    if export_format:
         try:
-            from app.services.excel_service import ExcelService
-
-            # Assuming ExcelService has a method for pending items report
-            return ExcelService.generate_pending_items_report(
-                df, "Pending_PO_Items.xlsx", db
-            )
+            return export_report("pending", "Pending_PO_Items", export_format, db)
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Failed to generate Pending PO Items report: {e}")
             raise internal_error(str(e), e)
+    df = report_service.get_pending_po_items(db)
     # Drop rows where po_number or material_description is null
     df_clean = df.dropna(subset=['po_number', 'material_description'])
     return df_clean.fillna("").to_dict(orient="records")
@@ -184,11 +212,7 @@ def get_dashboard_kpis(db: sqlite3.Connection = Depends(get_db)):
         pending_count = db.execute(
             "SELECT COUNT(*) FROM purchase_order_items WHERE pending_qty > 0"
         ).fetchone()[0]
-        uninvoiced_dc = db.execute("""
-            SELECT COUNT(*) FROM delivery_challans dc
-            LEFT JOIN gst_invoice_dc_links l ON dc.dc_number = l.dc_number
-            WHERE l.dc_number IS NULL
-        """).fetchone()[0]
+        uninvoiced_dc = count_uninvoiced_dcs(db)
 
         return {
             "pending_items": pending_count,
@@ -284,3 +308,54 @@ def get_guarantee_certificate(dc_number: str, db: sqlite3.Connection = Depends(g
     from app.services.excel_service import ExcelService
 
     return ExcelService.generate_guarantee_certificate(header, items)
+
+
+# ============================================================================
+# BACKGROUND REPORT JOBS
+# ============================================================================
+
+
+@router.post("/jobs", response_model=ReportJobStatus, status_code=202)
+def submit_report_job(request: ReportJobRequest):
+    """Queue a report export and return its job id for polling"""
+    start_date, end_date = request.start_date, request.end_date
+    if report_service.REPORT_QUERIES[request.report][1] and (not start_date or not end_date):
+        # Same default as the synchronous endpoints: last 30 days
+        end = datetime.now()
+        start = end - timedelta(days=30)
+        start_date = start.strftime("%Y-%m-%d")
+        end_date = end.strftime("%Y-%m-%d")
+    elif not report_service.REPORT_QUERIES[request.report][1]:
+        start_date = end_date = None
+
+    manager = get_report_jobs()
+    job = manager.submit(request.report, request.format, start_date, end_date)
+    return job.to_dict(manager.retention)
+
+
+@router.get("/jobs", response_model=List[ReportJobStatus])
+def list_report_jobs():
+    """Retained report jobs, newest first"""
+    manager = get_report_jobs()
+    return [job.to_dict(manager.retention) for job in manager.jobs()]
+
+
+@router.get("/jobs/{job_id}", response_model=ReportJobStatus)
+def get_report_job(job_id: str):
+    """Status and progress (rows written) of a report job"""
+    manager = get_report_jobs()
+    return manager.get(job_id).to_dict(manager.retention)
+
+
+@router.get("/jobs/{job_id}/download")
+def download_report_job(job_id: str):
+    """Result file of a finished report job"""
+    job = get_report_jobs().result(job_id)
+    return FileResponse(job.path, media_type=job.media_type, filename=job.filename)
+
+
+@router.delete("/jobs/{job_id}", response_model=ReportJobStatus)
+def cancel_report_job(job_id: str):
+    """Cancel a queued or running job, or discard a finished one"""
+    manager = get_report_jobs()
+    return manager.cancel(job_id).to_dict(manager.retention)
@@ -0,0 +1,38 @@
+"""
+Search Router
+Global search across POs, DCs, invoices and SRVs, plus number typeahead
+"""
+
+from fastapi import APIRouter, Depends, Query
+from app.db import get_db
+from app.models import SearchResponse, TypeaheadKind, TypeaheadResponse
+from app.services.search import search_documents
+from app.services.typeahead import KINDS, get_typeahead_index
+from typing import List, Optional
+import sqlite3
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+@router.get("/", response_model=SearchResponse)
+def global_search(
+    q: str = Query("", description="Free text; every term matches as a prefix"),
+    limit: int = Query(20, ge=1, le=100),
+    db: sqlite3.Connection = Depends(get_db),
+):
+    """Ranked document hits (number > party > item text)"""
+    return {"results": search_documents(db, q, limit)}
+
+
+@router.get("/typeahead", response_model=TypeaheadResponse)
+def typeahead(
+    q: str = Query("", description="Case-insensitive prefix"),
+    kind: Optional[List[TypeaheadKind]] = Query(None, description="Kinds to suggest; all when omitted"),
+    limit: int = Query(10, ge=1, le=50),
+    db: sqlite3.Connection = Depends(get_db),
+):
+    """Document numbers and material codes starting with `q`"""
+    suggestions = get_typeahead_index().suggest(db, q, kind or KINDS, limit)
+    return {"suggestions": suggestions}
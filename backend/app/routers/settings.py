@@ -0,0 +1,47 @@
+"""
+Settings Router
+Business settings for the "My Details" screens, served from the in-process
+settings snapshot; writes go through the single writer in one transaction
+"""
+
+from fastapi import APIRouter, Depends
+from app.core.exceptions import ValidationError
+from app.core.write_executor import get_write_executor
+from app.db import get_db
+from app.errors import bad_request
+from app.models import SettingsUpdate
+from app.services.settings_cache import get_business_settings, update_settings
+from typing import Dict, List
+import sqlite3
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+def _apply(updates: List[SettingsUpdate]) -> Dict[str, str]:
+    pairs = [(update.key, update.value) for update in updates]
+    try:
+        settings = get_write_executor().run(lambda db: update_settings(db, pairs))
+    except ValidationError as e:
+        raise bad_request(e.message)
+    logger.info(f"Updated {len(pairs)} setting(s)")
+    return dict(settings)
+
+
+@router.get("/", response_model=Dict[str, str])
+def get_settings(db: sqlite3.Connection = Depends(get_db)):
+    """All business settings as {key: value}"""
+    return dict(get_business_settings(db))
+
+
+@router.post("/", response_model=Dict[str, str])
+def update_setting(update: SettingsUpdate):
+    """Set one business setting; returns all settings"""
+    return _apply([update])
+
+
+@router.post("/batch", response_model=Dict[str, str])
+def update_settings_batch(updates: List[SettingsUpdate]):
+    """Set several business settings atomically; returns all settings"""
+    return _apply(updates)
@@ -3,26 +3,44 @@ SRV API Router
 Handles SRV upload, listing, and detail retrieval.
 """
 
-from fastapi import APIRouter, File, UploadFile, Depends, HTTPException
+from fastapi import APIRouter, File, UploadFile, Depends, HTTPException, Query
+import asyncio
 import sqlite3
 import re
 from typing import List
 
 from app.db import get_db
+from app.core.write_executor import get_write_executor
 from app.models import SRVDetail, SRVListItem, SRVStats, SRVHeader, SRVItem
 
 router = APIRouter()
 
 
+def _previous_messages(file_hash: str):
+    """Ledger lookup on a pooled reader; run off the event loop"""
+    from app.services.srv_ingestion import previous_srv_messages
+
+    with get_write_executor().pool.reader() as db:
+        return previous_srv_messages(db, file_hash)
+
+
 @router.post("/upload/batch")
 async def upload_batch_srvs(
-    files: List[UploadFile] = File(...), db: sqlite3.Connection = Depends(get_db)
+    files: List[UploadFile] = File(...),
+    force: bool = Query(False, description="Re-ingest files even if ingested before unchanged"),
 ):
     """
-    Upload multiple SRV HTML files in batch using process_srv_file.
+    Upload multiple SRV HTML files in batch.
+    Files already ingested unchanged are skipped unless force=true. Each file
+    is parsed off the event loop before its write job is queued, so the
+    single writer is held only for the inserts.
     """
     results = []
-    from app.services.srv_ingestion import process_srv_file
+    from app.services.ingestion_ledger import content_hash
+    from app.services.srv_ingestion import ingest_srv_file, parse_srv_file
+
+    writer = get_write_executor()
+    loop = asyncio.get_running_loop()
 
     for file in files:
         try:
@@ -58,9 +76,23 @@ async def upload_batch_srvs(
                 po_from_filename = None
 
             content = await file.read()
-            success, messages = process_srv_file(
-                content, file.filename, db, po_from_filename
-            )
+            file_hash = content_hash(content)
+            skipped = None
+            if not force:
+                skipped = await loop.run_in_executor(None, _previous_messages, file_hash)
+
+            if skipped:
+                success, messages = True, skipped
+            else:
+                srv_list = await loop.run_in_executor(
+                    None, parse_srv_file, content, file_hash, po_from_filename
+                )
+                # One write job per file so a bad file only rolls back itself
+                success, messages = await writer.run_async(
+                    lambda db, srv_list=srv_list, file_hash=file_hash, filename=file.filename: (
+                        ingest_srv_file(srv_list, file_hash, filename, db)
+                    )
+                )
 
             results.append(
                 {
@@ -277,13 +309,13 @@ def get_srvs_for_po(po_number: str, db: sqlite3.Connection = Depends(get_db)):
 
 
 @router.delete("/{srv_number}")
-def delete_srv_endpoint(srv_number: str, db: sqlite3.Connection = Depends(get_db)):
+def delete_srv_endpoint(srv_number: str):
     """
     Delete an SRV and rollback its quantities.
     """
     from app.services.srv_ingestion import delete_srv
 
-    success, message = delete_srv(srv_number, db)
+    success, message = get_write_executor().run(lambda db: delete_srv(srv_number, db))
     if not success:
         raise HTTPException(status_code=400, detail=message)
 
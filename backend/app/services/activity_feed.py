@@ -0,0 +1,134 @@
+"""
+Activity Feed
+Recent POs, DCs, invoices and SRVs as one stream, newest first. Each source
+is read backwards along its created_at index, capped at the page size, and
+the capped streams are merged, so a page reads about `limit` index entries
+per source however long the history is. Only the rows
+on the page are then looked up for display. Rows without created_at are not
+part of the feed.
+"""
+
+import base64
+import json
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+
+from app.errors import bad_request
+
+# (type, table, display columns)
+FEED_SOURCES = (
+    (
+        "PO",
+        "purchase_orders",
+        "po_number AS number, po_date AS date, supplier_name AS party, "
+        "po_value AS amount, COALESCE(po_status, 'New') AS status",
+    ),
+    (
+        "Invoice",
+        "gst_invoices",
+        "invoice_number AS number, invoice_date AS date, "
+        "COALESCE(NULLIF(customer_gstin, ''), 'Client') AS party, "
+        "total_invoice_value AS amount, 'Paid' AS status",
+    ),
+    (
+        "DC",
+        "delivery_challans",
+        "dc_number AS number, dc_date AS date, consignee_name AS party, "
+        "0 AS amount, 'Dispatched' AS status",
+    ),
+    (
+        "SRV",
+        "srvs",
+        "srv_number AS number, srv_date AS date, 'PO ' || po_number AS party, "
+        "0 AS amount, COALESCE(srv_status, 'Received') AS status",
+    ),
+)
+
+
+def _encode_cursor(created_at: str, kind: str, row_id: int) -> str:
+    """Opaque keyset cursor: last row's (created_at, type, rowid)"""
+    raw = json.dumps([created_at, kind, row_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> Tuple[str, str, int]:
+    try:
+        created_at, kind, row_id = json.loads(base64.urlsafe_b64decode(cursor))
+        return str(created_at), str(kind), int(row_id)
+    except (ValueError, TypeError):
+        raise bad_request("Invalid activity cursor")
+
+
+def _source_select(kind: str, table: str, cursor: Optional[Tuple]) -> Tuple[str, List]:
+    """
+    One arm of the merge. The feed order is (created_at, type, rowid), all
+    descending; type is constant within an arm, so the cursor reduces to a
+    range on the arm's (created_at, rowid) index order.
+    """
+    sql = f"SELECT created_at, '{kind}' AS type, rowid AS row_id FROM {table} WHERE created_at IS NOT NULL"
+    if cursor is None:
+        return sql, []
+    created_at, last_kind, last_row_id = cursor
+    if kind == last_kind:
+        return sql + " AND (created_at, rowid) < (?, ?)", [created_at, last_row_id]
+    if kind < last_kind:
+        return sql + " AND created_at <= ?", [created_at]
+    return sql + " AND created_at < ?", [created_at]
+
+
+def get_activity_page(
+    db: sqlite3.Connection, limit: int = 10, cursor: Optional[str] = None
+) -> Tuple[List[Dict], Optional[str]]:
+    """
+    One page of the feed.
+    Returns: (items, next_cursor) - next_cursor is None on the last page
+    """
+    position = _decode_cursor(cursor) if cursor else None
+
+    # Each arm is capped at the page size and read in its own index order, so
+    # the outer sort only ever sees len(FEED_SOURCES) * (limit + 1) rows
+    arms, params = [], []
+    for kind, table, _ in FEED_SOURCES:
+        sql, arm_params = _source_select(kind, table, position)
+        arms.append(f"SELECT * FROM ({sql} ORDER BY created_at DESC, rowid DESC LIMIT ?)")
+        params.extend(arm_params + [limit + 1])
+    keys = db.execute(
+        " UNION ALL ".join(arms) + " ORDER BY created_at DESC, type DESC, row_id DESC LIMIT ?",
+        params + [limit + 1],
+    ).fetchall()
+
+    next_cursor = None
+    if len(keys) > limit:
+        keys = keys[:limit]
+        last = keys[-1]
+        next_cursor = _encode_cursor(last[0], last[1], last[2])
+
+    # Display columns for just this page, one lookup per source
+    details = {}
+    for kind, table, columns in FEED_SOURCES:
+        row_ids = [key[2] for key in keys if key[1] == kind]
+        if not row_ids:
+            continue
+        rows = db.execute(
+            f"SELECT rowid AS row_id, {columns} FROM {table} "
+            f"WHERE rowid IN ({','.join('?' * len(row_ids))})",
+            row_ids,
+        ).fetchall()
+        for row in rows:
+            details[(kind, row[0])] = row
+
+    items = []
+    for created_at, kind, row_id in keys:
+        row = details[(kind, row_id)]
+        items.append(
+            {
+                "type": kind,
+                "number": row[1],
+                "date": row[2],
+                "party": row[3],
+                "amount": row[4],
+                "status": row[5],
+                "created_at": created_at,
+            }
+        )
+    return items, next_cursor
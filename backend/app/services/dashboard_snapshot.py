@@ -0,0 +1,175 @@
+"""
+Dashboard Snapshot
+dashboard_snapshot holds the dashboard summary figures as running totals,
+kept current by the triggers in migration 024. This module reads the
+summary from it, rebuilds it from source tables and cross-checks it against
+the live aggregates the dashboard used to run on every load.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from app.services.dc_invoice_links import COUNT_UNINVOICED_DCS_SQL, count_uninvoiced_dcs
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_FILE = "024_dashboard_snapshot.sql"
+
+# Full recomputation, one statement per metric. Dated metrics are bucketed
+# exactly as the triggers bucket them.
+REBUILD_SQL = (
+    """
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    SELECT 'po_value', '', COALESCE(SUM(po_value), 0) FROM purchase_orders
+    """,
+    """
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    SELECT 'pending_pos', '', COUNT(*) FROM purchase_orders
+    WHERE po_status = 'New' OR po_status IS NULL
+    """,
+    """
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    SELECT 'pos_created', COALESCE(date(created_at), ''), COUNT(*) FROM purchase_orders
+    GROUP BY 2
+    """,
+    """
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    SELECT 'ordered_qty', '', COALESCE(SUM(ord_qty), 0) FROM purchase_order_items
+    """,
+    """
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    SELECT 'delivered_qty', '', COALESCE(SUM(dispatch_qty), 0) FROM delivery_challan_items
+    """,
+    """
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    SELECT 'received_qty', '', COALESCE(SUM(received_qty), 0) FROM srv_items
+    """,
+    """
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    SELECT 'invoice_sales', COALESCE(strftime('%Y-%m', created_at), ''),
+           COALESCE(SUM(total_invoice_value), 0)
+    FROM gst_invoices
+    GROUP BY 2
+    """,
+    "INSERT INTO dashboard_snapshot (metric, bucket, value) "
+    f"SELECT 'active_challans', '', ({COUNT_UNINVOICED_DCS_SQL})",
+)
+
+
+def snapshot_table_exists(db: sqlite3.Connection) -> bool:
+    row = db.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'dashboard_snapshot'"
+    ).fetchone()
+    return row is not None
+
+
+def install_snapshot(db: sqlite3.Connection, migrations_dir) -> None:
+    """Apply migration 024 (table, indexes, triggers). Idempotent."""
+    with open(migrations_dir / MIGRATION_FILE, "r", encoding="utf-8") as f:
+        db.executescript(f.read())
+
+
+def rebuild_dashboard_snapshot(db: sqlite3.Connection) -> int:
+    """
+    Repopulate dashboard_snapshot from the source tables.
+    Runs inside the caller's transaction; returns the number of rows written.
+    """
+    db.execute("DELETE FROM dashboard_snapshot")
+    rows = sum(db.execute(sql).rowcount for sql in REBUILD_SQL)
+    logger.info(f"Rebuilt dashboard_snapshot: {rows} rows")
+    return rows
+
+
+def _metrics_from_snapshot(db: sqlite3.Connection, now: datetime) -> Dict[str, float]:
+    rows = db.execute(
+        """
+        SELECT metric, value FROM dashboard_snapshot
+        WHERE bucket = ''
+           OR (metric = 'pos_created' AND bucket = ?)
+           OR (metric = 'invoice_sales' AND bucket = ?)
+        """,
+        (now.strftime("%Y-%m-%d"), now.strftime("%Y-%m")),
+    ).fetchall()
+    return {row[0]: row[1] for row in rows}
+
+
+def _metrics_from_source(db: sqlite3.Connection, now: datetime) -> Dict[str, float]:
+    """The full-table aggregates the snapshot replaces"""
+
+    def scalar(sql: str, params: tuple = ()) -> float:
+        row = db.execute(sql, params).fetchone()
+        return row[0] if row and row[0] else 0
+
+    return {
+        "invoice_sales": scalar(
+            "SELECT SUM(total_invoice_value) FROM gst_invoices WHERE strftime('%Y-%m', created_at) = ?",
+            (now.strftime("%Y-%m"),),
+        ),
+        "pending_pos": scalar(
+            "SELECT COUNT(*) FROM purchase_orders WHERE po_status = 'New' OR po_status IS NULL"
+        ),
+        "pos_created": scalar(
+            "SELECT COUNT(*) FROM purchase_orders WHERE date(created_at) = ?",
+            (now.strftime("%Y-%m-%d"),),
+        ),
+        "active_challans": count_uninvoiced_dcs(db),
+        "po_value": scalar("SELECT SUM(po_value) FROM purchase_orders"),
+        "ordered_qty": scalar("SELECT SUM(ord_qty) FROM purchase_order_items"),
+        "delivered_qty": scalar("SELECT SUM(dispatch_qty) FROM delivery_challan_items"),
+        "received_qty": scalar("SELECT SUM(received_qty) FROM srv_items"),
+    }
+
+
+def get_dashboard_summary(db: sqlite3.Connection, now: Optional[datetime] = None) -> Dict:
+    """
+    Dashboard KPIs (DashboardSummary shape). Read from the snapshot when
+    migration 024 is installed, otherwise aggregated from source tables.
+    """
+    now = now or datetime.now()
+    if snapshot_table_exists(db):
+        metrics = _metrics_from_snapshot(db, now)
+    else:
+        metrics = _metrics_from_source(db, now)
+
+    pending_pos = int(metrics.get("pending_pos", 0))
+    return {
+        "total_sales_month": float(metrics.get("invoice_sales", 0)),
+        "sales_growth": 0.0,
+        "pending_pos": pending_pos,
+        "new_pos_today": int(metrics.get("pos_created", 0)),
+        "active_challans": int(metrics.get("active_challans", 0)),
+        "active_challans_growth": "Stable",
+        "total_po_value": float(metrics.get("po_value", 0)),
+        "po_value_growth": 0.0,
+        "active_po_count": pending_pos,  # Mapping pending to active for now, or use separate Active Status count
+        "total_ordered": float(metrics.get("ordered_qty", 0)),
+        "total_delivered": float(metrics.get("delivered_qty", 0)),
+        "total_received": float(metrics.get("received_qty", 0)),
+    }
+
+
+def summary_etag(summary: Dict) -> str:
+    """Weak ETag over the summary body"""
+    body = json.dumps(summary, sort_keys=True, default=str)
+    return 'W/"' + hashlib.sha1(body.encode()).hexdigest()[:20] + '"'
+
+
+def verify_dashboard_snapshot(
+    db: sqlite3.Connection, now: Optional[datetime] = None, tolerance: float = 0.001
+) -> List[Dict]:
+    """
+    Compare the snapshot against the live aggregates for `now`.
+    Returns one {"metric", "snapshot", "source"} entry per mismatch.
+    """
+    now = now or datetime.now()
+    snapshot = _metrics_from_snapshot(db, now)
+    mismatches = []
+    for metric, expected in _metrics_from_source(db, now).items():
+        actual = snapshot.get(metric) or 0
+        if abs((expected or 0) - actual) > tolerance:
+            mismatches.append({"metric": metric, "snapshot": actual, "source": expected})
+    return mismatches
@@ -17,6 +17,9 @@ from app.core.exceptions import (
     BusinessRuleViolation,
 )
 from app.models import DCCreate
+from app.services.dc_invoice_links import invoice_for_dc
+from app.services.lot_rollup import get_lot_quantities
+from app.services.number_availability import ensure_number_available
 
 logger = logging.getLogger(__name__)
 
@@ -81,39 +84,24 @@ def validate_dc_items(
         po_item_id = item["po_item_id"]
         lot_no = item.get("lot_no")
 
-        # Get lot ordered quantity
+        # Lot ordered / dispatched quantities (trigger-maintained lot_rollup)
         if lot_no:
-            lot_row = db.execute(
-                """
-                SELECT dely_qty FROM purchase_order_deliveries
-                WHERE po_item_id = ? AND lot_no = ?
-            """,
-                (po_item_id, lot_no),
-            ).fetchone()
-
-            if not lot_row:
+            lot = get_lot_quantities(db, po_item_id, lot_no)
+            if not lot:
                 raise ResourceNotFoundError("Lot", f"{lot_no} for PO item {po_item_id}")
 
-            lot_ordered = lot_row[0]
+            lot_ordered = lot["ordered_qty"]
+            already_dispatched = lot["dispatched_qty"]
 
-            # Calculate already dispatched (excluding current DC if updating)
+            # If updating, exclude current DC contribution
             if exclude_dc:
-                already_dispatched = db.execute(
+                already_dispatched -= db.execute(
                     """
                     SELECT COALESCE(SUM(dispatch_qty), 0)
                     FROM delivery_challan_items
-                    WHERE po_item_id = ? AND lot_no = ? AND dc_number != ?
+                    WHERE dc_number = ? AND po_item_id = ? AND lot_no = ?
                 """,
-                    (po_item_id, lot_no, exclude_dc),
-                ).fetchone()[0]
-            else:
-                already_dispatched = db.execute(
-                    """
-                    SELECT COALESCE(SUM(dispatch_qty), 0)
-                    FROM delivery_challan_items
-                    WHERE po_item_id = ? AND lot_no = ?
-                """,
-                    (po_item_id, lot_no),
+                    (exclude_dc, po_item_id, lot_no),
                 ).fetchone()[0]
 
             remaining = lot_ordered - already_dispatched
@@ -135,13 +123,12 @@ def validate_dc_items(
                 )
 
         # GLOBAL INVARIANT: Dispatch cannot exceed PO Item Ordered Quantity
-        # Use Reconciliation Ledger View for single source of truth
+        # Materialized reconciliation ledger (trigger-maintained, indexed by po_item_id)
         recon_row = db.execute(
             """
-            SELECT rl.ordered_quantity, rl.total_delivered_qty 
-            FROM reconciliation_ledger rl
-            JOIN purchase_order_items poi ON rl.po_number = poi.po_number AND rl.po_item_no = poi.po_item_no
-            WHERE poi.id = ?
+            SELECT ordered_quantity, total_delivered_qty
+            FROM reconciliation_ledger_mv
+            WHERE po_item_id = ?
         """,
             (po_item_id,),
         ).fetchone()
@@ -188,16 +175,7 @@ def check_dc_has_invoice(dc_number: str, db: sqlite3.Connection) -> Optional[str
     Returns:
         Invoice number if linked, None otherwise
     """
-    invoice_row = db.execute(
-        """
-        SELECT invoice_number FROM gst_invoice_dc_links 
-        WHERE dc_number = ? 
-        LIMIT 1
-    """,
-        (dc_number,),
-    ).fetchone()
-
-    return invoice_row["invoice_number"] if invoice_row else None
+    return invoice_for_dc(db, dc_number)
 
 
 def create_dc(
@@ -207,31 +185,8 @@ def create_dc(
     Create new Delivery Challan
     """
     try:
-        from app.core.utils import get_financial_year
-
-        fy = get_financial_year(dc.dc_date)
-
-        # Financial year boundaries
-        year_start = fy.split("-")[0]
-        full_year_start = f"{year_start}-04-01"
-        year_end = f"20{fy.split('-')[1]}"
-        full_year_end = f"{year_end}-03-31"
-
-        # Check for duplicate DC number within the FY
-        existing = db.execute(
-            """
-            SELECT 1 FROM delivery_challans 
-            WHERE dc_number = ? 
-            AND dc_date >= ? AND dc_date <= ?
-        """,
-            (dc.dc_number, full_year_start, full_year_end),
-        ).fetchone()
-
-        if existing:
-            raise ConflictError(
-                f"DC number {dc.dc_number} already exists in Financial Year {fy}.",
-                details={"dc_number": dc.dc_number, "financial_year": fy},
-            )
+        # DC numbers are primary keys: taken in any FY means taken
+        ensure_number_available(db, "DC", dc.dc_number, dc.dc_date)
 
         final_dc_number = dc.dc_number
 
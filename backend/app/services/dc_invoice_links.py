@@ -0,0 +1,51 @@
+"""
+DC / Invoice Links
+Shared reads of the DC-to-invoice relationship. gst_invoice_dc_links is the
+source of truth (gst_invoices.linked_dc_numbers is a denormalized display
+column with no index). Every check here is an EXISTS / NOT EXISTS probe on
+idx_invoice_dc_links_dc, so counts run as semi/anti-joins instead of
+nested scans of the invoice table.
+"""
+
+import sqlite3
+from typing import Optional
+
+
+def invoiced_sql(dc_column: str = "dc.dc_number") -> str:
+    """SQL predicate: the DC number in `dc_column` is linked to an invoice"""
+    return f"EXISTS (SELECT 1 FROM gst_invoice_dc_links l WHERE l.dc_number = {dc_column})"
+
+
+def uninvoiced_sql(dc_column: str = "dc.dc_number") -> str:
+    """SQL predicate: the DC number in `dc_column` is not linked to any invoice"""
+    return "NOT " + invoiced_sql(dc_column)
+
+
+COUNT_UNINVOICED_DCS_SQL = f"""
+    SELECT COUNT(DISTINCT dc.dc_number) FROM delivery_challans dc
+    WHERE {uninvoiced_sql()}
+"""
+
+COUNT_INVOICED_DCS_SQL = f"""
+    SELECT COUNT(DISTINCT dc.dc_number) FROM delivery_challans dc
+    WHERE {invoiced_sql()}
+"""
+
+
+def count_uninvoiced_dcs(db: sqlite3.Connection) -> int:
+    """DC numbers with no linked invoice ("active" / "uninvoiced" challans)"""
+    return db.execute(COUNT_UNINVOICED_DCS_SQL).fetchone()[0]
+
+
+def count_invoiced_dcs(db: sqlite3.Connection) -> int:
+    """DC numbers linked to at least one invoice"""
+    return db.execute(COUNT_INVOICED_DCS_SQL).fetchone()[0]
+
+
+def invoice_for_dc(db: sqlite3.Connection, dc_number: str) -> Optional[str]:
+    """Invoice number the DC is linked to, or None"""
+    row = db.execute(
+        "SELECT invoice_number FROM gst_invoice_dc_links WHERE dc_number = ? LIMIT 1",
+        (dc_number,),
+    ).fetchone()
+    return row[0] if row else None
@@ -0,0 +1,169 @@
+"""
+Document Cache
+Rendered .xlsx files for invoices and invoiced (frozen) DCs, kept on disk so
+repeat downloads are served as static files instead of rebuilding the
+workbook. Each file lives at <root>/<kind>/<number>-<hash>/<digest>.xlsx.
+The hash of the raw document number keeps numbers that sanitize alike
+(INV/24/1, INV_24_1) apart; the digest hashes the header, items, business
+settings and default buyer, so any change to what the layout reads renders
+a fresh file. Writers that change a document also drop its directory, and
+the least recently used files are evicted once the cache grows past its
+size limit.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.db import DATABASE_DIR
+from app.services.excel_service import ExcelService
+from app.services.settings_cache import get_business_settings, get_default_buyer
+
+logger = logging.getLogger(__name__)
+
+# Bump when the invoice / DC layouts change so old renders are not served
+LAYOUT_VERSION = 1
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+KIND_INVOICE = "invoice"
+KIND_DC = "dc"
+
+RENDERERS = {
+    KIND_INVOICE: ExcelService.render_exact_invoice_excel,
+    KIND_DC: ExcelService.render_exact_dc_excel,
+}
+
+
+def content_digest(kind: str, header: Dict, items: List[Dict], db: sqlite3.Connection) -> str:
+    """Hash of everything the layout reads for this document"""
+    payload = json.dumps(
+        {
+            "layout": LAYOUT_VERSION,
+            "kind": kind,
+            "header": header,
+            "items": items,
+            "settings": dict(get_business_settings(db)),
+            "buyer": dict(get_default_buyer(db)),
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def _directory_name(number: str) -> str:
+    number = str(number)
+    # The readable part is only a hint; the hash of the raw number is what keeps
+    # numbers that sanitize to the same name in separate directories
+    name = "".join(c if c.isalnum() or c in "-_." else "_" for c in number)[:64]
+    return f"{name}-{hashlib.sha256(number.encode('utf-8')).hexdigest()[:16]}"
+
+
+def _unlink(path: Path) -> bool:
+    """Remove a cached file; False while it is still open elsewhere (Windows)"""
+    try:
+        path.unlink(missing_ok=True)
+        return True
+    except OSError as e:
+        logger.warning(f"Document cache could not remove {path}: {e}")
+        return False
+
+
+class DocumentCache:
+    """Size-bounded on-disk cache of rendered documents"""
+
+    def __init__(self, root: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _document_dir(self, kind: str, number: str) -> Path:
+        return self.root / kind / _directory_name(number)
+
+    def get_or_render(
+        self, kind: str, number: str, header: Dict, items: List[Dict], db: sqlite3.Connection
+    ) -> Path:
+        """Path of the rendered file, rendering and storing it on a miss"""
+        directory = self._document_dir(kind, number)
+        path = directory / f"{content_digest(kind, header, items, db)}.xlsx"
+        try:
+            # Mark as recently used
+            os.utime(path)
+            return path
+        except FileNotFoundError:
+            pass
+
+        content = RENDERERS[kind](header, items, db)
+        with self._lock:
+            # Older renders of this document can never be served again
+            if directory.exists():
+                for stale in directory.glob("*.xlsx"):
+                    # A file still being streamed is left for eviction to retry
+                    _unlink(stale)
+            directory.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(content)
+            os.replace(tmp, path)
+            self._evict(keep=path)
+        return path
+
+    def invalidate(self, kind: str, number: str) -> None:
+        """Drop every cached render of one document"""
+        with self._lock:
+            shutil.rmtree(self._document_dir(kind, number), ignore_errors=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            shutil.rmtree(self.root, ignore_errors=True)
+
+    def size_bytes(self) -> int:
+        return sum(entry.stat().st_size for entry in self.root.rglob("*.xlsx"))
+
+    def _evict(self, keep: Path) -> None:
+        """Remove least recently used files until the cache fits its limit"""
+        entries = []
+        total = 0
+        for entry in self.root.rglob("*.xlsx"):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+            total += stat.st_size
+        if total <= self.max_bytes:
+            return
+
+        for _, size, entry in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            if entry == keep or not _unlink(entry):
+                continue
+            total -= size
+            try:
+                entry.parent.rmdir()
+            except OSError:
+                pass
+        logger.info(f"Document cache evicted down to {total} bytes")
+
+
+_document_cache: Optional[DocumentCache] = None
+
+
+def get_document_cache() -> DocumentCache:
+    global _document_cache
+    if _document_cache is None:
+        _document_cache = DocumentCache(DATABASE_DIR / "document_cache")
+    return _document_cache
+
+
+def set_document_cache(cache: DocumentCache) -> None:
+    """Replace the process-wide cache (tests point it at a temp directory)"""
+    global _document_cache
+    _document_cache = cache
@@ -0,0 +1,269 @@
+"""
+Bulk Document Export
+Renders many invoices / DCs in one request. Headers and items for the whole
+batch are loaded with a handful of IN (...) queries instead of one detail
+lookup per document, then each document is rendered with the same layout as
+its single download and written into a ZIP (one .xlsx per document) or one
+workbook (one sheet per document) in a spooled temp file.
+"""
+
+import re
+import sqlite3
+import zipfile
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import xlsxwriter
+
+from app.db import select_in
+from app.errors import bad_request, not_found
+from app.services.excel_service import XLSX_MEDIA_TYPE, ExcelService
+from app.services.settings_cache import get_business_settings
+from app.utils.file_stream import new_spool
+
+MAX_BULK_DOCUMENTS = 1000
+
+KIND_INVOICE = "invoice"
+KIND_DC = "dc"
+
+DC_HEADERS_SQL = """
+    SELECT dc.*, po.po_date
+    FROM delivery_challans dc
+    LEFT JOIN purchase_orders po ON dc.po_number = po.po_number
+    WHERE dc.dc_number IN ({})
+"""
+
+# Same columns as the DC detail endpoint
+DC_ITEMS_SQL = """
+    SELECT
+        dci.dc_number,
+        dci.id,
+        dci.dispatch_qty as dispatched_quantity,
+        dci.hsn_code,
+        dci.hsn_rate,
+        dci.lot_no,
+        dci.po_item_id,
+        poi.po_item_no,
+        poi.material_code,
+        poi.material_description,
+        poi.unit,
+        poi.po_rate,
+        pod.dely_qty as lot_ordered_qty,
+        (
+            SELECT COALESCE(SUM(si.received_qty), 0)
+            FROM srv_items si
+            JOIN srvs s ON si.srv_number = s.srv_number
+            WHERE s.is_active = 1
+              AND si.po_item_no = poi.po_item_no
+              AND si.challan_no = dci.dc_number
+        ) as received_quantity
+    FROM delivery_challan_items dci
+    JOIN purchase_order_items poi ON dci.po_item_id = poi.id
+    LEFT JOIN purchase_order_deliveries pod ON dci.po_item_id = pod.po_item_id AND dci.lot_no = pod.lot_no
+    WHERE dci.dc_number IN ({})
+"""
+
+DISPATCHED_BY_LOT_SQL = """
+    SELECT po_item_id, lot_no, COALESCE(SUM(dispatch_qty), 0)
+    FROM delivery_challan_items
+    WHERE po_item_id IN ({})
+    GROUP BY po_item_id, lot_no
+"""
+
+INVOICE_HEADERS_SQL = "SELECT * FROM gst_invoices WHERE invoice_number IN ({})"
+
+# Same join as the invoice detail endpoint
+INVOICE_ITEMS_SQL = """
+    SELECT
+        inv_item.*,
+        inv_item.total_amount as amount,
+        po_item.material_code,
+        po_item.ord_qty as ordered_quantity,
+        po_item.delivered_qty as dispatched_quantity
+    FROM gst_invoice_items inv_item
+    LEFT JOIN purchase_order_items po_item
+        ON inv_item.po_sl_no = po_item.po_item_no
+    JOIN gst_invoices inv
+        ON inv_item.invoice_number = inv.invoice_number
+    WHERE inv_item.invoice_number IN ({})
+    AND (inv.po_numbers IS NULL OR CAST(inv.po_numbers AS INTEGER) = po_item.po_number)
+    ORDER BY inv_item.invoice_number, inv_item.id
+"""
+
+# header key -> (business_settings key, fallback), applied when the invoice has no buyer
+INVOICE_BUYER_DEFAULTS = (
+    ("buyer_name", "buyer_name", "M/S Bharat Heavy Electrical Ltd."),
+    ("buyer_address", "buyer_address", "BHEL, Bhopal"),
+    ("buyer_gstin", "buyer_gstin", "23AAACB4146P1ZN"),
+    ("buyer_state", "buyer_state", "MP"),
+    ("place_of_supply", "buyer_place_of_supply", "BHOPAL, MP"),
+)
+
+
+def invoice_document_header(invoice_row, db: sqlite3.Connection) -> Dict:
+    """Invoice header as the invoice layout expects it, with buyer fallbacks from settings"""
+    header = dict(invoice_row)
+    header["buyers_order_no"] = header.get("po_numbers")
+    header["buyers_order_date"] = header.get("po_date")
+    header["dc_number"] = header.get("linked_dc_numbers")
+
+    if not header.get("buyer_name") or not header.get("buyer_gstin"):
+        settings = get_business_settings(db)
+        for field, setting_key, fallback in INVOICE_BUYER_DEFAULTS:
+            if not header.get(field):
+                header[field] = settings.get(setting_key, fallback)
+    return header
+
+
+def load_dc_documents(db: sqlite3.Connection, dc_numbers: List[str]) -> Dict[str, Dict]:
+    """{dc_number: {"header", "items"}} for every DC that exists"""
+    headers = {row["dc_number"]: dict(row) for row in select_in(db, DC_HEADERS_SQL, dc_numbers)}
+    item_rows = [dict(row) for row in select_in(db, DC_ITEMS_SQL, list(headers))]
+
+    # Dispatched totals per PO item, by lot and overall, in one grouped pass
+    dispatched_by_lot, dispatched_total = {}, defaultdict(int)
+    po_item_ids = sorted({item["po_item_id"] for item in item_rows})
+    for po_item_id, lot_no, qty in select_in(db, DISPATCHED_BY_LOT_SQL, po_item_ids):
+        dispatched_by_lot[(po_item_id, lot_no)] = qty
+        dispatched_total[po_item_id] += qty
+
+    items = defaultdict(list)
+    for item in item_rows:
+        dc_number = item.pop("dc_number")
+        lot_no = item["lot_no"]
+        if lot_no:
+            total_dispatched = dispatched_by_lot.get((item["po_item_id"], lot_no), 0)
+        else:
+            total_dispatched = dispatched_total.get(item["po_item_id"], 0)
+        item["received_quantity"] = item.get("received_quantity", 0)
+        item["remaining_post_dc"] = max(0, (item["lot_ordered_qty"] or 0) - total_dispatched)
+        items[dc_number].append(item)
+
+    return {number: {"header": header, "items": items[number]} for number, header in headers.items()}
+
+
+def load_invoice_documents(db: sqlite3.Connection, invoice_numbers: List[str]) -> Dict[str, Dict]:
+    """{invoice_number: {"header", "items"}} for every invoice that exists"""
+    headers = {
+        row["invoice_number"]: invoice_document_header(row, db)
+        for row in select_in(db, INVOICE_HEADERS_SQL, invoice_numbers)
+    }
+    items = defaultdict(list)
+    for row in select_in(db, INVOICE_ITEMS_SQL, list(headers)):
+        items[row["invoice_number"]].append(dict(row))
+    return {number: {"header": header, "items": items[number]} for number, header in headers.items()}
+
+
+def numbers_in_range(db: sqlite3.Connection, kind: str, start_date: str, end_date: str) -> List[str]:
+    """Document numbers dated within [start_date, end_date], oldest first"""
+    if kind == KIND_INVOICE:
+        sql = "SELECT invoice_number FROM gst_invoices WHERE invoice_date BETWEEN ? AND ? ORDER BY invoice_date, invoice_number"
+    else:
+        sql = "SELECT dc_number FROM delivery_challans WHERE dc_date BETWEEN ? AND ? ORDER BY dc_date, dc_number"
+    return [row[0] for row in db.execute(sql, (start_date, end_date))]
+
+
+def _safe_name(number: str) -> str:
+    return re.sub(r"[\[\]:*?/\\]", "-", str(number))
+
+
+def _unique_sheet_name(base: str, used: set) -> str:
+    """Excel sheet names: at most 31 characters, unique ignoring case"""
+    name, n = base[:31], 1
+    while name.lower() in used:
+        n += 1
+        suffix = f" ({n})"
+        name = base[: 31 - len(suffix)] + suffix
+    used.add(name.lower())
+    return name
+
+
+def _unique_entry_name(base: str, used: set) -> str:
+    """ZIP entry names: numbers that sanitize alike (INV/24/1, INV-24-1) get a (2) suffix"""
+    name, n = f"{base}.xlsx", 1
+    while name.lower() in used:
+        n += 1
+        name = f"{base} ({n}).xlsx"
+    used.add(name.lower())
+    return name
+
+
+def build_bulk_export(
+    db: sqlite3.Connection,
+    invoice_numbers: Optional[List[str]] = None,
+    dc_numbers: Optional[List[str]] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    kinds: Tuple[str, ...] = (KIND_INVOICE, KIND_DC),
+    layout: str = "zip",
+):
+    """
+    Render the selected documents into a spooled file.
+    Documents are picked by explicit numbers, or else every document of
+    `kinds` dated within the range. Returns (spool, filename, media_type).
+    """
+    if layout not in ("zip", "workbook"):
+        raise bad_request("layout must be 'zip' or 'workbook'")
+
+    if invoice_numbers is not None or dc_numbers is not None:
+        selected = {
+            KIND_INVOICE: list(dict.fromkeys(invoice_numbers or [])),
+            KIND_DC: list(dict.fromkeys(dc_numbers or [])),
+        }
+    elif start_date and end_date:
+        selected = {
+            kind: numbers_in_range(db, kind, start_date, end_date) if kind in kinds else []
+            for kind in (KIND_INVOICE, KIND_DC)
+        }
+    else:
+        raise bad_request("Provide document numbers or a start_date and end_date")
+
+    total = len(selected[KIND_INVOICE]) + len(selected[KIND_DC])
+    if total == 0:
+        raise not_found("No documents selected for export")
+    if total > MAX_BULK_DOCUMENTS:
+        raise bad_request(f"Bulk export is limited to {MAX_BULK_DOCUMENTS} documents; got {total}")
+
+    invoices = load_invoice_documents(db, selected[KIND_INVOICE])
+    dcs = load_dc_documents(db, selected[KIND_DC])
+    missing = [n for n in selected[KIND_INVOICE] if n not in invoices] + [
+        n for n in selected[KIND_DC] if n not in dcs
+    ]
+    if missing:
+        raise not_found(f"Documents not found: {', '.join(map(str, missing[:20]))}")
+
+    # (kind, number, document) in request order, invoices first
+    documents = [(KIND_INVOICE, n, invoices[n]) for n in selected[KIND_INVOICE]] + [
+        (KIND_DC, n, dcs[n]) for n in selected[KIND_DC]
+    ]
+
+    spool = new_spool()
+    try:
+        if layout == "zip":
+            with zipfile.ZipFile(spool, "w", zipfile.ZIP_STORED) as archive:
+                used = set()
+                for kind, number, doc in documents:
+                    if kind == KIND_INVOICE:
+                        content = ExcelService.render_exact_invoice_excel(doc["header"], doc["items"], db)
+                        entry = _unique_entry_name(f"invoices/Invoice_{_safe_name(number)}", used)
+                    else:
+                        content = ExcelService.render_exact_dc_excel(doc["header"], doc["items"], db)
+                        entry = _unique_entry_name(f"dcs/DC_{_safe_name(number)}", used)
+                    archive.writestr(entry, content)
+            return spool, "Documents.zip", "application/zip"
+
+        # One workbook: formats and settings are shared by every sheet
+        workbook = xlsxwriter.Workbook(spool)
+        used = set()
+        for kind, number, doc in documents:
+            if kind == KIND_INVOICE:
+                sheet = _unique_sheet_name(f"INV {_safe_name(number)}", used)
+                ExcelService.write_invoice_sheet(workbook, doc["header"], doc["items"], db, sheet)
+            else:
+                sheet = _unique_sheet_name(f"DC {_safe_name(number)}", used)
+                ExcelService.write_dc_sheet(workbook, doc["header"], doc["items"], db, sheet)
+        workbook.close()
+        return spool, "Documents.xlsx", XLSX_MEDIA_TYPE
+    except Exception:
+        spool.close()
+        raise
@@ -4,66 +4,138 @@ Uses XlsxWriter to generate formatted Excel reports with strict layout control.
 """
 
 import io
+import itertools
 import pandas as pd
-from typing import List, Dict
+from typing import List, Dict, Iterable, Optional, Sequence
 from fastapi.responses import StreamingResponse
 import xlsxwriter
 import sqlite3
 import logging
 
+from app.services.settings_cache import get_business_settings, get_default_buyer
+from app.utils.file_stream import new_spool, spooled_file_response
+
 logger = logging.getLogger(__name__)
 
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+WIDTH_SAMPLE_ROWS = 200
+MAX_COLUMN_WIDTH = 80
+
+# Named styles shared by the document layouts. font_name is filled in per
+# document (Calibri or Arial layouts).
+DOCUMENT_STYLES: Dict[str, Dict] = {
+    "header_title": {"bold": True, "font_size": 18, "align": "center"},
+    "header_subtitle": {"bold": True, "font_size": 10, "align": "center"},
+    "header_tel": {"font_size": 10, "align": "center"},
+    "header_name": {"bold": True, "font_size": 14, "align": "left"},
+    "header_detail": {"font_size": 11, "align": "left"},
+    "header_bold_detail": {"bold": True, "font_size": 11, "align": "left"},
+    "document_title": {"bold": True, "font_size": 14, "align": "center"},
+    "buyer_line": {"bold": True, "font_size": 11, "border": 1, "valign": "vcenter"},
+    "table_header": {
+        "border": 1,
+        "bold": True,
+        "align": "center",
+        "valign": "vcenter",
+        "text_wrap": True,
+    },
+    "cell": {"border": 1, "valign": "vcenter"},
+    "cell_center": {"border": 1, "align": "center", "valign": "vcenter"},
+}
+
+
+class WorkbookFormats:
+    """
+    Format objects for one workbook. Each distinct set of properties is added
+    to the workbook once, however many times the layout code asks for it.
+    """
+
+    def __init__(self, workbook):
+        self.workbook = workbook
+        self._formats = {}
+
+    def add(self, properties: Dict):
+        key = tuple(sorted(properties.items()))
+        fmt = self._formats.get(key)
+        if fmt is None:
+            fmt = self._formats[key] = self.workbook.add_format(properties)
+        return fmt
+
+    def style(self, name: str, font_name: str = "Calibri"):
+        return self.add({**DOCUMENT_STYLES[name], "font_name": font_name})
+
+
+def workbook_formats(workbook) -> WorkbookFormats:
+    """The WorkbookFormats of `workbook`, shared by every helper writing to it"""
+    formats = getattr(workbook, "_document_formats", None)
+    if formats is None:
+        formats = workbook._document_formats = WorkbookFormats(workbook)
+    return formats
+
 
 class ExcelService:
     @staticmethod
-    def generate_response(data: List[Dict], report_type: str) -> StreamingResponse:
+    def write_rows(
+        target,
+        columns: List[str],
+        rows: Iterable[Sequence],
+        sheet_name: str = "Report",
+        header_format: Optional[Dict] = None,
+        width_padding: int = 2,
+    ) -> None:
         """
-        Convert list of dicts to Excel download response (Legacy fallback)
+        Write a header and rows to `target` in xlsxwriter constant_memory mode.
+        Each row is flushed to disk as soon as the next one starts, so `rows`
+        can be a cursor or generator of any length. Column widths are estimated
+        from the first WIDTH_SAMPLE_ROWS rows, since constant_memory needs them
+        before any data is written.
         """
-        output = io.BytesIO()
-
-        # Convert to DataFrame
-        if not data:
-            df = pd.DataFrame()  # Empty
-        else:
-            df = pd.DataFrame(data)
-
-        # Write to Excel with formatting
-        with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-            df.to_excel(writer, sheet_name="Report", index=False)
-
-            workbook = writer.book
-            worksheet = writer.sheets["Report"]
-
-            # Formats
-            header_fmt = workbook.add_format(
-                {
-                    "bold": True,
-                    "bg_color": "#4F81BD",
-                    "font_color": "white",
-                    "border": 1,
-                }
-            )
+        rows = iter(rows)
+        sample = list(itertools.islice(rows, WIDTH_SAMPLE_ROWS))
 
-            # Apply header format
-            for col_num, value in enumerate(df.columns.values):
-                worksheet.write(0, col_num, value, header_fmt)
+        workbook = xlsxwriter.Workbook(target, {"constant_memory": True})
+        try:
+            worksheet = workbook.add_worksheet(sheet_name)
+            header_fmt = workbook.add_format(header_format or {"bold": True, "border": 1})
 
-            # Auto-adjust column width
-            for i, col in enumerate(df.columns):
-                column_len = max(df[col].astype(str).map(len).max(), len(col)) + 2
-                worksheet.set_column(i, i, column_len)
+            for i, col in enumerate(columns):
+                sample_len = max((len(str(row[i])) for row in sample if row[i] is not None), default=0)
+                width = min(max(sample_len, len(col)) + width_padding, MAX_COLUMN_WIDTH)
+                worksheet.set_column(i, i, width)
 
-        output.seek(0)
+            worksheet.write_row(0, 0, columns, header_fmt)
+            for row_num, row in enumerate(itertools.chain(sample, rows), start=1):
+                worksheet.write_row(row_num, 0, row)
+        finally:
+            workbook.close()
 
-        filename = f"{report_type}.xlsx"
-        headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    @staticmethod
+    def stream_rows(
+        columns: List[str],
+        rows: Iterable[Sequence],
+        filename: str,
+        sheet_name: str = "Report",
+        header_format: Optional[Dict] = None,
+        width_padding: int = 2,
+    ) -> StreamingResponse:
+        """Build a workbook from rows in a spooled temp file and stream it"""
+        spool = new_spool()
+        try:
+            ExcelService.write_rows(spool, columns, rows, sheet_name, header_format, width_padding)
+        except Exception:
+            spool.close()
+            raise
+        return spooled_file_response(spool, filename, XLSX_MEDIA_TYPE)
 
-        return StreamingResponse(
-            output,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers=headers,
-        )
+    @staticmethod
+    def generate_response(data: List[Dict], report_type: str) -> StreamingResponse:
+        """
+        Convert list of dicts to Excel download response (Legacy fallback)
+        """
+        columns = list(dict.fromkeys(key for record in data for key in record))
+        rows = ([record.get(col) for col in columns] for record in data)
+        header_fmt = {"bold": True, "bg_color": "#4F81BD", "font_color": "white", "border": 1}
+        return ExcelService.stream_rows(columns, rows, f"{report_type}.xlsx", header_format=header_fmt)
 
     @staticmethod
     def _write_standard_header(
@@ -79,10 +151,9 @@ class ExcelService:
         Consistently writes the business header across all reports with layout options.
         layout: 'invoice' (Standard for Sales Invoice) or 'challan' (Standard for DC, Summary, GC)
         """
-        # Fetch settings from DB
+        # Fetch settings (cached until business_settings changes)
         try:
-            rows = db.execute("SELECT key, value FROM business_settings").fetchall()
-            settings = {row["key"]: row["value"] for row in rows}
+            settings = get_business_settings(db)
         except Exception as e:
             logger.error(f"Failed to fetch business settings, using defaults: {e}")
             settings = {}
@@ -103,24 +174,13 @@ class ExcelService:
         s_state_code = settings.get("supplier_state_code", "23")
 
         # Formats
-        title_fmt = workbook.add_format(
-            {"bold": True, "font_size": 18, "align": "center", "font_name": font_name}
-        )
-        subtitle_fmt = workbook.add_format(
-            {"bold": True, "font_size": 10, "align": "center", "font_name": font_name}
-        )
-        tel_fmt = workbook.add_format(
-            {"font_size": 10, "align": "center", "font_name": font_name}
-        )
-        name_fmt = workbook.add_format(
-            {"bold": True, "font_size": 14, "align": "left", "font_name": font_name}
-        )
-        detail_fmt = workbook.add_format(
-            {"font_size": 11, "align": "left", "font_name": font_name}
-        )
-        bold_detail = workbook.add_format(
-            {"bold": True, "font_size": 11, "align": "left", "font_name": font_name}
-        )
+        formats = workbook_formats(workbook)
+        title_fmt = formats.style("header_title", font_name)
+        subtitle_fmt = formats.style("header_subtitle", font_name)
+        tel_fmt = formats.style("header_tel", font_name)
+        name_fmt = formats.style("header_name", font_name)
+        detail_fmt = formats.style("header_detail", font_name)
+        bold_detail = formats.style("header_bold_detail", font_name)
 
         row = 0
 
@@ -133,14 +193,7 @@ class ExcelService:
                     row,
                     columns - 1,
                     title,
-                    workbook.add_format(
-                        {
-                            "bold": True,
-                            "font_size": 14,
-                            "align": "center",
-                            "font_name": font_name,
-                        }
-                    ),
+                    formats.style("document_title", font_name),
                 )
                 row += 2  # Add spacing
 
@@ -186,14 +239,7 @@ class ExcelService:
                     row,
                     columns - 1,
                     title,
-                    workbook.add_format(
-                        {
-                            "bold": True,
-                            "font_size": 14,
-                            "align": "center",
-                            "font_name": font_name,
-                        }
-                    ),
+                    formats.style("document_title", font_name),
                 )
                 row += 1
 
@@ -215,23 +261,11 @@ class ExcelService:
         Consistently writes the Buyer/Consignee block.
         Fetches from DB settings as default, overriden by specific record header if available.
         """
-        # Fetch Supplier Settings
-        try:
-            rows = db.execute("SELECT key, value FROM business_settings").fetchall()
-            settings = {row["key"]: row["value"] for row in rows}
-        except Exception as e:
-            logger.error(f"Failed to fetch business settings for buyer block: {e}")
-            settings = {}
-
-        # Fetch Default Buyer if not provided in header
+        # Fetch Default Buyer if not provided in header (cached until buyers change)
         default_buyer = {}
         if not header.get("consignee_name"):
             try:
-                buyer_row = db.execute(
-                    "SELECT name, billing_address, gstin, place_of_supply FROM buyers WHERE is_default = 1 AND is_active = 1 LIMIT 1"
-                ).fetchone()
-                if buyer_row:
-                    default_buyer = dict(buyer_row)
+                default_buyer = get_default_buyer(db)
             except Exception as e:
                 logger.error(f"Failed to fetch default buyer: {e}")
 
@@ -251,15 +285,7 @@ class ExcelService:
              pass
 
         # Formats - ALL buyer details should be BOLD with borders
-        bold_border_fmt = workbook.add_format(
-            {
-                "bold": True,
-                "font_size": 11,
-                "font_name": font_name,
-                "border": 1,
-                "valign": "vcenter",
-            }
-        )
+        bold_border_fmt = workbook_formats(workbook).style("buyer_line", font_name)
 
         if label:
             worksheet.merge_range(row, col, row, col + width, label, bold_border_fmt)
@@ -296,20 +322,18 @@ class ExcelService:
         return row + 1
 
     @staticmethod
-    def generate_exact_invoice_excel(
-        header: Dict, items: List[Dict], db: sqlite3.Connection
-    ) -> StreamingResponse:
+    def write_invoice_sheet(
+        workbook, header: Dict, items: List[Dict], db: sqlite3.Connection, sheet_name: str = "Invoice"
+    ) -> None:
         """
-        Generate strict Excel format matching 'GST_INV_31.xls' audit structure.
-        Uses a 19-column grid (A-S).
+        Write one invoice in the 'GST_INV_31.xls' layout as a new sheet of `workbook`.
         """
-        output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output)
-        worksheet = workbook.add_worksheet("Invoice")
+        worksheet = workbook.add_worksheet(sheet_name)
+        formats = workbook_formats(workbook)
 
         # Styles
         font_name = "Arial"
-        title_fmt = workbook.add_format(
+        title_fmt = formats.add(
             {
                 "bold": True,
                 "font_size": 13,
@@ -318,7 +342,7 @@ class ExcelService:
                 "font_name": font_name,
             }
         )
-        copy_fmt = workbook.add_format(
+        copy_fmt = formats.add(
             {
                 "font_size": 24,
                 "align": "right",
@@ -326,7 +350,7 @@ class ExcelService:
                 "font_name": font_name,
             }
         )
-        header_bold = workbook.add_format(
+        header_bold = formats.add(
             {
                 "bold": True,
                 "font_size": 10,
@@ -335,7 +359,7 @@ class ExcelService:
                 "valign": "top",
             }
         )
-        header_normal = workbook.add_format(
+        header_normal = formats.add(
             {
                 "font_size": 10,
                 "font_name": font_name,
@@ -345,7 +369,7 @@ class ExcelService:
             }
         )
 
-        table_hdr = workbook.add_format(
+        table_hdr = formats.add(
             {
                 "bold": True,
                 "font_size": 10,
@@ -356,7 +380,7 @@ class ExcelService:
                 "text_wrap": True,
             }
         )
-        cell_center = workbook.add_format(
+        cell_center = formats.add(
             {
                 "font_size": 10,
                 "font_name": font_name,
@@ -365,7 +389,7 @@ class ExcelService:
                 "valign": "vcenter",
             }
         )
-        cell_left = workbook.add_format(
+        cell_left = formats.add(
             {
                 "font_size": 10,
                 "font_name": font_name,
@@ -375,7 +399,7 @@ class ExcelService:
                 "text_wrap": True,
             }
         )
-        cell_right = workbook.add_format(
+        cell_right = formats.add(
             {
                 "font_size": 10,
                 "font_name": font_name,
@@ -385,7 +409,7 @@ class ExcelService:
                 "num_format": "#,##0.00",
             }
         )
-        decl_fmt = workbook.add_format(
+        decl_fmt = formats.add(
             {
                 "font_size": 9,
                 "font_name": font_name,
@@ -409,10 +433,9 @@ class ExcelService:
         worksheet.set_column("R:S", 10)  # SGST
         worksheet.set_column("T:T", 15)  # Total
 
-        # Fetch settings from DB
+        # Fetch settings (cached until business_settings changes)
         try:
-            rows = db.execute("SELECT key, value FROM business_settings").fetchall()
-            settings = {row["key"]: row["value"] for row in rows}
+            settings = get_business_settings(db)
         except Exception as e:
             logger.error(f"Failed to fetch business settings, using defaults: {e}")
             settings = {}
@@ -468,13 +491,9 @@ class ExcelService:
         # Default Buyer logic
         default_buyer = {}
         if not header.get("buyer_name"):
-             try:
-                buyer_row = db.execute(
-                    "SELECT name, billing_address, gstin, place_of_supply FROM buyers WHERE is_default = 1 AND is_active = 1 LIMIT 1"
-                ).fetchone()
-                if buyer_row:
-                    default_buyer = dict(buyer_row)
-             except Exception as e:
+            try:
+                default_buyer = get_default_buyer(db)
+            except Exception as e:
                 logger.error(f"Failed to fetch default buyer for invoice: {e}")
 
         # Buyer - Multi-line with proper label
@@ -633,7 +652,7 @@ class ExcelService:
             row,
             12,
             "For Senstographic",
-            workbook.add_format(
+            formats.add(
                 {
                     "bold": True,
                     "align": "right",
@@ -658,14 +677,14 @@ class ExcelService:
             row,
             12,
             "Authorised Signatory",
-            workbook.add_format(
+            formats.add(
                 {"align": "right", "font_size": 11, "font_name": "Calibri"}
             ),
         )
 
         # Footer Rows
         row += 2
-        footer_fmt = workbook.add_format(
+        footer_fmt = formats.add(
             {"align": "center", "font_size": 10, "font_name": "Calibri"}
         )
         worksheet.merge_range(
@@ -676,81 +695,54 @@ class ExcelService:
             row, 0, row, 12, "This is a Computer Generated Invoice", footer_fmt
         )
 
+    @staticmethod
+    def render_exact_invoice_excel(header: Dict, items: List[Dict], db: sqlite3.Connection) -> bytes:
+        """Invoice as a standalone .xlsx file"""
+        output = io.BytesIO()
+        workbook = xlsxwriter.Workbook(output)
+        ExcelService.write_invoice_sheet(workbook, header, items, db)
         workbook.close()
-        output.seek(0)
+        return output.getvalue()
 
+    @staticmethod
+    def generate_exact_invoice_excel(
+        header: Dict, items: List[Dict], db: sqlite3.Connection
+    ) -> StreamingResponse:
+        """
+        Generate strict Excel format matching 'GST_INV_31.xls' audit structure.
+        Uses a 19-column grid (A-S).
+        """
+        content = ExcelService.render_exact_invoice_excel(header, items, db)
         filename = f"Invoice_{header.get('invoice_number', 'Draft')}.xlsx"
-        headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
         return StreamingResponse(
-            output,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers=headers,
+            io.BytesIO(content),
+            media_type=XLSX_MEDIA_TYPE,
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
         )
 
     @staticmethod
-    def generate_exact_dc_excel(
-        header: Dict, items: List[Dict], db: sqlite3.Connection
-    ) -> StreamingResponse:
+    def write_dc_sheet(
+        workbook, header: Dict, items: List[Dict], db: sqlite3.Connection, sheet_name: str = "Delivery Challan"
+    ) -> None:
         """
-        Generate strict Excel format matching 'DC12.xls' and User Screenshot
+        Write one DC in the 'DC12.xls' layout as a new sheet of `workbook`.
         """
-        output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output)
-        worksheet = workbook.add_worksheet("Delivery Challan")
+        worksheet = workbook.add_worksheet(sheet_name)
+        formats = workbook_formats(workbook)
 
         # Styles
-        workbook.add_format(
-            {"bold": True, "font_size": 20, "align": "center", "font_name": "Calibri"}
-        )
-        border_box = workbook.add_format(
-            {
-                "border": 1,
-                "text_wrap": True,
-                "valign": "top",
-                "font_name": "Calibri",
-                "font_size": 11,
-            }
-        )
-        workbook.add_format(
+        border_box = formats.add(
             {
                 "border": 1,
-                "bold": True,
                 "text_wrap": True,
                 "valign": "top",
                 "font_name": "Calibri",
                 "font_size": 11,
             }
         )
-        header_table = workbook.add_format(
-            {
-                "border": 1,
-                "bold": True,
-                "align": "center",
-                "valign": "vcenter",
-                "font_name": "Calibri",
-                "text_wrap": True,
-            }
-        )
-        cell_fmt = workbook.add_format(
-            {"border": 1, "valign": "vcenter", "font_name": "Calibri"}
-        )
-        cell_center = workbook.add_format(
-            {
-                "border": 1,
-                "align": "center",
-                "valign": "vcenter",
-                "font_name": "Calibri",
-            }
-        )
-        workbook.add_format(
-            {
-                "border": 1,
-                "font_name": "Calibri",
-                "font_size": 11,
-                "text_wrap": True,
-                "valign": "vcenter",
-            }
-        )  # Added for new layout
+        header_table = formats.style("table_header")
+        cell_fmt = formats.style("cell")
+        cell_center = formats.style("cell_center")
 
         worksheet.set_column("A:A", 10)  # P.O.Sl. No.
         worksheet.set_column("B:B", 60)  # Description
@@ -852,13 +844,27 @@ class ExcelService:
             cell_fmt,
         )
 
+    @staticmethod
+    def render_exact_dc_excel(header: Dict, items: List[Dict], db: sqlite3.Connection) -> bytes:
+        """Delivery Challan as a standalone .xlsx file"""
+        output = io.BytesIO()
+        workbook = xlsxwriter.Workbook(output)
+        ExcelService.write_dc_sheet(workbook, header, items, db)
         workbook.close()
-        output.seek(0)
+        return output.getvalue()
 
+    @staticmethod
+    def generate_exact_dc_excel(
+        header: Dict, items: List[Dict], db: sqlite3.Connection
+    ) -> StreamingResponse:
+        """
+        Generate strict Excel format matching 'DC12.xls' and User Screenshot
+        """
+        content = ExcelService.render_exact_dc_excel(header, items, db)
         filename = f"DC_{header.get('dc_number')}.xlsx"
         return StreamingResponse(
-            output,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            io.BytesIO(content),
+            media_type=XLSX_MEDIA_TYPE,
             headers={"Content-Disposition": f'attachment; filename="{filename}"'},
         )
 
@@ -872,33 +878,12 @@ class ExcelService:
         output = io.BytesIO()
         workbook = xlsxwriter.Workbook(output)
         worksheet = workbook.add_worksheet("Summary")
+        formats = workbook_formats(workbook)
 
         # Styles
-        workbook.add_format(
-            {"bold": True, "font_size": 18, "align": "center", "font_name": "Calibri"}
-        )
-        workbook.add_format(
-            {"bold": True, "font_size": 11, "align": "center", "font_name": "Calibri"}
-        )
-        header_table = workbook.add_format(
-            {
-                "bold": True,
-                "border": 1,
-                "align": "center",
-                "valign": "vcenter",
-                "text_wrap": True,
-                "font_name": "Calibri",
-            }
-        )
-        cell_fmt = workbook.add_format(
-            {
-                "border": 1,
-                "align": "center",
-                "valign": "vcenter",
-                "font_name": "Calibri",
-            }
-        )
-        bold_left = workbook.add_format({"bold": True, "font_name": "Calibri"})
+        header_table = formats.style("table_header")
+        cell_fmt = formats.style("cell_center")
+        bold_left = formats.add({"bold": True, "font_name": "Calibri"})
 
         # Column Widths
         worksheet.set_column("A:A", 5)  # S.No.
@@ -969,54 +954,18 @@ class ExcelService:
         output = io.BytesIO()
         workbook = xlsxwriter.Workbook(output)
         worksheet = workbook.add_worksheet("Guarantee Certificate")
+        formats = workbook_formats(workbook)
 
         # Styles
         base_font = "Arial"
-        workbook.add_format({"font_name": base_font, "font_size": 12})
-        workbook.add_format(
-            {"bold": True, "font_size": 16, "align": "center", "font_name": base_font}
-        )
-        workbook.add_format(
-            {"bold": True, "font_size": 10, "align": "center", "font_name": base_font}
-        )
-        workbook.add_format(
-            {"bold": True, "font_size": 14, "align": "center", "font_name": base_font}
-        )
-        border_all = workbook.add_format(
+        border_all = formats.add(
             {"border": 1, "font_name": base_font, "font_size": 11}
         )
-        workbook.add_format(
-            {
-                "border": 1,
-                "text_wrap": True,
-                "valign": "top",
-                "font_name": base_font,
-                "font_size": 11,
-            }
-        )
 
-        header_table = workbook.add_format(
-            {
-                "border": 1,
-                "bold": True,
-                "align": "center",
-                "valign": "vcenter",
-                "font_name": base_font,
-                "text_wrap": True,
-            }
-        )
-        cell_fmt = workbook.add_format(
-            {"border": 1, "valign": "vcenter", "font_name": base_font}
-        )
-        cell_center = workbook.add_format(
-            {
-                "border": 1,
-                "align": "center",
-                "valign": "vcenter",
-                "font_name": base_font,
-            }
-        )
-        footer_bold = workbook.add_format(
+        header_table = formats.style("table_header", base_font)
+        cell_fmt = formats.style("cell", base_font)
+        cell_center = formats.style("cell_center", base_font)
+        footer_bold = formats.add(
             {"bold": True, "font_name": base_font, "font_size": 12, "align": "left"}
         )
 
@@ -1113,7 +1062,7 @@ class ExcelService:
             item_row + 2,
             9,
             footer_text,
-            workbook.add_format({"text_wrap": True, "font_name": base_font}),
+            formats.add({"text_wrap": True, "font_name": base_font}),
         )
         item_row += 4
 
@@ -8,6 +8,147 @@ import sqlite3
 from typing import Dict, List, Tuple
 from app.utils.date_utils import normalize_date
 from app.utils.number_utils import to_int, to_float
+from app.db import select_in
+
+
+UPSERT_PO_HEADER_SQL = """
+INSERT INTO purchase_orders 
+(po_number, po_date, supplier_name, supplier_gstin, supplier_code, supplier_phone, supplier_fax, supplier_email, department_no,
+ enquiry_no, enquiry_date, quotation_ref, quotation_date, rc_no, order_type, po_status,
+ tin_no, ecc_no, mpct_no, po_value, fob_value, ex_rate, currency, net_po_value,
+ amend_no, amend_1_date, amend_2_date,
+ inspection_by, inspection_at, issuer_name, issuer_designation, issuer_phone, remarks)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(po_number) DO UPDATE SET
+    po_date=excluded.po_date, supplier_name=excluded.supplier_name, supplier_gstin=excluded.supplier_gstin,
+    supplier_code=excluded.supplier_code, supplier_phone=excluded.supplier_phone, supplier_fax=excluded.supplier_fax,
+    department_no=excluded.department_no, enquiry_no=excluded.enquiry_no, enquiry_date=excluded.enquiry_date,
+    quotation_ref=excluded.quotation_ref, quotation_date=excluded.quotation_date, rc_no=excluded.rc_no,
+    order_type=excluded.order_type, po_status=excluded.po_status, tin_no=excluded.tin_no, ecc_no=excluded.ecc_no,
+    mpct_no=excluded.mpct_no, po_value=excluded.po_value, fob_value=excluded.fob_value, ex_rate=excluded.ex_rate,
+    currency=excluded.currency, net_po_value=excluded.net_po_value, amend_no=excluded.amend_no,
+    amend_1_date=excluded.amend_1_date, amend_2_date=excluded.amend_2_date, inspection_by=excluded.inspection_by,
+    inspection_at=excluded.inspection_at, issuer_name=excluded.issuer_name, issuer_designation=excluded.issuer_designation,
+    issuer_phone=excluded.issuer_phone, remarks=excluded.remarks, updated_at=CURRENT_TIMESTAMP
+"""
+
+UPSERT_PO_ITEM_SQL = """
+INSERT INTO purchase_order_items
+(id, po_number, po_item_no, material_code, material_description, drg_no, mtrl_cat,
+ unit, po_rate, ord_qty, rcd_qty, item_value, hsn_code, delivered_qty, pending_qty)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0, ?)
+ON CONFLICT(po_number, po_item_no) DO UPDATE SET
+    material_code=excluded.material_code, material_description=excluded.material_description,
+    drg_no=excluded.drg_no, mtrl_cat=excluded.mtrl_cat, unit=excluded.unit,
+    po_rate=excluded.po_rate, ord_qty=excluded.ord_qty,
+    item_value=excluded.item_value, updated_at=CURRENT_TIMESTAMP
+"""
+
+INSERT_DELIVERY_SQL = """
+INSERT INTO purchase_order_deliveries
+(id, po_item_id, lot_no, dely_qty, dely_date, entry_allow_date, dest_code)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _header_row(po_number: int, po_header: Dict) -> Dict:
+    """Column values for UPSERT_PO_HEADER_SQL, in statement order"""
+    return {
+        "po_number": po_number,
+        "po_date": normalize_date(po_header.get("PO DATE")),
+        "supplier_name": po_header.get("SUPP NAME M/S"),
+        "supplier_gstin": None,  # Internal data, not in PO
+        "supplier_code": po_header.get("SUPP CODE"),
+        "supplier_phone": po_header.get("PHONE"),
+        "supplier_fax": po_header.get("FAX"),
+        "supplier_email": po_header.get("EMAIL")
+        or po_header.get("WEBSITE"),  # Fallback
+        "department_no": to_int(po_header.get("DVN")),
+        # Ref
+        "enquiry_no": po_header.get("ENQUIRY"),
+        "enquiry_date": normalize_date(po_header.get("ENQ DATE")),
+        "quotation_ref": po_header.get("QUOTATION"),
+        "quotation_date": normalize_date(po_header.get("QUOT-DATE")),
+        "rc_no": po_header.get("RC NO"),
+        "order_type": po_header.get("ORD-TYPE"),
+        "po_status": po_header.get("PO STATUS"),
+        # Fin
+        "tin_no": po_header.get("TIN NO"),
+        "ecc_no": po_header.get("ECC NO"),
+        "mpct_no": po_header.get("MPCT NO"),
+        "po_value": to_float(po_header.get("PO-VALUE")),
+        "fob_value": to_float(po_header.get("FOB VALUE")),
+        "ex_rate": to_float(po_header.get("EX RATE")),
+        "currency": po_header.get("CURRENCY"),
+        "net_po_value": to_float(po_header.get("NET PO VAL")),
+        # Amend
+        "amend_no": to_int(po_header.get("AMEND NO")) or 0,
+        "amend_1_date": None,  # Not in PO
+        "amend_2_date": None,  # Not in PO
+        # Insp & Issuer
+        "inspection_by": po_header.get("INSPECTION BY"),
+        "inspection_at": po_header.get("INSPECTION AT BHEL"),
+        "issuer_name": po_header.get("NAME"),
+        "issuer_designation": po_header.get("DESIGNATION"),
+        "issuer_phone": po_header.get("PHONE NO"),
+        "remarks": po_header.get("REMARKS"),
+    }
+
+
+def _group_items(po_items: List[Dict]) -> Dict[int, Dict]:
+    """Group scraper rows by PO ITM: first row is the item, every row is a delivery lot"""
+    items_grouped = {}
+    for item in po_items:
+        po_item_no = to_int(item.get("PO ITM"))
+
+        if po_item_no not in items_grouped:
+            items_grouped[po_item_no] = {"item": item, "deliveries": []}
+
+        items_grouped[po_item_no]["deliveries"].append(item)
+    return items_grouped
+
+
+def _item_row(item_id: str, po_number: int, po_item_no: int, item: Dict) -> Tuple:
+    """Parameters for UPSERT_PO_ITEM_SQL"""
+    # Standardized variable names
+    ordered_quantity = to_float(item.get("ORD QTY")) or 0
+    item_value = to_float(item.get("ITEM VALUE")) or 0
+    received_quantity = to_float(item.get("RCD QTY")) or 0
+    description = item.get("DESCRIPTION") or ""
+    drg_no = item.get("DRG") or ""
+
+    return (
+        item_id,
+        po_number,
+        po_item_no,
+        item.get("MATERIAL CODE"),
+        description,
+        drg_no,
+        to_int(item.get("MTRL CAT")),
+        item.get("UNIT"),
+        to_float(item.get("PO RATE")),
+        ordered_quantity,
+        received_quantity,
+        item_value,
+        None,  # HSN not in scraper
+        ordered_quantity,  # pending_qty = ordered_quantity initially
+    )
+
+
+def _delivery_rows(item_id: str, deliveries: List[Dict]) -> List[Tuple]:
+    """Parameters for INSERT_DELIVERY_SQL, one tuple per delivery lot"""
+    return [
+        (
+            str(uuid.uuid4()),
+            item_id,
+            to_int(delivery.get("LOT NO")),
+            to_float(delivery.get("DELY QTY")),
+            normalize_date(delivery.get("DELY DATE")),
+            normalize_date(delivery.get("ENTRY ALLOW DATE")),
+            to_int(delivery.get("DEST CODE")),
+        )
+        for delivery in deliveries
+    ]
 
 
 class POIngestionService:
@@ -50,81 +191,13 @@ class POIngestionService:
                 )
 
             # Prepare header data
-            header_data = {
-                "po_number": po_number,
-                "po_date": normalize_date(po_header.get("PO DATE")),
-                "supplier_name": po_header.get("SUPP NAME M/S"),
-                "supplier_gstin": None,  # Internal data, not in PO
-                "supplier_code": po_header.get("SUPP CODE"),
-                "supplier_phone": po_header.get("PHONE"),
-                "supplier_fax": po_header.get("FAX"),
-                "supplier_email": po_header.get("EMAIL")
-                or po_header.get("WEBSITE"),  # Fallback
-                "department_no": to_int(po_header.get("DVN")),
-                # Ref
-                "enquiry_no": po_header.get("ENQUIRY"),
-                "enquiry_date": normalize_date(po_header.get("ENQ DATE")),
-                "quotation_ref": po_header.get("QUOTATION"),
-                "quotation_date": normalize_date(po_header.get("QUOT-DATE")),
-                "rc_no": po_header.get("RC NO"),
-                "order_type": po_header.get("ORD-TYPE"),
-                "po_status": po_header.get("PO STATUS"),
-                # Fin
-                "tin_no": po_header.get("TIN NO"),
-                "ecc_no": po_header.get("ECC NO"),
-                "mpct_no": po_header.get("MPCT NO"),
-                "po_value": to_float(po_header.get("PO-VALUE")),
-                "fob_value": to_float(po_header.get("FOB VALUE")),
-                "ex_rate": to_float(po_header.get("EX RATE")),
-                "currency": po_header.get("CURRENCY"),
-                "net_po_value": to_float(po_header.get("NET PO VAL")),
-                # Amend
-                "amend_no": to_int(po_header.get("AMEND NO")) or 0,
-                "amend_1_date": None,  # Not in PO
-                "amend_2_date": None,  # Not in PO
-                # Insp & Issuer
-                "inspection_by": po_header.get("INSPECTION BY"),
-                "inspection_at": po_header.get("INSPECTION AT BHEL"),
-                "issuer_name": po_header.get("NAME"),
-                "issuer_designation": po_header.get("DESIGNATION"),
-                "issuer_phone": po_header.get("PHONE NO"),
-                "remarks": po_header.get("REMARKS"),
-            }
+            header_data = _header_row(po_number, po_header)
 
             # Upsert PO header
-            db.execute(
-                """
-                INSERT INTO purchase_orders 
-                (po_number, po_date, supplier_name, supplier_gstin, supplier_code, supplier_phone, supplier_fax, supplier_email, department_no,
-                 enquiry_no, enquiry_date, quotation_ref, quotation_date, rc_no, order_type, po_status,
-                 tin_no, ecc_no, mpct_no, po_value, fob_value, ex_rate, currency, net_po_value,
-                 amend_no, amend_1_date, amend_2_date,
-                 inspection_by, inspection_at, issuer_name, issuer_designation, issuer_phone, remarks)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(po_number) DO UPDATE SET
-                    po_date=excluded.po_date, supplier_name=excluded.supplier_name, supplier_gstin=excluded.supplier_gstin,
-                    supplier_code=excluded.supplier_code, supplier_phone=excluded.supplier_phone, supplier_fax=excluded.supplier_fax,
-                    department_no=excluded.department_no, enquiry_no=excluded.enquiry_no, enquiry_date=excluded.enquiry_date,
-                    quotation_ref=excluded.quotation_ref, quotation_date=excluded.quotation_date, rc_no=excluded.rc_no,
-                    order_type=excluded.order_type, po_status=excluded.po_status, tin_no=excluded.tin_no, ecc_no=excluded.ecc_no,
-                    mpct_no=excluded.mpct_no, po_value=excluded.po_value, fob_value=excluded.fob_value, ex_rate=excluded.ex_rate,
-                    currency=excluded.currency, net_po_value=excluded.net_po_value, amend_no=excluded.amend_no,
-                    amend_1_date=excluded.amend_1_date, amend_2_date=excluded.amend_2_date, inspection_by=excluded.inspection_by,
-                    inspection_at=excluded.inspection_at, issuer_name=excluded.issuer_name, issuer_designation=excluded.issuer_designation,
-                    issuer_phone=excluded.issuer_phone, remarks=excluded.remarks, updated_at=CURRENT_TIMESTAMP
-            """,
-                tuple(header_data.values()),
-            )
+            db.execute(UPSERT_PO_HEADER_SQL, tuple(header_data.values()))
 
             # Group items by PO_ITM to eliminate repetition
-            items_grouped = {}
-            for item in po_items:
-                po_item_no = to_int(item.get("PO ITM"))
-
-                if po_item_no not in items_grouped:
-                    items_grouped[po_item_no] = {"item": item, "deliveries": []}
-
-                items_grouped[po_item_no]["deliveries"].append(item)
+            items_grouped = _group_items(po_items)
 
             # Insert or Update unique items and their deliveries
             for po_item_no, data in items_grouped.items():
@@ -138,43 +211,8 @@ class POIngestionService:
 
                 item_id = existing_item["id"] if existing_item else str(uuid.uuid4())
 
-                # Standardized variable names
-                ordered_quantity = to_float(item.get("ORD QTY")) or 0
-                item_value = to_float(item.get("ITEM VALUE")) or 0
-                received_quantity = to_float(item.get("RCD QTY")) or 0
-                description = item.get("DESCRIPTION") or ""
-                drg_no = item.get("DRG") or ""
-
                 # Upsert item
-                db.execute(
-                    """
-                    INSERT INTO purchase_order_items
-                    (id, po_number, po_item_no, material_code, material_description, drg_no, mtrl_cat,
-                     unit, po_rate, ord_qty, rcd_qty, item_value, hsn_code, delivered_qty, pending_qty)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0, ?)
-                    ON CONFLICT(po_number, po_item_no) DO UPDATE SET
-                        material_code=excluded.material_code, material_description=excluded.material_description,
-                        drg_no=excluded.drg_no, mtrl_cat=excluded.mtrl_cat, unit=excluded.unit,
-                        po_rate=excluded.po_rate, ord_qty=excluded.ord_qty,
-                        item_value=excluded.item_value, updated_at=CURRENT_TIMESTAMP
-                """,
-                    (
-                        item_id,
-                        po_number,
-                        po_item_no,
-                        item.get("MATERIAL CODE"),
-                        description,
-                        drg_no,
-                        to_int(item.get("MTRL CAT")),
-                        item.get("UNIT"),
-                        to_float(item.get("PO RATE")),
-                        ordered_quantity,
-                        received_quantity,
-                        item_value,
-                        None,  # HSN not in scraper
-                        ordered_quantity,  # pending_qty = ordered_quantity initially
-                    ),
-                )
+                db.execute(UPSERT_PO_ITEM_SQL, _item_row(item_id, po_number, po_item_no, item))
 
                 # Clear existing deliveries for this item and re-insert
                 # Deliveries do not have FKs pointing TO them, so this is safe and preserves data integrity
@@ -184,26 +222,9 @@ class POIngestionService:
                 )
 
                 # Insert deliveries
-                for delivery in data["deliveries"]:
-                    delivery_id = str(uuid.uuid4())
-                    delivered_quantity = to_float(delivery.get("DELY QTY"))
-
-                    db.execute(
-                        """
-                        INSERT INTO purchase_order_deliveries
-                        (id, po_item_id, lot_no, dely_qty, dely_date, entry_allow_date, dest_code)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """,
-                        (
-                            delivery_id,
-                            item_id,
-                            to_int(delivery.get("LOT NO")),
-                            delivered_quantity,
-                            normalize_date(delivery.get("DELY DATE")),
-                            normalize_date(delivery.get("ENTRY ALLOW DATE")),
-                            to_int(delivery.get("DEST CODE")),
-                        ),
-                    )
+                db.executemany(
+                    INSERT_DELIVERY_SQL, _delivery_rows(item_id, data["deliveries"])
+                )
 
             # Remove commit/rollback, controlled by caller
             warnings.insert(
@@ -267,5 +288,141 @@ class POIngestionService:
             raise ValueError(f"Error ingesting PO: {str(e)}")
 
 
+    def ingest_many(
+        self, db: sqlite3.Connection, parsed_pos: List[Tuple[Dict, List[Dict]]]
+    ) -> List[Tuple[bool, List[str], int]]:
+        """
+        Ingest several parsed POs with set-based statements (executemany).
+        Same end state and messages as calling ingest_po for each in order;
+        a PO number repeated in the batch is written once, from its last copy.
+
+        Args:
+            db: Active database connection, normally a single write transaction
+            parsed_pos: (po_header, po_items) pairs from the scraper
+
+        Returns: one (success, warnings, linked_srv_count) per input, in order
+
+        Any database error aborts the whole call; the caller decides whether
+        to roll back or retry files individually.
+        """
+        results: List[Tuple[bool, List[str], int]] = [None] * len(parsed_pos)
+        latest: Dict[int, int] = {}
+        for idx, (po_header, _) in enumerate(parsed_pos):
+            po_number = to_int(po_header.get("PURCHASE ORDER"))
+            if not po_number:
+                results[idx] = (False, ["Error ingesting PO: PO number is required"], 0)
+                continue
+            if po_number in latest:
+                earlier = latest[po_number]
+                results[earlier] = (
+                    True,
+                    [f"⚠️ PO {po_number} appears again later in this batch. Using the later file."],
+                    0,
+                )
+            latest[po_number] = idx
+
+        if not latest:
+            return results
+        po_numbers = list(latest)
+
+        existing = {
+            row["po_number"]: row["amend_no"]
+            for row in select_in(
+                db,
+                "SELECT po_number, amend_no FROM purchase_orders WHERE po_number IN ({})",
+                po_numbers,
+            )
+        }
+        existing_items = {
+            (row["po_number"], row["po_item_no"]): row["id"]
+            for row in select_in(
+                db,
+                "SELECT po_number, po_item_no, id FROM purchase_order_items WHERE po_number IN ({})",
+                po_numbers,
+            )
+        }
+
+        header_rows, item_rows, item_ids, delivery_rows = [], [], [], []
+        grouped_by_po: Dict[int, Dict[int, Dict]] = {}
+        for po_number, idx in latest.items():
+            po_header, po_items = parsed_pos[idx]
+            header_rows.append(tuple(_header_row(po_number, po_header).values()))
+
+            items_grouped = _group_items(po_items)
+            grouped_by_po[po_number] = items_grouped
+            for po_item_no, data in items_grouped.items():
+                item_id = existing_items.get((po_number, po_item_no)) or str(uuid.uuid4())
+                item_rows.append(_item_row(item_id, po_number, po_item_no, data["item"]))
+                item_ids.append((item_id,))
+                delivery_rows.extend(_delivery_rows(item_id, data["deliveries"]))
+
+        db.executemany(UPSERT_PO_HEADER_SQL, header_rows)
+        db.executemany(UPSERT_PO_ITEM_SQL, item_rows)
+        db.executemany("DELETE FROM purchase_order_deliveries WHERE po_item_id = ?", item_ids)
+        db.executemany(INSERT_DELIVERY_SQL, delivery_rows)
+
+        # --- Retroactive Linkage: orphan SRVs uploaded before their PO ---
+        po_keys = [str(n) for n in po_numbers]
+        orphan_counts = {
+            row["po_number"]: row["cnt"]
+            for row in select_in(
+                db,
+                "SELECT po_number, COUNT(*) AS cnt FROM srvs "
+                "WHERE po_found = 0 AND po_number IN ({}) GROUP BY po_number",
+                po_keys,
+            )
+        }
+        if orphan_counts:
+            linked_keys = list(orphan_counts)
+            db.executemany(
+                "UPDATE srvs SET po_found = 1 WHERE po_number = ? AND po_found = 0",
+                [(k,) for k in linked_keys],
+            )
+            totals = select_in(
+                db,
+                """
+                SELECT s.po_number, si.po_item_no,
+                       COALESCE(SUM(si.received_qty), 0) AS total_received,
+                       COALESCE(SUM(si.rejected_qty), 0) AS total_rejected
+                FROM srv_items si
+                JOIN srvs s ON si.srv_number = s.srv_number
+                WHERE s.is_active = 1 AND s.po_number IN ({})
+                GROUP BY s.po_number, si.po_item_no
+                """,
+                linked_keys,
+            )
+            db.executemany(
+                """
+                UPDATE purchase_order_items
+                SET rcd_qty = ?, rejected_qty = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE po_number = ? AND po_item_no = ?
+                """,
+                [
+                    (float(t["total_received"]), float(t["total_rejected"]), int(t["po_number"]), t["po_item_no"])
+                    for t in totals
+                    if t["po_item_no"] in grouped_by_po[int(t["po_number"])]
+                    and (t["total_received"] > 0 or t["total_rejected"] > 0)
+                ],
+            )
+
+        for po_number, idx in latest.items():
+            items_grouped = grouped_by_po[po_number]
+            warnings = [
+                f"✅ Successfully ingested PO {po_number} with {len(items_grouped)} unique items "
+                f"and {len(parsed_pos[idx][1])} delivery schedules"
+            ]
+            if po_number in existing:
+                warnings.append(
+                    f"⚠️ PO {po_number} already exists (Amendment {existing[po_number]}). Updating..."
+                )
+            linked = orphan_counts.get(str(po_number), 0)
+            if linked:
+                warnings.append(f"🔗 Linked {linked} existing SRV(s) to this new PO")
+                warnings.append("📊 Updated PO item quantities from linked SRVs")
+            results[idx] = (True, warnings, linked)
+
+        return results
+
+
 # Singleton instance
 po_ingestion_service = POIngestionService()
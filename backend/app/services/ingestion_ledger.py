@@ -0,0 +1,119 @@
+"""
+Ingestion Ledger
+Remembers the response of every fully successful PO / SRV upload, keyed by
+the SHA-256 of the file and the parser version that read it (migration
+023). Re-uploading an unchanged file returns the stored response without
+parsing, as long as every document it produced still exists and was last
+written by that same file.
+"""
+
+import hashlib
+import json
+import sqlite3
+from typing import Dict, Iterable, List
+
+from app.db import select_in
+
+KIND_PO = "po"
+KIND_SRV = "srv"
+
+# How a document key resolves to its live row, per kind
+_DOCUMENT_JOINS = {
+    KIND_PO: "JOIN purchase_orders t ON t.po_number = CAST(d.document_key AS INTEGER)",
+    KIND_SRV: "JOIN srvs t ON t.srv_number = d.document_key",
+}
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def ledger_available(db: sqlite3.Connection) -> bool:
+    """False on databases (and test fixtures) without migration 023"""
+    row = db.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ingestion_ledger'"
+    ).fetchone()
+    return row is not None
+
+
+def find_previous(
+    db: sqlite3.Connection, kind: str, digests: Iterable[str], parser_version: str
+) -> Dict[str, Dict]:
+    """
+    Ledger entries still valid for `digests`, as
+    {digest: {"outcome": <stored response>, "ingested_at": <timestamp>}}.
+    """
+    digests = sorted(set(digests))
+    if not digests or not ledger_available(db):
+        return {}
+
+    entries = select_in(
+        db,
+        "SELECT content_hash, outcome, document_count, created_at FROM ingestion_ledger "
+        "WHERE kind = ? AND parser_version = ? AND content_hash IN ({})",
+        digests,
+        params=(kind, parser_version),
+    )
+    if not entries:
+        return {}
+
+    # Documents deleted since, or overwritten by another file, invalidate the entry
+    live = dict(
+        select_in(
+            db,
+            f"""
+            SELECT d.content_hash, COUNT(*) FROM ingested_documents d
+            {_DOCUMENT_JOINS[kind]}
+            WHERE d.kind = ? AND d.content_hash IN ({{}})
+            GROUP BY d.content_hash
+            """,
+            [row[0] for row in entries],
+            params=(kind,),
+        )
+    )
+    return {
+        digest: {"outcome": json.loads(outcome), "ingested_at": created_at}
+        for digest, outcome, document_count, created_at in entries
+        if live.get(digest, 0) == document_count
+    }
+
+
+def note_documents(
+    db: sqlite3.Connection, kind: str, digest: str, document_keys: List[str]
+) -> None:
+    """Mark `document_keys` as last written by the file with `digest`"""
+    if not document_keys or not ledger_available(db):
+        return
+    db.executemany(
+        """
+        INSERT INTO ingested_documents (kind, document_key, content_hash)
+        VALUES (?, ?, ?)
+        ON CONFLICT(kind, document_key) DO UPDATE SET
+            content_hash = excluded.content_hash,
+            ingested_at = CURRENT_TIMESTAMP
+        """,
+        [(kind, str(key), digest) for key in document_keys],
+    )
+
+
+def record_outcome(
+    db: sqlite3.Connection,
+    kind: str,
+    digest: str,
+    parser_version: str,
+    filename: str,
+    document_keys: List[str],
+    outcome: Dict,
+) -> None:
+    """Store the response of a fully successful upload so re-uploads can reuse it"""
+    if not ledger_available(db):
+        return
+    note_documents(db, kind, digest, document_keys)
+    db.execute(
+        """
+        INSERT OR REPLACE INTO ingestion_ledger
+            (kind, content_hash, parser_version, filename, outcome, document_count)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        (kind, digest, parser_version, filename, json.dumps(outcome), len(set(map(str, document_keys)))),
+    )
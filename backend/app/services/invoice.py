@@ -15,6 +15,8 @@ from app.core.exceptions import (
     ResourceNotFoundError,
     ConflictError,
 )
+from app.services.dc_invoice_links import invoice_for_dc
+from app.services.number_availability import ensure_number_available
 
 logger = logging.getLogger(__name__)
 
@@ -75,14 +77,7 @@ def check_dc_already_invoiced(dc_number: str, db: sqlite3.Connection) -> Optiona
     Returns:
         Invoice number if already invoiced, None otherwise
     """
-    existing_invoice = db.execute(
-        """
-        SELECT invoice_number FROM gst_invoice_dc_links WHERE dc_number = ?
-    """,
-        (dc_number,),
-    ).fetchone()
-
-    return existing_invoice[0] if existing_invoice else None
+    return invoice_for_dc(db, dc_number)
 
 
 def check_invoice_number_exists(invoice_number: str, db: sqlite3.Connection) -> bool:
@@ -138,7 +133,7 @@ def create_invoice(invoice_data: dict, db: sqlite3.Connection) -> ServiceResult[
     - 1 DC → 1 Invoice (enforced via INVARIANT DC-2)
     - Invoice items are 1-to-1 mapping from DC items
     - Backend recomputes all monetary values (INVARIANT INV-2)
-    - Transaction uses BEGIN IMMEDIATE for collision safety
+    - Caller runs this on the single writer (write executor) transaction
 
     Args:
         invoice_data: Invoice header data (dict matching EnhancedInvoiceCreate)
@@ -152,31 +147,8 @@ def create_invoice(invoice_data: dict, db: sqlite3.Connection) -> ServiceResult[
         invoice_date = invoice_data["invoice_date"]
         dc_number = invoice_data["dc_number"]
 
-        from app.core.utils import get_financial_year
-
-        fy = get_financial_year(invoice_date)
-
-        # Financial year boundaries
-        year_start = fy.split("-")[0]
-        full_year_start = f"{year_start}-04-01"
-        year_end = f"20{fy.split('-')[1]}"
-        full_year_end = f"{year_end}-03-31"
-
-        # Check for duplicate invoice number within the FY
-        existing_dup = db.execute(
-            """
-            SELECT 1 FROM gst_invoices 
-            WHERE invoice_number = ? 
-            AND invoice_date >= ? AND invoice_date <= ?
-        """,
-            (invoice_number, full_year_start, full_year_end),
-        ).fetchone()
-
-        if existing_dup:
-            raise ConflictError(
-                f"Invoice number {invoice_number} already exists in Financial Year {fy}.",
-                details={"invoice_number": invoice_number, "financial_year": fy},
-            )
+        # Invoice numbers are primary keys: taken in any FY means taken
+        ensure_number_available(db, "Invoice", invoice_number, invoice_date)
 
         # Validate header
         validate_invoice_header(invoice_data)
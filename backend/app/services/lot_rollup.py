@@ -0,0 +1,122 @@
+"""
+Lot Rollup
+lot_rollup holds ordered, dispatched, received, rejected and invoiced
+quantities per (PO item, lot), kept current by the triggers in migration 030.
+This module rebuilds it from source tables and serves the per-item and
+per-lot views behind /api/reconciliation.
+"""
+
+import logging
+import sqlite3
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_FILE = "030_lot_rollup.sql"
+
+ROLLUP_COLUMNS = ("ordered_qty", "dispatched_qty", "received_qty", "rejected_qty", "invoiced_qty")
+
+# Same lots and sums as trg_lot_rollup_refresh, for every item at once
+REBUILD_SQL = """
+INSERT INTO lot_rollup (
+    po_item_id, lot_no, po_number, po_item_no,
+    ordered_qty, dispatched_qty, received_qty, rejected_qty, invoiced_qty
+)
+WITH q AS (
+    SELECT d.po_item_id, COALESCE(d.lot_no, 0) AS lot_no, COALESCE(d.dely_qty, 0) AS ordered,
+           0 AS dispatched, 0 AS received, 0 AS rejected, 0 AS invoiced
+    FROM purchase_order_deliveries d
+    UNION ALL
+    SELECT dci.po_item_id, COALESCE(dci.lot_no, 0), 0, dci.dispatch_qty, 0, 0, 0
+    FROM delivery_challan_items dci
+    JOIN delivery_challans dc ON dc.dc_number = dci.dc_number
+    UNION ALL
+    SELECT i.id, COALESCE(si.lot_no, 0), 0, 0, COALESCE(si.received_qty, 0), COALESCE(si.rejected_qty, 0), 0
+    FROM srv_items si
+    JOIN srvs s ON s.srv_number = si.srv_number
+    JOIN purchase_order_items i ON i.po_number = si.po_key AND i.po_item_no = si.po_item_no
+    WHERE s.is_active = 1
+    UNION ALL
+    SELECT dci.po_item_id, COALESCE(dci.lot_no, 0), 0, 0, 0, 0, gii.quantity
+    FROM delivery_challan_items dci
+    JOIN gst_invoices gi ON gi.linked_dc_numbers = dci.dc_number
+    JOIN gst_invoice_items gii ON gii.invoice_number = gi.invoice_number
+    WHERE gii.po_sl_no = dci.lot_no
+)
+SELECT poi.id, q.lot_no, poi.po_number, poi.po_item_no,
+       SUM(q.ordered), SUM(q.dispatched), SUM(q.received), SUM(q.rejected), SUM(q.invoiced)
+FROM q
+JOIN purchase_order_items poi ON poi.id = q.po_item_id
+GROUP BY q.po_item_id, q.lot_no
+"""
+
+PO_LOTS_SQL = """
+    SELECT lr.po_item_id, lr.po_item_no, lr.lot_no,
+           poi.material_code, poi.material_description, poi.drg_no, poi.unit,
+           lr.ordered_qty, lr.dispatched_qty, lr.received_qty, lr.rejected_qty, lr.invoiced_qty,
+           lr.ordered_qty - lr.dispatched_qty AS remaining_qty
+    FROM lot_rollup lr
+    JOIN purchase_order_items poi ON poi.id = lr.po_item_id
+    WHERE lr.po_number = ?
+    ORDER BY lr.po_item_no, lr.lot_no
+"""
+
+PO_ITEMS_SQL = """
+    SELECT poi.id AS po_item_id, poi.po_item_no,
+           poi.material_code, poi.material_description, poi.drg_no, poi.unit,
+           COALESCE(poi.ord_qty, 0) AS ordered_qty,
+           COALESCE(SUM(lr.dispatched_qty), 0) AS dispatched_qty,
+           COALESCE(SUM(lr.received_qty), 0) AS received_qty,
+           COALESCE(SUM(lr.rejected_qty), 0) AS rejected_qty,
+           COALESCE(SUM(lr.invoiced_qty), 0) AS invoiced_qty,
+           COALESCE(poi.ord_qty, 0) - COALESCE(SUM(lr.dispatched_qty), 0) AS remaining_qty,
+           COUNT(lr.lot_no) AS lot_count
+    FROM purchase_order_items poi
+    LEFT JOIN lot_rollup lr ON lr.po_item_id = poi.id
+    WHERE poi.po_number = ?
+    GROUP BY poi.id
+    ORDER BY poi.po_item_no
+"""
+
+
+def rollup_table_exists(db: sqlite3.Connection) -> bool:
+    row = db.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'lot_rollup'"
+    ).fetchone()
+    return row is not None
+
+
+def install_lot_rollup(db: sqlite3.Connection, migrations_dir) -> None:
+    """Apply migration 030 (tables, indexes, triggers). Idempotent."""
+    with open(migrations_dir / MIGRATION_FILE, "r", encoding="utf-8") as f:
+        db.executescript(f.read())
+
+
+def rebuild_lot_rollup(db: sqlite3.Connection) -> int:
+    """
+    Repopulate lot_rollup from the source tables.
+    Runs inside the caller's transaction; returns the number of rows written.
+    """
+    db.execute("DELETE FROM lot_rollup")
+    cursor = db.execute(REBUILD_SQL)
+    logger.info(f"Rebuilt lot_rollup: {cursor.rowcount} rows")
+    return cursor.rowcount
+
+
+def get_lot_quantities(db: sqlite3.Connection, po_item_id: str, lot_no: int) -> Optional[Dict]:
+    """{ordered_qty, dispatched_qty, ...} for one lot, or None if nothing references the lot"""
+    row = db.execute(
+        f"SELECT {', '.join(ROLLUP_COLUMNS)} FROM lot_rollup WHERE po_item_id = ? AND lot_no = ?",
+        (po_item_id, lot_no),
+    ).fetchone()
+    return dict(zip(ROLLUP_COLUMNS, row)) if row else None
+
+
+def get_po_lots(db: sqlite3.Connection, po_number: int) -> List[Dict]:
+    """Every lot of a PO, ordered by item and lot, with remaining (undispatched) quantity"""
+    return [dict(row) for row in db.execute(PO_LOTS_SQL, (po_number,))]
+
+
+def get_po_items(db: sqlite3.Connection, po_number: int) -> List[Dict]:
+    """Per-item totals: ordered from the PO item, everything else summed over its lots"""
+    return [dict(row) for row in db.execute(PO_ITEMS_SQL, (po_number,))]
@@ -0,0 +1,108 @@
+"""
+Number Availability
+Whether DC and invoice numbers are still free. dc_number and invoice_number
+are the tables' primary keys, so a number used in any financial year can
+never be reused; a batch of candidates costs one primary-key IN (...)
+lookup per type. Results also carry the financial year of the candidate's
+date and, when taken, of the document already using the number (the
+generated financial_year column from migration 031).
+"""
+
+import sqlite3
+from typing import Dict, List
+
+from app.core.exceptions import ConflictError
+from app.core.utils import get_financial_year
+from app.db import select_in
+
+MIGRATION_FILE = "031_document_financial_year.sql"
+
+# type -> (table, number column, label)
+NUMBER_SOURCES = {
+    "DC": ("delivery_challans", "dc_number", "DC"),
+    "Invoice": ("gst_invoices", "invoice_number", "Invoice"),
+}
+
+# Unique (number, financial_year) indexes from the first version of 031,
+# redundant with the primary keys
+REDUNDANT_INDEXES = ("idx_dc_number_fy", "idx_invoice_number_fy")
+
+
+def taken_numbers(db: sqlite3.Connection, doc_type: str, numbers: List[str]) -> Dict[str, str]:
+    """{number: financial year of the existing document} for the `numbers` already used by `doc_type`"""
+    table, column, _ = NUMBER_SOURCES[doc_type]
+    rows = select_in(
+        db,
+        f"SELECT {column}, financial_year FROM {table} WHERE {column} IN ({{}})",
+        sorted(set(numbers)),
+    )
+    return {row[0]: row[1] for row in rows}
+
+
+def check_numbers(db: sqlite3.Connection, checks: List[Dict]) -> List[Dict]:
+    """
+    Availability for each {type, number, date} in `checks`, in input order.
+    Candidates are grouped by type, one lookup per type.
+    """
+    groups: Dict[str, List[str]] = {}
+    for check in checks:
+        groups.setdefault(check["type"], []).append(check["number"])
+    taken = {doc_type: taken_numbers(db, doc_type, numbers) for doc_type, numbers in groups.items()}
+
+    results = []
+    for check in checks:
+        existing = taken[check["type"]]
+        results.append(
+            {
+                "type": check["type"],
+                "number": check["number"],
+                "financial_year": get_financial_year(check.get("date")),
+                "exists": check["number"] in existing,
+                "existing_financial_year": existing.get(check["number"]),
+            }
+        )
+    return results
+
+
+def ensure_number_available(db: sqlite3.Connection, doc_type: str, number: str, date: str) -> str:
+    """
+    Raise ConflictError if `number` is already used, in any financial year;
+    returns the financial year of `date`.
+    """
+    fy = get_financial_year(date)
+    existing = taken_numbers(db, doc_type, [number])
+    if existing:
+        _, column, label = NUMBER_SOURCES[doc_type]
+        used_in = existing[number]
+        raise ConflictError(
+            f"{label} number {number} already exists"
+            + (f" (Financial Year {used_in})." if used_in else "."),
+            details={column: number, "financial_year": used_in},
+        )
+    return fy
+
+
+def _has_generated_financial_year(db: sqlite3.Connection, table: str) -> bool:
+    # hidden = 0: ordinary column; 2 / 3: generated
+    return any(
+        column[1] == "financial_year" and column[6] in (2, 3)
+        for column in db.execute(f"PRAGMA table_xinfo({table})").fetchall()
+    )
+
+
+def install_financial_year(db: sqlite3.Connection, migrations_dir) -> None:
+    """
+    Apply migration 031 unless already applied. A plain financial_year column
+    left by older schemas cannot become a generated one in place, so it is
+    renamed out of the way.
+    """
+    for index in REDUNDANT_INDEXES:
+        db.execute(f"DROP INDEX IF EXISTS {index}")
+    if all(_has_generated_financial_year(db, table) for table, _, _ in NUMBER_SOURCES.values()):
+        return
+    for table, _, _ in NUMBER_SOURCES.values():
+        for column in db.execute(f"PRAGMA table_xinfo({table})").fetchall():
+            if column[1] == "financial_year" and column[6] == 0:
+                db.execute(f"ALTER TABLE {table} RENAME COLUMN financial_year TO financial_year_legacy")
+    with open(migrations_dir / MIGRATION_FILE, "r", encoding="utf-8") as f:
+        db.executescript(f.read())
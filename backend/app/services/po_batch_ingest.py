@@ -0,0 +1,227 @@
+"""
+PO Batch Ingestion
+Parses uploaded PO HTML files in a process pool (BeautifulSoup work is
+CPU-bound) and writes every parsed PO in one transaction through the
+single-writer executor. Progress is reported per file as events. Files
+already ingested unchanged (see ingestion_ledger) skip parsing and return
+their previous result unless force=True.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from app.core.write_executor import get_write_executor
+from app.services.ingest_po import po_ingestion_service
+from app.services.ingestion_ledger import KIND_PO, content_hash, find_previous, record_outcome
+from app.services.po_scraper import PARSER_VERSION, parse_po_html
+
+logger = logging.getLogger(__name__)
+
+PARSE_WORKERS = max(1, min(8, (os.cpu_count() or 2) - 1))
+
+_parse_pool: Optional[ProcessPoolExecutor] = None
+_parse_pool_lock = threading.Lock()
+
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    """Process pool shared by all batch uploads, created on first use"""
+    global _parse_pool
+    if _parse_pool is None:
+        with _parse_pool_lock:
+            if _parse_pool is None:
+                _parse_pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+    return _parse_pool
+
+
+def _parse_file(filename: str, content: bytes) -> Dict:
+    """Runs in a worker process"""
+    if not filename.endswith(".html"):
+        return {"filename": filename, "error": "Only HTML files are supported"}
+    try:
+        header, items = parse_po_html(content)
+    except Exception as e:
+        return {"filename": filename, "error": f"Error: {str(e)}"}
+    if not header.get("PURCHASE ORDER"):
+        return {"filename": filename, "error": "Could not extract PO number from HTML"}
+    return {"filename": filename, "header": header, "items": items, "error": None}
+
+
+def _file_result(filename: str) -> Dict:
+    return {
+        "filename": filename,
+        "success": False,
+        "po_number": None,
+        "message": "",
+        "linked_srvs": 0,
+        "unchanged": False,
+    }
+
+
+def _outcome_result(
+    filename: str, header: Dict, success: bool, warnings: List[str], linked: int
+) -> Dict:
+    result = _file_result(filename)
+    if not success:
+        result["message"] = warnings[0] if warnings else "Failed to ingest PO"
+        return result
+    po_number = header.get("PURCHASE ORDER")
+    result["success"] = True
+    result["po_number"] = po_number
+    result["linked_srvs"] = linked
+    message = warnings[0] if warnings else f"Successfully ingested PO {po_number}"
+    if linked > 0:
+        message += f" (Linked {linked} SRV(s))"
+    result["message"] = message
+    return result
+
+
+def _record(db, digest: str, result: Dict) -> None:
+    if result["success"]:
+        record_outcome(
+            db, KIND_PO, digest, PARSER_VERSION, result["filename"], [result["po_number"]], result
+        )
+
+
+def _ingest_batch(db, entries: List[Tuple[str, str, Dict]]) -> List[Dict]:
+    """Write job: ingest every parsed (filename, digest, parsed) entry and record it in the ledger"""
+    outcomes = po_ingestion_service.ingest_many(
+        db, [(p["header"], p["items"]) for _, _, p in entries]
+    )
+    results = []
+    for (filename, digest, p), outcome in zip(entries, outcomes):
+        result = _outcome_result(filename, p["header"], *outcome)
+        _record(db, digest, result)
+        results.append(result)
+    return results
+
+
+def _ingest_one(db, filename: str, digest: str, parsed: Dict) -> Dict:
+    """Write job for the per-file fallback: same linking and ledger entry as the batch path"""
+    po_key = str(parsed["header"].get("PURCHASE ORDER"))
+    # ingest_po links orphan SRVs itself without returning a count, so count them first
+    orphans = db.execute(
+        "SELECT COUNT(*) FROM srvs WHERE po_number = ? AND po_found = 0", (po_key,)
+    ).fetchone()[0]
+    success, warnings = po_ingestion_service.ingest_po(db, parsed["header"], parsed["items"])
+    result = _outcome_result(filename, parsed["header"], success, warnings, orphans if success else 0)
+    _record(db, digest, result)
+    return result
+
+
+async def _write(entries: List[Tuple[str, str, Dict]]) -> List[Dict]:
+    """One transaction for the whole batch; on failure, retry per file to isolate the bad one"""
+    writer = get_write_executor()
+    try:
+        return await writer.run_async(_ingest_batch, entries)
+    except Exception as e:
+        logger.warning(f"Batch PO write failed ({e}); retrying files individually")
+
+    results = []
+    for filename, digest, parsed in entries:
+        try:
+            results.append(await writer.run_async(_ingest_one, filename, digest, parsed))
+        except Exception as e:
+            result = _file_result(filename)
+            result["message"] = f"Error: {str(e)}"
+            results.append(result)
+    return results
+
+
+def _previous_results(files: List[Tuple[str, bytes]], digests: List[str]) -> Dict[int, Dict]:
+    """Ledger hits by file index, with the stored result re-labelled for this upload (blocking)"""
+    with get_write_executor().pool.reader() as db:
+        previous = find_previous(db, KIND_PO, digests, PARSER_VERSION)
+    hits = {}
+    for idx, digest in enumerate(digests):
+        if digest in previous:
+            hits[idx] = {
+                **previous[digest]["outcome"],
+                "filename": files[idx][0],
+                "unchanged": True,
+                "ingested_at": previous[digest]["ingested_at"],
+            }
+    return hits
+
+
+async def ingest_po_files(
+    files: List[Tuple[str, bytes]], force: bool = False
+) -> AsyncIterator[Dict]:
+    """
+    Parse and ingest (filename, content) pairs.
+
+    Yields {"event": "parsed", ...} once per file as parsing completes (in
+    completion order), then a single {"event": "complete", ...} carrying the
+    same summary the batch upload endpoint returns. Unchanged files come
+    first, with their previous result and "unchanged": true.
+    """
+    loop = asyncio.get_running_loop()
+    total = len(files)
+    results = [_file_result(filename) for filename, _ in files]
+    digests = [content_hash(content) for _, content in files]
+    done_count = 0
+
+    if not force:
+        previous = await loop.run_in_executor(None, _previous_results, files, digests)
+        for idx, result in previous.items():
+            results[idx] = result
+            done_count += 1
+            yield {
+                "event": "parsed",
+                "filename": result["filename"],
+                "ok": True,
+                "message": result["message"],
+                "unchanged": True,
+                "done": done_count,
+                "total": total,
+            }
+
+    pool = get_parse_pool()
+    pending = {
+        asyncio.ensure_future(loop.run_in_executor(pool, _parse_file, filename, content)): idx
+        for idx, (filename, content) in enumerate(files)
+        if not results[idx]["unchanged"]
+    }
+    parsed: List[Tuple[int, Dict]] = []
+    while pending:
+        done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for fut in done:
+            idx = pending.pop(fut)
+            try:
+                outcome = fut.result()
+            except Exception as e:
+                outcome = {"filename": files[idx][0], "error": f"Error: {str(e)}"}
+            done_count += 1
+            if outcome["error"]:
+                results[idx]["message"] = outcome["error"]
+            else:
+                parsed.append((idx, outcome))
+            yield {
+                "event": "parsed",
+                "filename": outcome["filename"],
+                "ok": not outcome["error"],
+                "message": outcome["error"] or "",
+                "unchanged": False,
+                "done": done_count,
+                "total": total,
+            }
+
+    # Keep upload order so a PO repeated in the batch resolves to its last file
+    parsed.sort(key=lambda pair: pair[0])
+    if parsed:
+        written = await _write([(files[idx][0], digests[idx], p) for idx, p in parsed])
+        for (idx, _), result in zip(parsed, written):
+            results[idx] = result
+
+    successful = sum(1 for r in results if r["success"])
+    yield {
+        "event": "complete",
+        "total": total,
+        "successful": successful,
+        "failed": total - successful,
+        "total_linked_srvs": sum(r["linked_srvs"] for r in results),
+        "results": results,
+    }
@@ -5,6 +5,12 @@ Extracts PO data from HTML files
 
 import re
 from datetime import datetime
+from typing import Dict, List, Tuple
+
+from bs4 import BeautifulSoup
+
+# Bump when extraction output changes so the ingestion ledger re-parses old uploads
+PARSER_VERSION = "1"
 
 # --------------------------------------------------
 # Regex
@@ -72,78 +78,169 @@ def normalize_date(val):
 
 
 # --------------------------------------------------
-# Header Extraction
+# Header label lookups
 # --------------------------------------------------
+INLINE_LABELS = {
+    "TIN NO": r"TIN\s+NO",
+    "ECC NO": r"ECC\s+NO",
+    "MPCT NO": r"MPCT\s+NO",
+    "PHONE": r"PHONE",
+    "FAX": r"FAX",
+    "EMAIL": r"EMAIL",
+    "WEBSITE": r"WEBSITE",
+}
+
+BELOW_LABELS = {
+    "PURCHASE ORDER": r"PURCHASE\s+ORDER(?:\s+NO[\.]?)?",
+    "PO DATE": r"^PO\s+DATE$",  # Fixed: Must match exactly "PO DATE", not any "*DATE"
+    "ENQUIRY": r"^ENQUIRY$",  # Made more specific - exact match only
+    "SUPP CODE": r"SUPP\s+CODE",
+    "ORD-TYPE": r"ORD-TYPE",
+    "DVN": r"DVN",
+    "QUOTATION": r"QUOTATION",
+    "QUOT-DATE": r"QUOT-DATE",
+    "PO STATUS": r"PO\s+STATUS",
+    "AMEND NO": r"AMEND\s+NO",
+    "PO-VALUE": r"PO-VALUE",
+    "RC NO": r"RC\s+NO",
+    "EX RATE": r"EX\s+RATE",
+    "CURRENCY": r"CURRENCY",
+    "FOB VALUE": r"FOB\s+VALUE",
+    "NET PO VAL": r"NET\s+PO\s+VAL",
+    "ENQ DATE": r"ENQ\s+DATE",
+    "REMARKS": r"REMARKS",
+    "TOTAL VALUE": r"TOTAL\s+VALUE",
+    "SUPP NAME M/S": r"^SUPP\s+NAME\s+M/S$",
+}
+# Looked up with prefer="any"; every other BELOW_LABELS key uses "below"
+ANY_DIRECTION_KEYS = ("PURCHASE ORDER", "PO DATE")
+
+ADJACENT_LABELS = {
+    "INSPECTION BY": r"INSPECTION\s+BY",
+    "NAME": r"^NAME$",
+    "DESIGNATION": r"DESIGNATION",
+    "PHONE NO": r"^PHONE\s+NO$",
+}
+
+# Used only when the primary lookups come back empty
+FALLBACK_LOOKUPS = (
+    (r"PURCHASE\s+ORDER", "adjacent"),
+    (r"Purchase\s+Order\s+No", "adjacent"),
+    (r"(PO\s+)?DATE", "adjacent"),
+)
+
+
+class _LabelLookup:
+    """One (label regex, direction) pair with its patterns compiled once"""
+
+    __slots__ = ("key", "prefer", "label", "inline")
+
+    def __init__(self, label_rx, prefer):
+        self.key = (label_rx, prefer)
+        self.prefer = prefer
+        self.label = re.compile(label_rx, re.IGNORECASE)
+        self.inline = re.compile(rf"{label_rx}[:\.]?\s*(.+)", re.IGNORECASE)
+
+    def value_at(self, rows, r_idx, c_idx, cell_text):
+        """Value for a cell whose text matched the label, or "" to keep scanning"""
+        inline = self.inline.search(cell_text)
+        if inline and has_value(inline.group(1)):
+            return clean(inline.group(1))
+
+        cells = rows[r_idx]
+        if self.prefer in ["adjacent", "any"] and c_idx + 1 < len(cells):
+            val = cells[c_idx + 1]
+            if has_value(val):
+                return val
+
+        if r_idx + 1 < len(rows) and self.prefer in ["below", "any"]:
+            below_cells = rows[r_idx + 1]
+            if c_idx < len(below_cells):
+                val = below_cells[c_idx]
+                if has_value(val) and not RX_LABEL_ONLY.match(val):
+                    return val
+        return ""
+
+
+def _header_lookups():
+    specs = [(rx, "below") for rx in INLINE_LABELS.values()]
+    specs += [
+        (rx, "any" if k in ANY_DIRECTION_KEYS else "below")
+        for k, rx in BELOW_LABELS.items()
+    ]
+    specs += list(FALLBACK_LOOKUPS)
+    specs += [(rx, "adjacent") for rx in ADJACENT_LABELS.values()]
+    return tuple(_LabelLookup(rx, prefer) for rx, prefer in dict.fromkeys(specs))
+
+
+HEADER_LOOKUPS = _header_lookups()
+# Union of every label: cells that match none of them are skipped with one search
+RX_ANY_HEADER_LABEL = re.compile(
+    "|".join(f"(?:{lookup.label.pattern})" for lookup in HEADER_LOOKUPS),
+    re.IGNORECASE,
+)
+
+
+def index_tables(soup):
+    """
+    Cleaned cell text grid, built once per document: one list of rows per
+    <table>, each row the cleaned text of its <td> cells. Mirrors
+    table.find_all("tr") / row.find_all("td"), nested tables included.
+    """
+    text_cache = {}
+
+    def cell_text(td):
+        key = id(td)
+        if key not in text_cache:
+            text_cache[key] = clean(td.get_text())
+        return text_cache[key]
+
+    return [
+        [[cell_text(td) for td in tr.find_all("td")] for tr in table.find_all("tr")]
+        for table in soup.find_all("table")
+    ]
+
+
+def resolve_labels(grid, lookups=HEADER_LOOKUPS):
+    """
+    Resolve every lookup in a single document-order scan of the grid.
+    Each lookup takes the first matching cell that yields a value, which is
+    what a separate scan per label would return.
+    """
+    resolved = {}
+    pending = list(lookups)
+    for rows in grid:
+        for r_idx, row in enumerate(rows):
+            for c_idx, text in enumerate(row):
+                if not RX_ANY_HEADER_LABEL.search(text):
+                    continue
+                for lookup in list(pending):
+                    if not lookup.label.search(text):
+                        continue
+                    value = lookup.value_at(rows, r_idx, c_idx, text)
+                    if value:
+                        resolved[lookup.key] = value
+                        pending.remove(lookup)
+                if not pending:
+                    return resolved
+    return resolved
+
+
 def extract_po_header(soup):
     tables = soup.find_all("table")
     header = {}
+    resolved = resolve_labels(index_tables(soup))
 
     def find_value(label_rx, prefer="below"):
-        for table in tables:
-            rows = table.find_all("tr")
-            for r_idx, row in enumerate(rows):
-                cells = row.find_all("td")
-                for c_idx, cell in enumerate(cells):
-                    cell_text = clean(cell.get_text())
-
-                    if not re.search(label_rx, cell_text, re.IGNORECASE):
-                        continue
-
-                    inline = re.search(
-                        rf"{label_rx}[:\.]?\s*(.+)", cell_text, re.IGNORECASE
-                    )
-                    if inline and has_value(inline.group(1)):
-                        return clean(inline.group(1))
-
-                    if prefer in ["adjacent", "any"] and c_idx + 1 < len(cells):
-                        val = clean(cells[c_idx + 1].get_text())
-                        if has_value(val):
-                            return val
-
-                    if r_idx + 1 < len(rows) and prefer in ["below", "any"]:
-                        below_cells = rows[r_idx + 1].find_all("td")
-                        if c_idx < len(below_cells):
-                            val = clean(below_cells[c_idx].get_text())
-                            if has_value(val) and not RX_LABEL_ONLY.match(val):
-                                return val
-        return ""
+        return resolved.get((label_rx, prefer), "")
 
     # Inline fields
-    for k, rx in {
-        "TIN NO": r"TIN\s+NO",
-        "ECC NO": r"ECC\s+NO",
-        "MPCT NO": r"MPCT\s+NO",
-        "PHONE": r"PHONE",
-        "FAX": r"FAX",
-        "EMAIL": r"EMAIL",
-        "WEBSITE": r"WEBSITE",
-    }.items():
+    for k, rx in INLINE_LABELS.items():
         header[k] = find_value(rx)
 
     # Below-cell fields
-    for k, rx in {
-        "PURCHASE ORDER": r"PURCHASE\s+ORDER(?:\s+NO[\.]?)?",
-        "PO DATE": r"^PO\s+DATE$",  # Fixed: Must match exactly "PO DATE", not any "*DATE"
-        "ENQUIRY": r"^ENQUIRY$",  # Made more specific - exact match only
-        "SUPP CODE": r"SUPP\s+CODE",
-        "ORD-TYPE": r"ORD-TYPE",
-        "DVN": r"DVN",
-        "QUOTATION": r"QUOTATION",
-        "QUOT-DATE": r"QUOT-DATE",
-        "PO STATUS": r"PO\s+STATUS",
-        "AMEND NO": r"AMEND\s+NO",
-        "PO-VALUE": r"PO-VALUE",
-        "RC NO": r"RC\s+NO",
-        "EX RATE": r"EX\s+RATE",
-        "CURRENCY": r"CURRENCY",
-        "FOB VALUE": r"FOB\s+VALUE",
-        "NET PO VAL": r"NET\s+PO\s+VAL",
-        "ENQ DATE": r"ENQ\s+DATE",
-        "REMARKS": r"REMARKS",
-        "TOTAL VALUE": r"TOTAL\s+VALUE",
-        "SUPP NAME M/S": r"^SUPP\s+NAME\s+M/S$",
-    }.items():
-        pref = "any" if k in ["PURCHASE ORDER", "PO DATE"] else "below"
+    for k, rx in BELOW_LABELS.items():
+        pref = "any" if k in ANY_DIRECTION_KEYS else "below"
         header[k] = find_value(rx, prefer=pref)
 
     # Fallback: Try adjacent if main fields missing (handles different formats like test files)
@@ -164,12 +261,7 @@ def extract_po_header(soup):
         header["ENQUIRY"] = ""  # Clear invalid data
 
     # Adjacent-only fields
-    for k, rx in {
-        "INSPECTION BY": r"INSPECTION\s+BY",
-        "NAME": r"^NAME$",
-        "DESIGNATION": r"DESIGNATION",
-        "PHONE NO": r"^PHONE\s+NO$",
-    }.items():
+    for k, rx in ADJACENT_LABELS.items():
         header[k] = find_value(rx, prefer="adjacent")
 
     # DRG
@@ -316,3 +408,9 @@ def extract_items(soup):
         )
 
     return items
+
+
+def parse_po_html(content) -> Tuple[Dict, List[Dict]]:
+    """Parse raw PO HTML into (header, items). Picklable entry point for worker processes."""
+    soup = BeautifulSoup(content, "lxml")
+    return extract_po_header(soup), extract_items(soup)
@@ -6,12 +6,48 @@ Separates concerns from the API router.
 
 import sqlite3
 import logging
-from typing import List
-from app.models import POListItem, PODetail, POHeader, POItem, POStats
-from app.errors import not_found
+import json
+import base64
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.models import (
+    POListItem,
+    PODetail,
+    PODelivery,
+    POHeader,
+    POItem,
+    POStats,
+)
+from app.errors import not_found, bad_request
 
 logger = logging.getLogger(__name__)
 
+# Sortable header columns for the PO list (NULLs coalesced so keyset
+# comparisons stay total-ordered)
+_PO_SORT_COLUMNS = {
+    "created_at": "COALESCE(po.created_at, '')",
+    "po_date": "COALESCE(po.po_date, '')",
+    "po_number": "po.po_number",
+    "po_value": "COALESCE(po.po_value, 0)",
+    "supplier_name": "COALESCE(po.supplier_name, '')",
+}
+
+# Projectable parts of the PO detail payload (header is always included)
+PO_DETAIL_FIELDS = frozenset({"items", "deliveries"})
+
+
+def _encode_cursor(sort_value, po_number: int) -> str:
+    """Opaque keyset cursor: last row's (sort_value, po_number)"""
+    raw = json.dumps([sort_value, po_number]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> Tuple:
+    try:
+        sort_value, po_number = json.loads(base64.urlsafe_b64decode(cursor))
+        return sort_value, int(po_number)
+    except (ValueError, TypeError):
+        raise bad_request("Invalid pagination cursor")
+
 
 class POService:
     """Service for Purchase Order business logic"""
@@ -56,72 +92,139 @@ class POService:
         List all Purchase Orders with aggregated quantity details.
         Calculates ordered, dispatched, and pending quantities.
         """
-        rows = db.execute("""
-            SELECT po_number, po_date, supplier_name, po_value, amend_no, po_status, created_at
-            FROM purchase_orders
-            ORDER BY created_at DESC
-        """).fetchall()
-
-        results = []
-        for row in rows:
-            po_num = row["po_number"]
+        items, _ = self.list_pos_page(db)
+        return items
+
+    def list_pos_page(
+        self,
+        db: sqlite3.Connection,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        sort: str = "created_at",
+        order: str = "desc",
+        status: Optional[str] = None,
+        q: Optional[str] = None,
+    ) -> Tuple[List[POListItem], Optional[str]]:
+        """
+        Set-based PO list with keyset pagination.
 
-            # Calculate Total Ordered Quantity
-            ordered_row = db.execute(
-                """
-                SELECT SUM(ord_qty) FROM purchase_order_items WHERE po_number = ?
-            """,
-                (po_num,),
-            ).fetchone()
-            total_ordered = ordered_row[0] if ordered_row and ordered_row[0] else 0.0
+        The page of headers is selected first, then every child table is
+        aggregated once (grouped CTEs) for just those POs and joined back.
+        Query count is constant regardless of PO volume.
 
-            # Calculate Total Dispatched Quantity
-            # Link via PO Items to get specific dispatches for this PO
-            dispatched_row = db.execute(
-                """
-                SELECT SUM(dci.dispatch_qty) 
-                FROM delivery_challan_items dci
-                JOIN purchase_order_items poi ON dci.po_item_id = poi.id
-                WHERE poi.po_number = ?
-            """,
-                (po_num,),
-            ).fetchone()
-            total_dispatched = (
-                dispatched_row[0] if dispatched_row and dispatched_row[0] else 0.0
+        Returns: (items, next_cursor) - next_cursor is None on the last page
+        """
+        sort_expr = _PO_SORT_COLUMNS.get(sort)
+        if sort_expr is None:
+            raise bad_request(
+                f"Invalid sort '{sort}'. Allowed: {', '.join(_PO_SORT_COLUMNS)}"
             )
+        order = order.lower()
+        if order not in ("asc", "desc"):
+            raise bad_request("Invalid order. Allowed: asc, desc")
+
+        where = []
+        params: List = []
+
+        if status:
+            if status.lower() == "new":
+                where.append("(po.po_status = 'New' OR po.po_status IS NULL)")
+            else:
+                where.append("po.po_status = ?")
+                params.append(status)
+
+        if q:
+            where.append(
+                "(CAST(po.po_number AS TEXT) LIKE ? OR po.supplier_name LIKE ?)"
+            )
+            params.extend([f"%{q}%", f"%{q}%"])
+
+        if cursor:
+            sort_value, last_po = _decode_cursor(cursor)
+            op = "<" if order == "desc" else ">"
+            where.append(f"({sort_expr}, po.po_number) {op} (?, ?)")
+            params.extend([sort_value, last_po])
+
+        where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+        direction = order.upper()
+        limit_sql = ""
+        if limit:
+            # Fetch one extra row to know whether another page exists
+            limit_sql = "LIMIT ?"
+            params.append(limit + 1)
+
+        rows = db.execute(
+            f"""
+            WITH page AS (
+                SELECT po.po_number, po.po_date, po.supplier_name, po.po_value,
+                       po.amend_no, po.po_status, po.created_at,
+                       {sort_expr} AS sort_key
+                FROM purchase_orders po
+                {where_sql}
+                ORDER BY sort_key {direction}, po.po_number {direction}
+                {limit_sql}
+            ),
+            item_agg AS (
+                -- Bare drg_no column resolves to the row holding MIN(po_item_no)
+                SELECT poi.po_number,
+                       SUM(poi.ord_qty) AS total_ordered,
+                       COUNT(*) AS total_items,
+                       poi.drg_no AS drg_no,
+                       MIN(poi.po_item_no) AS first_item_no
+                FROM purchase_order_items poi
+                WHERE poi.po_number IN (SELECT po_number FROM page)
+                GROUP BY poi.po_number
+            ),
+            dispatch_agg AS (
+                SELECT poi.po_number, SUM(dci.dispatch_qty) AS total_dispatched
+                FROM purchase_order_items poi
+                JOIN delivery_challan_items dci ON dci.po_item_id = poi.id
+                WHERE poi.po_number IN (SELECT po_number FROM page)
+                GROUP BY poi.po_number
+            ),
+            dc_agg AS (
+                SELECT dc.po_number, GROUP_CONCAT(dc.dc_number, ', ') AS dc_numbers
+                FROM delivery_challans dc
+                WHERE dc.po_number IN (SELECT po_number FROM page)
+                GROUP BY dc.po_number
+            ),
+            srv_agg AS (
+                -- srv_items.po_number is TEXT; compare as TEXT so its index is usable
+                SELECT CAST(si.po_number AS INTEGER) AS po_number,
+                       SUM(si.received_qty) AS total_received,
+                       SUM(si.rejected_qty) AS total_rejected
+                FROM srv_items si
+                WHERE si.po_number IN (SELECT CAST(po_number AS TEXT) FROM page)
+                GROUP BY si.po_number
+            )
+            SELECT page.*,
+                   COALESCE(ia.total_ordered, 0) AS total_ordered,
+                   COALESCE(ia.total_items, 0) AS total_items,
+                   ia.drg_no,
+                   COALESCE(da.total_dispatched, 0) AS total_dispatched,
+                   dca.dc_numbers,
+                   COALESCE(sa.total_received, 0) AS total_received,
+                   COALESCE(sa.total_rejected, 0) AS total_rejected
+            FROM page
+            LEFT JOIN item_agg ia ON ia.po_number = page.po_number
+            LEFT JOIN dispatch_agg da ON da.po_number = page.po_number
+            LEFT JOIN dc_agg dca ON dca.po_number = page.po_number
+            LEFT JOIN srv_agg sa ON sa.po_number = page.po_number
+            ORDER BY page.sort_key {direction}, page.po_number {direction}
+        """,
+            params,
+        ).fetchall()
 
-            # Calculate Total pending (Derived)
-            # Rule 3: pending_quantity is derived only, never persisted.
-            total_pending = max(0, total_ordered - total_dispatched)
-
-            # Calculate Total Items Count
-            items_count_row = db.execute(
-                "SELECT COUNT(*) FROM purchase_order_items WHERE po_number = ?",
-                (po_num,),
-            ).fetchone()
-            total_items = items_count_row[0] if items_count_row else 0
-
-            # Fetch linked DC numbers for reference
-            dc_rows = db.execute(
-                "SELECT dc_number FROM delivery_challans WHERE po_number = ?", (po_num,)
-            ).fetchall()
-            dc_nums = [r["dc_number"] for r in dc_rows]
-            linked_dcs_str = ", ".join(dc_nums) if dc_nums else None
-
-            # Calculate Total Received & Rejected (from SRVs)
-            srv_agg_res = db.execute(
-                """
-                SELECT 
-                    COALESCE(SUM(received_qty), 0),
-                    COALESCE(SUM(rejected_qty), 0)
-                FROM srv_items
-                WHERE po_number = ?
-            """,
-                (po_num,),
-            ).fetchone()
-            total_received = srv_agg_res[0] if srv_agg_res else 0.0
-            total_rejected = srv_agg_res[1] if srv_agg_res else 0.0
+        next_cursor = None
+        if limit and len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = _encode_cursor(last["sort_key"], last["po_number"])
 
+        results = []
+        for row in rows:
+            total_ordered = row["total_ordered"]
+            total_dispatched = row["total_dispatched"]
             results.append(
                 POListItem(
                     po_number=row["po_number"],
@@ -130,25 +233,50 @@ class POService:
                     po_value=row["po_value"],
                     amend_no=row["amend_no"],
                     po_status=row["po_status"] or "New",
-                    linked_dc_numbers=linked_dcs_str,
+                    linked_dc_numbers=row["dc_numbers"],
                     total_ordered_quantity=total_ordered,
                     total_dispatched_quantity=total_dispatched,
-                    total_received_quantity=total_received,
-                    total_rejected_quantity=total_rejected,
-                    total_pending_quantity=total_pending,
-                    total_items_count=total_items,
-                    drg_no=db.execute("SELECT drg_no FROM purchase_order_items WHERE po_number = ? LIMIT 1", (po_num,)).fetchone()[0] if total_items > 0 else None,
+                    total_received_quantity=row["total_received"],
+                    total_rejected_quantity=row["total_rejected"],
+                    # Rule 3: pending_quantity is derived only, never persisted.
+                    total_pending_quantity=max(0, total_ordered - total_dispatched),
+                    total_items_count=row["total_items"],
+                    drg_no=row["drg_no"],
                     created_at=row["created_at"],
                 )
             )
 
-        return results
+        return results, next_cursor
 
-    def get_po_detail(self, db: sqlite3.Connection, po_number: int) -> PODetail:
+    def get_po_detail(
+        self,
+        db: sqlite3.Connection,
+        po_number: int,
+        fields: Optional[Iterable[str]] = None,
+    ) -> PODetail:
         """
         Get full Purchase Order detail with items and delivery schedules.
         Includes SRV aggregated received/rejected quantities.
+
+        Child data is loaded with one grouped query per table and stitched in
+        memory, so the query count does not grow with the number of items.
+
+        Args:
+            fields: Optional projection over PO_DETAIL_FIELDS. The header is
+                    always returned; omit "deliveries" to skip lot schedules
+                    or "items" to return the header only.
         """
+        if fields is None:
+            fields = PO_DETAIL_FIELDS
+        else:
+            fields = set(fields)
+            unknown = fields - PO_DETAIL_FIELDS
+            if unknown:
+                raise bad_request(
+                    f"Invalid fields: {', '.join(sorted(unknown))}. "
+                    f"Allowed: {', '.join(sorted(PO_DETAIL_FIELDS))}"
+                )
+
         # Get header
         header_row = db.execute(
             """
@@ -171,7 +299,9 @@ class POService:
 
         header = POHeader(**header_dict)
 
-        # Get items with SRV aggregated data
+        if "items" not in fields:
+            return PODetail(header=header, items=[])
+
         item_rows = db.execute(
             """
             SELECT id, po_item_no, material_code, material_description, drg_no, mtrl_cat,
@@ -184,49 +314,67 @@ class POService:
             (po_number,),
         ).fetchall()
 
-        # For each item, get deliveries and SRV data
-        items_with_deliveries = []
-        for item_row in item_rows:
-            item_dict = dict(item_row)
-            item_id = item_dict["id"]
-            po_item_no = item_dict["po_item_no"]
-
-            # Get deliveries for this item
-            delivery_rows = db.execute(
+        # Per-item dispatched totals (one grouped query)
+        dispatched_by_item = {
+            row["po_item_id"]: row["dispatched"]
+            for row in db.execute(
                 """
-                SELECT id, lot_no, dely_qty as delivered_quantity, dely_date, entry_allow_date, dest_code
-                FROM purchase_order_deliveries
-                WHERE po_item_id = ?
-                ORDER BY lot_no
+                SELECT dci.po_item_id, SUM(dci.dispatch_qty) as dispatched
+                FROM purchase_order_items poi
+                JOIN delivery_challan_items dci ON dci.po_item_id = poi.id
+                WHERE poi.po_number = ?
+                GROUP BY dci.po_item_id
             """,
-                (item_id,),
-            ).fetchall()
-
-            deliveries = [dict(d) for d in delivery_rows]
+                (po_number,),
+            )
+        }
 
-            # Calculate per-item dispatched quantity
-            dispatched_res = db.execute(
+        # Per-item SRV totals (one grouped query)
+        srv_by_item_no = {
+            row["po_item_no"]: (row["total_received"], row["total_rejected"])
+            for row in db.execute(
                 """
-                SELECT COALESCE(SUM(dispatch_qty), 0) FROM delivery_challan_items WHERE po_item_id = ?
+                SELECT po_item_no,
+                       COALESCE(SUM(received_qty), 0) as total_received,
+                       COALESCE(SUM(rejected_qty), 0) as total_rejected
+                FROM srv_items
+                WHERE po_number = ?
+                GROUP BY po_item_no
             """,
-                (item_id,),
-            ).fetchone()
-            item_dispatched = dispatched_res[0] if dispatched_res else 0.0
+                (po_number,),
+            )
+        }
 
-            # Get SRV aggregated quantities for this item
-            srv_res = db.execute(
+        # All delivery lots for the PO (one query), grouped by item
+        deliveries_by_item: Dict[str, List[PODelivery]] = {}
+        if "deliveries" in fields:
+            delivery_rows = db.execute(
                 """
-                SELECT 
-                    COALESCE(SUM(received_qty), 0) as total_received,
-                    COALESCE(SUM(rejected_qty), 0) as total_rejected
-                FROM srv_items
-                WHERE po_number = ? AND po_item_no = ?
+                SELECT pod.po_item_id, pod.id, pod.lot_no, pod.dely_qty as delivered_quantity,
+                       pod.dely_date, pod.entry_allow_date, pod.dest_code
+                FROM purchase_order_items poi
+                JOIN purchase_order_deliveries pod ON pod.po_item_id = poi.id
+                WHERE poi.po_number = ?
+                ORDER BY pod.po_item_id, pod.lot_no
             """,
-                (po_number, po_item_no),
-            ).fetchone()
+                (po_number,),
+            ).fetchall()
+            for d in delivery_rows:
+                delivery = dict(d)
+                item_id = delivery.pop("po_item_id")
+                deliveries_by_item.setdefault(item_id, []).append(
+                    PODelivery(**delivery)
+                )
 
-            srv_received = srv_res[0] if srv_res else 0.0
-            srv_rejected = srv_res[1] if srv_res else 0.0
+        items = []
+        for item_row in item_rows:
+            item_dict = dict(item_row)
+            item_id = item_dict["id"]
+
+            item_dispatched = dispatched_by_item.get(item_id) or 0.0
+            srv_received, srv_rejected = srv_by_item_no.get(
+                item_dict["po_item_no"], (0.0, 0.0)
+            )
 
             # Update item with SRV quantities
             item_dict["received_quantity"] = srv_received
@@ -234,13 +382,13 @@ class POService:
             item_dict["delivered_quantity"] = item_dispatched
 
             # Calculate pending: Ordered - Delivered (dispatched)
-            item_ordered = item_dict.get("ordered_quantity", 0)
+            item_ordered = item_dict.get("ordered_quantity") or 0
             item_dict["pending_quantity"] = max(0, item_ordered - item_dispatched)
 
-            item_with_deliveries = {**item_dict, "deliveries": deliveries}
-            items_with_deliveries.append(POItem(**item_with_deliveries))
+            item_dict["deliveries"] = deliveries_by_item.get(item_id, [])
+            items.append(POItem(**item_dict))
 
-        return PODetail(header=header, items=items_with_deliveries)
+        return PODetail(header=header, items=items)
 
 
 # Singleton instance
@@ -0,0 +1,151 @@
+"""
+Reconciliation Ledger (materialized)
+reconciliation_ledger_mv holds one row per PO item with delivered, received,
+rejected and invoiced totals. Migration 021 installs the table and the
+triggers that keep it current; this module rebuilds it from source tables
+and cross-checks it against the reconciliation_ledger view.
+"""
+
+import logging
+import sqlite3
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_FILE = "021_reconciliation_ledger_mv.sql"
+
+LEDGER_COLUMNS = (
+    "ordered_quantity",
+    "total_delivered_qty",
+    "total_received_qty",
+    "total_rejected_qty",
+    "total_invoiced_qty",
+)
+
+# Set-based rebuild: each source table is aggregated once and joined back,
+# instead of the per-row correlated subqueries used by the view.
+REBUILD_SQL = """
+INSERT INTO reconciliation_ledger_mv (
+    po_number, po_item_no, po_item_id, material_code, material_description,
+    ordered_quantity, total_delivered_qty, total_received_qty,
+    total_rejected_qty, total_invoiced_qty
+)
+WITH delivered AS (
+    SELECT dci.po_item_id, SUM(dci.dispatch_qty) AS qty
+    FROM delivery_challan_items dci
+    JOIN delivery_challans dc ON dci.dc_number = dc.dc_number
+    GROUP BY dci.po_item_id
+),
+received AS (
+    SELECT si.po_number, si.po_item_no,
+           SUM(si.received_qty) AS received, SUM(si.rejected_qty) AS rejected
+    FROM srv_items si
+    JOIN srvs s ON si.srv_number = s.srv_number
+    WHERE s.is_active = 1
+    GROUP BY si.po_number, si.po_item_no
+),
+invoiced AS (
+    SELECT dci.po_item_id, SUM(gii.quantity) AS qty
+    FROM delivery_challan_items dci
+    JOIN gst_invoices gi ON gi.linked_dc_numbers = dci.dc_number
+    JOIN gst_invoice_items gii ON gii.invoice_number = gi.invoice_number
+    WHERE gii.po_sl_no = dci.lot_no
+    GROUP BY dci.po_item_id
+)
+SELECT
+    poi.po_number,
+    poi.po_item_no,
+    poi.id,
+    poi.material_code,
+    poi.material_description,
+    COALESCE(poi.ord_qty, 0),
+    COALESCE(d.qty, 0),
+    COALESCE(r.received, 0),
+    COALESCE(r.rejected, 0),
+    COALESCE(i.qty, 0)
+FROM purchase_order_items poi
+LEFT JOIN delivered d ON d.po_item_id = poi.id
+LEFT JOIN received r
+    ON r.po_number = CAST(poi.po_number AS TEXT) AND r.po_item_no = poi.po_item_no
+LEFT JOIN invoiced i ON i.po_item_id = poi.id
+"""
+
+
+def ledger_table_exists(db: sqlite3.Connection) -> bool:
+    row = db.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'reconciliation_ledger_mv'"
+    ).fetchone()
+    return row is not None
+
+
+def install_ledger(db: sqlite3.Connection, migrations_dir) -> None:
+    """Apply migration 021 (table, indexes, triggers). Idempotent."""
+    with open(migrations_dir / MIGRATION_FILE, "r", encoding="utf-8") as f:
+        db.executescript(f.read())
+
+
+def rebuild_reconciliation_ledger(db: sqlite3.Connection) -> int:
+    """
+    Repopulate reconciliation_ledger_mv from the source tables.
+    Runs inside the caller's transaction; returns the number of rows written.
+    """
+    db.execute("DELETE FROM reconciliation_ledger_mv")
+    cursor = db.execute(REBUILD_SQL)
+    logger.info(f"Rebuilt reconciliation_ledger_mv: {cursor.rowcount} rows")
+    return cursor.rowcount
+
+
+def verify_reconciliation_ledger(
+    db: sqlite3.Connection, tolerance: float = 0.001, limit: Optional[int] = None
+) -> List[Dict]:
+    """
+    Compare the materialized ledger against the reconciliation_ledger view.
+
+    Returns a list of mismatches, each with po_number, po_item_no, the
+    offending column and both values. Rows present on only one side are
+    reported with column 'row'.
+    """
+    view_rows = {
+        (row["po_number"], row["po_item_no"]): row
+        for row in db.execute(
+            f"SELECT po_number, po_item_no, {', '.join(LEDGER_COLUMNS)} FROM reconciliation_ledger"
+        )
+    }
+    mv_rows = {
+        (row["po_number"], row["po_item_no"]): row
+        for row in db.execute(
+            f"SELECT po_number, po_item_no, {', '.join(LEDGER_COLUMNS)} FROM reconciliation_ledger_mv"
+        )
+    }
+
+    mismatches = []
+    for key in sorted(view_rows.keys() | mv_rows.keys()):
+        expected, actual = view_rows.get(key), mv_rows.get(key)
+        if expected is None or actual is None:
+            mismatches.append(
+                {
+                    "po_number": key[0],
+                    "po_item_no": key[1],
+                    "column": "row",
+                    "view": expected is not None,
+                    "materialized": actual is not None,
+                }
+            )
+        else:
+            for column in LEDGER_COLUMNS:
+                view_value = expected[column] or 0
+                mv_value = actual[column] or 0
+                if abs(view_value - mv_value) > tolerance:
+                    mismatches.append(
+                        {
+                            "po_number": key[0],
+                            "po_item_no": key[1],
+                            "column": column,
+                            "view": view_value,
+                            "materialized": mv_value,
+                        }
+                    )
+        if limit and len(mismatches) >= limit:
+            break
+
+    return mismatches
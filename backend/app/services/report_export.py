@@ -0,0 +1,120 @@
+"""
+Report Export Formats
+Writes an executed report query to xlsx, csv, jsonl or parquet. Every
+format pulls rows from the cursor in fetchmany chunks into a spooled temp
+file, so extracts of any size run in bounded memory. Parquet needs pyarrow,
+which is only imported when that format is requested.
+"""
+
+import csv
+import io
+import json
+import sqlite3
+from typing import Callable, Dict, List, Tuple
+
+from fastapi.responses import StreamingResponse
+
+from app.errors import bad_request
+from app.services.excel_service import XLSX_MEDIA_TYPE, ExcelService
+from app.utils.file_stream import (
+    CURSOR_CHUNK_ROWS,
+    iter_cursor_rows,
+    new_spool,
+    spooled_file_response,
+)
+
+
+def _columns(cursor: sqlite3.Cursor) -> List[str]:
+    return [d[0] for d in cursor.description]
+
+
+def _write_xlsx(target, cursor: sqlite3.Cursor) -> None:
+    ExcelService.write_rows(target, _columns(cursor), iter_cursor_rows(cursor), width_padding=4)
+
+
+def _write_csv(target, cursor: sqlite3.Cursor) -> None:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(_columns(cursor))
+    while True:
+        target.write(buffer.getvalue().encode("utf-8"))
+        buffer.seek(0)
+        buffer.truncate()
+        rows = cursor.fetchmany(CURSOR_CHUNK_ROWS)
+        if not rows:
+            return
+        writer.writerows(rows)
+
+
+def _write_jsonl(target, cursor: sqlite3.Cursor) -> None:
+    columns = _columns(cursor)
+    while True:
+        rows = cursor.fetchmany(CURSOR_CHUNK_ROWS)
+        if not rows:
+            return
+        lines = (json.dumps(dict(zip(columns, row)), default=str) for row in rows)
+        target.write(("\n".join(lines) + "\n").encode("utf-8"))
+
+
+def _arrow_type(pa, values: List):
+    """
+    Column type from the first chunk: float64 for numbers, string for
+    anything else. SQLite types values per row, so a column that is all
+    integers so far (COALESCE(qty, 0)) can turn REAL in a later chunk; ints
+    are widened up front rather than fixing a schema they may not fit.
+    """
+    kinds = {type(v) for v in values if v is not None}
+    if kinds and kinds <= {int, float}:
+        return pa.float64()
+    return pa.string()
+
+
+def _write_parquet(target, cursor: sqlite3.Cursor) -> None:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise bad_request("Parquet export requires the pyarrow package")
+
+    columns = _columns(cursor)
+    rows = cursor.fetchmany(CURSOR_CHUNK_ROWS)
+    schema = pa.schema(
+        [(name, _arrow_type(pa, [row[i] for row in rows])) for i, name in enumerate(columns)]
+    )
+    with pq.ParquetWriter(target, schema) as writer:
+        # One row group per fetch chunk
+        while True:
+            data = {}
+            for i, field in enumerate(schema):
+                values = [row[i] for row in rows]
+                if pa.types.is_string(field.type):
+                    values = [None if v is None else str(v) for v in values]
+                data[field.name] = pa.array(values, type=field.type)
+            writer.write_table(pa.table(data, schema=schema))
+            rows = cursor.fetchmany(CURSOR_CHUNK_ROWS)
+            if not rows:
+                return
+
+
+# format -> (file extension, media type, writer)
+EXPORT_FORMATS: Dict[str, Tuple[str, str, Callable]] = {
+    "xlsx": ("xlsx", XLSX_MEDIA_TYPE, _write_xlsx),
+    "csv": ("csv", "text/csv; charset=utf-8", _write_csv),
+    "jsonl": ("jsonl", "application/x-ndjson", _write_jsonl),
+    "parquet": ("parquet", "application/vnd.apache.parquet", _write_parquet),
+}
+
+
+def export_cursor(cursor: sqlite3.Cursor, fmt: str, filename_stem: str) -> StreamingResponse:
+    """Write the cursor's rows in `fmt` and stream the file as an attachment"""
+    if fmt not in EXPORT_FORMATS:
+        raise bad_request(f"Unsupported export format '{fmt}'. Use one of: {', '.join(EXPORT_FORMATS)}")
+    extension, media_type, write = EXPORT_FORMATS[fmt]
+
+    spool = new_spool()
+    try:
+        write(spool, cursor)
+    except Exception:
+        spool.close()
+        raise
+    return spooled_file_response(spool, f"{filename_stem}.{extension}", media_type)
@@ -0,0 +1,347 @@
+"""
+Report Jobs
+Background execution of report exports. A submitted job gets an id right
+away; a small pool of daemon worker threads runs the report query on a
+pooled reader connection and writes the file to disk through the same
+writers as the synchronous exports. Clients poll the job for status and
+rows written, then download the result while it is retained. Cancelling a
+running job interrupts its SQLite statement.
+
+Jobs live in the memory of the process that accepted them, so polling and
+downloading only work when every request reaches that process: run the API
+with a single worker when report jobs are used. Each process keeps its
+result files in its own subdirectory of RESULT_DIR.
+"""
+
+import itertools
+import logging
+import os
+import queue
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+
+from app.db import DATABASE_DIR, ConnectionPool, get_pool
+from app.errors import bad_request, conflict, not_found, too_many_requests
+from app.services.report_export import EXPORT_FORMATS
+from app.services.report_service import REPORT_QUERIES, open_report_cursor
+from app.utils.file_stream import CURSOR_CHUNK_ROWS
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = 2
+MAX_PENDING_JOBS = 16
+RESULT_RETENTION_SECONDS = 60 * 60
+MAX_RETAINED_JOBS = 200
+RESULT_DIR = DATABASE_DIR / "report_jobs"
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+# Report name -> download filename stem, matching the synchronous exports
+REPORT_FILENAMES = {
+    "reconciliation": "PO_Reconciliation",
+    "sales": "Monthly_Sales",
+    "dc_register": "DC_Register",
+    "invoice_register": "Invoice_Register",
+    "pending": "Pending_PO_Items",
+    "po_register": "PO_Register",
+}
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def _timestamp(value: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(value).isoformat(timespec="seconds") if value else None
+
+
+@dataclass
+class ReportJob:
+    job_id: str
+    report: str
+    fmt: str
+    start_date: Optional[str]
+    end_date: Optional[str]
+    status: str = QUEUED
+    rows_written: int = 0
+    error: Optional[str] = None
+    path: Optional[Path] = None
+    filename: Optional[str] = None
+    media_type: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+    conn: Optional[sqlite3.Connection] = field(default=None, repr=False)
+
+    def to_dict(self, retention: float) -> Dict:
+        return {
+            "job_id": self.job_id,
+            "report": self.report,
+            "format": self.fmt,
+            "start_date": self.start_date,
+            "end_date": self.end_date,
+            "status": self.status,
+            "rows_written": self.rows_written,
+            "error": self.error,
+            "filename": self.filename,
+            "size_bytes": self.path.stat().st_size if self.path and self.path.exists() else None,
+            "created_at": _timestamp(self.created_at),
+            "started_at": _timestamp(self.started_at),
+            "finished_at": _timestamp(self.finished_at),
+            "expires_at": _timestamp(self.finished_at + retention) if self.finished_at else None,
+        }
+
+
+class _ProgressCursor:
+    """Cursor wrapper that counts fetched rows and stops once the job is cancelled"""
+
+    def __init__(self, cursor: sqlite3.Cursor, job: ReportJob):
+        self._cursor = cursor
+        self._job = job
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def fetchmany(self, size: int = CURSOR_CHUNK_ROWS):
+        if self._job.cancel_event.is_set():
+            raise JobCancelled()
+        rows = self._cursor.fetchmany(size)
+        self._job.rows_written += len(rows)
+        return rows
+
+
+class ReportJobManager:
+    """Bounded queue of report jobs served by a fixed set of worker threads"""
+
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        workers: int = JOB_WORKERS,
+        max_pending: int = MAX_PENDING_JOBS,
+        retention: float = RESULT_RETENTION_SECONDS,
+        max_retained: int = MAX_RETAINED_JOBS,
+        result_dir: Optional[Path] = None,
+    ):
+        self.pool = pool
+        self.workers = workers
+        self.max_pending = max_pending
+        self.retention = retention
+        self.max_retained = max_retained
+        self.result_dir = Path(result_dir or tempfile.mkdtemp(prefix="report-jobs-"))
+        self.result_dir.mkdir(parents=True, exist_ok=True)
+        self._queue: "queue.Queue[Optional[ReportJob]]" = queue.Queue()
+        self._jobs: "OrderedDict[str, ReportJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._thread_ids = itertools.count(1)
+
+    def _ensure_started(self) -> None:
+        self._threads = [t for t in self._threads if t.is_alive()]
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(
+                target=self._worker, name=f"report-job-{next(self._thread_ids)}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(
+        self, report: str, fmt: str = "xlsx", start_date: Optional[str] = None, end_date: Optional[str] = None
+    ) -> ReportJob:
+        """Queue a report export; raises 429 when too many jobs are waiting or running"""
+        if report not in REPORT_QUERIES:
+            raise bad_request(f"Unknown report '{report}'. Use one of: {', '.join(REPORT_QUERIES)}")
+        if fmt not in EXPORT_FORMATS:
+            raise bad_request(f"Unsupported export format '{fmt}'. Use one of: {', '.join(EXPORT_FORMATS)}")
+        if REPORT_QUERIES[report][1] and not (start_date and end_date):
+            raise bad_request(f"Report '{report}' needs a start_date and end_date")
+
+        self._sweep()
+        job = ReportJob(uuid.uuid4().hex, report, fmt, start_date, end_date)
+        with self._lock:
+            active = sum(1 for j in self._jobs.values() if j.status in (QUEUED, RUNNING))
+            if active >= self.max_pending:
+                raise too_many_requests(
+                    f"{active} report jobs are already queued or running; try again shortly", retry_after=30
+                )
+            self._ensure_started()
+            self._jobs[job.job_id] = job
+        self._queue.put(job)
+        return job
+
+    def get(self, job_id: str) -> ReportJob:
+        self._sweep()
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            raise not_found(f"Report job {job_id} not found", "ReportJob")
+        return job
+
+    def jobs(self) -> List[ReportJob]:
+        """Retained jobs, newest first"""
+        self._sweep()
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def result(self, job_id: str) -> ReportJob:
+        """A succeeded job whose file is still on disk"""
+        job = self.get(job_id)
+        if job.status != SUCCEEDED:
+            raise conflict(f"Report job {job_id} is {job.status}")
+        return job
+
+    def cancel(self, job_id: str) -> ReportJob:
+        """Cancel a queued or running job, or discard a finished job and its file"""
+        job = self.get(job_id)
+        with self._lock:
+            if job.status in FINISHED:
+                self._discard(job)
+                return job
+            job.cancel_event.set()
+            if job.status == QUEUED:
+                self._finish(job, CANCELLED)
+            elif job.conn is not None:
+                # Aborts the running statement with OperationalError("interrupted")
+                job.conn.interrupt()
+        return job
+
+    def shutdown(self, timeout: Optional[float] = None) -> None:
+        with self._lock:
+            for job in self._jobs.values():
+                job.cancel_event.set()
+                if job.conn is not None:
+                    job.conn.interrupt()
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        shutil.rmtree(self.result_dir, ignore_errors=True)
+
+    def _worker(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            self._run(job)
+
+    def _run(self, job: ReportJob) -> None:
+        with self._lock:
+            if job.status != QUEUED:
+                return
+            job.status = RUNNING
+            job.started_at = time.time()
+
+        extension, media_type, write = EXPORT_FORMATS[job.fmt]
+        path = self.result_dir / f"{job.job_id}.{extension}"
+        try:
+            with self.pool.reader() as db:
+                with self._lock:
+                    job.conn = db
+                try:
+                    if job.cancel_event.is_set():
+                        raise JobCancelled()
+                    cursor = open_report_cursor(job.report, db, job.start_date, job.end_date)
+                    with open(path, "wb") as target:
+                        write(target, _ProgressCursor(cursor, job))
+                finally:
+                    with self._lock:
+                        job.conn = None
+        except Exception as e:
+            path.unlink(missing_ok=True)
+            with self._lock:
+                if job.cancel_event.is_set():
+                    self._finish(job, CANCELLED)
+                    return
+                job.error = e.detail if isinstance(e, HTTPException) else str(e)
+                self._finish(job, FAILED)
+            logger.error(f"Report job {job.job_id} ({job.report}) failed: {e}", exc_info=True)
+            return
+
+        stem = REPORT_FILENAMES[job.report]
+        if job.start_date and job.end_date:
+            stem = f"{stem}_{job.start_date}_{job.end_date}"
+        with self._lock:
+            if job.cancel_event.is_set():
+                path.unlink(missing_ok=True)
+                self._finish(job, CANCELLED)
+                return
+            job.path = path
+            job.filename = f"{stem}.{extension}"
+            job.media_type = media_type
+            self._finish(job, SUCCEEDED)
+
+    def _finish(self, job: ReportJob, status: str) -> None:
+        job.status = status
+        job.finished_at = time.time()
+
+    def _discard(self, job: ReportJob) -> None:
+        self._jobs.pop(job.job_id, None)
+        if job.path is not None:
+            job.path.unlink(missing_ok=True)
+
+    def _sweep(self) -> None:
+        """Drop finished jobs past retention, and the oldest beyond max_retained"""
+        now = time.time()
+        with self._lock:
+            finished = [j for j in self._jobs.values() if j.status in FINISHED]
+            for job in finished:
+                if now - job.finished_at > self.retention:
+                    self._discard(job)
+            excess = len(self._jobs) - self.max_retained
+            for job in finished:
+                if excess <= 0:
+                    break
+                if job.job_id in self._jobs:
+                    self._discard(job)
+                    excess -= 1
+
+
+_manager: Optional[ReportJobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_report_jobs() -> ReportJobManager:
+    """Process-wide report job manager bound to the connection pool"""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                # Other workers share RESULT_DIR, so only this process's own
+                # directory is cleared; anything in it was left by an earlier
+                # process with the same pid that never reached shutdown
+                result_dir = RESULT_DIR / str(os.getpid())
+                shutil.rmtree(result_dir, ignore_errors=True)
+                _manager = ReportJobManager(get_pool(), result_dir=result_dir)
+    return _manager
+
+
+def shutdown_report_jobs() -> None:
+    """Stop the workers and remove result files, if the manager was ever started"""
+    global _manager
+    with _manager_lock:
+        manager, _manager = _manager, None
+    if manager is not None:
+        manager.shutdown(timeout=5)
+
+
+def set_report_jobs(manager: ReportJobManager) -> None:
+    """Replace the process-wide manager (tests bind it to their own pool)"""
+    global _manager
+    _manager = manager
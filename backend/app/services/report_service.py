@@ -7,6 +7,188 @@ Phase 4 Requirement: No AI, purely SQL-based.
 import sqlite3
 import pandas as pd
 
+# Schema Mapping:
+# - purchase_order_items.ord_qty -> ordered_qty
+# - srv_items JOIN on po_key (integer po_number, migration 027), po_item_no
+#
+# Each child table is aggregated once in its own CTE, restricted to the
+# selected POs, and joined back one row per key; no correlated subqueries
+# and no joins that multiply rows before summing.
+PO_RECONCILIATION_SQL = """
+WITH selected_pos AS (
+    SELECT po_number FROM purchase_orders WHERE po_date BETWEEN ? AND ?
+    UNION
+    SELECT po_number FROM delivery_challans WHERE dc_date BETWEEN ? AND ?
+),
+items AS (
+    SELECT poi.id, poi.po_number, poi.po_item_no, poi.material_description, poi.ord_qty
+    FROM selected_pos sp
+    JOIN purchase_orders po ON po.po_number = sp.po_number
+    JOIN purchase_order_items poi ON poi.po_number = po.po_number
+),
+dispatched AS (
+    SELECT i.id as po_item_id, SUM(dci.dispatch_qty) as total_dispatched
+    FROM items i
+    JOIN delivery_challan_items dci ON dci.po_item_id = i.id
+    GROUP BY i.id
+),
+received AS (
+    SELECT
+      srvi.po_key,
+      srvi.po_item_no,
+      SUM(srvi.accepted_qty) as total_accepted,
+      SUM(srvi.rejected_qty) as total_rejected
+    FROM srv_items srvi
+    JOIN srvs s ON srvi.srv_number = s.srv_number
+    WHERE srvi.po_key IN (SELECT po_number FROM selected_pos)
+      AND s.is_active = 1
+    GROUP BY srvi.po_key, srvi.po_item_no
+)
+SELECT
+  i.po_number,
+  i.po_item_no,
+  i.material_description as item_description,
+  i.ord_qty as ordered_qty,
+  COALESCE(d.total_dispatched, 0) as total_dispatched,
+  COALESCE(r.total_accepted, 0) as total_accepted,
+  COALESCE(r.total_rejected, 0) as total_rejected,
+  COALESCE(r.total_accepted, 0) + COALESCE(r.total_rejected, 0) as total_received
+FROM items i
+LEFT JOIN dispatched d ON d.po_item_id = i.id
+LEFT JOIN received r ON r.po_key = i.po_number AND r.po_item_no = i.po_item_no
+ORDER BY i.po_number, i.po_item_no;
+"""
+
+MONTHLY_SALES_SQL = """
+SELECT
+    strftime('%Y-%m', invoice_date) as month,
+    COUNT(invoice_number) as invoice_count,
+    SUM(taxable_value) as total_taxable,
+    SUM(cgst) as total_cgst,
+    SUM(sgst) as total_sgst,
+    SUM(igst) as total_igst,
+    SUM(total_invoice_value) as total_value
+FROM gst_invoices
+WHERE invoice_date BETWEEN ? AND ?
+GROUP BY month
+ORDER BY month DESC;
+"""
+
+DC_REGISTER_SQL = """
+WITH selected_dcs AS (
+    SELECT dc_number, dc_date, po_number, consignee_name
+    FROM delivery_challans
+    WHERE dc_date BETWEEN ? AND ?
+),
+item_totals AS (
+    SELECT
+        dci.dc_number,
+        COUNT(dci.id) as item_count,
+        SUM(dci.dispatch_qty) as total_qty,
+        SUM(dci.dispatch_qty * poi.po_rate) as total_value
+    FROM delivery_challan_items dci
+    LEFT JOIN purchase_order_items poi ON dci.po_item_id = poi.id
+    WHERE dci.dc_number IN (SELECT dc_number FROM selected_dcs)
+    GROUP BY dci.dc_number
+)
+SELECT
+    dc.dc_number,
+    dc.dc_date,
+    dc.po_number,
+    dc.consignee_name,
+    COALESCE(t.item_count, 0) as item_count,
+    t.total_qty,
+    t.total_value
+FROM selected_dcs dc
+LEFT JOIN item_totals t ON t.dc_number = dc.dc_number
+ORDER BY dc.dc_date DESC;
+"""
+
+INVOICE_REGISTER_SQL = """
+SELECT
+    invoice_number,
+    invoice_date,
+    linked_dc_numbers,
+    po_numbers,
+    customer_gstin,
+    taxable_value,
+    cgst,
+    sgst,
+    igst,
+    total_invoice_value
+FROM gst_invoices
+WHERE invoice_date BETWEEN ? AND ?
+ORDER BY invoice_date DESC;
+"""
+
+PENDING_PO_ITEMS_SQL = """
+SELECT
+    po_number,
+    po_item_no,
+    material_description,
+    ord_qty,
+    pending_qty,
+    (ord_qty - pending_qty) as delivered_qty
+FROM purchase_order_items
+WHERE pending_qty > 0
+ORDER BY po_number, po_item_no;
+"""
+
+PO_REGISTER_SQL = """
+WITH selected_pos AS (
+    SELECT po_number, po_date FROM purchase_orders WHERE po_date BETWEEN ? AND ?
+),
+item_totals AS (
+    SELECT poi.po_number, SUM(poi.ord_qty) as total_ordered, SUM(poi.pending_qty) as pending_qty
+    FROM purchase_order_items poi
+    WHERE poi.po_number IN (SELECT po_number FROM selected_pos)
+    GROUP BY poi.po_number
+),
+dispatch_totals AS (
+    SELECT poi.po_number, SUM(dci.dispatch_qty) as total_dispatched
+    FROM delivery_challan_items dci
+    JOIN purchase_order_items poi ON dci.po_item_id = poi.id
+    WHERE poi.po_number IN (SELECT po_number FROM selected_pos)
+    GROUP BY poi.po_number
+)
+SELECT
+    po.po_number,
+    po.po_date,
+    it.total_ordered,
+    COALESCE(dt.total_dispatched, 0) as total_dispatched,
+    it.pending_qty,
+    CASE
+        WHEN it.pending_qty <= 0 THEN 'Completed'
+        WHEN COALESCE(dt.total_dispatched, 0) > 0 THEN 'In Progress'
+        ELSE 'Pending'
+    END as status
+FROM selected_pos po
+JOIN item_totals it ON it.po_number = po.po_number
+LEFT JOIN dispatch_totals dt ON dt.po_number = po.po_number
+ORDER BY po.po_date DESC, po.po_number DESC;
+"""
+
+# Report name -> (query, number of (start_date, end_date) pairs it binds)
+REPORT_QUERIES = {
+    "reconciliation": (PO_RECONCILIATION_SQL, 2),
+    "sales": (MONTHLY_SALES_SQL, 1),
+    "dc_register": (DC_REGISTER_SQL, 1),
+    "invoice_register": (INVOICE_REGISTER_SQL, 1),
+    "pending": (PENDING_PO_ITEMS_SQL, 0),
+    "po_register": (PO_REGISTER_SQL, 1),
+}
+
+
+def open_report_cursor(
+    report: str, db: sqlite3.Connection, start_date: str = None, end_date: str = None
+) -> sqlite3.Cursor:
+    """
+    Execute a report query and return the live cursor, for exports that write
+    rows as they are fetched instead of materializing a DataFrame.
+    """
+    query, date_ranges = REPORT_QUERIES[report]
+    return db.execute(query, [start_date, end_date] * date_ranges)
+
 
 def get_po_reconciliation_by_date(
     start_date: str, end_date: str, db: sqlite3.Connection
@@ -14,59 +196,12 @@ def get_po_reconciliation_by_date(
     """
     Generate PO vs Delivered vs Received vs Rejected report.
     Adapted from Master Prompt to match actual Schema.
-
-    Schema Mapping:
-    - purchase_order_items.ord_qty -> ordered_qty
-    - srv_items JOIN on po_number, po_item_no (not id)
     """
-    query = """
-    SELECT 
-      poi.po_number,
-      poi.po_item_no,
-      poi.material_description as item_description,
-      poi.ord_qty as ordered_qty,
-      
-      -- Subquery for Total Dispatched
-      COALESCE((
-        SELECT SUM(dci.dispatch_qty) 
-        FROM delivery_challan_items dci 
-        WHERE dci.po_item_id = poi.id
-      ), 0) as total_dispatched,
-      
-      -- Subquery for Total Accepted/Rejected/Received
-      COALESCE((
-        SELECT SUM(srvi.accepted_qty)
-        FROM srv_items srvi
-        JOIN srvs s ON srvi.srv_number = s.srv_number
-        WHERE CAST(srvi.po_number AS TEXT) = CAST(poi.po_number AS TEXT) 
-          AND srvi.po_item_no = poi.po_item_no
-          AND s.is_active = 1
-      ), 0) as total_accepted,
-
-      COALESCE((
-        SELECT SUM(srvi.rejected_qty)
-        FROM srv_items srvi
-        JOIN srvs s ON srvi.srv_number = s.srv_number
-        WHERE CAST(srvi.po_number AS TEXT) = CAST(poi.po_number AS TEXT) 
-          AND srvi.po_item_no = poi.po_item_no
-          AND s.is_active = 1
-      ), 0) as total_rejected
-
-    FROM purchase_order_items poi
-    JOIN purchase_orders po ON poi.po_number = po.po_number
-    WHERE po.po_date BETWEEN ? AND ?
-       OR EXISTS (
-         SELECT 1 FROM delivery_challans dc 
-         WHERE dc.po_number = po.po_number AND dc.dc_date BETWEEN ? AND ?
-       )
-    ORDER BY poi.po_number, poi.po_item_no;
-    """
-
     # Use pandas for easy DataFrame handling
     try:
-        df = pd.read_sql_query(query, db, params=[start_date, end_date, start_date, end_date])
-        # Add a calculated 'total_received' column for the frontend
-        df['total_received'] = df['total_accepted'] + df['total_rejected']
+        df = pd.read_sql_query(
+            PO_RECONCILIATION_SQL, db, params=[start_date, end_date, start_date, end_date]
+        )
         # Ensure numeric types
         for col in ['ordered_qty', 'total_dispatched', 'total_accepted', 'total_rejected', 'total_received']:
             df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
@@ -82,22 +217,8 @@ def get_monthly_sales_summary(
     """
     Generate Monthly Sales Summary (Invoice Register essentially).
     """
-    query = """
-    SELECT 
-        strftime('%Y-%m', invoice_date) as month,
-        COUNT(invoice_number) as invoice_count,
-        SUM(taxable_value) as total_taxable,
-        SUM(cgst) as total_cgst,
-        SUM(sgst) as total_sgst,
-        SUM(igst) as total_igst,
-        SUM(total_invoice_value) as total_value
-    FROM gst_invoices
-    WHERE invoice_date BETWEEN ? AND ?
-    GROUP BY month
-    ORDER BY month DESC;
-    """
     try:
-        df = pd.read_sql_query(query, db, params=[start_date, end_date])
+        df = pd.read_sql_query(MONTHLY_SALES_SQL, db, params=[start_date, end_date])
         return df
     except Exception as e:
         print(f"Error generating Monthly Sales report: {e}")
@@ -110,24 +231,8 @@ def get_dc_register(
     """
     Generate DC Register.
     """
-    query = """
-    SELECT 
-        dc.dc_number,
-        dc.dc_date,
-        dc.po_number,
-        dc.consignee_name,
-        COUNT(dci.id) as item_count,
-        SUM(dci.dispatch_qty) as total_qty,
-        SUM(dci.dispatch_qty * poi.po_rate) as total_value
-    FROM delivery_challans dc
-    LEFT JOIN delivery_challan_items dci ON dc.dc_number = dci.dc_number
-    LEFT JOIN purchase_order_items poi ON dci.po_item_id = poi.id
-    WHERE dc.dc_date BETWEEN ? AND ?
-    GROUP BY dc.dc_number, dc.dc_date, dc.po_number, dc.consignee_name
-    ORDER BY dc.dc_date DESC;
-    """
     try:
-        df = pd.read_sql_query(query, db, params=[start_date, end_date])
+        df = pd.read_sql_query(DC_REGISTER_SQL, db, params=[start_date, end_date])
         return df
     except Exception as e:
         print(f"Error generating DC Register: {e}")
@@ -140,24 +245,8 @@ def get_invoice_register(
     """
     Detailed Invoice Register
     """
-    query = """
-    SELECT 
-        invoice_number,
-        invoice_date,
-        linked_dc_numbers,
-        po_numbers,
-        customer_gstin,
-        taxable_value,
-        cgst,
-        sgst,
-        igst,
-        total_invoice_value
-    FROM gst_invoices
-    WHERE invoice_date BETWEEN ? AND ?
-    ORDER BY invoice_date DESC;
-    """
     try:
-        df = pd.read_sql_query(query, db, params=[start_date, end_date])
+        df = pd.read_sql_query(INVOICE_REGISTER_SQL, db, params=[start_date, end_date])
         return df
     except Exception as e:
         print(f"Error generating Invoice Register: {e}")
@@ -168,20 +257,8 @@ def get_pending_po_items(db: sqlite3.Connection) -> pd.DataFrame:
     """
     Get items where pending_qty > 0
     """
-    query = """
-    SELECT 
-        po_number,
-        po_item_no,
-        material_description,
-        ord_qty,
-        pending_qty,
-        (ord_qty - pending_qty) as delivered_qty
-    FROM purchase_order_items
-    WHERE pending_qty > 0
-    ORDER BY po_number, po_item_no;
-    """
     try:
-        df = pd.read_sql_query(query, db)
+        df = pd.read_sql_query(PENDING_PO_ITEMS_SQL, db)
         return df
     except Exception as e:
         print(f"Error generating Pending PO Items report: {e}")
@@ -194,27 +271,8 @@ def get_po_register(
     """
     Summary of POs with totals.
     """
-    query = """
-    SELECT 
-        po.po_number,
-        po.po_date,
-        SUM(poi.ord_qty) as total_ordered,
-        COALESCE(SUM(dci.dispatch_qty), 0) as total_dispatched,
-        SUM(poi.pending_qty) as pending_qty,
-        CASE 
-            WHEN SUM(poi.pending_qty) <= 0 THEN 'Completed'
-            WHEN COALESCE(SUM(dci.dispatch_qty), 0) > 0 THEN 'In Progress'
-            ELSE 'Pending'
-        END as status
-    FROM purchase_orders po
-    JOIN purchase_order_items poi ON po.po_number = poi.po_number
-    LEFT JOIN delivery_challan_items dci ON poi.id = dci.po_item_id
-    WHERE po.po_date BETWEEN ? AND ?
-    GROUP BY po.po_number, po.po_date
-    ORDER BY po.po_date DESC;
-    """
     try:
-        df = pd.read_sql_query(query, db, params=[start_date, end_date])
+        df = pd.read_sql_query(PO_REGISTER_SQL, db, params=[start_date, end_date])
         return df
     except Exception as e:
         print(f"Error generating PO Register: {e}")
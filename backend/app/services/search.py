@@ -0,0 +1,141 @@
+"""
+Global Search
+Ranked full-text search over POs, DCs, invoices and SRVs using the FTS5
+index from migration 028 (search_index + search_docs, kept in sync by
+triggers). PO items are indexed as rows of their own and reported as their
+PO. Hits on document numbers come first, then hits on any field; each phase
+ranks at most CANDIDATE_LIMIT of the newest matches by bm25. Display fields
+are then fetched for just the hits, one IN (...) lookup per type.
+"""
+
+import re
+import sqlite3
+from typing import Dict, List
+
+from app.db import select_in
+
+MIGRATION_FILE = "028_search_index.sql"
+
+# type -> (label, table, key column, display columns)
+SEARCH_SOURCES = {
+    "PO": (
+        "Purchase Order",
+        "purchase_orders",
+        "po_number",
+        "po_date AS date, supplier_name AS party, po_value AS amount, COALESCE(po_status, 'New') AS status",
+    ),
+    "DC": (
+        "Delivery Challan",
+        "delivery_challans",
+        "dc_number",
+        "dc_date AS date, consignee_name AS party, NULL AS amount, 'Dispatched' AS status",
+    ),
+    "Invoice": (
+        "GST Invoice",
+        "gst_invoices",
+        "invoice_number",
+        "invoice_date AS date, COALESCE(NULLIF(buyer_name, ''), NULLIF(customer_gstin, ''), 'Client') AS party, "
+        "total_invoice_value AS amount, 'Paid' AS status",
+    ),
+    "SRV": (
+        "SRV",
+        "srvs",
+        "srv_number",
+        "srv_date AS date, 'PO ' || po_number AS party, NULL AS amount, COALESCE(srv_status, 'Received') AS status",
+    ),
+}
+
+# Newest matches ranked per phase; keeps very common terms (a buyer name on
+# every PO) from ranking the whole table
+CANDIDATE_LIMIT = 500
+
+# Item hits resolve to their PO; the caller drops repeats
+SEARCH_SQL = """
+    SELECT CASE d.doc_type WHEN 'POItem' THEN 'PO' ELSE d.doc_type END,
+           CASE d.doc_type
+               WHEN 'POItem' THEN (SELECT CAST(po_number AS TEXT) FROM purchase_order_items WHERE id = d.doc_key)
+               ELSE d.doc_key
+           END
+    FROM (
+        SELECT rowid, rank FROM search_index
+        WHERE search_index MATCH ?
+        ORDER BY rowid DESC
+        LIMIT ?
+    ) hits
+    JOIN search_docs d ON d.id = hits.rowid
+    ORDER BY hits.rank
+"""
+
+
+def build_match_query(q: str) -> str:
+    """
+    FTS5 query for free text: every whitespace-separated term must match as
+    a prefix. Punctuation inside a term splits it into a phrase, so
+    "DC-00" matches the tokens "dc" followed by "00...".
+    """
+    phrases = []
+    for term in q.split():
+        tokens = re.findall(r"\w+", term)
+        if tokens:
+            phrases.append('"' + " ".join(tokens) + '"*')
+    return " AND ".join(phrases)
+
+
+def search_index_exists(db: sqlite3.Connection) -> bool:
+    return db.execute("SELECT 1 FROM sqlite_master WHERE name = 'search_index'").fetchone() is not None
+
+
+def search_documents(db: sqlite3.Connection, q: str, limit: int = 20) -> List[Dict]:
+    """Best-ranked documents matching `q`, as SearchResult dicts"""
+    match = build_match_query(q)
+    if not match:
+        return []
+
+    # Document numbers first, then any other field
+    hits, seen = [], set()
+    for phase in (f"number : ({match})", match):
+        for hit in db.execute(SEARCH_SQL, (phase, CANDIDATE_LIMIT)):
+            if len(hits) >= limit:
+                break
+            if hit[1] is not None and hit not in seen:
+                seen.add(hit)
+                hits.append(hit)
+
+    keys_by_type: Dict[str, List[str]] = {}
+    for doc_type, doc_key in hits:
+        keys_by_type.setdefault(doc_type, []).append(doc_key)
+
+    details: Dict[tuple, Dict] = {}
+    for doc_type, keys in keys_by_type.items():
+        label, table, key_column, columns = SEARCH_SOURCES[doc_type]
+        sql = f"SELECT CAST({key_column} AS TEXT) AS number, {columns} FROM {table} WHERE {key_column} IN ({{}})"
+        for row in select_in(db, sql, keys):
+            details[(doc_type, row["number"])] = {
+                "id": row["number"],
+                "type": doc_type,
+                "type_label": label,
+                **dict(row),
+            }
+
+    # Rank order; skips any hit whose source row vanished mid-request
+    return [details[key] for key in map(tuple, hits) if key in details]
+
+
+def search_index_current(db: sqlite3.Connection) -> bool:
+    """Whether migration 028 is installed with per-item PO rows"""
+    row = db.execute("SELECT sql FROM sqlite_master WHERE name = 'search_po_item_insert'").fetchone()
+    return row is not None and "'POItem'" in row[0]
+
+
+def rebuild_search_index(db: sqlite3.Connection, migrations_dir) -> int:
+    """Drop and rebuild the index and its triggers from source tables; returns rows indexed"""
+    triggers = db.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'search\\_%' ESCAPE '\\'"
+    ).fetchall()
+    for (name,) in triggers:
+        db.execute(f"DROP TRIGGER IF EXISTS {name}")
+    db.execute("DROP TABLE IF EXISTS search_index")
+    db.execute("DROP TABLE IF EXISTS search_docs")
+    with open(migrations_dir / MIGRATION_FILE, "r", encoding="utf-8") as f:
+        db.executescript(f.read())
+    return db.execute("SELECT COUNT(*) FROM search_docs").fetchone()[0]
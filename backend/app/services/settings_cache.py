@@ -0,0 +1,109 @@
+"""
+Settings Cache
+In-process copy of business_settings and the default buyer for document
+rendering and /api/settings. Triggers from migration 026 bump
+settings_version on every write to either table; a cached snapshot is reused
+while its (token, version) still matches, so a document costs one
+primary-key probe instead of re-reading both tables for every header and
+buyer block. Snapshots are read-only mappings shared between requests.
+"""
+
+import sqlite3
+import threading
+from types import MappingProxyType
+from typing import Iterable, Mapping, Optional, Tuple
+
+from app.core.exceptions import ValidationError
+from app.models import Settings
+
+DEFAULT_BUYER_SQL = (
+    "SELECT name, billing_address, gstin, place_of_supply FROM buyers "
+    "WHERE is_default = 1 AND is_active = 1 LIMIT 1"
+)
+
+UPSERT_SETTING_SQL = """
+    INSERT INTO business_settings (key, value, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+    WHERE value IS NOT excluded.value
+"""
+
+# Keys the settings screens may write
+SETTINGS_KEYS = frozenset(Settings.model_fields)
+
+EMPTY = MappingProxyType({})
+
+# token -> (version, settings, default_buyer)
+_cache: dict = {}
+_lock = threading.Lock()
+
+
+def _read_settings(db: sqlite3.Connection) -> Mapping[str, str]:
+    return MappingProxyType({row[0]: row[1] for row in db.execute("SELECT key, value FROM business_settings")})
+
+
+def _read_default_buyer(db: sqlite3.Connection) -> Mapping:
+    try:
+        row = db.execute(DEFAULT_BUYER_SQL).fetchone()
+    except sqlite3.OperationalError:
+        # Databases created before the buyers table
+        return EMPTY
+    if not row:
+        return EMPTY
+    return MappingProxyType(dict(zip(("name", "billing_address", "gstin", "place_of_supply"), row)))
+
+
+def _current_version(db: sqlite3.Connection) -> Optional[Tuple[str, int]]:
+    """(token, version), or None on databases without migration 026"""
+    try:
+        row = db.execute("SELECT token, version FROM settings_version WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return (row[0], row[1]) if row else None
+
+
+def _snapshot(db: sqlite3.Connection) -> Tuple[Mapping[str, str], Mapping]:
+    current = _current_version(db)
+    if current is None:
+        return _read_settings(db), _read_default_buyer(db)
+
+    token, version = current
+    with _lock:
+        cached = _cache.get(token)
+    if cached and cached[0] == version:
+        return cached[1], cached[2]
+
+    settings, buyer = _read_settings(db), _read_default_buyer(db)
+    with _lock:
+        _cache[token] = (version, settings, buyer)
+    return settings, buyer
+
+
+def get_business_settings(db: sqlite3.Connection) -> Mapping[str, str]:
+    """business_settings as a read-only {key: value} mapping"""
+    return _snapshot(db)[0]
+
+
+def get_default_buyer(db: sqlite3.Connection) -> Mapping:
+    """The active default buyer (name, billing_address, gstin, place_of_supply), or an empty mapping"""
+    return _snapshot(db)[1]
+
+
+def update_settings(db: sqlite3.Connection, updates: Iterable[Tuple[str, str]]) -> Mapping[str, str]:
+    """
+    Upsert (key, value) pairs in the caller's transaction and return the new
+    settings. Unknown keys reject the whole batch; unchanged values are not
+    rewritten, so they do not invalidate cached snapshots. The result is read
+    straight from the connection: the transaction may still roll back, so its
+    version must never reach the cache.
+    """
+    updates = list(updates)
+    unknown = sorted({key for key, _ in updates} - SETTINGS_KEYS)
+    if unknown:
+        raise ValidationError(f"Unknown setting(s): {', '.join(unknown)}", details={"keys": unknown})
+    db.executemany(UPSERT_SETTING_SQL, updates)
+    return _read_settings(db)
+
+
+def clear_settings_cache() -> None:
+    with _lock:
+        _cache.clear()
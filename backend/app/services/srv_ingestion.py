@@ -6,16 +6,89 @@ Validates and inserts SRV data into the database.
 import sqlite3
 from typing import Dict, Tuple, List, Optional
 from datetime import datetime
-from app.services.srv_scraper import scrape_srv_html
+from app.db import select_in
+from app.services.ingestion_ledger import (
+    KIND_SRV,
+    content_hash,
+    find_previous,
+    note_documents,
+    record_outcome,
+)
+from app.services.srv_scraper import PARSER_VERSION, iter_srv_groups, merge_srv_groups
+
+# trigger_guards row that suspends the per-row srv_items receipt triggers (migration 022)
+SRV_RECEIPT_GUARD = "srv_receipts"
+
+
+def _po_key(po_number) -> str:
+    """purchase_orders.po_number is INTEGER; match SQLite's affinity for text values"""
+    try:
+        return str(int(po_number))
+    except (TypeError, ValueError):
+        return str(po_number)
 
 
-def validate_srv_data(srv_data: Dict, db: sqlite3.Connection) -> Tuple[bool, str, bool]:
+class SRVLookups:
+    """
+    PO, PO item and DC dispatch rows referenced by a set of SRVs, fetched
+    with one query per table instead of one per SRV item.
+    """
+
+    def __init__(self, db: sqlite3.Connection, srv_list: List[Dict]):
+        po_numbers = sorted(
+            {_po_key(s["header"]["po_number"]) for s in srv_list if s["header"].get("po_number")}
+        )
+        challans = sorted(
+            {i["challan_no"] for s in srv_list for i in s.get("items", []) if i.get("challan_no")}
+        )
+
+        self.po_numbers = {
+            _po_key(row[0])
+            for row in select_in(
+                db, "SELECT po_number FROM purchase_orders WHERE po_number IN ({})", po_numbers
+            )
+        }
+        self.po_items = {
+            (_po_key(row[0]), row[1])
+            for row in select_in(
+                db,
+                "SELECT po_number, po_item_no FROM purchase_order_items WHERE po_number IN ({})",
+                po_numbers,
+            )
+        }
+        self.dispatch: Dict[Tuple[str, str, int], float] = {}
+        for row in select_in(
+            db,
+            """
+            SELECT dci.dc_number, poi.po_number, poi.po_item_no, dci.dispatch_qty
+            FROM delivery_challan_items dci
+            JOIN purchase_order_items poi ON poi.id = dci.po_item_id
+            WHERE dci.dc_number IN ({})
+            """,
+            challans,
+        ):
+            self.dispatch.setdefault((row[0], _po_key(row[1]), row[2]), row[3])
+
+    def po_exists(self, po_number) -> bool:
+        return _po_key(po_number) in self.po_numbers
+
+    def po_item_exists(self, po_number, po_item_no) -> bool:
+        return (_po_key(po_number), po_item_no) in self.po_items
+
+    def dispatched_qty(self, challan_no: str, po_number, po_item_no) -> Optional[float]:
+        return self.dispatch.get((challan_no, _po_key(po_number), po_item_no))
+
+
+def validate_srv_data(
+    srv_data: Dict, db: sqlite3.Connection, lookups: Optional[SRVLookups] = None
+) -> Tuple[bool, str, bool]:
     """
     Validate SRV data before database insertion.
 
     Args:
         srv_data: Parsed SRV data from scraper
         db: Database session
+        lookups: Prefetched rows covering this SRV (fetched here if omitted)
 
     Returns:
         (is_valid: bool, message: str, po_found: bool)
@@ -37,12 +110,9 @@ def validate_srv_data(srv_data: Dict, db: sqlite3.Connection) -> Tuple[bool, str
     # existing_srv = db.execute(...)
 
     # Check if PO exists - WARNING instead of ERROR
-    po_exists = db.execute(
-        "SELECT po_number FROM purchase_orders WHERE po_number = :po_number",
-        {"po_number": header["po_number"]},
-    ).fetchone()
-
-    po_found = bool(po_exists)
+    if lookups is None:
+        lookups = SRVLookups(db, [srv_data])
+    po_found = lookups.po_exists(header["po_number"])
 
     if not po_found:
         # SRV-1: Strict PO Linkage Required.
@@ -104,15 +174,7 @@ def validate_srv_data(srv_data: Dict, db: sqlite3.Connection) -> Tuple[bool, str
                 return False, f"Item {idx + 1}: Missing PO item number", po_found
 
             # Check if PO item exists
-            po_item_exists = db.execute(
-                """
-                SELECT id, ord_qty, delivered_qty, pending_qty FROM purchase_order_items 
-                WHERE po_number = :po_number AND po_item_no = :po_item_no
-            """,
-                {"po_number": header["po_number"], "po_item_no": item["po_item_no"]},
-            ).fetchone()
-
-            if not po_item_exists:
+            if not lookups.po_item_exists(header["po_number"], item["po_item_no"]):
                 return (
                     False,
                     f"Item {idx + 1}: PO item number {item['po_item_no']} not found in PO {header['po_number']}",
@@ -124,19 +186,10 @@ def validate_srv_data(srv_data: Dict, db: sqlite3.Connection) -> Tuple[bool, str
             received_qty = item.get("received_qty", 0)
             
             if challan_no and po_found:
-                dc_item = db.execute(
-                    """
-                    SELECT dispatch_qty FROM delivery_challan_items 
-                    WHERE dc_number = ? AND po_item_id = (
-                        SELECT id FROM purchase_order_items 
-                        WHERE po_number = ? AND po_item_no = ?
-                    )
-                """,
-                    (challan_no, header["po_number"], item["po_item_no"]),
-                ).fetchone()
-
-                if dc_item:
-                    dispatched_qty = dc_item[0]
+                dispatched_qty = lookups.dispatched_qty(
+                    challan_no, header["po_number"], item["po_item_no"]
+                )
+                if dispatched_qty is not None:
                     if received_qty > dispatched_qty + 0.001:
                         return (
                             False,
@@ -147,6 +200,124 @@ def validate_srv_data(srv_data: Dict, db: sqlite3.Connection) -> Tuple[bool, str
     return True, "Valid", po_found
 
 
+INSERT_SRV_SQL = """
+    INSERT INTO srvs (srv_number, srv_date, po_number, srv_status, po_found, file_hash, is_active, created_at, updated_at)
+    VALUES (:srv_number, :srv_date, :po_number, :srv_status, :po_found, :file_hash, 1, :created_at, :updated_at)
+"""
+
+INSERT_SRV_ITEM_SQL = """
+    INSERT INTO srv_items 
+    (srv_number, po_number, po_item_no, lot_no, received_qty, rejected_qty, 
+     challan_no, invoice_no, remarks, created_at,
+     invoice_date, challan_date, order_qty, challan_qty, accepted_qty, unit,
+     div_code, pmir_no, finance_date, cnote_no, cnote_date)
+    VALUES 
+    (:srv_number, :po_number, :po_item_no, :lot_no, :received_qty, :rejected_qty,
+     :challan_no, :invoice_no, :remarks, :created_at,
+     :invoice_date, :challan_date, :order_qty, :challan_qty, :accepted_qty, :unit,
+     :div_code, :pmir_no, :finance_date, :cnote_no, :cnote_date)
+"""
+
+# Received / rejected totals for one PO item from its active SRVs, 0 when none;
+# the srv_items triggers from migration 032 use the same definition
+RECOMPUTE_PO_ITEM_RECEIPTS_SQL = """
+    UPDATE purchase_order_items
+    SET
+        rcd_qty = COALESCE((
+            SELECT SUM(si.received_qty) FROM srv_items si
+            JOIN srvs s ON si.srv_number = s.srv_number
+            WHERE si.po_number = CAST(purchase_order_items.po_number AS TEXT)
+            AND si.po_item_no = purchase_order_items.po_item_no AND s.is_active = 1
+        ), 0),
+        rejected_qty = COALESCE((
+            SELECT SUM(si.rejected_qty) FROM srv_items si
+            JOIN srvs s ON si.srv_number = s.srv_number
+            WHERE si.po_number = CAST(purchase_order_items.po_number AS TEXT)
+            AND si.po_item_no = purchase_order_items.po_item_no AND s.is_active = 1
+        ), 0),
+        updated_at = :updated_at
+    WHERE po_number = :po_number AND po_item_no = :po_item_no
+"""
+
+RECOMPUTE_LEDGER_RECEIPTS_SQL = """
+    UPDATE reconciliation_ledger_mv
+    SET
+        total_received_qty = COALESCE((
+            SELECT SUM(si.received_qty) FROM srv_items si
+            JOIN srvs s ON si.srv_number = s.srv_number
+            WHERE si.po_number = CAST(reconciliation_ledger_mv.po_number AS TEXT)
+            AND si.po_item_no = reconciliation_ledger_mv.po_item_no AND s.is_active = 1
+        ), 0),
+        total_rejected_qty = COALESCE((
+            SELECT SUM(si.rejected_qty) FROM srv_items si
+            JOIN srvs s ON si.srv_number = s.srv_number
+            WHERE si.po_number = CAST(reconciliation_ledger_mv.po_number AS TEXT)
+            AND si.po_item_no = reconciliation_ledger_mv.po_item_no AND s.is_active = 1
+        ), 0)
+    WHERE po_number = :po_number AND po_item_no = :po_item_no
+"""
+
+# trg_lot_rollup_refresh recomputes the item's lots on insert
+QUEUE_LOT_ROLLUP_SQL = """
+    INSERT OR IGNORE INTO lot_rollup_refresh (po_item_id)
+    SELECT id FROM purchase_order_items WHERE po_number = :po_number AND po_item_no = :po_item_no
+"""
+
+
+def _srv_params(header: Dict, po_found: bool) -> Dict:
+    now = datetime.now().isoformat()
+    return {
+        "srv_number": header["srv_number"],
+        "srv_date": header["srv_date"],
+        "po_number": header["po_number"],
+        "srv_status": "Received",
+        "po_found": 1 if po_found else 0,
+        "file_hash": header.get("file_hash"),
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def _srv_item_params(header: Dict, items: List[Dict]) -> List[Dict]:
+    now = datetime.now().isoformat()
+    rows = []
+    for item in items:
+        # Enforce accounting invariant: Received = Accepted + Rejected
+        received_qty = item.get("received_qty", 0)
+        rejected_qty = item.get("rejected_qty", 0)
+        accepted_qty = item.get("accepted_qty", 0)
+
+        if accepted_qty == 0 and received_qty > 0:
+            accepted_qty = max(0, received_qty - rejected_qty)
+
+        rows.append(
+            {
+                "srv_number": header["srv_number"],
+                "po_number": header["po_number"],
+                "po_item_no": item["po_item_no"],
+                "lot_no": item.get("lot_no"),
+                "received_qty": received_qty,
+                "rejected_qty": rejected_qty,
+                "challan_no": item.get("challan_no"),
+                "invoice_no": item.get("invoice_no"),
+                "remarks": item.get("remarks"),
+                "created_at": now,
+                "invoice_date": item.get("invoice_date"),
+                "challan_date": item.get("challan_date"),
+                "order_qty": item.get("order_qty", 0),
+                "challan_qty": item.get("challan_qty", 0),
+                "accepted_qty": accepted_qty,
+                "unit": item.get("unit"),
+                "div_code": item.get("div_code"),
+                "pmir_no": item.get("pmir_no"),
+                "finance_date": item.get("finance_date"),
+                "cnote_no": item.get("cnote_no"),
+                "cnote_date": item.get("cnote_date"),
+            }
+        )
+    return rows
+
+
 def ingest_srv_to_db(
     srv_data: Dict, db: sqlite3.Connection, po_found: bool = True
 ) -> bool:
@@ -170,70 +341,10 @@ def ingest_srv_to_db(
 
     try:
         # 1. Insert NEW SRV header (Soft Delete logic removed as duplicates are rejected)
-        db.execute(
-            """
-            INSERT INTO srvs (srv_number, srv_date, po_number, srv_status, po_found, file_hash, is_active, created_at, updated_at)
-            VALUES (:srv_number, :srv_date, :po_number, :srv_status, :po_found, :file_hash, 1, :created_at, :updated_at)
-        """,
-            {
-                "srv_number": header["srv_number"],
-                "srv_date": header["srv_date"],
-                "po_number": header["po_number"],
-                "srv_status": "Received",
-                "po_found": 1 if po_found else 0,
-                "file_hash": header.get("file_hash"),
-                "created_at": datetime.now().isoformat(),
-                "updated_at": datetime.now().isoformat(),
-            },
-        )
+        db.execute(INSERT_SRV_SQL, _srv_params(header, po_found))
 
         # 2. Insert SRV items
-        for item in items:
-            # Enforce accounting invariant: Received = Accepted + Rejected
-            received_qty = item.get("received_qty", 0)
-            rejected_qty = item.get("rejected_qty", 0)
-            accepted_qty = item.get("accepted_qty", 0)
-
-            if accepted_qty == 0 and received_qty > 0:
-                accepted_qty = max(0, received_qty - rejected_qty)
-
-            db.execute(
-                """
-                INSERT INTO srv_items 
-                (srv_number, po_number, po_item_no, lot_no, received_qty, rejected_qty, 
-                 challan_no, invoice_no, remarks, created_at,
-                 invoice_date, challan_date, order_qty, challan_qty, accepted_qty, unit,
-                 div_code, pmir_no, finance_date, cnote_no, cnote_date)
-                VALUES 
-                (:srv_number, :po_number, :po_item_no, :lot_no, :received_qty, :rejected_qty,
-                 :challan_no, :invoice_no, :remarks, :created_at,
-                 :invoice_date, :challan_date, :order_qty, :challan_qty, :accepted_qty, :unit,
-                 :div_code, :pmir_no, :finance_date, :cnote_no, :cnote_date)
-            """,
-                {
-                    "srv_number": header["srv_number"],
-                    "po_number": header["po_number"],
-                    "po_item_no": item["po_item_no"],
-                    "lot_no": item.get("lot_no"),
-                    "received_qty": received_qty,
-                    "rejected_qty": rejected_qty,
-                    "challan_no": item.get("challan_no"),
-                    "invoice_no": item.get("invoice_no"),
-                    "remarks": item.get("remarks"),
-                    "created_at": datetime.now().isoformat(),
-                    "invoice_date": item.get("invoice_date"),
-                    "challan_date": item.get("challan_date"),
-                    "order_qty": item.get("order_qty", 0),
-                    "challan_qty": item.get("challan_qty", 0),
-                    "accepted_qty": accepted_qty,
-                    "unit": item.get("unit"),
-                    "div_code": item.get("div_code"),
-                    "pmir_no": item.get("pmir_no"),
-                    "finance_date": item.get("finance_date"),
-                    "cnote_no": item.get("cnote_no"),
-                    "cnote_date": item.get("cnote_date"),
-                },
-            )
+        db.executemany(INSERT_SRV_ITEM_SQL, _srv_item_params(header, items))
 
         # 3. Update PO item quantities if PO exists
         if po_found:
@@ -317,53 +428,54 @@ def get_srv_aggregated_quantities(po_number: str, db: sqlite3.Connection) -> Dic
     return aggregated
 
 
-def process_srv_file(
-    contents: bytes,
-    filename: str,
-    db: sqlite3.Connection,
-    po_from_filename: Optional[int] = None,
-) -> Tuple[bool, List[str]]:
-    """
-    Process an uploaded SRV HTML file.
-    Parses content, validates against DB, and ingests if valid.
-    Handles files containing multiple SRVs.
+def ingest_srv_batch(srv_list: List[Dict], db: sqlite3.Connection) -> List[Dict]:
     """
-    import hashlib
+    Validate and ingest every SRV parsed from one file in a single transaction.
 
-    file_hash = hashlib.sha256(contents).hexdigest()
+    SRVs already in the database are replaced (uploads overwrite). Validation
+    runs against PO, PO item and DC rows prefetched for the whole file, items
+    are written with executemany, and rcd_qty / rejected_qty are recomputed
+    once per touched PO item at the end. While the batch runs, the per-row
+    srv_items receipt triggers are suspended through trigger_guards.
 
+    Returns:
+        One {"success", "srv_number", "error" | "warnings"} dict per SRV, in order
+    """
     try:
-        html_content = contents.decode("utf-8")
-        srv_list = scrape_srv_html(html_content)
+        return _ingest_srv_batch(srv_list, db, isolate=False)
+    except sqlite3.Error as e:
+        # Rolled back; replay with a savepoint per SRV to skip only the bad ones
+        print(f"Bulk SRV insert failed ({e}); retrying SRV by SRV")
+        return _ingest_srv_batch(srv_list, db, isolate=True)
 
-        if not srv_list:
-            return False, ["No valid SRVs found in file"]
 
-        results = []
+def _ingest_srv_batch(srv_list: List[Dict], db: sqlite3.Connection, isolate: bool) -> List[Dict]:
+    if not db.in_transaction:
+        db.execute("BEGIN")
+    try:
+        guarded = _suspend_receipt_triggers(db)
+        srv_numbers = [s["header"].get("srv_number") for s in srv_list]
+
+        # Replace: drop the previous copies of these SRVs first
+        touched = {
+            (row[0], row[1])
+            for row in select_in(
+                db,
+                "SELECT DISTINCT po_number, po_item_no FROM srv_items WHERE srv_number IN ({})",
+                srv_numbers,
+            )
+        }
+        for start in range(0, len(srv_numbers), 500):
+            chunk = srv_numbers[start : start + 500]
+            marks = ",".join("?" * len(chunk))
+            db.execute(f"DELETE FROM srv_items WHERE srv_number IN ({marks})", chunk)
+            db.execute(f"DELETE FROM srvs WHERE srv_number IN ({marks})", chunk)
+
+        lookups = SRVLookups(db, srv_list)
+        results, valid = [], []
         for srv_data in srv_list:
-            header = srv_data.get("header", {})
-            header["file_hash"] = file_hash  # Inject hash
-
-            # Check for exact duplicate file upload (Idempotency)
-            # User requested Overwrite instead of Skip.
-            # So we check if SRV exists, and if so, delete it before re-ingesting.
-
-            existing_srv = db.execute(
-                "SELECT 1 FROM srvs WHERE srv_number = :srv_number",
-                {"srv_number": header.get("srv_number")},
-            ).fetchone()
-
-            if existing_srv:
-                # Delete existing SRV to allow overwrite
-                # This handles rollback of quantities from PO items implicitly in delete_srv
-                delete_srv(header.get("srv_number"), db)
-
-            # If PO extraction failed from HTML, try filename fallback
-            if not header.get("po_number") and po_from_filename:
-                header["po_number"] = str(po_from_filename)
-
-            # Validate
-            is_valid, message, po_found = validate_srv_data(srv_data, db)
+            header = srv_data["header"]
+            is_valid, message, po_found = validate_srv_data(srv_data, db, lookups)
 
             # Add po_found status to header for ingestion
             header["po_found"] = po_found
@@ -379,26 +491,148 @@ def process_srv_file(
                     }
                 )
                 continue
+            valid.append(srv_data)
+            results.append(
+                {
+                    "success": True,
+                    "srv_number": header.get("srv_number"),
+                    "warnings": [message] if not po_found else [],
+                }
+            )
 
-            # Ingest
-            try:
-                ingest_srv_to_db(srv_data, db, po_found)
-                results.append(
-                    {
-                        "success": True,
-                        "srv_number": header.get("srv_number"),
-                        "warnings": [message] if not po_found else [],
-                    }
-                )
-            except Exception as e:
-                print(f"Error ingesting SRV {header.get('srv_number')}: {e}")
-                results.append(
-                    {
-                        "success": False,
-                        "srv_number": header.get("srv_number", "Unknown"),
-                        "error": str(e),
-                    }
-                )
+        errors = _insert_srvs(db, valid, isolate)
+        for result in results:
+            if result["srv_number"] in errors:
+                result.update(success=False, error=errors[result["srv_number"]])
+                result.pop("warnings", None)
+
+        for srv_data in valid:
+            if srv_data["header"]["srv_number"] not in errors:
+                po_number = srv_data["header"]["po_number"]
+                touched.update((po_number, item["po_item_no"]) for item in srv_data["items"])
+        _recompute_receipts(db, touched)
+
+        if guarded:
+            db.execute("DELETE FROM trigger_guards WHERE name = ?", (SRV_RECEIPT_GUARD,))
+        db.commit()
+        return results
+
+    except Exception:
+        db.rollback()
+        raise
+
+
+def _suspend_receipt_triggers(db: sqlite3.Connection) -> bool:
+    """Set the srv_receipts guard for this transaction; False before migration 022"""
+    has_guards = db.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'trigger_guards'"
+    ).fetchone()
+    if not has_guards:
+        return False
+    db.execute("INSERT OR IGNORE INTO trigger_guards (name) VALUES (?)", (SRV_RECEIPT_GUARD,))
+    return True
+
+
+def _insert_srvs(db: sqlite3.Connection, srv_list: List[Dict], isolate: bool) -> Dict[str, str]:
+    """
+    Insert headers and items with executemany. With `isolate`, each SRV gets
+    its own savepoint so a failing one is skipped instead of failing the batch
+    (savepoints re-journal pages the replace step already touched, so the
+    plain path is used first).
+    Returns {srv_number: error} for SRVs that could not be inserted.
+    """
+
+    def insert(batch: List[Dict]) -> None:
+        db.executemany(
+            INSERT_SRV_SQL, [_srv_params(s["header"], s["header"]["po_found"]) for s in batch]
+        )
+        db.executemany(
+            INSERT_SRV_ITEM_SQL,
+            [row for s in batch for row in _srv_item_params(s["header"], s["items"])],
+        )
+
+    if not isolate:
+        insert(srv_list)
+        return {}
+
+    errors = {}
+    for srv_data in srv_list:
+        db.execute("SAVEPOINT srv_insert")
+        try:
+            insert([srv_data])
+        except sqlite3.Error as e:
+            print(f"Error ingesting SRV {srv_data['header'].get('srv_number')}: {e}")
+            db.execute("ROLLBACK TO srv_insert")
+            errors[srv_data["header"]["srv_number"]] = str(e)
+        db.execute("RELEASE srv_insert")
+    return errors
+
+
+def _recompute_receipts(db: sqlite3.Connection, touched) -> None:
+    """Refresh received / rejected totals once per (po_number, po_item_no)"""
+    if not touched:
+        return
+    now = datetime.now().isoformat()
+    keys = [
+        {"po_number": po_number, "po_item_no": po_item_no, "updated_at": now}
+        for po_number, po_item_no in sorted(touched, key=lambda k: (str(k[0]), k[1] or 0))
+    ]
+    db.executemany(RECOMPUTE_PO_ITEM_RECEIPTS_SQL, keys)
+
+    has_ledger = db.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'reconciliation_ledger_mv'"
+    ).fetchone()
+    if has_ledger:
+        db.executemany(RECOMPUTE_LEDGER_RECEIPTS_SQL, keys)
+
+    has_rollup = db.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'lot_rollup_refresh'"
+    ).fetchone()
+    if has_rollup:
+        db.executemany(QUEUE_LOT_ROLLUP_SQL, keys)
+
+
+def previous_srv_messages(db: sqlite3.Connection, file_hash: str) -> Optional[List[str]]:
+    """Messages for a file already ingested in full (ingestion ledger), or None"""
+    previous = find_previous(db, KIND_SRV, [file_hash], PARSER_VERSION).get(file_hash)
+    if not previous:
+        return None
+    return [
+        f"Unchanged since {previous['ingested_at']}; skipped (use force=true to re-ingest)"
+    ] + previous["outcome"]["messages"]
+
+
+def parse_srv_file(
+    contents: bytes, file_hash: str, po_from_filename: Optional[int] = None
+) -> List[Dict]:
+    """
+    SRVs in an uploaded SRV HTML file, tagged with the file hash and, where
+    the HTML has no PO number, the one from the filename. Touches no database,
+    so uploads parse before taking the writer.
+    """
+    srv_list = merge_srv_groups(iter_srv_groups(contents))
+    for srv_data in srv_list:
+        header = srv_data.get("header", {})
+        header["file_hash"] = file_hash  # Inject hash
+
+        # If PO extraction failed from HTML, try filename fallback
+        if not header.get("po_number") and po_from_filename:
+            header["po_number"] = str(po_from_filename)
+    return srv_list
+
+
+def ingest_srv_file(
+    srv_list: List[Dict], file_hash: str, filename: str, db: sqlite3.Connection
+) -> Tuple[bool, List[str]]:
+    """
+    Write step for one parsed SRV file: validate and ingest its SRVs and
+    record the outcome in the ingestion ledger.
+    """
+    try:
+        if not srv_list:
+            return False, ["No valid SRVs found in file"]
+
+        results = ingest_srv_batch(srv_list, db)
 
         # Summarize results
         success_count = sum(1 for r in results if r["success"])
@@ -416,6 +650,22 @@ def process_srv_file(
             else:
                 all_messages.append(f"{prefix}Failed: {r['error']}")
 
+        ingested = [r["srv_number"] for r in results if r["success"]]
+        if success_count == len(results):
+            record_outcome(
+                db,
+                KIND_SRV,
+                file_hash,
+                PARSER_VERSION,
+                filename,
+                ingested,
+                {"messages": all_messages},
+            )
+        else:
+            # Partial file: remember which SRVs it wrote, but re-parse it next time
+            note_documents(db, KIND_SRV, file_hash, ingested)
+        db.commit()
+
         if success_count > 0:
             return True, all_messages
         else:
@@ -429,6 +679,34 @@ def process_srv_file(
         return False, [str(e)]
 
 
+def process_srv_file(
+    contents: bytes,
+    filename: str,
+    db: sqlite3.Connection,
+    po_from_filename: Optional[int] = None,
+    force: bool = False,
+) -> Tuple[bool, List[str]]:
+    """
+    Process an uploaded SRV HTML file.
+    Parses content, validates against DB, and ingests if valid.
+    Handles files containing multiple SRVs. A file already ingested in full
+    returns its previous messages without parsing, unless force=True.
+    """
+    file_hash = content_hash(contents)
+
+    try:
+        if not force:
+            skipped = previous_srv_messages(db, file_hash)
+            if skipped:
+                return True, skipped
+        srv_list = parse_srv_file(contents, file_hash, po_from_filename)
+    except Exception as e:
+        print(f"Error processing SRV file {filename}: {e}")
+        return False, [str(e)]
+
+    return ingest_srv_file(srv_list, file_hash, filename, db)
+
+
 def delete_srv(srv_number: str, db: sqlite3.Connection) -> Tuple[bool, str]:
     """
     Delete an SRV (Hard Delete) and rollback quantities.
@@ -437,7 +715,7 @@ def delete_srv(srv_number: str, db: sqlite3.Connection) -> Tuple[bool, str]:
     1. Identify affected PO items.
     2. Permanently DELETE srv_items and srvs records.
     3. Recalculate 'rcd_qty' and 'rejected_qty' for affected PO items
-       by summing up remaining SRV items.
+       by summing up the remaining active SRV items.
 
     Args:
         srv_number: SRV number to delete
@@ -477,43 +755,8 @@ def delete_srv(srv_number: str, db: sqlite3.Connection) -> Tuple[bool, str]:
             {"srv_number": srv_number},
         )
 
-        # 4. Recalculate quantities for affected PO items
-        for row in affected_items:
-            po_number, po_item_no = row
-
-            # Sum up remaining SRV items
-            srv_totals = db.execute(
-                """
-                SELECT 
-                    COALESCE(SUM(received_qty), 0) as total_received,
-                    COALESCE(SUM(rejected_qty), 0) as total_rejected
-                FROM srv_items
-                WHERE po_number = :po_number AND po_item_no = :po_item_no
-            """,
-                {"po_number": po_number, "po_item_no": po_item_no},
-            ).fetchone()
-
-            if srv_totals:
-                received_qty = float(srv_totals[0])
-                rejected_qty = float(srv_totals[1])
-
-                db.execute(
-                    """
-                    UPDATE purchase_order_items
-                    SET 
-                        rcd_qty = :received_qty,
-                        rejected_qty = :rejected_qty,
-                        updated_at = :now
-                    WHERE po_number = :po_number AND po_item_no = :po_item_no
-                """,
-                    {
-                        "received_qty": received_qty,
-                        "rejected_qty": rejected_qty,
-                        "now": datetime.now().isoformat(),
-                        "po_number": po_number,
-                        "po_item_no": po_item_no,
-                    },
-                )
+        # 4. Recalculate quantities for affected PO items from the remaining active SRVs
+        _recompute_receipts(db, {(row[0], row[1]) for row in affected_items})
 
         db.commit()
         return True, f"SRV {srv_number} has been permanently deleted"
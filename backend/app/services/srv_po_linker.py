@@ -56,14 +56,15 @@ def update_srvs_on_po_upload(po_number: str, db) -> int:
 
             # Update each PO item
             for item in srv_items:
-                # Get aggregated totals from all SRVs for this PO item
+                # Aggregated totals from all active SRVs for this PO item
                 srv_totals = db.execute(
                     """
                     SELECT 
-                        COALESCE(SUM(received_qty), 0) as total_received,
-                        COALESCE(SUM(rejected_qty), 0) as total_rejected
-                    FROM srv_items
-                    WHERE po_number = :po_number AND po_item_no = :po_item_no
+                        COALESCE(SUM(si.received_qty), 0) as total_received,
+                        COALESCE(SUM(si.rejected_qty), 0) as total_rejected
+                    FROM srv_items si
+                    JOIN srvs s ON si.srv_number = s.srv_number
+                    WHERE si.po_number = :po_number AND si.po_item_no = :po_item_no AND s.is_active = 1
                 """,
                     {"po_number": po_number, "po_item_no": item["po_item_no"]},
                 ).fetchone()
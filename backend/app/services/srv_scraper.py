@@ -4,15 +4,173 @@ Parses SRV HTML files from buyers (BHEL, NTPC, etc.) and extracts structured dat
 """
 
 from bs4 import BeautifulSoup
-from typing import Dict, List, Optional
+from lxml import etree
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Union
 import re
 from datetime import datetime
 
+# Bump when extraction output changes so the ingestion ledger re-parses old uploads
+PARSER_VERSION = "1"
+
+
+SRV_NUMBER_KEYS = ["SRV NO", "SRV", "SRV_NO"]
+PO_NUMBER_KEYS = ["PO NO", "PURCHASE ORDER", "PO_NO", "PO NUMBER"]
+SRV_DATE_KEYS = ["SRV DATE", "DATE"]
+
+# Item fields: (field, header keys, parser). First key present in the header wins.
+ITEM_FIELDS = [
+    ("lot_no", ["SUB ITM", "LOT NO", "LOT"], "int"),
+    ("received_qty", ["RECVD QTY", "RECEIVED QTY", "RCD QTY", "RECEIVED"], "decimal"),
+    ("rejected_qty", ["REJ QTY", "REJECTED QTY", "REJECTED"], "decimal"),
+    (
+        "accepted_qty",
+        ["ACCEPTED QTY", "ACCPT QTY", "ACCEPTED", "ACCEPTED QUANTITY", "OK QTY", "QTY OK"],
+        "decimal",
+    ),
+    ("challan_no", ["CHALLAN NO", "CHALLAN", "DC NO", "DC NUMBER", "CHALLAN NUMBER"], "text"),
+    ("challan_date", ["CHALLAN DATE", "CHALLAN DT", "DC DATE", "DC DT"], "date"),
+    (
+        "invoice_no",
+        ["TAX INV", "INVOICE NO", "INV NO", "TAX INVOICE NO", "TAX INVOICE", "GST INV NO"],
+        "text",
+    ),
+    (
+        "invoice_date",
+        ["TAX INV DT", "INVOICE DATE", "INV DT", "TAX INVOICE DATE", "TAX INV DATE"],
+        "date",
+    ),
+    ("unit", ["UNIT", "UOM"], "text"),
+    (
+        "order_qty",
+        ["ORDER QTY", "PO QTY", "ORDERED QTY", "PO QUANTITY", "ORDER QUANTITY"],
+        "decimal",
+    ),
+    ("challan_qty", ["CHALLAN QTY", "DC QTY", "DC QUANTITY", "CHALLAN QUANTITY"], "decimal"),
+    ("div_code", ["DIV", "DIVISION"], "text"),
+    ("pmir_no", ["PMIR NO", "PMIR"], "text"),
+    ("finance_date", ["FINANCE DT", "FINANCE DATE"], "date"),
+    ("cnote_no", ["CNOTE NO.", "CNOTE NO", "CNOTE"], "text"),
+    ("cnote_date", ["CNOTE DATE", "CNOTE DT"], "date"),
+]
+
+
+def normalize_header(text: str) -> str:
+    """Upper-case a header cell and collapse internal whitespace"""
+    return " ".join(text.upper().split())
+
+
+def is_srv_table(headers: List[str]) -> bool:
+    """Main SRV table has PO ITM and SRV NO columns (or their variants)"""
+    header_set = set(headers)
+    return ("PO ITM" in header_set or "PO ITEM" in header_set) and (
+        "SRV NO" in header_set or "SRV NUMBER" in header_set
+    )
+
+
+class SRVRowReader:
+    """
+    Column lookups for one SRV table, resolved once from its header row and
+    applied to the cell texts of each data row.
+    """
+
+    def __init__(self, headers: List[str]):
+        self.headers = headers
+        self.header_map = {h: i for i, h in enumerate(headers)}
+        self.item_columns = [
+            (field, self._first_column(keys), kind) for field, keys, kind in ITEM_FIELDS
+        ]
+        self.po_item_column = self._first_column(
+            ["PO ITM", "ITEM", "ITM", "PO_ITM", "PO ITEM"]
+        )
+
+    def _first_column(self, keys: List[str]) -> Optional[int]:
+        for key in keys:
+            if key in self.header_map:
+                return self.header_map[key]
+        return None
+
+    def _cell(self, values: List[str], keys: List[str]) -> Optional[str]:
+        """First key whose column exists in this row"""
+        for key in keys:
+            idx = self.header_map.get(key)
+            if idx is not None and idx < len(values):
+                return values[idx]
+        return None
+
+    def srv_number(self, values: List[str]) -> Optional[str]:
+        """SRV number of a data row, or None for blank/repeated-header rows"""
+        if len(values) < 5:
+            return None
+        srv_number = self._cell(values, SRV_NUMBER_KEYS)
+        if not srv_number or srv_number in ["SRV NO", "SRV ITM", "SRV"]:
+            return None
+        if not re.search(r"\d+", srv_number):
+            return None
+        return srv_number
+
+    def header(self, values: List[str], srv_number: str) -> Dict:
+        po_number_raw = self._cell(values, PO_NUMBER_KEYS)
+        po_number = str(parse_int(po_number_raw)) if po_number_raw else None
+        return {
+            "srv_number": srv_number,
+            "srv_date": parse_date(self._cell(values, SRV_DATE_KEYS)),
+            "po_number": po_number,
+            "srv_status": "Received",
+            "po_found": True,  # Default, updated in ingestion
+        }
+
+    def item(self, values: List[str]) -> Optional[Dict]:
+        """Parse a single SRV item row."""
+        item = {
+            "po_item_no": None,
+            "lot_no": None,
+            "received_qty": 0,
+            "rejected_qty": 0,
+            "challan_no": None,
+            "invoice_no": None,
+        }
+
+        try:
+            # Extract PO Item Number
+            val = values[self.po_item_column] if self.po_item_column is not None else None
+            if val:
+                item["po_item_no"] = parse_int(val)
+            elif len(values) > 0:
+                # Fallback when the header has no usable PO ITM column
+                try:
+                    item["po_item_no"] = parse_int(values[2])  # Index 2 is PO ITM usually
+                except Exception:
+                    pass
+
+            # Extract SRV Number (for internal grouping/validation)
+            srv_column = self._first_column(SRV_NUMBER_KEYS)
+            item["row_srv_number"] = values[srv_column] if srv_column is not None else None
+
+            for field, idx, kind in self.item_columns:
+                val = values[idx] if idx is not None else None
+                if kind == "int":
+                    item[field] = parse_int(val)
+                elif kind == "decimal":
+                    item[field] = parse_decimal(val)
+                elif kind == "date":
+                    item[field] = parse_date(val)
+                else:
+                    item[field] = val or None
+
+            return item
+
+        except Exception as e:
+            print(f"Error parsing SRV item row: {e}")
+            return None
+
 
 def scrape_srv_html(html_content: str) -> List[Dict]:
     """
     Parse SRV HTML and extract structured data for MULTIPLE SRVs.
 
+    Builds the whole document tree; iter_srv_groups() streams the same
+    result for large exports.
+
     Args:
         html_content: Raw HTML string from SRV file
 
@@ -35,223 +193,202 @@ def scrape_srv_html(html_content: str) -> List[Dict]:
         if not header_row:
             continue
 
-        headers = []
-        for th in header_row.find_all(["th", "td"]):
-            text = th.get_text(strip=True).upper()
-            # Normalize whitespace: replace multiple spaces with single space
-            text = " ".join(text.split())
-            headers.append(text)
+        headers = [
+            normalize_header(th.get_text(strip=True))
+            for th in header_row.find_all(["th", "td"])
+        ]
 
         # Check if this is the main table (has PO ITM, SRV NO, RECVD QTY etc)
-        # Also check for "PO ITEM" or "SRV NO" variates
-        header_set = set(headers)
-        if ("PO ITM" in header_set or "PO ITEM" in header_set) and (
-            "SRV NO" in header_set or "SRV NUMBER" in header_set
-        ):
-            # Process data rows
-            rows = table.find_all("tr")[1:]  # Skip header
-
-            for row in rows:
-                cells = row.find_all("td")
-                if len(cells) < 5 or (
-                    len(cells) == 1 and cells[0].get_text(strip=True) == ""
-                ):
-                    continue
-
-                # Parse the row
-                # We need a temporary item extraction to get the SRV Number
-                # We reuse parse_srv_item_row but we need to extract header info from it too
-
-                # To do this cleanly, we'll manually extract SRV NO first
-                # Map headers
-                header_map = {h: i for i, h in enumerate(headers)}
-
-                def get_cell_val(keys):
-                    for key in keys:
-                        if key in header_map and header_map[key] < len(cells):
-                            return cells[header_map[key]].get_text(strip=True)
-                    return None
-
-                srv_number = get_cell_val(["SRV NO", "SRV", "SRV_NO"])
-
-                # Validation: Skip header rows or invalid rows
-                if not srv_number or srv_number in ["SRV NO", "SRV ITM", "SRV"]:
-                    continue
-                if not re.search(r"\d+", srv_number):
-                    continue
-
-                # Initialize group if not exists
-                if srv_number not in srv_groups:
-                    # Extract Header Info from this row
-                    po_number_raw = get_cell_val(
-                        ["PO NO", "PURCHASE ORDER", "PO_NO", "PO NUMBER"]
-                    )
-                    po_number = str(parse_int(po_number_raw)) if po_number_raw else None
-                    srv_date = parse_date(get_cell_val(["SRV DATE", "DATE"]))
-
-                    srv_groups[srv_number] = {
-                        "header": {
-                            "srv_number": srv_number,
-                            "srv_date": srv_date,
-                            "po_number": po_number,
-                            "srv_status": "Received",
-                            "po_found": True,  # Default, updated in ingestion
-                        },
-                        "items": [],
-                    }
-
-                # Extract Item
-                item = parse_srv_item_row(cells, headers)
-                if item and item.get("po_item_no") is not None:
-                    srv_groups[srv_number]["items"].append(item)
-
-    # Convert groups to list
-    results = []
-    for srv_num, data in srv_groups.items():
-        results.append(data)
-
-    return results
-
-
-# Deprecated/Unused helper functions kept for compatibility if needed,
-# but effectively replaced by the logic above.
-# We can remove extract_srv_header and extract_srv_items entirely
-# or keep them as stubs if other code imports them (unlikely).
-# For cleanliness, I will allow them to remain but scrape_srv_html is the entry point.
+        if not is_srv_table(headers):
+            continue
 
+        reader = SRVRowReader(headers)
+        for row in table.find_all("tr")[1:]:  # Skip header
+            values = [td.get_text(strip=True) for td in row.find_all("td")]
+            srv_number = reader.srv_number(values)
+            if srv_number is None:
+                continue
 
-def parse_srv_item_row(cells: List, headers: List[str]) -> Optional[Dict]:
-    """Parse a single SRV item row."""
-    item = {
-        "po_item_no": None,
-        "lot_no": None,
-        "received_qty": 0,
-        "rejected_qty": 0,
-        "challan_no": None,
-        "invoice_no": None,
-    }
+            # Initialize group if not exists
+            if srv_number not in srv_groups:
+                srv_groups[srv_number] = {
+                    "header": reader.header(values, srv_number),
+                    "items": [],
+                }
 
-    try:
-        # Map headers to cell indexes
-        header_map = {}
-        for idx, header in enumerate(headers):
-            header_map[header] = idx
-
-        # Helper to safely get cell text
-        def get_val(keys):
-            for key in keys:
-                if key in header_map:
-                    return cells[header_map[key]].get_text(strip=True)
-            return None
+            item = reader.item(values)
+            if item and item.get("po_item_no") is not None:
+                srv_groups[srv_number]["items"].append(item)
 
-        # Extract PO Item Number
-        val = get_val(["PO ITM", "ITEM", "ITM", "PO_ITM", "PO ITEM"])
-        if val:
-            item["po_item_no"] = parse_int(val)
-        elif len(cells) > 0:
-            # Fallback to logic if header parsing completely failed but structure is known
-            # But with the exact map this shouldn't be needed often
-            try:
-                item["po_item_no"] = parse_int(
-                    cells[2].get_text(strip=True)
-                )  # Index 2 is PO ITM usually
-            except Exception:
-                pass
-
-        # Extract SRV Number (for internal grouping/validation)
-        item["row_srv_number"] = get_val(["SRV NO", "SRV", "SRV_NO"])
-
-        # Extract Lot Number (SUB ITM)
-        item["lot_no"] = parse_int(get_val(["SUB ITM", "LOT NO", "LOT"]))
-
-        # Extract Received Quantity
-        item["received_qty"] = parse_decimal(
-            get_val(["RECVD QTY", "RECEIVED QTY", "RCD QTY", "RECEIVED"])
-        )
+    return list(srv_groups.values())
 
-        # Extract Rejected Quantity
-        item["rejected_qty"] = parse_decimal(
-            get_val(["REJ QTY", "REJECTED QTY", "REJECTED"])
-        )
 
-        # Extract Accepted Quantity
-        item["accepted_qty"] = parse_decimal(
-            get_val(
-                [
-                    "ACCEPTED QTY",
-                    "ACCPT QTY",
-                    "ACCEPTED",
-                    "ACCEPTED QUANTITY",
-                    "OK QTY",
-                    "QTY OK",
-                ]
-            )
-        )
+# Tags whose text BeautifulSoup leaves out of get_text()
+_NON_TEXT_TAGS = {"script", "style", "template"}
 
-        # Extract Challan Number
-        item["challan_no"] = (
-            get_val(["CHALLAN NO", "CHALLAN", "DC NO", "DC NUMBER", "CHALLAN NUMBER"])
-            or None
-        )
+# Bytes handed to the parser per feed() call
+FEED_CHUNK_BYTES = 64 * 1024
 
-        # Extract Challan Date
-        item["challan_date"] = parse_date(
-            get_val(["CHALLAN DATE", "CHALLAN DT", "DC DATE", "DC DT"])
-        )
 
-        # Extract Invoice Number (TAX INV)
-        item["invoice_no"] = (
-            get_val(
-                [
-                    "TAX INV",
-                    "INVOICE NO",
-                    "INV NO",
-                    "TAX INVOICE NO",
-                    "TAX INVOICE",
-                    "GST INV NO",
-                ]
-            )
-            or None
-        )
+class _SRVParserTarget:
+    """
+    lxml parser target (SAX-style callbacks, no tree is built) that reads
+    SRV tables row by row and hands each finished SRV group to `emit`.
+    """
 
-        # Extract Invoice Date (TAX INV DT)
-        item["invoice_date"] = parse_date(
-            get_val(
-                [
-                    "TAX INV DT",
-                    "INVOICE DATE",
-                    "INV DT",
-                    "TAX INVOICE DATE",
-                    "TAX INV DATE",
-                ]
-            )
-        )
+    def __init__(self, emit):
+        self.emit = emit
+        self.tables: List[Dict] = []  # open <table>s, innermost last
+        self.row: Optional[List] = None  # [(cell tag, parts)] of the open <tr>
+        self.cells: List[List[str]] = []  # text parts of open <th>/<td>, nested ones included
+        self.text: List[str] = []  # one text node, which libxml2 may deliver in pieces
+        self.skip_depth = 0
+        self.current: Optional[Dict] = None
+
+    def _flush_text(self) -> None:
+        if self.text:
+            node = "".join(self.text).strip()
+            self.text = []
+            if node:
+                for parts in self.cells:
+                    parts.append(node)
+
+    def start(self, tag, attrib) -> None:
+        self._flush_text()
+        if self.skip_depth or tag in _NON_TEXT_TAGS:
+            self.skip_depth += 1
+        elif tag == "table":
+            self.tables.append({"reader": None, "seen_header": False})
+        elif tag == "tr":
+            self.row = []
+        elif tag in ("td", "th") and self.row is not None:
+            parts: List[str] = []
+            self.row.append((tag, parts))
+            self.cells.append(parts)
+
+    def end(self, tag) -> None:
+        self._flush_text()
+        if self.skip_depth:
+            self.skip_depth -= 1
+        elif tag == "table":
+            if self.tables:
+                self.tables.pop()
+        elif tag in ("td", "th"):
+            if self.cells:
+                self.cells.pop()
+        elif tag == "tr" and self.row is not None:
+            row, self.row, self.cells = self.row, None, []
+            if self.tables:
+                self._read_row(self.tables[-1], row)
+
+    def data(self, text) -> None:
+        if not self.skip_depth:
+            self.text.append(text)
+
+    def comment(self, text) -> None:
+        self._flush_text()
+
+    def pi(self, target, data=None) -> None:
+        self._flush_text()
+
+    def close(self) -> None:
+        if self.current is not None:
+            self.emit(self.current)
+            self.current = None
+
+    def _read_row(self, table: Dict, row: List) -> None:
+        if not table["seen_header"]:
+            table["seen_header"] = True
+            headers = [normalize_header("".join(parts)) for _, parts in row]
+            if is_srv_table(headers):
+                table["reader"] = SRVRowReader(headers)
+            return
+
+        reader = table["reader"]
+        if reader is None:
+            return
+        values = ["".join(parts) for tag, parts in row if tag == "td"]
+        srv_number = reader.srv_number(values)
+        if srv_number is None:
+            return
+        if self.current is None or self.current["header"]["srv_number"] != srv_number:
+            if self.current is not None:
+                self.emit(self.current)
+            self.current = {"header": reader.header(values, srv_number), "items": []}
+        item = reader.item(values)
+        if item and item.get("po_item_no") is not None:
+            self.current["items"].append(item)
+
+
+class _ChunkReader:
+    """File-like view over str/bytes input for the parser to read from"""
+
+    def __init__(self, source):
+        self._source = source
+        self._pos = 0
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0:
+            size = len(self._source) - self._pos
+        chunk = self._source[self._pos : self._pos + size]
+        self._pos += len(chunk)
+        return chunk.encode("utf-8") if isinstance(chunk, str) else bytes(chunk)
+
+
+def iter_srv_groups(source: Union[str, bytes, BinaryIO]) -> Iterator[Dict]:
+    """
+    Stream SRV groups out of an SRV HTML export.
 
-        # Extract Unit
-        item["unit"] = get_val(["UNIT", "UOM"]) or None
+    The file is fed to lxml's HTML parser FEED_CHUNK_BYTES at a time, in the
+    calling thread, with a SAX-style target, so no document tree is built;
+    memory stays bounded by one chunk plus the SRV groups it completes,
+    whatever the file size. Input is only read as the consumer asks for
+    more groups.
 
-        # Extract Quantities
-        item["order_qty"] = parse_decimal(
-            get_val(
-                ["ORDER QTY", "PO QTY", "ORDERED QTY", "PO QUANTITY", "ORDER QUANTITY"]
-            )
-        )
-        item["challan_qty"] = parse_decimal(
-            get_val(["CHALLAN QTY", "DC QTY", "DC QUANTITY", "CHALLAN QUANTITY"])
-        )
+    Yields {"header": ..., "items": [...]} each time the SRV number changes.
+    BHEL exports list an SRV's rows together; if an SRV's rows are split by
+    another SRV, each run is yielded separately (merge_srv_groups() folds
+    them back into scrape_srv_html()'s shape). Rows of a nested table are
+    read as part of that table only.
 
-        # Extract Extended Fields
-        item["div_code"] = get_val(["DIV", "DIVISION"]) or None
-        item["pmir_no"] = get_val(["PMIR NO", "PMIR"]) or None
-        item["finance_date"] = parse_date(get_val(["FINANCE DT", "FINANCE DATE"]))
-        item["cnote_no"] = get_val(["CNOTE NO.", "CNOTE NO", "CNOTE"]) or None
-        item["cnote_date"] = parse_date(get_val(["CNOTE DATE", "CNOTE DT"]))
+    Args:
+        source: HTML as str, UTF-8 bytes, or a binary file object
+    """
+    if isinstance(source, (str, bytes, bytearray, memoryview)):
+        source = _ChunkReader(source)
+
+    finished: List[Dict] = []
+    parser = etree.HTMLParser(target=_SRVParserTarget(finished.append), encoding="utf-8")
+    fed = False
+    while True:
+        chunk = source.read(FEED_CHUNK_BYTES)
+        if not chunk:
+            break
+        parser.feed(chunk)
+        fed = True
+        ready = finished[:]
+        finished.clear()
+        yield from ready
+    if fed:
+        parser.close()
+    yield from finished
+
+
+def merge_srv_groups(groups: Iterable[Dict]) -> List[Dict]:
+    """Combine repeated runs of the same SRV, in order of first appearance"""
+    merged: Dict[str, Dict] = {}
+    for group in groups:
+        srv_number = group["header"]["srv_number"]
+        if srv_number in merged:
+            merged[srv_number]["items"].extend(group["items"])
+        else:
+            merged[srv_number] = group
+    return list(merged.values())
 
-        return item
 
-    except Exception as e:
-        print(f"Error parsing SRV item row: {e}")
-        return None
+def parse_srv_item_row(cells: List, headers: List[str]) -> Optional[Dict]:
+    """Parse a single SRV item row from BeautifulSoup cells."""
+    return SRVRowReader(headers).item([cell.get_text(strip=True) for cell in cells])
 
 
 def parse_date(date_str: str) -> Optional[str]:
@@ -0,0 +1,134 @@
+"""
+Typeahead
+In-memory prefix index over PO, DC, invoice and SRV numbers and material
+codes. Each kind is a sorted list of lower-cased values, so a prefix lookup
+is one bisect plus a walk over the matches. The index is built from the
+source tables once, then kept current from typeahead_log (migration 029):
+every lookup first applies the log rows written since the last one it saw,
+which costs a single rowid probe when nothing has changed.
+"""
+
+import bisect
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional
+
+MIGRATION_FILE = "029_typeahead_log.sql"
+
+# kind -> query returning (value, count)
+TYPEAHEAD_SOURCES = {
+    "po": "SELECT CAST(po_number AS TEXT), 1 FROM purchase_orders",
+    "dc": "SELECT dc_number, 1 FROM delivery_challans",
+    "invoice": "SELECT invoice_number, 1 FROM gst_invoices",
+    "srv": "SELECT srv_number, 1 FROM srvs",
+    "material": (
+        "SELECT material_code, COUNT(*) FROM purchase_order_items "
+        "WHERE COALESCE(material_code, '') != '' GROUP BY material_code"
+    ),
+}
+
+KINDS = tuple(TYPEAHEAD_SOURCES)
+
+
+class _Keys:
+    """Sorted lower-cased keys for one kind, with display value and count per key"""
+
+    def __init__(self, rows: Iterable):
+        self.values: Dict[str, str] = {}
+        self.counts: Dict[str, int] = {}
+        for value, count in rows:
+            if value:
+                key = value.lower()
+                self.values.setdefault(key, value)
+                self.counts[key] = self.counts.get(key, 0) + count
+        self.keys = sorted(self.counts)
+
+    def apply(self, value: str, delta: int) -> None:
+        key = value.lower()
+        count = self.counts.get(key, 0) + delta
+        if count > 0:
+            if key not in self.counts:
+                bisect.insort(self.keys, key)
+                self.values[key] = value
+            self.counts[key] = count
+        elif key in self.counts:
+            del self.keys[bisect.bisect_left(self.keys, key)]
+            del self.counts[key]
+            del self.values[key]
+
+    def prefixed(self, prefix: str, limit: int) -> List[str]:
+        keys = self.keys
+        start = bisect.bisect_left(keys, prefix)
+        end = min(start + limit, len(keys))
+        i = start
+        while i < end and keys[i].startswith(prefix):
+            i += 1
+        return [self.values[k] for k in keys[start:i]]
+
+
+class TypeaheadIndex:
+    def __init__(self):
+        self._kinds: Dict[str, _Keys] = {}
+        self._seq: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def rebuild(self, db: sqlite3.Connection) -> None:
+        """Reload every kind from the source tables"""
+        # One read transaction, so the log position matches the rows read
+        own_txn = not db.in_transaction
+        if own_txn:
+            db.execute("BEGIN")
+        try:
+            seq = _last_seq(db)
+            kinds = {kind: _Keys(db.execute(sql)) for kind, sql in TYPEAHEAD_SOURCES.items()}
+        finally:
+            if own_txn:
+                db.execute("COMMIT")
+        with self._lock:
+            self._kinds, self._seq = kinds, seq
+
+    def refresh(self, db: sqlite3.Connection) -> None:
+        """Apply log rows written since the last refresh; rebuild if the log was pruned past them"""
+        seq = _last_seq(db)
+        if self._seq is not None and seq == self._seq:
+            return
+        with self._lock:
+            if self._seq is not None:
+                rows = db.execute(
+                    "SELECT seq, kind, value, delta FROM typeahead_log WHERE seq > ? ORDER BY seq",
+                    (self._seq,),
+                ).fetchall()
+                # The first unseen row must still be in the log
+                if not rows or rows[0][0] == self._seq + 1:
+                    for row_seq, kind, value, delta in rows:
+                        self._kinds[kind].apply(value, delta)
+                        self._seq = row_seq
+                    return
+        self.rebuild(db)
+
+    def suggest(
+        self, db: sqlite3.Connection, prefix: str, kinds: Iterable[str] = KINDS, limit: int = 10
+    ) -> List[Dict[str, str]]:
+        """Up to `limit` values starting with `prefix` (case-insensitive), in sort order per kind"""
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+        self.refresh(db)
+        with self._lock:
+            hits = [
+                {"kind": kind, "value": value}
+                for kind in kinds
+                for value in self._kinds[kind].prefixed(prefix, limit)
+            ]
+        return hits[:limit]
+
+
+def _last_seq(db: sqlite3.Connection) -> int:
+    return db.execute("SELECT COALESCE(MAX(seq), 0) FROM typeahead_log").fetchone()[0]
+
+
+_index = TypeaheadIndex()
+
+
+def get_typeahead_index() -> TypeaheadIndex:
+    return _index
@@ -0,0 +1,48 @@
+"""
+File streaming helpers for exports
+Large exports are written into a spooled temp file (memory up to a limit,
+then disk) and streamed to the client in blocks, so the response never holds
+the whole file as one bytes object.
+"""
+
+import sqlite3
+import tempfile
+from typing import Iterator, Sequence
+
+from fastapi.responses import StreamingResponse
+
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+STREAM_BLOCK_BYTES = 64 * 1024
+CURSOR_CHUNK_ROWS = 1000
+
+
+def new_spool() -> tempfile.SpooledTemporaryFile:
+    """Binary temp file that stays in memory until SPOOL_MAX_BYTES"""
+    return tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES, mode="w+b")
+
+
+def iter_cursor_rows(cursor: sqlite3.Cursor, chunk_size: int = CURSOR_CHUNK_ROWS) -> Iterator[Sequence]:
+    """Yield a cursor's rows, fetching chunk_size at a time"""
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def spooled_file_response(spool, filename: str, media_type: str) -> StreamingResponse:
+    """Stream a finished spool as an attachment, closing it once sent"""
+    spool.seek(0)
+
+    def blocks():
+        try:
+            while True:
+                block = spool.read(STREAM_BLOCK_BYTES)
+                if not block:
+                    break
+                yield block
+        finally:
+            spool.close()
+
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    return StreamingResponse(blocks(), media_type=media_type, headers=headers)
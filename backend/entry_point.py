@@ -10,7 +10,22 @@ import traceback
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, current_dir)
 
-from app.db import validate_database_path, verify_wal_mode
+from app.db import (
+    validate_database_path,
+    verify_wal_mode,
+    ensure_reconciliation_ledger,
+    ensure_srv_trigger_guards,
+    ensure_ingestion_ledger,
+    ensure_dashboard_snapshot,
+    ensure_activity_feed_indexes,
+    ensure_settings_version,
+    ensure_srv_items_po_key,
+    ensure_search_index,
+    ensure_typeahead_log,
+    ensure_lot_rollup,
+    ensure_document_financial_year,
+    ensure_srv_receipt_totals,
+)
 
 # Graceful shutdown handler
 def shutdown_handler(signum, frame):
@@ -29,6 +44,18 @@ if __name__ == "__main__":
     print("=== SenstoSales ERP Backend ===")
     print("Initializing database...")
     validate_database_path()
+    ensure_reconciliation_ledger()
+    ensure_srv_trigger_guards()
+    ensure_ingestion_ledger()
+    ensure_dashboard_snapshot()
+    ensure_activity_feed_indexes()
+    ensure_settings_version()
+    ensure_srv_items_po_key()
+    ensure_search_index()
+    ensure_typeahead_log()
+    ensure_lot_rollup()
+    ensure_document_financial_year()
+    ensure_srv_receipt_totals()
     
     print("Starting server...")
     try:
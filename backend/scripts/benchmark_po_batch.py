@@ -0,0 +1,92 @@
+"""
+PO Batch Upload Benchmark
+Compares the old serial path (parse each file on the event loop, ingest_po
+per file) with the process-pool pipeline used by /api/po/upload/batch.
+
+Run from backend/:
+    python -m scripts.benchmark_po_batch            # 500 files
+    python -m scripts.benchmark_po_batch --files 100
+"""
+
+import argparse
+import asyncio
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from app.core.write_executor import WriteExecutor
+from app.db import ConnectionPool
+from app.services.ingest_po import POIngestionService
+from app.services.po_batch_ingest import PARSE_WORKERS, get_parse_pool, ingest_po_files
+from app.services.po_scraper import parse_po_html
+from scripts.synthetic_db import SCHEMA_SQL
+from scripts.synthetic_po_html import render_po_html
+
+
+def serial(path: Path, files) -> float:
+    conn = sqlite3.connect(str(path))
+    conn.row_factory = sqlite3.Row
+    service = POIngestionService()
+    start = time.perf_counter()
+    for _, content in files:
+        header, items = parse_po_html(content)
+        service.ingest_po(conn, header, items)
+        conn.commit()
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed
+
+
+def pipeline(path: Path, files) -> float:
+    pool = ConnectionPool(path)
+    executor = WriteExecutor(pool)
+
+    async def drain():
+        async for event in ingest_po_files(files):
+            last = event
+        return last
+
+    with patch("app.services.po_batch_ingest.get_write_executor", return_value=executor):
+        start = time.perf_counter()
+        summary = asyncio.run(drain())
+        elapsed = time.perf_counter() - start
+
+    executor.shutdown()
+    pool.close()
+    assert summary["successful"] == len(files), summary["failed"]
+    return elapsed
+
+
+def run(count: int) -> int:
+    files = [
+        (f"PO_{n}.html", render_po_html(4500000000 + n, items=6).encode())
+        for n in range(count)
+    ]
+    # Warm the worker processes so pool start-up is not billed to the first run
+    get_parse_pool().submit(parse_po_html, files[0][1]).result()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        timings = {}
+        for name, fn in (("serial", serial), ("pipeline", pipeline)):
+            path = Path(tmp) / f"{name}.db"
+            conn = sqlite3.connect(str(path))
+            conn.executescript(SCHEMA_SQL)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.close()
+            timings[name] = fn(path, files)
+
+    print(f"{count} files, {PARSE_WORKERS} parse workers")
+    for name, seconds in timings.items():
+        print(f"  {name:<9} {seconds:8.2f} s  {count / seconds:8.1f} files/s")
+    print(f"  speedup   {timings['serial'] / timings['pipeline']:8.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=500)
+    args = parser.parse_args()
+    sys.exit(run(args.files))
@@ -0,0 +1,50 @@
+"""
+PO List Benchmark
+Shows that POService.list_pos issues a constant number of SQL statements
+regardless of PO volume, and reports wall-clock time per volume.
+
+Run from backend/:
+    python -m scripts.benchmark_po_list
+"""
+
+import sys
+import time
+
+from scripts.synthetic_db import build_synthetic_db, QueryCounter
+from app.services.po_service import po_service
+
+VOLUMES = [100, 1000, 5000, 20000]
+
+
+def run():
+    print(f"{'POs':>8} {'queries':>8} {'full list ms':>14} {'page(50) ms':>12}")
+    print("-" * 46)
+
+    query_counts = set()
+    for volume in VOLUMES:
+        conn = build_synthetic_db(po_count=volume)
+
+        with QueryCounter(conn) as counter:
+            start = time.perf_counter()
+            items = po_service.list_pos(conn)
+            full_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        po_service.list_pos_page(conn, limit=50)
+        page_ms = (time.perf_counter() - start) * 1000
+
+        assert len(items) == volume
+        query_counts.add(counter.count)
+        print(f"{volume:>8} {counter.count:>8} {full_ms:>14.1f} {page_ms:>12.1f}")
+        conn.close()
+
+    if len(query_counts) != 1:
+        print(f"\n❌ Query count varies with volume: {sorted(query_counts)}")
+        return 1
+
+    print(f"\n✓ Constant query count ({query_counts.pop()}) across all volumes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,75 @@
+"""
+PO Parser Benchmark
+Times parse_po_html / extract_po_header per file over a corpus of PO HTML
+pages. Point --corpus at a directory of saved BHEL PO pages; without it the
+benchmark renders synthetic pages.
+
+Run from backend/:
+    python -m scripts.benchmark_po_parser --corpus ~/po_html
+    python -m scripts.benchmark_po_parser --files 200 --filler-tables 40
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from app.services.po_scraper import extract_po_header, parse_po_html
+from scripts.synthetic_po_html import render_po_html
+
+
+def load_corpus(args) -> list:
+    if args.corpus:
+        paths = sorted(Path(args.corpus).expanduser().glob("*.htm*"))
+        return [(p.name, p.read_bytes()) for p in paths]
+    return [
+        (f"PO_{n}.html", render_po_html(4500000000 + n, filler_tables=args.filler_tables).encode())
+        for n in range(args.files)
+    ]
+
+
+def time_each(fn, docs) -> list:
+    timings = []
+    for doc in docs:
+        start = time.perf_counter()
+        fn(doc)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(name: str, timings: list) -> None:
+    ordered = sorted(timings)
+    p95 = ordered[int(len(ordered) * 0.95) - 1] if len(ordered) > 1 else ordered[0]
+    print(
+        f"  {name:<18} mean {statistics.mean(timings):8.2f} ms"
+        f"  p50 {statistics.median(timings):8.2f} ms  p95 {p95:8.2f} ms"
+    )
+
+
+def run(args) -> int:
+    files = load_corpus(args)
+    if not files:
+        print(f"No .html files found in {args.corpus}")
+        return 1
+
+    soups = [BeautifulSoup(content, "lxml") for _, content in files]
+    missing = [name for (name, _), soup in zip(files, soups) if not extract_po_header(soup).get("PURCHASE ORDER")]
+
+    print(f"{len(files)} files ({args.corpus or 'synthetic'})")
+    report("extract_po_header", time_each(extract_po_header, soups))
+    report("parse_po_html", time_each(parse_po_html, [content for _, content in files]))
+    if missing:
+        print(f"  no PO number in {len(missing)} file(s): {', '.join(missing[:5])}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus", help="Directory of PO .html files")
+    parser.add_argument("--files", type=int, default=100, help="Synthetic pages when no corpus is given")
+    parser.add_argument("--filler-tables", type=int, default=20)
+    args = parser.parse_args()
+    sys.exit(run(args))
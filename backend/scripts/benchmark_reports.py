@@ -0,0 +1,83 @@
+"""
+Report Benchmark
+Runs every report in report_service over the full date range of a synthetic
+100k-PO database, fetching rows the way the exports do, and fails if any
+report exceeds its runtime budget.
+
+Run from backend/:
+    python -m scripts.benchmark_reports
+    python -m scripts.benchmark_reports --db /tmp/reports_100k.db   # reuse a built database
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from scripts.synthetic_db import build_synthetic_db
+from app.services.report_service import REPORT_QUERIES, open_report_cursor
+from app.utils.file_stream import iter_cursor_rows
+
+PO_COUNT = 100_000
+START_DATE, END_DATE = "2000-01-01", "2100-01-01"
+
+# Seconds per report at PO_COUNT, fetching every row
+BUDGETS = {
+    "reconciliation": 8.0,
+    "sales": 0.5,
+    "dc_register": 2.0,
+    "invoice_register": 0.5,
+    "pending": 2.0,
+    "po_register": 4.0,
+}
+
+
+def open_database(path: str) -> sqlite3.Connection:
+    if os.path.exists(path):
+        conn = sqlite3.connect(path)
+        if conn.execute("SELECT COUNT(*) FROM purchase_orders").fetchone()[0] == PO_COUNT:
+            return conn
+        conn.close()
+        os.remove(path)
+    print(f"Building synthetic database with {PO_COUNT:,} POs at {path}...")
+    start = time.perf_counter()
+    conn = build_synthetic_db(path, po_count=PO_COUNT)
+    print(f"Built in {time.perf_counter() - start:.1f}s\n")
+    return conn
+
+
+def run(db_path: str) -> int:
+    conn = open_database(db_path)
+    missing = set(REPORT_QUERIES) - set(BUDGETS)
+    if missing:
+        print(f"❌ No budget for: {', '.join(sorted(missing))}")
+        return 1
+
+    print(f"{'report':<18} {'rows':>9} {'seconds':>9} {'budget':>8}")
+    print("-" * 47)
+    over = []
+    for report in REPORT_QUERIES:
+        start = time.perf_counter()
+        cursor = open_report_cursor(report, conn, START_DATE, END_DATE)
+        rows = sum(1 for _ in iter_cursor_rows(cursor))
+        elapsed = time.perf_counter() - start
+        budget = BUDGETS[report]
+        flag = "" if elapsed <= budget else "  ❌"
+        print(f"{report:<18} {rows:>9,} {elapsed:>9.2f} {budget:>8.1f}{flag}")
+        if elapsed > budget:
+            over.append(report)
+    conn.close()
+
+    if over:
+        print(f"\n❌ Over budget: {', '.join(over)}")
+        return 1
+    print("\n✓ All reports within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "senstosales_reports_100k.db"))
+    sys.exit(run(parser.parse_args().db))
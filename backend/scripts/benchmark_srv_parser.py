@@ -0,0 +1,93 @@
+"""
+SRV Parser Benchmark
+Compares scrape_srv_html (full BeautifulSoup tree) with the streaming
+iter_srv_groups parser on one large SRV export. Each parser runs in a fresh
+child process so peak RSS is measured per parser.
+
+Run from backend/:
+    python -m scripts.benchmark_srv_parser                 # 20k rows
+    python -m scripts.benchmark_srv_parser --rows 100000
+    python -m scripts.benchmark_srv_parser --file export.html
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app.services.srv_scraper import iter_srv_groups, scrape_srv_html
+from scripts.synthetic_srv_html import render_srv_html
+
+
+def peak_rss_mb() -> float:
+    # VmHWM resets on exec; ru_maxrss keeps the parent's high-water mark on Linux
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(mode: str, path: str) -> dict:
+    """Runs in the child process"""
+    start = time.perf_counter()
+    groups = items = 0
+    if mode == "tree":
+        for group in scrape_srv_html(Path(path).read_text(encoding="utf-8")):
+            groups += 1
+            items += len(group["items"])
+    else:
+        with open(path, "rb") as f:
+            for group in iter_srv_groups(f):
+                groups += 1
+                items += len(group["items"])
+    return {
+        "seconds": time.perf_counter() - start,
+        "groups": groups,
+        "items": items,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run(args) -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.file
+        if not path:
+            path = str(Path(tmp) / "srv_export.html")
+            po_items = [(4500000000 + p, i * 10) for p in range(50) for i in range(1, 9)]
+            Path(path).write_text(
+                render_srv_html(po_items, srvs=args.rows // 4, items_per_srv=4), encoding="utf-8"
+            )
+
+        size_mb = Path(path).stat().st_size / 1e6
+        print(f"{path if args.file else 'synthetic export'}: {size_mb:.1f} MB")
+        for mode in ("tree", "stream"):
+            out = subprocess.run(
+                [sys.executable, "-m", "scripts.benchmark_srv_parser", "--child", mode, "--file", path],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            r = json.loads(out)
+            print(
+                f"  {mode:<7} {r['seconds']:7.2f} s  peak RSS {r['peak_rss_mb']:7.1f} MB"
+                f"  ({r['groups']} SRVs, {r['items']} items)"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--file", help="Existing SRV export to parse instead of a synthetic one")
+    parser.add_argument("--child", choices=["tree", "stream"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(measure(args.child, args.file)))
+        sys.exit(0)
+    sys.exit(run(args))
@@ -0,0 +1,66 @@
+"""
+Dashboard Snapshot Rebuild / Verify
+Installs dashboard_snapshot if missing, rebuilds it from source tables and
+cross-checks every figure against the live aggregates.
+
+Run from backend/:
+    python -m scripts.rebuild_dashboard_snapshot            # rebuild + verify
+    python -m scripts.rebuild_dashboard_snapshot --verify   # verify only
+    python -m scripts.rebuild_dashboard_snapshot --db path/to/business.db
+"""
+
+import argparse
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+from app.db import DATABASE_PATH, MIGRATIONS_DIR
+from app.services.dashboard_snapshot import (
+    install_snapshot,
+    rebuild_dashboard_snapshot,
+    snapshot_table_exists,
+    verify_dashboard_snapshot,
+)
+
+
+def run(db_path: Path, verify_only: bool) -> int:
+    if not db_path.exists():
+        print(f"❌ Database not found at {db_path}")
+        return 1
+
+    conn = sqlite3.connect(str(db_path))
+    conn.row_factory = sqlite3.Row
+    try:
+        if not verify_only:
+            if not snapshot_table_exists(conn):
+                print("Installing dashboard_snapshot (migration 024)...")
+                install_snapshot(conn, MIGRATIONS_DIR)
+
+            start = time.perf_counter()
+            rows = rebuild_dashboard_snapshot(conn)
+            conn.commit()
+            print(f"✓ Rebuilt {rows} snapshot rows in {(time.perf_counter() - start) * 1000:.1f} ms")
+        elif not snapshot_table_exists(conn):
+            print("❌ dashboard_snapshot does not exist. Run without --verify first.")
+            return 1
+
+        mismatches = verify_dashboard_snapshot(conn)
+        if mismatches:
+            print(f"\n❌ {len(mismatches)} mismatch(es) against source tables:")
+            for m in mismatches:
+                print(f"  {m['metric']}: snapshot={m['snapshot']} source={m['source']}")
+            return 1
+
+        print("✓ Dashboard snapshot matches source tables")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", type=Path, default=DATABASE_PATH)
+    parser.add_argument("--verify", action="store_true", help="verify without rebuilding")
+    args = parser.parse_args()
+    sys.exit(run(args.db, args.verify))
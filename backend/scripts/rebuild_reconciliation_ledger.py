@@ -0,0 +1,69 @@
+"""
+Reconciliation Ledger Rebuild / Verify
+Installs reconciliation_ledger_mv if missing, rebuilds it from source tables
+and cross-checks every row against the reconciliation_ledger view.
+
+Run from backend/:
+    python -m scripts.rebuild_reconciliation_ledger            # rebuild + verify
+    python -m scripts.rebuild_reconciliation_ledger --verify   # verify only
+    python -m scripts.rebuild_reconciliation_ledger --db path/to/business.db
+"""
+
+import argparse
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+from app.db import DATABASE_PATH, MIGRATIONS_DIR
+from app.services.reconciliation_ledger import (
+    install_ledger,
+    ledger_table_exists,
+    rebuild_reconciliation_ledger,
+    verify_reconciliation_ledger,
+)
+
+
+def run(db_path: Path, verify_only: bool) -> int:
+    if not db_path.exists():
+        print(f"❌ Database not found at {db_path}")
+        return 1
+
+    conn = sqlite3.connect(str(db_path))
+    conn.row_factory = sqlite3.Row
+    try:
+        if not verify_only:
+            if not ledger_table_exists(conn):
+                print("Installing reconciliation_ledger_mv (migration 021)...")
+                install_ledger(conn, MIGRATIONS_DIR)
+
+            start = time.perf_counter()
+            rows = rebuild_reconciliation_ledger(conn)
+            conn.commit()
+            print(f"✓ Rebuilt {rows} ledger rows in {(time.perf_counter() - start) * 1000:.1f} ms")
+        elif not ledger_table_exists(conn):
+            print("❌ reconciliation_ledger_mv does not exist. Run without --verify first.")
+            return 1
+
+        mismatches = verify_reconciliation_ledger(conn, limit=50)
+        if mismatches:
+            print(f"\n❌ {len(mismatches)} mismatch(es) against reconciliation_ledger view:")
+            for m in mismatches:
+                print(
+                    f"  PO {m['po_number']} item {m['po_item_no']} {m['column']}: "
+                    f"view={m['view']} materialized={m['materialized']}"
+                )
+            return 1
+
+        print("✓ Materialized ledger matches reconciliation_ledger view")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", type=Path, default=DATABASE_PATH)
+    parser.add_argument("--verify", action="store_true", help="verify without rebuilding")
+    args = parser.parse_args()
+    sys.exit(run(args.db, args.verify))
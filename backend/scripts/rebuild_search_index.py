@@ -0,0 +1,40 @@
+"""
+Search Index Rebuild
+Drops and rebuilds the FTS5 search index (migration 028) from the source
+tables, e.g. after bulk edits made with triggers disabled.
+
+Run from backend/:
+    python -m scripts.rebuild_search_index
+    python -m scripts.rebuild_search_index --db path/to/business.db
+"""
+
+import argparse
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+from app.db import DATABASE_PATH, MIGRATIONS_DIR
+from app.services.search import rebuild_search_index
+
+
+def run(db_path: Path) -> int:
+    if not db_path.exists():
+        print(f"❌ Database not found at {db_path}")
+        return 1
+
+    conn = sqlite3.connect(str(db_path))
+    try:
+        start = time.perf_counter()
+        documents = rebuild_search_index(conn, MIGRATIONS_DIR)
+        conn.commit()
+        print(f"✓ Indexed {documents} rows (documents and PO items) in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", type=Path, default=DATABASE_PATH)
+    sys.exit(run(parser.parse_args().db))
@@ -0,0 +1,528 @@
+"""
+Synthetic Database Builder
+Creates a schema-compatible SQLite database filled with generated BHEL-style
+POs, DCs, invoices and SRVs for benchmarks and plan checks.
+
+Usage:
+    from scripts.synthetic_db import build_synthetic_db
+    conn = build_synthetic_db(":memory:", po_count=5000)
+"""
+
+import random
+import sqlite3
+import uuid
+from datetime import date, timedelta
+
+SCHEMA_SQL = """
+CREATE TABLE purchase_orders (
+    po_number INTEGER PRIMARY KEY,
+    po_date DATE,
+    supplier_name TEXT,
+    supplier_gstin TEXT,
+    supplier_code TEXT,
+    supplier_phone TEXT,
+    supplier_fax TEXT,
+    supplier_email TEXT,
+    department_no INTEGER,
+    enquiry_no TEXT,
+    enquiry_date DATE,
+    quotation_ref TEXT,
+    quotation_date DATE,
+    rc_no TEXT,
+    order_type TEXT,
+    po_status TEXT,
+    tin_no TEXT,
+    ecc_no TEXT,
+    mpct_no TEXT,
+    po_value NUMERIC,
+    fob_value NUMERIC,
+    ex_rate NUMERIC,
+    currency TEXT,
+    net_po_value NUMERIC,
+    amend_no INTEGER DEFAULT 0,
+    amend_1_date DATE,
+    amend_2_date DATE,
+    inspection_by TEXT,
+    inspection_at TEXT,
+    issuer_name TEXT,
+    issuer_designation TEXT,
+    issuer_phone TEXT,
+    remarks TEXT,
+    financial_year TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE purchase_order_items (
+    id TEXT PRIMARY KEY,
+    po_number INTEGER NOT NULL REFERENCES purchase_orders(po_number) ON DELETE CASCADE,
+    po_item_no INTEGER,
+    material_code TEXT,
+    material_description TEXT,
+    drg_no TEXT,
+    mtrl_cat INTEGER,
+    unit TEXT,
+    po_rate NUMERIC,
+    ord_qty NUMERIC,
+    rcd_qty NUMERIC DEFAULT 0,
+    item_value NUMERIC,
+    hsn_code TEXT,
+    delivered_qty NUMERIC DEFAULT 0,
+    pending_qty NUMERIC,
+    rejected_qty NUMERIC DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(po_number, po_item_no)
+);
+
+CREATE TABLE purchase_order_deliveries (
+    id TEXT PRIMARY KEY,
+    po_item_id TEXT NOT NULL REFERENCES purchase_order_items(id) ON DELETE CASCADE,
+    lot_no INTEGER,
+    dely_qty NUMERIC,
+    dely_date DATE,
+    entry_allow_date DATE,
+    dest_code INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE delivery_challans (
+    dc_number TEXT PRIMARY KEY,
+    dc_date DATE NOT NULL,
+    po_number INTEGER NOT NULL REFERENCES purchase_orders(po_number) ON DELETE CASCADE,
+    department_no INTEGER,
+    consignee_name TEXT,
+    consignee_gstin TEXT,
+    consignee_address TEXT,
+    inspection_company TEXT,
+    eway_bill_no TEXT,
+    vehicle_no TEXT,
+    lr_no TEXT,
+    transporter TEXT,
+    mode_of_transport TEXT,
+    remarks TEXT,
+    financial_year TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE delivery_challan_items (
+    id TEXT PRIMARY KEY,
+    dc_number TEXT NOT NULL REFERENCES delivery_challans(dc_number) ON DELETE CASCADE,
+    po_item_id TEXT NOT NULL REFERENCES purchase_order_items(id) ON DELETE CASCADE,
+    dispatch_qty NUMERIC NOT NULL,
+    hsn_code TEXT,
+    hsn_rate NUMERIC,
+    lot_no INTEGER,
+    no_of_packets INTEGER,
+    CHECK (dispatch_qty > 0)
+);
+
+CREATE TABLE gst_invoices (
+    invoice_number TEXT PRIMARY KEY,
+    invoice_date DATE NOT NULL,
+    linked_dc_numbers TEXT,
+    po_numbers TEXT,
+    po_date TEXT,
+    customer_gstin TEXT,
+    place_of_supply TEXT,
+    taxable_value NUMERIC,
+    cgst NUMERIC DEFAULT 0,
+    sgst NUMERIC DEFAULT 0,
+    igst NUMERIC DEFAULT 0,
+    total_invoice_value NUMERIC,
+    remarks TEXT,
+    gemc_number TEXT,
+    gemc_date TEXT,
+    mode_of_payment TEXT,
+    payment_terms TEXT DEFAULT '45 Days',
+    buyers_order_no TEXT,
+    buyers_order_date TEXT,
+    despatch_doc_no TEXT,
+    srv_no TEXT,
+    srv_date TEXT,
+    vehicle_no TEXT,
+    lr_no TEXT,
+    transporter TEXT,
+    destination TEXT,
+    terms_of_delivery TEXT,
+    buyer_name TEXT,
+    buyer_address TEXT,
+    buyer_gstin TEXT,
+    buyer_state TEXT,
+    buyer_state_code TEXT,
+    financial_year TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE gst_invoice_items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    invoice_number TEXT NOT NULL REFERENCES gst_invoices(invoice_number) ON DELETE CASCADE,
+    po_sl_no TEXT,
+    description TEXT NOT NULL,
+    hsn_sac TEXT,
+    no_of_packets INTEGER,
+    quantity REAL NOT NULL,
+    unit TEXT DEFAULT 'NO',
+    rate REAL NOT NULL,
+    taxable_value REAL NOT NULL,
+    cgst_rate REAL DEFAULT 9.0,
+    cgst_amount REAL NOT NULL,
+    sgst_rate REAL DEFAULT 9.0,
+    sgst_amount REAL NOT NULL,
+    igst_rate REAL DEFAULT 0.0,
+    igst_amount REAL DEFAULT 0.0,
+    total_amount REAL NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE gst_invoice_dc_links (
+    id TEXT PRIMARY KEY,
+    invoice_number TEXT NOT NULL REFERENCES gst_invoices(invoice_number) ON DELETE CASCADE,
+    dc_number TEXT NOT NULL REFERENCES delivery_challans(dc_number) ON DELETE CASCADE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(invoice_number, dc_number)
+);
+
+CREATE TABLE srvs (
+    srv_number VARCHAR(50) PRIMARY KEY,
+    srv_date DATE NOT NULL,
+    po_number VARCHAR(50) NOT NULL,
+    srv_status VARCHAR(50) DEFAULT 'Received',
+    po_found BOOLEAN DEFAULT 1,
+    warning_message TEXT,
+    file_hash TEXT,
+    is_active BOOLEAN DEFAULT 1,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE srv_items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    srv_number VARCHAR(50) NOT NULL REFERENCES srvs(srv_number) ON DELETE CASCADE,
+    po_number VARCHAR(50) NOT NULL,
+    po_item_no INTEGER NOT NULL,
+    lot_no INTEGER,
+    received_qty DECIMAL(15,3) DEFAULT 0,
+    rejected_qty DECIMAL(15,3) DEFAULT 0,
+    challan_no VARCHAR(50),
+    invoice_no VARCHAR(50),
+    remarks TEXT,
+    invoice_date DATE,
+    challan_date DATE,
+    order_qty DECIMAL(15,3) DEFAULT 0,
+    challan_qty DECIMAL(15,3) DEFAULT 0,
+    accepted_qty DECIMAL(15,3) DEFAULT 0,
+    unit VARCHAR(20),
+    div_code VARCHAR(20),
+    pmir_no VARCHAR(50),
+    finance_date DATE,
+    cnote_no VARCHAR(50),
+    cnote_date DATE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    po_key INTEGER GENERATED ALWAYS AS (CAST(po_number AS INTEGER)) VIRTUAL
+);
+
+CREATE TABLE business_settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE buyers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    gstin TEXT NOT NULL,
+    billing_address TEXT NOT NULL,
+    shipping_address TEXT,
+    place_of_supply TEXT NOT NULL,
+    is_default BOOLEAN DEFAULT 0,
+    is_active BOOLEAN DEFAULT 1,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_po_date ON purchase_orders(po_date);
+CREATE INDEX idx_po_created_at ON purchase_orders(created_at);
+CREATE INDEX idx_po_status ON purchase_orders(po_status);
+CREATE INDEX idx_poi_po_number ON purchase_order_items(po_number);
+CREATE INDEX idx_poi_material ON purchase_order_items(material_code);
+CREATE INDEX idx_pod_po_item_id ON purchase_order_deliveries(po_item_id);
+CREATE INDEX idx_pod_lot_no ON purchase_order_deliveries(po_item_id, lot_no);
+CREATE INDEX idx_dc_date ON delivery_challans(dc_date);
+CREATE INDEX idx_dc_po_number ON delivery_challans(po_number);
+CREATE INDEX idx_dc_created_at ON delivery_challans(created_at);
+CREATE INDEX idx_dci_dc_number ON delivery_challan_items(dc_number);
+CREATE INDEX idx_dci_po_item_id ON delivery_challan_items(po_item_id);
+CREATE INDEX idx_dci_lot_no ON delivery_challan_items(po_item_id, lot_no);
+CREATE INDEX idx_invoices_created_at ON gst_invoices(created_at);
+CREATE INDEX idx_invoices_date ON gst_invoices(invoice_date);
+CREATE INDEX idx_invoice_items_invoice_no ON gst_invoice_items(invoice_number);
+CREATE INDEX idx_invoice_dc_links_dc ON gst_invoice_dc_links(dc_number);
+CREATE INDEX idx_invoice_dc_links_invoice ON gst_invoice_dc_links(invoice_number);
+CREATE INDEX idx_srv_items_srv_number ON srv_items(srv_number);
+CREATE INDEX idx_srv_items_po_number ON srv_items(po_number);
+CREATE INDEX idx_srv_items_po_item ON srv_items(po_number, po_item_no);
+CREATE INDEX idx_srv_items_po_key ON srv_items(po_key, po_item_no);
+CREATE INDEX idx_srvs_po_number ON srvs(po_number);
+CREATE INDEX idx_srvs_date ON srvs(srv_date);
+"""
+
+
+def _fy(d: date) -> str:
+    start = d.year if d.month >= 4 else d.year - 1
+    return f"{start}-{str(start + 1)[2:]}"
+
+
+def build_synthetic_db(
+    path: str = ":memory:",
+    po_count: int = 1000,
+    items_per_po: int = 4,
+    lots_per_item: int = 2,
+    seed: int = 42,
+) -> sqlite3.Connection:
+    """
+    Build a synthetic database at `path` and return an open connection.
+
+    Roughly half of the POs get a DC, half of those DCs get an invoice and
+    an SRV, which mirrors the shape of the production ledger.
+    """
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA_SQL)
+
+    base_date = date(2023, 4, 1)
+    pos, items, deliveries = [], [], []
+    dcs, dc_items, invoices, invoice_items, links = [], [], [], [], []
+    srvs, srv_items = [], []
+
+    for n in range(po_count):
+        po_number = 4500000000 + n
+        po_date = base_date + timedelta(days=n % 700)
+        created = f"{po_date.isoformat()} 10:{n % 60:02d}:00"
+        pos.append(
+            (
+                po_number,
+                po_date.isoformat(),
+                "SENSTOGRAPHIC",
+                rng.choice(["Active", "New", None, "Closed"]),
+                round(rng.uniform(1e4, 1e6), 2),
+                0,
+                _fy(po_date),
+                created,
+            )
+        )
+
+        po_item_rows = []
+        for i in range(1, items_per_po + 1):
+            item_id = str(uuid.UUID(int=rng.getrandbits(128)))
+            ord_qty = float(rng.randint(10, 500))
+            rate = round(rng.uniform(10, 900), 2)
+            items.append(
+                (
+                    item_id,
+                    po_number,
+                    i * 10,
+                    f"M{rng.randint(10000000, 99999999)}",
+                    f"SYNTHETIC MATERIAL {n}-{i}",
+                    f"DRG-{po_number % 1000}-{i}",
+                    "NO",
+                    rate,
+                    ord_qty,
+                    round(ord_qty * rate, 2),
+                    ord_qty,
+                )
+            )
+            po_item_rows.append((item_id, i * 10, ord_qty, rate))
+            for lot in range(1, lots_per_item + 1):
+                deliveries.append(
+                    (
+                        str(uuid.UUID(int=rng.getrandbits(128))),
+                        item_id,
+                        lot,
+                        ord_qty / lots_per_item,
+                        (po_date + timedelta(days=30 * lot)).isoformat(),
+                    )
+                )
+
+        if n % 2:
+            continue
+
+        dc_number = f"DC{n:07d}"
+        dc_date = po_date + timedelta(days=15)
+        dcs.append(
+            (
+                dc_number,
+                dc_date.isoformat(),
+                po_number,
+                "BHEL, Bhopal",
+                _fy(dc_date),
+                f"{dc_date.isoformat()} 11:00:00",
+            )
+        )
+        for item_id, po_item_no, ord_qty, rate in po_item_rows:
+            qty = ord_qty / lots_per_item
+            dc_items.append(
+                (str(uuid.UUID(int=rng.getrandbits(128))), dc_number, item_id, qty, 1)
+            )
+
+        if n % 4:
+            continue
+
+        invoice_number = f"INV{n:07d}"
+        taxable = sum(o / lots_per_item * r for _, _, o, r in po_item_rows)
+        invoices.append(
+            (
+                invoice_number,
+                dc_date.isoformat(),
+                dc_number,
+                str(po_number),
+                round(taxable, 2),
+                round(taxable * 0.09, 2),
+                round(taxable * 0.09, 2),
+                round(taxable * 1.18, 2),
+                _fy(dc_date),
+                f"{dc_date.isoformat()} 12:00:00",
+            )
+        )
+        links.append((str(uuid.UUID(int=rng.getrandbits(128))), invoice_number, dc_number))
+        srv_number = f"SRV{n:07d}"
+        srvs.append((srv_number, (dc_date + timedelta(days=7)).isoformat(), str(po_number)))
+        for item_id, po_item_no, ord_qty, rate in po_item_rows:
+            qty = ord_qty / lots_per_item
+            rejected = float(rng.choice([0, 0, 0, 1]))
+            invoice_items.append(
+                (
+                    invoice_number,
+                    "1",
+                    f"SYNTHETIC MATERIAL {n}",
+                    qty,
+                    rate,
+                    round(qty * rate, 2),
+                    round(qty * rate * 0.09, 2),
+                    round(qty * rate * 0.09, 2),
+                    round(qty * rate * 1.18, 2),
+                )
+            )
+            srv_items.append(
+                (
+                    srv_number,
+                    str(po_number),
+                    po_item_no,
+                    1,
+                    qty,
+                    rejected,
+                    qty - rejected,
+                    dc_number,
+                    invoice_number,
+                )
+            )
+
+    conn.executemany(
+        """
+        INSERT INTO purchase_orders
+        (po_number, po_date, supplier_name, po_status, po_value, amend_no, financial_year, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+        pos,
+    )
+    conn.executemany(
+        """
+        INSERT INTO purchase_order_items
+        (id, po_number, po_item_no, material_code, material_description, drg_no,
+         unit, po_rate, ord_qty, item_value, pending_qty)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+        items,
+    )
+    conn.executemany(
+        """
+        INSERT INTO purchase_order_deliveries (id, po_item_id, lot_no, dely_qty, dely_date)
+        VALUES (?, ?, ?, ?, ?)
+    """,
+        deliveries,
+    )
+    conn.executemany(
+        """
+        INSERT INTO delivery_challans
+        (dc_number, dc_date, po_number, consignee_name, financial_year, created_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """,
+        dcs,
+    )
+    conn.executemany(
+        """
+        INSERT INTO delivery_challan_items (id, dc_number, po_item_id, dispatch_qty, lot_no)
+        VALUES (?, ?, ?, ?, ?)
+    """,
+        dc_items,
+    )
+    conn.executemany(
+        """
+        INSERT INTO gst_invoices
+        (invoice_number, invoice_date, linked_dc_numbers, po_numbers, taxable_value,
+         cgst, sgst, total_invoice_value, financial_year, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+        invoices,
+    )
+    conn.executemany(
+        """
+        INSERT INTO gst_invoice_items
+        (invoice_number, po_sl_no, description, quantity, rate, taxable_value,
+         cgst_amount, sgst_amount, total_amount)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+        invoice_items,
+    )
+    conn.executemany(
+        "INSERT INTO gst_invoice_dc_links (id, invoice_number, dc_number) VALUES (?, ?, ?)",
+        links,
+    )
+    conn.executemany(
+        "INSERT INTO srvs (srv_number, srv_date, po_number) VALUES (?, ?, ?)", srvs
+    )
+    conn.executemany(
+        """
+        INSERT INTO srv_items
+        (srv_number, po_number, po_item_no, lot_no, received_qty, rejected_qty,
+         accepted_qty, challan_no, invoice_no)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+        srv_items,
+    )
+
+    # Denormalized PO item totals normally kept by the 016 triggers
+    conn.execute("""
+        UPDATE purchase_order_items SET
+            delivered_qty = COALESCE((SELECT SUM(dispatch_qty) FROM delivery_challan_items
+                                      WHERE po_item_id = purchase_order_items.id), 0),
+            rcd_qty = COALESCE((SELECT SUM(received_qty) FROM srv_items
+                                WHERE po_number = CAST(purchase_order_items.po_number AS TEXT)
+                                AND po_item_no = purchase_order_items.po_item_no), 0),
+            rejected_qty = COALESCE((SELECT SUM(rejected_qty) FROM srv_items
+                                     WHERE po_number = CAST(purchase_order_items.po_number AS TEXT)
+                                     AND po_item_no = purchase_order_items.po_item_no), 0)
+    """)
+    conn.execute("UPDATE purchase_order_items SET pending_qty = ord_qty - delivered_qty")
+    conn.commit()
+    return conn
+
+
+class QueryCounter:
+    """Counts statements executed on a connection (via sqlite trace callback)"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.statements = []
+
+    def __enter__(self):
+        self.conn.set_trace_callback(self.statements.append)
+        return self
+
+    def __exit__(self, *exc):
+        self.conn.set_trace_callback(None)
+        return False
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
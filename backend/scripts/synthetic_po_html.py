@@ -0,0 +1,101 @@
+"""
+Synthetic PO HTML
+Renders BHEL-style purchase order pages that po_scraper can parse, for
+parser benchmarks and batch-upload tests.
+
+Usage:
+    from scripts.synthetic_po_html import render_po_html
+    html = render_po_html(4500000001, items=6, lots=2)
+"""
+
+import random
+
+
+def _row(cells):
+    return "<tr>" + "".join(f"<td>{c}</td>" for c in cells) + "</tr>"
+
+
+def render_po_html(
+    po_number: int,
+    items: int = 4,
+    lots: int = 2,
+    filler_tables: int = 6,
+    seed: int = 0,
+) -> str:
+    """
+    Build one PO page: header label/value tables, `filler_tables` terms and
+    conditions tables (real pages carry many), and the item/delivery table.
+    """
+    rng = random.Random(seed or po_number)
+    day = rng.randint(1, 28)
+
+    header_tables = [
+        [["PURCHASE ORDER", po_number, "PO DATE", f"{day:02d}/05/2024"]],
+        [
+            ["SUPP CODE", "ORD-TYPE", "DVN", "PO STATUS"],
+            ["S1234", "RC 1", "21", "Active"],
+        ],
+        [
+            ["ENQUIRY", "ENQ DATE", "QUOTATION", "QUOT-DATE", "RC NO", "AMEND NO"],
+            ["ENQ-77", "01/04/2024", "Q-12", "10/04/2024", "991", "0"],
+        ],
+        [
+            ["PO-VALUE", "FOB VALUE", "EX RATE", "CURRENCY", "NET PO VAL", "TOTAL VALUE"],
+            ["125000.00", "0", "1", "INR", "125000.00", "147500.00"],
+        ],
+        [
+            ["SUPP NAME M/S", "TIN NO 23456789", "ECC NO AAAC1234", "MPCT NO 7788"],
+            ["Senstographic, Bhopal", "", "", ""],
+        ],
+    ]
+
+    parts = ["<html><body>"]
+    for rows in header_tables:
+        parts.append("<table>" + "".join(_row(r) for r in rows) + "</table>")
+    parts.append(
+        "<table>"
+        + _row(["INSPECTION BY", "BHEL QA"])
+        + _row(["NAME", "R KUMAR"])
+        + _row(["DESIGNATION", "MANAGER"])
+        + _row(["PHONE NO", "0755-2500000"])
+        + _row([f"DRG NO: {rng.randint(100000, 999999)}"])
+        + "</table>"
+    )
+    for t in range(filler_tables):
+        parts.append(
+            "<table>"
+            + "".join(
+                _row([f"{t + 1}.{line}", "Terms and conditions apply as per the general conditions of contract."])
+                for line in range(1, 6)
+            )
+            + "</table>"
+        )
+
+    item_rows = [
+        _row(
+            [
+                "PO ITM", "MATERIAL CODE", "MTRL CAT", "UNIT", "PO RATE", "ORD QTY",
+                "RCD QTY", "ITEM VALUE", "LOT NO", "DELY QTY", "DELY DATE",
+                "ENTRY ALLOW DATE", "DEST CODE",
+            ]
+        )
+    ]
+    for i in range(1, items + 1):
+        ord_qty = rng.randint(10, 500) * lots
+        rate = rng.randint(10, 900)
+        for lot in range(1, lots + 1):
+            item_rows.append(
+                _row(
+                    [
+                        i * 10, f"M{rng.randint(10000000, 99999999)}", "1", "NO", f"{rate}.00",
+                        ord_qty, 0, f"{ord_qty * rate}.00", lot, ord_qty // lots,
+                        f"{day:02d}/{5 + lot:02d}/2024", f"{day:02d}/{4 + lot:02d}/2024", "1001",
+                    ]
+                )
+            )
+    item_rows.append(
+        _row(["SYNTHETIC MATERIAL DESCRIPTION FOR PARSER BENCHMARKS, SIZE 40 X 60 MM"])
+    )
+    parts.append("<table>" + "".join(item_rows) + "</table>")
+    parts.append("</body></html>")
+    return "".join(parts)
@@ -0,0 +1,67 @@
+"""
+Synthetic SRV HTML
+Renders BHEL-style SRV export pages (one table row per SRV item) that
+srv_scraper can parse, for parser benchmarks and ingestion tests.
+
+Usage:
+    from scripts.synthetic_srv_html import render_srv_html
+    html = render_srv_html([(4500000001, 10), (4500000001, 20)], srvs=50)
+"""
+
+import random
+
+SRV_COLUMNS = [
+    "SRV NO", "SRV DATE", "PO ITM", "SUB ITM", "PO NO", "UNIT", "ORDER QTY",
+    "CHALLAN QTY", "RECVD QTY", "ACCEPTED QTY", "REJ QTY", "CHALLAN NO",
+    "CHALLAN DT", "TAX INV", "TAX INV DT", "DIV", "PMIR NO", "FINANCE DT",
+    "CNOTE NO", "CNOTE DATE",
+]
+
+
+def _row(cells, tag="td"):
+    return "<tr>" + "".join(f"<{tag}>{c}</{tag}>" for c in cells) + "</tr>"
+
+
+def render_srv_html(
+    po_items,
+    srvs: int = 20,
+    items_per_srv: int = 3,
+    first_srv: int = 2400001,
+    seed: int = 1,
+) -> str:
+    """
+    Build one SRV export page with `srvs` SRVs of `items_per_srv` rows each,
+    drawn from `po_items`, a list of (po_number, po_item_no) pairs. Each SRV
+    references a single PO, as the real exports do.
+    """
+    rng = random.Random(seed)
+    by_po = {}
+    for po_number, po_item_no in po_items:
+        by_po.setdefault(po_number, []).append(po_item_no)
+    po_numbers = sorted(by_po)
+
+    rows = [_row(SRV_COLUMNS, "th")]
+    for n in range(srvs):
+        srv_no = first_srv + n
+        po_number = po_numbers[n % len(po_numbers)]
+        day = rng.randint(1, 28)
+        for i in range(items_per_srv):
+            po_item_no = by_po[po_number][i % len(by_po[po_number])]
+            received = rng.randint(1, 50)
+            rejected = rng.randint(0, received // 5)
+            rows.append(
+                _row(
+                    [
+                        srv_no, f"{day:02d}/07/2024", po_item_no, i + 1, po_number, "NO",
+                        received * 2, received, f"{received}.000", received - rejected,
+                        rejected, f"DC-{srv_no % 997}", f"{day:02d}/06/2024",
+                        f"INV/{srv_no}", f"{day:02d}/06/2024", "21", f"PM{srv_no}",
+                        "-", "", "",
+                    ]
+                )
+            )
+    return (
+        "<html><head><title>SRV Report</title></head><body>"
+        "<table><tr><td>BHEL SRV REPORT</td></tr></table>"
+        "<table>" + "".join(rows) + "</table></body></html>"
+    )
@@ -0,0 +1,110 @@
+import unittest
+import sys
+import os
+
+# Add backend to path so we can import app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.db import MIGRATIONS_DIR, get_db
+from app.routers import dashboard
+from app.services.activity_feed import FEED_SOURCES, get_activity_page
+from scripts.synthetic_db import build_synthetic_db
+
+
+def apply_feed_indexes(conn):
+    with open(MIGRATIONS_DIR / "025_activity_feed_indexes.sql", "r", encoding="utf-8") as f:
+        conn.executescript(f.read())
+
+
+class TestActivityFeed(unittest.TestCase):
+    def setUp(self):
+        self.conn = build_synthetic_db(po_count=60)
+        apply_feed_indexes(self.conn)
+        # Identical timestamps across and within sources exercise the tie-breaks
+        self.conn.execute("UPDATE delivery_challans SET created_at = '2023-10-05 10:00:00' WHERE rowid % 3 = 0")
+        self.conn.execute("UPDATE purchase_orders SET created_at = '2023-10-05 10:00:00' WHERE rowid % 4 = 0")
+        self.conn.execute("UPDATE srvs SET created_at = '2023-10-05 10:00:00' WHERE rowid % 2 = 0")
+
+    def tearDown(self):
+        self.conn.close()
+
+    def expected_order(self):
+        rows = []
+        for kind, table, _ in FEED_SOURCES:
+            for created_at, row_id in self.conn.execute(
+                f"SELECT created_at, rowid FROM {table} WHERE created_at IS NOT NULL"
+            ):
+                rows.append((created_at, kind, row_id))
+        rows.sort(reverse=True)
+        return rows
+
+    def test_pages_cover_everything_once_in_order(self):
+        expected = self.expected_order()
+        seen, cursor = [], None
+        while True:
+            items, cursor = get_activity_page(self.conn, limit=7, cursor=cursor)
+            self.assertLessEqual(len(items), 7)
+            seen.extend((item["created_at"], item["type"]) for item in items)
+            if cursor is None:
+                break
+        self.assertEqual(seen, [(created_at, kind) for created_at, kind, _ in expected])
+        self.assertIn("SRV", {kind for _, kind in seen})
+
+    def test_first_page_matches_latest_rows(self):
+        items, cursor = get_activity_page(self.conn, limit=5)
+        self.assertEqual(len(items), 5)
+        self.assertIsNotNone(cursor)
+        newest = self.expected_order()[0]
+        self.assertEqual((items[0]["created_at"], items[0]["type"]), newest[:2])
+        self.assertTrue(all(item["number"] is not None for item in items))
+
+    def test_pages_read_indexes_only(self):
+        statements = []
+        self.conn.set_trace_callback(statements.append)
+        _, cursor = get_activity_page(self.conn, limit=5)
+        get_activity_page(self.conn, limit=5, cursor=cursor)
+        self.conn.set_trace_callback(None)
+
+        key_queries = [s for s in statements if "UNION ALL" in s]
+        self.assertEqual(len(key_queries), 2)
+        for sql in key_queries:
+            # Every source is a covering created_at index range; the only sorts
+            # left are over the capped per-source subquery results
+            plan = [row[3] for row in self.conn.execute("EXPLAIN QUERY PLAN " + sql)]
+            reads = [line for line in plan if line.startswith(("SCAN ", "SEARCH ")) and "subquery" not in line]
+            self.assertEqual(len(reads), len(FEED_SOURCES), plan)
+            for line in reads:
+                self.assertRegex(line, r"^SEARCH \w+ USING COVERING INDEX idx_\w+_created_at", plan)
+
+
+class TestActivityEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.conn = build_synthetic_db(po_count=10)
+        apply_feed_indexes(self.conn)
+        app = FastAPI()
+        app.include_router(dashboard.router, prefix="/api/dashboard")
+        app.dependency_overrides[get_db] = lambda: self.conn
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_cursor_header(self):
+        first = self.client.get("/api/dashboard/activity", params={"limit": 4})
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(len(first.json()), 4)
+        cursor = first.headers["x-next-cursor"]
+
+        second = self.client.get("/api/dashboard/activity", params={"limit": 4, "cursor": cursor})
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(first.json()[0], second.json()[0])
+
+        bad = self.client.get("/api/dashboard/activity", params={"cursor": "not-a-cursor"})
+        self.assertEqual(bad.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+import unittest
+import sys
+import os
+from datetime import datetime
+
+# Add backend to path so we can import app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.db import MIGRATIONS_DIR, get_db
+from app.routers import dashboard
+from app.services.dashboard_snapshot import (
+    _metrics_from_source,
+    get_dashboard_summary,
+    install_snapshot,
+    rebuild_dashboard_snapshot,
+    verify_dashboard_snapshot,
+)
+from scripts.synthetic_db import build_synthetic_db
+
+
+class TestDashboardSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.conn = build_synthetic_db(po_count=40)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        install_snapshot(self.conn, MIGRATIONS_DIR)
+        rebuild_dashboard_snapshot(self.conn)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def assertSnapshotMatchesSource(self):
+        self.assertEqual(verify_dashboard_snapshot(self.conn), [])
+
+    def test_rebuild_matches_source(self):
+        self.assertSnapshotMatchesSource()
+        metrics = _metrics_from_source(self.conn, datetime.now())
+        self.assertGreater(metrics["active_challans"], 0)
+        self.assertGreater(metrics["ordered_qty"], 0)
+
+    def test_triggers_track_writes(self):
+        db = self.conn
+        po_number = 4500000001
+        item_id = db.execute(
+            "SELECT id FROM purchase_order_items WHERE po_number = ? AND po_item_no = 10", (po_number,)
+        ).fetchone()[0]
+
+        # New PO today, then status and value edits
+        db.execute(
+            "INSERT INTO purchase_orders (po_number, po_value, po_status, created_at) "
+            "VALUES (4599999999, 1000, 'New', CURRENT_TIMESTAMP)"
+        )
+        db.execute(
+            "INSERT INTO purchase_order_items (id, po_number, po_item_no, ord_qty) "
+            "VALUES ('new-1', 4599999999, 10, 12)"
+        )
+        self.assertSnapshotMatchesSource()
+        db.execute("UPDATE purchase_orders SET po_status = 'Closed', po_value = 1500 WHERE po_number = 4599999999")
+        self.assertSnapshotMatchesSource()
+
+        # DCs, then invoices linked through gst_invoice_dc_links
+        for dc_number in ("DCX", "DCY", "DCZ"):
+            db.execute(
+                "INSERT INTO delivery_challans (dc_number, dc_date, po_number) VALUES (?, '2024-01-01', ?)",
+                (dc_number, po_number),
+            )
+        db.execute(
+            "INSERT INTO delivery_challan_items (id, dc_number, po_item_id, dispatch_qty, lot_no) "
+            "VALUES ('dcx-1', 'DCX', ?, 3, 1)",
+            (item_id,),
+        )
+        self.assertSnapshotMatchesSource()
+        for invoice_number, value in (("INVX", 500), ("INVY", 10)):
+            db.execute(
+                "INSERT INTO gst_invoices (invoice_number, invoice_date, total_invoice_value, created_at) "
+                "VALUES (?, '2024-01-02', ?, CURRENT_TIMESTAMP)",
+                (invoice_number, value),
+            )
+        db.execute("INSERT INTO gst_invoice_dc_links (id, invoice_number, dc_number) VALUES ('l1', 'INVX', 'DCX')")
+        db.execute("INSERT INTO gst_invoice_dc_links (id, invoice_number, dc_number) VALUES ('l2', 'INVY', 'DCX')")
+        db.execute("INSERT INTO gst_invoice_dc_links (id, invoice_number, dc_number) VALUES ('l3', 'INVY', 'DCZ')")
+        self.assertSnapshotMatchesSource()
+        db.execute("UPDATE gst_invoice_dc_links SET dc_number = 'DCY' WHERE id = 'l1'")
+        db.execute("UPDATE gst_invoices SET total_invoice_value = 750 WHERE invoice_number = 'INVX'")
+        self.assertSnapshotMatchesSource()
+
+        # SRV receipts
+        db.execute(
+            "INSERT INTO srvs (srv_number, srv_date, po_number) VALUES ('SRVX', '2024-01-03', ?)",
+            (str(po_number),),
+        )
+        db.execute(
+            "INSERT INTO srv_items (srv_number, po_number, po_item_no, received_qty, rejected_qty) "
+            "VALUES ('SRVX', ?, 10, 2, 1)",
+            (str(po_number),),
+        )
+        db.execute("UPDATE srv_items SET received_qty = 5 WHERE srv_number = 'SRVX'")
+        self.assertSnapshotMatchesSource()
+
+        # Deletes, including cascades through the links
+        db.execute("DELETE FROM gst_invoices WHERE invoice_number = 'INVY'")
+        self.assertSnapshotMatchesSource()
+        db.execute("DELETE FROM delivery_challans WHERE dc_number IN ('DCX', 'DCY')")
+        self.assertSnapshotMatchesSource()
+        db.execute("DELETE FROM delivery_challans WHERE dc_number = 'DCZ'")
+        db.execute("DELETE FROM srvs WHERE srv_number = 'SRVX'")
+        db.execute("DELETE FROM purchase_orders WHERE po_number IN (?, 4599999999)", (po_number,))
+        self.assertSnapshotMatchesSource()
+
+    def test_summary_reads_snapshot_only(self):
+        statements = []
+        self.conn.set_trace_callback(statements.append)
+        summary = get_dashboard_summary(self.conn)
+        self.conn.set_trace_callback(None)
+
+        self.assertEqual(len([s for s in statements if "SELECT metric" in s]), 1)
+        self.assertFalse(any("SUM(" in s for s in statements))
+        self.assertEqual(summary["pending_pos"], summary["active_po_count"])
+
+
+class TestSummaryETag(unittest.TestCase):
+    def setUp(self):
+        self.conn = build_synthetic_db(po_count=10)
+        install_snapshot(self.conn, MIGRATIONS_DIR)
+        rebuild_dashboard_snapshot(self.conn)
+        app = FastAPI()
+        app.include_router(dashboard.router, prefix="/api/dashboard")
+        app.dependency_overrides[get_db] = lambda: self.conn
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_not_modified_until_a_write(self):
+        first = self.client.get("/api/dashboard/summary")
+        self.assertEqual(first.status_code, 200)
+        etag = first.headers["etag"]
+
+        again = self.client.get("/api/dashboard/summary", headers={"If-None-Match": etag})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b"")
+
+        self.conn.execute("UPDATE purchase_order_items SET ord_qty = ord_qty + 1 WHERE rowid = 1")
+        changed = self.client.get("/api/dashboard/summary", headers={"If-None-Match": etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers["etag"], etag)
+        self.assertEqual(changed.json()["total_ordered"], first.json()["total_ordered"] + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
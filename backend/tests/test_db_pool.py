@@ -0,0 +1,82 @@
+import unittest
+import sqlite3
+import sys
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add backend to path so we can import app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db import ConnectionPool
+
+
+class TestConnectionPool(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pool = ConnectionPool(Path(self.tmp.name) / "pool.db", max_readers=2, timeout=0.5)
+        with self.pool.writer() as conn:
+            conn.execute("CREATE TABLE t (x INTEGER)")
+            conn.commit()
+
+    def tearDown(self):
+        self.pool.close()
+        self.tmp.cleanup()
+
+    def test_pragmas_applied_once_per_connection(self):
+        with self.pool.writer() as conn:
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+            self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)  # NORMAL
+            self.assertEqual(conn.execute("PRAGMA temp_store").fetchone()[0], 2)  # MEMORY
+            self.assertEqual(conn.execute("PRAGMA foreign_keys").fetchone()[0], 1)
+
+        with self.pool.reader() as first:
+            pass
+        with self.pool.reader() as second:
+            self.assertIs(first, second)
+            with self.assertRaises(sqlite3.OperationalError):
+                second.execute("INSERT INTO t VALUES (1)")
+
+    def test_readers_see_committed_writes(self):
+        with self.pool.writer() as conn:
+            conn.execute("INSERT INTO t VALUES (1)")
+            conn.commit()
+        with self.pool.reader() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM t").fetchone()[0], 1)
+
+    def test_writer_is_exclusive_and_waits_are_counted(self):
+        entered = threading.Event()
+
+        def hold_writer():
+            with self.pool.writer():
+                entered.set()
+                time.sleep(0.1)
+
+        thread = threading.Thread(target=hold_writer)
+        thread.start()
+        entered.wait()
+        with self.pool.writer():
+            pass
+        thread.join()
+
+        stats = self.pool.stats()
+        self.assertEqual(stats["waits"], 1)
+        self.assertGreater(stats["wait_ms_max"], 0)
+        self.assertFalse(stats["writer"]["in_use"])
+
+    def test_reader_pool_is_bounded(self):
+        with self.pool.reader(), self.pool.reader():
+            self.assertEqual(self.pool.stats()["readers"]["in_use"], 2)
+            with self.assertRaises(TimeoutError):
+                with self.pool.reader():
+                    pass
+        stats = self.pool.stats()
+        self.assertEqual(stats["timeouts"], 1)
+        self.assertEqual(stats["readers"]["open"], 2)
+        self.assertEqual(stats["readers"]["idle"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
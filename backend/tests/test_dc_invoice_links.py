@@ -0,0 +1,92 @@
+import unittest
+import sys
+import os
+from datetime import datetime
+
+# Add backend to path so we can import app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db import MIGRATIONS_DIR
+from app.routers import dashboard, dc, reports
+from app.services import dashboard_snapshot
+from app.services.dc import check_dc_has_invoice
+from app.services.dc_invoice_links import count_invoiced_dcs, count_uninvoiced_dcs
+from app.services.invoice import check_dc_already_invoiced
+from scripts.synthetic_db import build_synthetic_db
+
+
+def full_scans(db, sql):
+    """Plan lines that read a table without an index"""
+    plan = [row[3] for row in db.execute("EXPLAIN QUERY PLAN " + sql)]
+    return [
+        line
+        for line in plan
+        if (line.startswith("SCAN ") and " INDEX " not in line and line != "SCAN CONSTANT ROW")
+        or "AUTOMATIC" in line
+    ]
+
+
+class TestLinkageQueryPlans(unittest.TestCase):
+    def setUp(self):
+        self.conn = build_synthetic_db(po_count=200)
+        dashboard_snapshot.install_snapshot(self.conn, MIGRATIONS_DIR)
+        self.conn.execute("ANALYZE")
+
+    def tearDown(self):
+        self.conn.close()
+
+    def linkage_statements(self):
+        """Every statement the linkage readers actually run that touches the link table"""
+        statements = []
+        self.conn.set_trace_callback(statements.append)
+        try:
+            dashboard_snapshot._metrics_from_source(self.conn, datetime.now())
+            dashboard_snapshot.rebuild_dashboard_snapshot(self.conn)
+            dashboard.get_dashboard_insights(db=self.conn)
+            reports.get_dashboard_kpis(db=self.conn)
+            dc.get_dc_stats(db=self.conn)
+            dc.list_dcs(po=None, db=self.conn)
+            dc.list_dcs(po=4500000001, db=self.conn)
+            check_dc_has_invoice("DC-0001", self.conn)
+            check_dc_already_invoiced("DC-0001", self.conn)
+        finally:
+            self.conn.set_trace_callback(None)
+        return [
+            s
+            for s in statements
+            if "gst_invoice_dc_links" in s and s.lstrip().upper().startswith(("SELECT", "INSERT"))
+        ]
+
+    def test_no_full_scans(self):
+        statements = self.linkage_statements()
+        self.assertGreaterEqual(len(statements), 9)
+        for sql in statements:
+            self.assertEqual(full_scans(self.conn, sql), [], sql)
+            self.assertNotIn("linked_dc_numbers", sql)
+
+    def test_check_catches_missing_index(self):
+        self.conn.execute("DROP INDEX idx_invoice_dc_links_dc")
+        self.conn.execute("ANALYZE")
+        self.assertTrue(any(full_scans(self.conn, sql) for sql in self.linkage_statements()))
+
+    def test_counts_follow_link_table(self):
+        total = self.conn.execute("SELECT COUNT(*) FROM delivery_challans").fetchone()[0]
+        invoiced = count_invoiced_dcs(self.conn)
+        self.assertEqual(invoiced + count_uninvoiced_dcs(self.conn), total)
+
+        # A link without the denormalized column still counts as invoiced
+        dc_number = self.conn.execute(
+            "SELECT dc_number FROM delivery_challans dc "
+            "WHERE NOT EXISTS (SELECT 1 FROM gst_invoice_dc_links l WHERE l.dc_number = dc.dc_number) LIMIT 1"
+        ).fetchone()[0]
+        invoice_number = self.conn.execute("SELECT invoice_number FROM gst_invoices LIMIT 1").fetchone()[0]
+        self.conn.execute(
+            "INSERT INTO gst_invoice_dc_links (id, invoice_number, dc_number) VALUES ('extra', ?, ?)",
+            (invoice_number, dc_number),
+        )
+        self.assertEqual(count_invoiced_dcs(self.conn), invoiced + 1)
+        self.assertEqual(check_dc_has_invoice(dc_number, self.conn), invoice_number)
+
+
+if __name__ == '__main__':
+    unittest.main()
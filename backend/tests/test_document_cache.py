@@ -0,0 +1,171 @@
+import unittest
+import sys
+import os
+import io
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+# Add backend to path so we can import app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from openpyxl import load_workbook
+
+from app.db import MIGRATIONS_DIR, get_db
+from app.routers import dc, invoice
+from app.services import document_cache
+from app.services.dc_invoice_links import invoice_for_dc
+from app.services.document_cache import KIND_DC, DocumentCache, set_document_cache
+from app.services.document_export import load_dc_documents
+from app.services.settings_cache import clear_settings_cache
+from scripts.synthetic_db import build_synthetic_db
+
+
+class TestDocumentCache(unittest.TestCase):
+    def setUp(self):
+        clear_settings_cache()
+        self.conn = build_synthetic_db(po_count=20)
+        with open(MIGRATIONS_DIR / "026_settings_version.sql", "r", encoding="utf-8") as f:
+            self.conn.executescript(f.read())
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = DocumentCache(Path(self.tmp.name))
+        set_document_cache(self.cache)
+
+        self.renders = []
+        original = document_cache.RENDERERS[KIND_DC]
+        self.addCleanup(document_cache.RENDERERS.__setitem__, KIND_DC, original)
+
+        def counting(header, items, db):
+            self.renders.append(header["dc_number"])
+            return original(header, items, db)
+
+        document_cache.RENDERERS[KIND_DC] = counting
+
+        dc_numbers = [r[0] for r in self.conn.execute("SELECT dc_number FROM delivery_challans ORDER BY dc_number")]
+        self.invoiced = [n for n in dc_numbers if invoice_for_dc(self.conn, n)]
+        self.open_dcs = [n for n in dc_numbers if not invoice_for_dc(self.conn, n)]
+        self.docs = load_dc_documents(self.conn, dc_numbers)
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmp.cleanup()
+
+    def cached(self, number):
+        doc = self.docs[number]
+        return self.cache.get_or_render(KIND_DC, number, doc["header"], doc["items"], self.conn)
+
+    def test_repeat_requests_reuse_the_file(self):
+        number = self.invoiced[0]
+        first = self.cached(number)
+        second = self.cached(number)
+        self.assertEqual(first, second)
+        self.assertEqual(self.renders, [number])
+        sheet = load_workbook(io.BytesIO(first.read_bytes())).active
+        self.assertTrue(any(number in str(c) for row in sheet.iter_rows(values_only=True) for c in row if c))
+
+    def test_settings_change_renders_fresh_file(self):
+        number = self.invoiced[0]
+        first = self.cached(number)
+        self.conn.execute("INSERT INTO business_settings (key, value) VALUES ('supplier_name', 'New Name')")
+        second = self.cached(number)
+        self.assertNotEqual(first, second)
+        self.assertFalse(first.exists())
+        self.assertEqual(len(self.renders), 2)
+
+    def test_invalidate(self):
+        number = self.invoiced[0]
+        path = self.cached(number)
+        self.cache.invalidate(KIND_DC, number)
+        self.assertFalse(path.exists())
+        self.cached(number)
+        self.assertEqual(len(self.renders), 2)
+
+    def test_lru_eviction(self):
+        a, b, c = self.invoiced[:3]
+        size = self.cached(a).stat().st_size
+        self.cache.max_bytes = int(size * 2.5)
+        path_b = self.cached(b)
+        # Touch a so b becomes least recently used
+        past = time.time() - 60
+        os.utime(path_b, (past, past))
+        self.cached(a)
+        self.cached(c)
+        self.assertFalse(path_b.exists())
+        self.assertLessEqual(self.cache.size_bytes(), self.cache.max_bytes)
+        self.assertEqual(self.renders, [a, b, c])
+
+    def test_numbers_that_sanitize_alike_do_not_collide(self):
+        doc = self.docs[self.invoiced[0]]
+        slash = self.cache.get_or_render(KIND_DC, "DC/24/1", doc["header"], doc["items"], self.conn)
+        underscore = self.cache.get_or_render(KIND_DC, "DC_24_1", doc["header"], doc["items"], self.conn)
+        self.assertNotEqual(slash.parent, underscore.parent)
+        self.assertTrue(slash.exists())
+        self.cache.invalidate(KIND_DC, "DC_24_1")
+        self.assertTrue(slash.exists())
+        self.assertFalse(underscore.exists())
+        for number in ("..", ".", "a/../b"):
+            self.assertEqual(self.cache._document_dir(KIND_DC, number).parent, self.cache.root / KIND_DC)
+
+    def test_files_in_use_are_skipped(self):
+        a, b = self.invoiced[:2]
+        path_a = self.cached(a)
+        self.cache.max_bytes = 1
+        # Windows refuses to delete a file another request is still streaming
+        with patch.object(Path, "unlink", side_effect=PermissionError("in use")):
+            path_b = self.cached(b)
+        self.assertTrue(path_a.exists())
+        self.assertTrue(path_b.exists())
+        self.cached(self.invoiced[2])
+        self.assertFalse(path_a.exists())
+
+
+class TestDownloadEndpoints(unittest.TestCase):
+    def setUp(self):
+        clear_settings_cache()
+        self.conn = build_synthetic_db(po_count=20)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = DocumentCache(Path(self.tmp.name))
+        set_document_cache(self.cache)
+        app = FastAPI()
+        app.include_router(dc.router, prefix="/api/dc")
+        app.include_router(invoice.router, prefix="/api/invoice")
+        app.dependency_overrides[get_db] = lambda: self.conn
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmp.cleanup()
+
+    def cached_files(self):
+        return sorted(p.relative_to(self.tmp.name).parts[:2] for p in Path(self.tmp.name).rglob("*.xlsx"))
+
+    def test_only_frozen_documents_are_cached(self):
+        dc_numbers = [r[0] for r in self.conn.execute("SELECT dc_number FROM delivery_challans")]
+        invoiced = next(n for n in dc_numbers if invoice_for_dc(self.conn, n))
+        open_dc = next(n for n in dc_numbers if not invoice_for_dc(self.conn, n))
+        invoice_number = self.conn.execute("SELECT invoice_number FROM gst_invoices LIMIT 1").fetchone()[0]
+
+        for path in (f"/api/dc/{invoiced}/download", f"/api/dc/{open_dc}/download", f"/api/invoice/{invoice_number}/download"):
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, 200, path)
+            self.assertIn("attachment", response.headers["content-disposition"])
+            load_workbook(io.BytesIO(response.content))
+
+        self.assertEqual(
+            self.cached_files(),
+            sorted([
+                ("dc", document_cache._directory_name(invoiced)),
+                ("invoice", document_cache._directory_name(invoice_number)),
+            ]),
+        )
+        self.assertEqual(
+            self.client.get(f"/api/dc/{invoiced}/download").content,
+            (next(Path(self.tmp.name, "dc", document_cache._directory_name(invoiced)).glob("*.xlsx"))).read_bytes(),
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import unittest
+import sys
+import os
+import io
+import tempfile
+import zipfile
+from unittest.mock import patch
+
+# Add backend to path so we can import app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from openpyxl import load_workbook
+
+from app.db import get_db, get_read_db
+from app.routers import dc, documents, invoice
+from app.services.document_cache import DocumentCache, set_document_cache
+from app.services import document_export
+from app.services.document_export import build_bulk_export, load_dc_documents
+from scripts.synthetic_db import QueryCounter, build_synthetic_db
+
+
+def sheet_values(sheet):
+    return [[cell for cell in row] for row in sheet.iter_rows(values_only=True)]
+
+
+class TestBulkDocumentExport(unittest.TestCase):
+    def setUp(self):
+        self.conn = build_synthetic_db(po_count=20)
+        self.cache_dir = tempfile.TemporaryDirectory()
+        set_document_cache(DocumentCache(self.cache_dir.name))
+        app = FastAPI()
+        app.include_router(dc.router, prefix="/api/dc")
+        app.include_router(invoice.router, prefix="/api/invoice")
+        app.include_router(documents.router, prefix="/api/documents")
+        app.dependency_overrides[get_db] = lambda: self.conn
+        app.dependency_overrides[get_read_db] = lambda: self.conn
+        self.client = TestClient(app)
+        self.dc_numbers = [r[0] for r in self.conn.execute("SELECT dc_number FROM delivery_challans ORDER BY dc_number LIMIT 6")]
+        self.invoice_numbers = [r[0] for r in self.conn.execute("SELECT invoice_number FROM gst_invoices ORDER BY invoice_number LIMIT 4")]
+
+    def tearDown(self):
+        self.conn.close()
+        self.cache_dir.cleanup()
+
+    def single(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200, path)
+        return sheet_values(load_workbook(io.BytesIO(response.content)).active)
+
+    def test_zip_matches_single_downloads(self):
+        response = self.client.post(
+            "/api/documents/export",
+            json={"invoice_numbers": self.invoice_numbers, "dc_numbers": self.dc_numbers},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-type"], "application/zip")
+
+        archive = zipfile.ZipFile(io.BytesIO(response.content))
+        names = archive.namelist()
+        self.assertEqual(len(names), len(self.invoice_numbers) + len(self.dc_numbers))
+        for number in self.dc_numbers:
+            bulk = sheet_values(load_workbook(io.BytesIO(archive.read(f"dcs/DC_{number}.xlsx"))).active)
+            self.assertEqual(bulk, self.single(f"/api/dc/{number}/download"))
+        for number in self.invoice_numbers:
+            bulk = sheet_values(load_workbook(io.BytesIO(archive.read(f"invoices/Invoice_{number}.xlsx"))).active)
+            self.assertEqual(bulk, self.single(f"/api/invoice/{number}/download"))
+
+    def test_zip_entries_stay_unique(self):
+        doc = load_dc_documents(self.conn, self.dc_numbers[:1])[self.dc_numbers[0]]
+        numbers = ["DC/24/1", "DC-24-1", "dc-24-1"]
+        with patch.object(document_export, "load_dc_documents", return_value={n: doc for n in numbers}):
+            spool, _, _ = build_bulk_export(self.conn, dc_numbers=numbers)
+        with spool, zipfile.ZipFile(spool) as archive:
+            self.assertEqual(
+                archive.namelist(),
+                ["dcs/DC_DC-24-1.xlsx", "dcs/DC_DC-24-1 (2).xlsx", "dcs/DC_dc-24-1 (3).xlsx"],
+            )
+
+    def test_workbook_layout_by_date_range(self):
+        response = self.client.post(
+            "/api/documents/export",
+            json={"start_date": "2000-01-01", "end_date": "2100-01-01", "kinds": ["dc"], "layout": "workbook"},
+        )
+        self.assertEqual(response.status_code, 200)
+        workbook = load_workbook(io.BytesIO(response.content))
+        total = self.conn.execute("SELECT COUNT(*) FROM delivery_challans").fetchone()[0]
+        self.assertEqual(len(workbook.sheetnames), total)
+        self.assertTrue(all(name.startswith("DC ") for name in workbook.sheetnames))
+
+    def test_loading_is_batched(self):
+        with QueryCounter(self.conn) as few:
+            load_dc_documents(self.conn, self.dc_numbers[:2])
+        with QueryCounter(self.conn) as many:
+            load_dc_documents(self.conn, self.dc_numbers)
+        self.assertEqual(few.count, many.count)
+
+    def test_detail_matches_independent_totals(self):
+        detail = self.client.get(f"/api/dc/{self.dc_numbers[0]}").json()
+        self.assertEqual(detail["header"]["dc_number"], self.dc_numbers[0])
+        for item in detail["items"]:
+            dispatched = self.conn.execute(
+                "SELECT COALESCE(SUM(dispatch_qty), 0) FROM delivery_challan_items WHERE po_item_id = ? AND lot_no = ?",
+                (item["po_item_id"], item["lot_no"]),
+            ).fetchone()[0]
+            self.assertEqual(item["remaining_post_dc"], max(0, (item["lot_ordered_qty"] or 0) - dispatched))
+        self.assertEqual(self.client.get("/api/dc/NOPE").status_code, 404)
+
+    def test_errors(self):
+        missing = self.client.post("/api/documents/export", json={"dc_numbers": ["NOPE"]})
+        self.assertEqual(missing.status_code, 404)
+        self.assertIn("NOPE", missing.json()["detail"])
+        self.assertEqual(self.client.post("/api/documents/export", json={}).status_code, 400)
+        self.assertEqual(self.client.post("/api/documents/export", json={"dc_numbers": []}).status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
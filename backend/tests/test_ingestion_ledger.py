@@ -0,0 +1,111 @@
+import asyncio
+import unittest
+import sys
+import os
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+# Add backend to path so we can import app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db import MIGRATIONS_DIR, ConnectionPool
+from app.core.write_executor import WriteExecutor
+from app.services.po_batch_ingest import ingest_po_files
+from app.services.srv_ingestion import delete_srv, process_srv_file
+from scripts.synthetic_db import SCHEMA_SQL, build_synthetic_db
+from scripts.synthetic_po_html import render_po_html
+from scripts.synthetic_srv_html import render_srv_html
+
+
+def apply_ledger_migration(conn):
+    with open(MIGRATIONS_DIR / "023_ingestion_ledger.sql", encoding="utf-8") as f:
+        conn.executescript(f.read())
+
+
+class TestPOLedger(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pool = ConnectionPool(Path(self.tmp.name) / "ledger.db")
+        with self.pool.writer() as conn:
+            conn.executescript(SCHEMA_SQL)
+            apply_ledger_migration(conn)
+        self.executor = WriteExecutor(self.pool)
+
+    def tearDown(self):
+        self.executor.shutdown(timeout=5)
+        self.pool.close()
+        self.tmp.cleanup()
+
+    def run_batch(self, files, force=False):
+        async def collect():
+            return [event async for event in ingest_po_files(files, force=force)]
+
+        with patch("app.services.po_batch_ingest.get_write_executor", return_value=self.executor):
+            return asyncio.run(collect())[-1]
+
+    def test_unchanged_files_skip_parsing(self):
+        files = [(f"PO_{n}.html", render_po_html(4500000000 + n).encode()) for n in range(3)]
+        first = self.run_batch(files)
+        self.assertEqual(first["successful"], 3)
+
+        with patch("app.services.po_batch_ingest._parse_file") as parse:
+            again = self.run_batch(files)
+        parse.assert_not_called()
+        self.assertEqual(self.executor.stats()["jobs"], 1)
+        self.assertTrue(all(r["unchanged"] for r in again["results"]))
+        self.assertEqual(
+            [r["message"] for r in again["results"]], [r["message"] for r in first["results"]]
+        )
+
+        forced = self.run_batch(files, force=True)
+        self.assertFalse(any(r["unchanged"] for r in forced["results"]))
+        self.assertEqual(self.executor.stats()["jobs"], 2)
+
+    def test_newer_file_for_same_po_invalidates_entry(self):
+        original = ("PO_1.html", render_po_html(4500000001, items=2).encode())
+        amended = ("PO_1_amended.html", render_po_html(4500000001, items=5).encode())
+        self.run_batch([original])
+        self.run_batch([amended])
+
+        summary = self.run_batch([original])
+
+        self.assertFalse(summary["results"][0]["unchanged"])
+        self.assertTrue(summary["results"][0]["success"])
+        self.assertTrue(self.run_batch([original])["results"][0]["unchanged"])
+
+
+class TestSRVLedger(unittest.TestCase):
+    def setUp(self):
+        self.conn = build_synthetic_db(po_count=10)
+        apply_ledger_migration(self.conn)
+        self.po_items = [
+            (row[0], row[1])
+            for row in self.conn.execute("SELECT po_number, po_item_no FROM purchase_order_items")
+        ]
+        self.html = render_srv_html(self.po_items, srvs=3, items_per_srv=2).encode()
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_reupload_returns_previous_messages_until_srv_deleted(self):
+        ok, messages = process_srv_file(self.html, "SRV_1.html", self.conn)
+        self.assertTrue(ok, messages)
+
+        with patch("app.services.srv_ingestion.iter_srv_groups") as parse:
+            ok, again = process_srv_file(self.html, "SRV_1.html", self.conn)
+        parse.assert_not_called()
+        self.assertTrue(ok)
+        self.assertIn("skipped", again[0])
+        self.assertEqual(again[1:], messages)
+
+        ok, forced = process_srv_file(self.html, "SRV_1.html", self.conn, force=True)
+        self.assertEqual(forced, messages)
+
+        delete_srv("2400002", self.conn)
+        ok, after_delete = process_srv_file(self.html, "SRV_1.html", self.conn)
+        self.assertEqual(after_delete, messages)
+
+
+if __name__ == '__main__':
+    unittest.main()
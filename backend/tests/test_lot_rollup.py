@@ -0,0 +1,182 @@
+import unittest
+import sys
+import os
+
+# Add backend to path so we can import app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.db import MIGRATIONS_DIR, get_db
+from app.core.exceptions import BusinessRuleViolation, ResourceNotFoundError
+from app.routers import reconciliation
+from app.services.dc import validate_dc_items
+from app.services.lot_rollup import get_po_items, install_lot_rollup, rebuild_lot_rollup
+from app.services.reconciliation_ledger import install_ledger, rebuild_reconciliation_ledger
+from app.services.srv_ingestion import process_srv_file
+from scripts.synthetic_db import build_synthetic_db
+from scripts.synthetic_srv_html import render_srv_html
+
+ROLLUP_SQL = "SELECT * FROM lot_rollup ORDER BY po_item_id, lot_no"
+
+
+class TestLotRollup(unittest.TestCase):
+    def setUp(self):
+        self.conn = build_synthetic_db(po_count=30)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        with open(MIGRATIONS_DIR / "022_srv_bulk_ingest.sql", encoding="utf-8") as f:
+            self.conn.executescript(f.read())
+        install_ledger(self.conn, MIGRATIONS_DIR)
+        rebuild_reconciliation_ledger(self.conn)
+        install_lot_rollup(self.conn, MIGRATIONS_DIR)
+        rebuild_lot_rollup(self.conn)
+        self.conn.commit()
+        self.item = self.conn.execute(
+            "SELECT id, po_number, po_item_no FROM purchase_order_items WHERE po_number = 4500000001 AND po_item_no = 10"
+        ).fetchone()
+
+    def tearDown(self):
+        self.conn.close()
+
+    def assertRollupMatchesRebuild(self):
+        maintained = [tuple(r) for r in self.conn.execute(ROLLUP_SQL)]
+        self.conn.execute("SAVEPOINT rebuild")
+        rebuild_lot_rollup(self.conn)
+        rebuilt = [tuple(r) for r in self.conn.execute(ROLLUP_SQL)]
+        self.conn.execute("ROLLBACK TO rebuild")
+        self.conn.execute("RELEASE rebuild")
+        self.assertEqual(maintained, rebuilt)
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM lot_rollup_refresh").fetchone()[0], 0)
+
+    def test_item_totals_match_reconciliation_ledger(self):
+        rows = self.conn.execute("SELECT COUNT(*) FROM lot_rollup").fetchone()[0]
+        self.assertEqual(rows, 30 * 4 * 2)
+        for po_number in (4500000000, 4500000004, 4500000007):
+            ledger = {
+                r["po_item_id"]: r
+                for r in self.conn.execute(
+                    "SELECT * FROM reconciliation_ledger_mv WHERE po_number = ?", (po_number,)
+                )
+            }
+            items = get_po_items(self.conn, po_number)
+            self.assertEqual(len(items), 4)
+            for item in items:
+                row = ledger[item["po_item_id"]]
+                self.assertAlmostEqual(item["ordered_qty"], row["ordered_quantity"])
+                self.assertAlmostEqual(item["dispatched_qty"], row["total_delivered_qty"])
+                self.assertAlmostEqual(item["received_qty"], row["total_received_qty"])
+                self.assertAlmostEqual(item["rejected_qty"], row["total_rejected_qty"])
+                self.assertAlmostEqual(item["invoiced_qty"], row["total_invoiced_qty"])
+
+    def test_triggers_track_writes(self):
+        db, item = self.conn, self.item
+
+        # DC lines on a scheduled lot and without a lot
+        db.execute("INSERT INTO delivery_challans (dc_number, dc_date, po_number) VALUES ('DCX', '2024-01-01', ?)", (item["po_number"],))
+        db.execute(
+            "INSERT INTO delivery_challan_items (id, dc_number, po_item_id, dispatch_qty, lot_no) VALUES "
+            "('dcx-1', 'DCX', ?, 3, 1), ('dcx-2', 'DCX', ?, 2, NULL)",
+            (item["id"], item["id"]),
+        )
+        lot0 = db.execute("SELECT dispatched_qty FROM lot_rollup WHERE po_item_id = ? AND lot_no = 0", (item["id"],)).fetchone()
+        self.assertEqual(lot0[0], 2)
+        self.assertRollupMatchesRebuild()
+
+        db.execute("UPDATE delivery_challan_items SET lot_no = 2 WHERE id = 'dcx-2'")
+        self.assertIsNone(db.execute("SELECT 1 FROM lot_rollup WHERE po_item_id = ? AND lot_no = 0", (item["id"],)).fetchone())
+        self.assertRollupMatchesRebuild()
+
+        # Invoice against the DC, then edit it
+        db.execute("INSERT INTO gst_invoices (invoice_number, invoice_date, linked_dc_numbers) VALUES ('INVX', '2024-01-02', 'DCX')")
+        db.execute(
+            "INSERT INTO gst_invoice_items (invoice_number, po_sl_no, description, quantity, rate, taxable_value, "
+            "cgst_amount, sgst_amount, total_amount) VALUES ('INVX', '1', 'X', 3, 1, 3, 0, 0, 3)"
+        )
+        db.execute("UPDATE gst_invoice_items SET quantity = 2 WHERE invoice_number = 'INVX'")
+        self.assertRollupMatchesRebuild()
+
+        # SRV receipt on a lot, then deactivate the SRV
+        db.execute("INSERT INTO srvs (srv_number, srv_date, po_number) VALUES ('SRVX', '2024-01-03', ?)", (str(item["po_number"]),))
+        db.execute(
+            "INSERT INTO srv_items (srv_number, po_number, po_item_no, lot_no, received_qty, rejected_qty) "
+            "VALUES ('SRVX', ?, 10, 2, 2, 1)",
+            (str(item["po_number"]),),
+        )
+        self.assertRollupMatchesRebuild()
+        db.execute("UPDATE srvs SET is_active = 0 WHERE srv_number = 'SRVX'")
+        self.assertRollupMatchesRebuild()
+
+        # PO re-ingestion replaces the delivery schedule
+        db.execute("DELETE FROM purchase_order_deliveries WHERE po_item_id = ?", (item["id"],))
+        db.execute(
+            "INSERT INTO purchase_order_deliveries (id, po_item_id, lot_no, dely_qty) VALUES ('pdx', ?, 1, 50)",
+            (item["id"],),
+        )
+        self.assertRollupMatchesRebuild()
+
+        # Cascading deletes
+        db.execute("DELETE FROM gst_invoices WHERE invoice_number = 'INVX'")
+        db.execute("DELETE FROM delivery_challans WHERE dc_number = 'DCX'")
+        self.assertRollupMatchesRebuild()
+        db.execute("DELETE FROM purchase_orders WHERE po_number = ?", (item["po_number"],))
+        self.assertIsNone(db.execute("SELECT 1 FROM lot_rollup WHERE po_number = ?", (item["po_number"],)).fetchone())
+        self.assertRollupMatchesRebuild()
+
+    def test_bulk_srv_ingest_refreshes_touched_items(self):
+        po_items = [tuple(r) for r in self.conn.execute("SELECT po_number, po_item_no FROM purchase_order_items ORDER BY 1, 2")]
+        html = render_srv_html(po_items, srvs=20, items_per_srv=3).encode()
+        ok, messages = process_srv_file(html, "SRV_batch.html", self.conn)
+        self.assertTrue(ok, messages)
+        self.assertRollupMatchesRebuild()
+
+    def test_validate_dc_items_reads_lot_rollup(self):
+        lot = self.conn.execute(
+            "SELECT ordered_qty - dispatched_qty FROM lot_rollup WHERE po_item_id = ? AND lot_no = 1", (self.item["id"],)
+        ).fetchone()[0]
+
+        statements = []
+        self.conn.set_trace_callback(statements.append)
+        validate_dc_items([{"po_item_id": self.item["id"], "lot_no": 1, "dispatch_qty": lot}], self.conn)
+        self.conn.set_trace_callback(None)
+        self.assertTrue(any("FROM lot_rollup" in s for s in statements))
+        self.assertFalse(any("purchase_order_deliveries" in s for s in statements))
+
+        with self.assertRaises(BusinessRuleViolation):
+            validate_dc_items([{"po_item_id": self.item["id"], "lot_no": 1, "dispatch_qty": lot + 1}], self.conn)
+        with self.assertRaises(ResourceNotFoundError):
+            validate_dc_items([{"po_item_id": self.item["id"], "lot_no": 9, "dispatch_qty": 1}], self.conn)
+
+        # Updating a DC does not count its own lines against the lot
+        dc = self.conn.execute(
+            "SELECT dc_number, po_item_id, lot_no, dispatch_qty FROM delivery_challan_items LIMIT 1"
+        ).fetchone()
+        remaining = self.conn.execute(
+            "SELECT ordered_qty - dispatched_qty FROM lot_rollup WHERE po_item_id = ? AND lot_no = ?", (dc[1], dc[2])
+        ).fetchone()[0]
+        validate_dc_items(
+            [{"po_item_id": dc[1], "lot_no": dc[2], "dispatch_qty": remaining + dc[3]}], self.conn, exclude_dc=dc[0]
+        )
+
+    def test_endpoints(self):
+        app = FastAPI()
+        app.include_router(reconciliation.router, prefix="/api/reconciliation")
+        app.dependency_overrides[get_db] = lambda: self.conn
+        client = TestClient(app)
+
+        items = client.get("/api/reconciliation/po/4500000000").json()
+        self.assertEqual([i["po_item_no"] for i in items], [10, 20, 30, 40])
+        self.assertEqual({i["lot_count"] for i in items}, {2})
+
+        body = client.get("/api/reconciliation/po/4500000000/lots").json()
+        self.assertEqual(body["po_number"], 4500000000)
+        self.assertEqual(len(body["lots"]), 8)
+        for lot in body["lots"]:
+            self.assertAlmostEqual(lot["remaining_qty"], lot["ordered_qty"] - lot["dispatched_qty"])
+
+        self.assertEqual(client.get("/api/reconciliation/po/1").status_code, 404)
+        self.assertEqual(client.get("/api/reconciliation/po/1/lots").status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+import sys
+import os
+import sqlite3
+
+# Add backend to path so we can import app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.exceptions import ConflictError
+from app.db import MIGRATIONS_DIR, get_db, get_read_db
+from app.routers import common
+from app.services.number_availability import check_numbers, ensure_number_available, install_financial_year
+from scripts.synthetic_db import build_synthetic_db
+
+
+class TestNumberAvailability(unittest.TestCase):
+    def setUp(self):
+        # The synthetic schema carries the older, plain financial_year column
+        self.conn = build_synthetic_db(po_count=20)
+        install_financial_year(self.conn, MIGRATIONS_DIR)
+        self.dc = self.conn.execute("SELECT dc_number, dc_date FROM delivery_challans LIMIT 1").fetchone()
+        self.invoice = self.conn.execute("SELECT invoice_number, invoice_date FROM gst_invoices LIMIT 1").fetchone()
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_generated_financial_year(self):
+        columns = {row[1]: row[6] for row in self.conn.execute("PRAGMA table_xinfo(delivery_challans)")}
+        self.assertEqual(columns["financial_year_legacy"], 0)
+        self.assertIn(columns["financial_year"], (2, 3))
+
+        self.conn.execute("UPDATE delivery_challans SET dc_date = '2024-03-31' WHERE dc_number = ?", (self.dc[0],))
+        fy = lambda: self.conn.execute(
+            "SELECT financial_year FROM delivery_challans WHERE dc_number = ?", (self.dc[0],)
+        ).fetchone()[0]
+        self.assertEqual(fy(), "2023-24")
+        self.conn.execute("UPDATE delivery_challans SET dc_date = '2024-04-01' WHERE dc_number = ?", (self.dc[0],))
+        self.assertEqual(fy(), "2024-25")
+        self.conn.execute("UPDATE delivery_challans SET dc_date = '1999-12-31' WHERE dc_number = ?", (self.dc[0],))
+        self.assertEqual(fy(), "1999-00")
+
+        # Re-running is a no-op and drops the per-FY unique indexes of the first version
+        self.conn.execute("CREATE UNIQUE INDEX idx_dc_number_fy ON delivery_challans(dc_number, financial_year)")
+        install_financial_year(self.conn, MIGRATIONS_DIR)
+        self.assertIsNone(self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'idx_dc_number_fy'").fetchone())
+
+    def test_fresh_schema_without_financial_year(self):
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE delivery_challans (dc_number TEXT PRIMARY KEY, dc_date DATE NOT NULL)")
+        conn.execute("CREATE TABLE gst_invoices (invoice_number TEXT PRIMARY KEY, invoice_date DATE NOT NULL)")
+        conn.execute("INSERT INTO gst_invoices VALUES ('INV-1', '2025-01-15')")
+        install_financial_year(conn, MIGRATIONS_DIR)
+        self.assertEqual(conn.execute("SELECT financial_year FROM gst_invoices").fetchone()[0], "2024-25")
+        conn.close()
+
+    def test_batch_check(self):
+        statements = []
+        self.conn.set_trace_callback(statements.append)
+        results = check_numbers(
+            self.conn,
+            [
+                {"type": "DC", "number": self.dc[0], "date": self.dc[1]},
+                {"type": "DC", "number": "DC-FREE", "date": self.dc[1]},
+                {"type": "Invoice", "number": self.invoice[0], "date": self.invoice[1]},
+                {"type": "DC", "number": self.dc[0], "date": "1990-06-01"},
+            ],
+        )
+        self.conn.set_trace_callback(None)
+
+        # Numbers are primary keys: used in another FY is still used
+        self.assertEqual([r["exists"] for r in results], [True, False, True, True])
+        self.assertEqual(results[3]["financial_year"], "1990-91")
+        self.assertNotEqual(results[3]["existing_financial_year"], "1990-91")
+        self.assertIsNone(results[1]["existing_financial_year"])
+        # One lookup per type
+        self.assertEqual(len(statements), 2)
+
+    def test_ensure_number_available(self):
+        with self.assertRaises(ConflictError) as ctx:
+            ensure_number_available(self.conn, "Invoice", self.invoice[0], self.invoice[1])
+        self.assertEqual(ctx.exception.details["invoice_number"], self.invoice[0])
+        # A later FY does not free the number
+        with self.assertRaises(ConflictError):
+            ensure_number_available(self.conn, "DC", self.dc[0], "2099-06-01")
+        self.assertEqual(ensure_number_available(self.conn, "DC", "DC-NEW", "2025-02-01"), "2024-25")
+
+    def test_endpoints(self):
+        app = FastAPI()
+        app.include_router(common.router, prefix="/api/common")
+        app.dependency_overrides[get_db] = lambda: self.conn
+        app.dependency_overrides[get_read_db] = lambda: self.conn
+        client = TestClient(app)
+
+        response = client.get(
+            "/api/common/check-duplicate", params={"type": "DC", "number": self.dc[0], "date": self.dc[1]}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["exists"])
+
+        response = client.post(
+            "/api/common/check-duplicate",
+            json={"checks": [
+                {"type": "Invoice", "number": self.invoice[0], "date": self.invoice[1]},
+                {"type": "Invoice", "number": "INV-FREE", "date": self.invoice[1]},
+            ]},
+        )
+        self.assertEqual([r["exists"] for r in response.json()["results"]], [True, False])
+        self.assertEqual(
+            client.post("/api/common/check-duplicate", json={"checks": [{"type": "PO", "number": "1"}]}).status_code,
+            422,
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
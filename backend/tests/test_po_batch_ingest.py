@@ -0,0 +1,151 @@
+import asyncio
+import unittest
+import sys
+import os
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+# Add backend to path so we can import app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db import ConnectionPool
+from app.core.write_executor import WriteExecutor
+from app.services.ingest_po import POIngestionService
+from app.services.po_scraper import parse_po_html
+from app.services.po_batch_ingest import ingest_po_files
+from scripts.synthetic_db import SCHEMA_SQL
+from scripts.synthetic_po_html import render_po_html
+
+
+def snapshot(conn):
+    """Table contents without generated ids and timestamps"""
+    return {
+        "headers": conn.execute(
+            "SELECT po_number, po_date, supplier_name, po_value, amend_no FROM purchase_orders ORDER BY po_number"
+        ).fetchall(),
+        "items": conn.execute(
+            "SELECT po_number, po_item_no, material_code, ord_qty, rcd_qty, rejected_qty "
+            "FROM purchase_order_items ORDER BY po_number, po_item_no"
+        ).fetchall(),
+        "deliveries": conn.execute(
+            "SELECT poi.po_number, poi.po_item_no, d.lot_no, d.dely_qty, d.dely_date "
+            "FROM purchase_order_deliveries d JOIN purchase_order_items poi ON poi.id = d.po_item_id "
+            "ORDER BY 1, 2, 3"
+        ).fetchall(),
+        "srvs": conn.execute("SELECT srv_number, po_found FROM srvs ORDER BY 1").fetchall(),
+    }
+
+
+class TestIngestMany(unittest.TestCase):
+    def make_db(self):
+        import sqlite3
+
+        conn = sqlite3.connect(':memory:')
+        conn.row_factory = sqlite3.Row
+        conn.executescript(SCHEMA_SQL)
+        # Orphan SRV waiting for PO 4500000002
+        conn.execute(
+            "INSERT INTO srvs (srv_number, srv_date, po_number, po_found) VALUES ('S1', '2024-06-01', '4500000002', 0)"
+        )
+        conn.execute(
+            "INSERT INTO srv_items (srv_number, po_number, po_item_no, received_qty, rejected_qty) "
+            "VALUES ('S1', '4500000002', 10, 7, 1)"
+        )
+        return conn
+
+    def test_matches_per_file_ingestion(self):
+        parsed = [parse_po_html(render_po_html(4500000000 + n, items=3)) for n in range(1, 5)]
+        service = POIngestionService()
+
+        serial = self.make_db()
+        serial_warnings = [service.ingest_po(serial, h, i)[1] for h, i in parsed]
+        batched = self.make_db()
+        outcomes = service.ingest_many(batched, parsed)
+
+        self.assertEqual(snapshot(serial), snapshot(batched))
+        self.assertEqual([w[0] for w in serial_warnings], [o[1][0] for o in outcomes])
+        self.assertEqual([o[2] for o in outcomes], [0, 1, 0, 0])
+
+        # Re-ingesting keeps item ids and replaces deliveries
+        ids = batched.execute("SELECT id FROM purchase_order_items ORDER BY id").fetchall()
+        outcomes = service.ingest_many(batched, parsed)
+        self.assertIn("already exists", outcomes[0][1][1])
+        self.assertEqual(ids, batched.execute("SELECT id FROM purchase_order_items ORDER BY id").fetchall())
+        self.assertEqual(snapshot(serial), snapshot(batched))
+
+    def test_repeated_po_uses_last_copy(self):
+        first = parse_po_html(render_po_html(4500000009, items=2))
+        second = parse_po_html(render_po_html(4500000009, items=5))
+        conn = self.make_db()
+
+        outcomes = POIngestionService().ingest_many(conn, [first, second])
+
+        self.assertIn("later file", outcomes[0][1][0])
+        self.assertEqual(
+            conn.execute("SELECT COUNT(*) FROM purchase_order_items").fetchone()[0], 5
+        )
+
+
+class TestIngestPOFiles(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pool = ConnectionPool(Path(self.tmp.name) / "batch.db")
+        with self.pool.writer() as conn:
+            conn.executescript(SCHEMA_SQL)
+        self.executor = WriteExecutor(self.pool)
+
+    def tearDown(self):
+        self.executor.shutdown(timeout=5)
+        self.pool.close()
+        self.tmp.cleanup()
+
+    def run_batch(self, files):
+        async def collect():
+            return [event async for event in ingest_po_files(files)]
+
+        with patch("app.services.po_batch_ingest.get_write_executor", return_value=self.executor):
+            return asyncio.run(collect())
+
+    def test_progress_events_and_summary(self):
+        files = [(f"PO_{n}.html", render_po_html(4500000000 + n).encode()) for n in range(6)]
+        files.append(("notes.txt", b"hello"))
+        files.append(("broken.html", b"<html><body>no tables</body></html>"))
+
+        events = self.run_batch(files)
+
+        parsed = [e for e in events if e["event"] == "parsed"]
+        self.assertEqual(len(parsed), 8)
+        self.assertEqual(sorted(e["done"] for e in parsed), list(range(1, 9)))
+
+        summary = events[-1]
+        self.assertEqual(summary["event"], "complete")
+        self.assertEqual((summary["successful"], summary["failed"]), (6, 2))
+        self.assertEqual([r["filename"] for r in summary["results"]], [f for f, _ in files])
+        self.assertEqual(summary["results"][6]["message"], "Only HTML files are supported")
+        with self.pool.reader() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM purchase_orders").fetchone()[0], 6)
+        # All six POs went through one write job
+        self.assertEqual(self.executor.stats()["jobs"], 1)
+
+    def test_per_file_fallback_links_srvs(self):
+        with self.pool.writer() as conn:
+            conn.execute(
+                "INSERT INTO srvs (srv_number, srv_date, po_number, po_found) VALUES ('S1', '2024-06-01', '4500000002', 0)"
+            )
+            conn.commit()
+        files = [(f"PO_{n}.html", render_po_html(4500000000 + n).encode()) for n in range(1, 4)]
+
+        with patch(
+            "app.services.po_batch_ingest.po_ingestion_service.ingest_many", side_effect=RuntimeError("batch failed")
+        ):
+            summary = self.run_batch(files)[-1]
+
+        self.assertEqual(summary["successful"], 3)
+        self.assertEqual([r["linked_srvs"] for r in summary["results"]], [0, 1, 0])
+        with self.pool.reader() as conn:
+            self.assertEqual(conn.execute("SELECT po_found FROM srvs WHERE srv_number = 'S1'").fetchone()[0], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import sys
+import os
+
+# Add backend to path so we can import app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bs4 import BeautifulSoup
+
+from app.services.po_scraper import extract_po_header, index_tables, parse_po_html
+from scripts.synthetic_po_html import render_po_html
+
+
+def page(*tables):
+    html = "".join(
+        "<table>" + "".join("<tr>" + "".join(f"<td>{c}</td>" for c in row) + "</tr>" for row in rows) + "</table>"
+        for rows in tables
+    )
+    return BeautifulSoup(f"<html><body>{html}</body></html>", "lxml")
+
+
+class TestHeaderLookups(unittest.TestCase):
+    def test_synthetic_page(self):
+        header, items = parse_po_html(render_po_html(4500000123, items=3, lots=2))
+        self.assertEqual(header["PURCHASE ORDER"], 4500000123)
+        self.assertEqual(header["SUPP CODE"], "S1234")
+        self.assertEqual(header["TIN NO"], 23456789)
+        self.assertEqual(header["INSPECTION BY"], "BHEL QA")
+        self.assertEqual(len(items), 6)  # one row per delivery lot
+
+    def test_first_cell_with_a_value_wins(self):
+        soup = page(
+            [["SUPP CODE", "DVN"], ["", "21"]],  # label with nothing below: keep scanning
+            [["SUPP CODE"], ["S9"]],
+            [["SUPP CODE"], ["S10"]],
+        )
+        header = extract_po_header(soup)
+        self.assertEqual(header["SUPP CODE"], "S9")
+        self.assertEqual(header["DVN"], 21)
+
+    def test_label_below_label_is_not_a_value(self):
+        soup = page([["REMARKS"], ["CURRENCY"]], [["REMARKS"], ["Urgent"]])
+        self.assertEqual(extract_po_header(soup)["REMARKS"], "Urgent")
+
+    def test_adjacent_fallback_for_po_date(self):
+        soup = page([["PURCHASE ORDER", "4500000456"], ["Date", "01/06/2024"]])
+        header = extract_po_header(soup)
+        self.assertEqual(header["PURCHASE ORDER"], 4500000456)
+        self.assertEqual(header["PO DATE"], "01/06/2024")
+
+    def test_index_includes_nested_tables(self):
+        soup = BeautifulSoup(
+            "<table><tr><td>A<table><tr><td>B</td></tr></table></td></tr></table>", "lxml"
+        )
+        # row.find_all("td") is recursive, so the outer row also carries the inner cell
+        self.assertEqual(index_tables(soup), [[["AB", "B"], ["B"]], [["B"]]])
+
+
+if __name__ == '__main__':
+    unittest.main()
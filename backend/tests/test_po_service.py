@@ -0,0 +1,266 @@
+import unittest
+import sqlite3
+import sys
+import os
+
+# Add backend to path so we can import app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import HTTPException
+from app.services.po_service import POService
+
+SCHEMA_SQL = """
+CREATE TABLE purchase_orders (
+    po_number INTEGER PRIMARY KEY,
+    po_date DATE,
+    supplier_name TEXT,
+    po_value NUMERIC,
+    amend_no INTEGER DEFAULT 0,
+    po_status TEXT,
+    inspection_at TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE purchase_order_items (
+    id TEXT PRIMARY KEY,
+    po_number INTEGER NOT NULL REFERENCES purchase_orders(po_number) ON DELETE CASCADE,
+    po_item_no INTEGER,
+    material_code TEXT,
+    material_description TEXT,
+    drg_no TEXT,
+    mtrl_cat INTEGER,
+    unit TEXT,
+    po_rate NUMERIC,
+    ord_qty NUMERIC,
+    rcd_qty NUMERIC DEFAULT 0,
+    item_value NUMERIC,
+    hsn_code TEXT,
+    UNIQUE(po_number, po_item_no)
+);
+
+CREATE TABLE purchase_order_deliveries (
+    id TEXT PRIMARY KEY,
+    po_item_id TEXT NOT NULL REFERENCES purchase_order_items(id) ON DELETE CASCADE,
+    lot_no INTEGER,
+    dely_qty NUMERIC,
+    dely_date DATE,
+    entry_allow_date DATE,
+    dest_code INTEGER
+);
+
+CREATE TABLE delivery_challans (
+    dc_number TEXT PRIMARY KEY,
+    dc_date DATE NOT NULL,
+    po_number INTEGER NOT NULL
+);
+
+CREATE TABLE delivery_challan_items (
+    id TEXT PRIMARY KEY,
+    dc_number TEXT NOT NULL,
+    po_item_id TEXT NOT NULL,
+    dispatch_qty NUMERIC NOT NULL,
+    lot_no INTEGER
+);
+
+CREATE TABLE srv_items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    srv_number VARCHAR(50) NOT NULL,
+    po_number VARCHAR(50) NOT NULL,
+    po_item_no INTEGER NOT NULL,
+    received_qty DECIMAL(15,3) DEFAULT 0,
+    rejected_qty DECIMAL(15,3) DEFAULT 0
+);
+
+CREATE INDEX idx_poi_po_number ON purchase_order_items(po_number);
+CREATE INDEX idx_dc_po_number ON delivery_challans(po_number);
+CREATE INDEX idx_dci_po_item_id ON delivery_challan_items(po_item_id);
+CREATE INDEX idx_srv_items_po_item ON srv_items(po_number, po_item_no);
+"""
+
+
+def seed_po(conn, po_number, created_at, items=2, dispatch=True, srv=True):
+    conn.execute(
+        "INSERT INTO purchase_orders (po_number, po_date, supplier_name, po_value, po_status, created_at) "
+        "VALUES (?, '2024-05-01', 'BHEL', 1000, NULL, ?)",
+        (po_number, created_at),
+    )
+    for i in range(1, items + 1):
+        item_id = f"{po_number}-{i}"
+        conn.execute(
+            "INSERT INTO purchase_order_items (id, po_number, po_item_no, drg_no, ord_qty, po_rate) "
+            "VALUES (?, ?, ?, ?, 100, 5)",
+            (item_id, po_number, i * 10, f"DRG-{po_number}-{i}"),
+        )
+        conn.execute(
+            "INSERT INTO purchase_order_deliveries (id, po_item_id, lot_no, dely_qty) VALUES (?, ?, 1, 60)",
+            (f"{item_id}-L1", item_id),
+        )
+        conn.execute(
+            "INSERT INTO purchase_order_deliveries (id, po_item_id, lot_no, dely_qty) VALUES (?, ?, 2, 40)",
+            (f"{item_id}-L2", item_id),
+        )
+        if dispatch:
+            conn.execute(
+                "INSERT OR IGNORE INTO delivery_challans (dc_number, dc_date, po_number) VALUES (?, '2024-06-01', ?)",
+                (f"DC-{po_number}", po_number),
+            )
+            conn.execute(
+                "INSERT INTO delivery_challan_items (id, dc_number, po_item_id, dispatch_qty, lot_no) "
+                "VALUES (?, ?, ?, 30, 1)",
+                (f"DCI-{item_id}", f"DC-{po_number}", item_id),
+            )
+        if srv:
+            conn.execute(
+                "INSERT INTO srv_items (srv_number, po_number, po_item_no, received_qty, rejected_qty) "
+                "VALUES (?, ?, ?, 25, 5)",
+                (f"SRV-{po_number}", str(po_number), i * 10),
+            )
+
+
+class TestPOList(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA_SQL)
+        self.service = POService()
+
+    def tearDown(self):
+        self.conn.close()
+
+    def count_queries(self, fn):
+        statements = []
+        self.conn.set_trace_callback(statements.append)
+        try:
+            fn()
+        finally:
+            self.conn.set_trace_callback(None)
+        return len(statements)
+
+    def test_aggregates_match_per_po_totals(self):
+        seed_po(self.conn, 100, '2024-01-01 10:00:00', items=2)
+        seed_po(self.conn, 200, '2024-01-02 10:00:00', items=1, dispatch=False, srv=False)
+
+        items = {p.po_number: p for p in self.service.list_pos(self.conn)}
+
+        po = items[100]
+        self.assertEqual(po.total_items_count, 2)
+        self.assertEqual(po.total_ordered_quantity, 200)
+        self.assertEqual(po.total_dispatched_quantity, 60)
+        self.assertEqual(po.total_pending_quantity, 140)
+        self.assertEqual(po.total_received_quantity, 50)
+        self.assertEqual(po.total_rejected_quantity, 10)
+        self.assertEqual(po.linked_dc_numbers, 'DC-100')
+        self.assertEqual(po.drg_no, 'DRG-100-1')
+        self.assertEqual(po.po_status, 'New')
+
+        empty = items[200]
+        self.assertEqual(empty.total_dispatched_quantity, 0)
+        self.assertEqual(empty.total_received_quantity, 0)
+        self.assertIsNone(empty.linked_dc_numbers)
+
+    def test_default_order_is_newest_first(self):
+        seed_po(self.conn, 100, '2024-01-01 10:00:00')
+        seed_po(self.conn, 200, '2024-01-03 10:00:00')
+        seed_po(self.conn, 300, '2024-01-02 10:00:00')
+        self.assertEqual(
+            [p.po_number for p in self.service.list_pos(self.conn)], [200, 300, 100]
+        )
+
+    def test_keyset_pagination_visits_every_po_once(self):
+        for n in range(1, 24):
+            # Duplicate timestamps exercise the po_number tie-breaker
+            seed_po(self.conn, n, f'2024-01-{(n % 5) + 1:02d} 10:00:00', items=1)
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = self.service.list_pos_page(
+                self.conn, limit=5, cursor=cursor, sort='created_at', order='asc'
+            )
+            seen.extend(p.po_number for p in page)
+            if not cursor:
+                break
+
+        self.assertEqual(sorted(seen), list(range(1, 24)))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_query_count_is_constant(self):
+        seed_po(self.conn, 1, '2024-01-01 10:00:00')
+        small = self.count_queries(lambda: self.service.list_pos(self.conn))
+        for n in range(2, 60):
+            seed_po(self.conn, n, '2024-01-01 10:00:00')
+        large = self.count_queries(lambda: self.service.list_pos(self.conn))
+        self.assertEqual(small, large)
+        self.assertEqual(large, 1)
+
+    def test_filter_and_invalid_sort(self):
+        seed_po(self.conn, 4500001, '2024-01-01 10:00:00')
+        seed_po(self.conn, 4600002, '2024-01-01 10:00:00')
+        page, _ = self.service.list_pos_page(self.conn, q='45000')
+        self.assertEqual([p.po_number for p in page], [4500001])
+
+        with self.assertRaises(HTTPException):
+            self.service.list_pos_page(self.conn, sort='total_items; DROP TABLE x')
+
+
+class TestPODetail(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA_SQL)
+        self.service = POService()
+
+    def tearDown(self):
+        self.conn.close()
+
+    def count_queries(self, fn):
+        statements = []
+        self.conn.set_trace_callback(statements.append)
+        try:
+            fn()
+        finally:
+            self.conn.set_trace_callback(None)
+        return len(statements)
+
+    def test_items_are_stitched_with_totals_and_deliveries(self):
+        seed_po(self.conn, 100, '2024-01-01 10:00:00', items=3)
+
+        detail = self.service.get_po_detail(self.conn, 100)
+
+        self.assertEqual([i.po_item_no for i in detail.items], [10, 20, 30])
+        item = detail.items[0]
+        self.assertEqual(item.delivered_quantity, 30)
+        self.assertEqual(item.pending_quantity, 70)
+        self.assertEqual(item.received_quantity, 25)
+        self.assertEqual(item.rejected_quantity, 5)
+        self.assertEqual([d.lot_no for d in item.deliveries], [1, 2])
+        self.assertEqual(item.deliveries[0].delivered_quantity, 60)
+
+    def test_query_count_does_not_grow_with_items(self):
+        seed_po(self.conn, 1, '2024-01-01 10:00:00', items=1)
+        seed_po(self.conn, 2, '2024-01-01 10:00:00', items=40)
+        small = self.count_queries(lambda: self.service.get_po_detail(self.conn, 1))
+        large = self.count_queries(lambda: self.service.get_po_detail(self.conn, 2))
+        self.assertEqual(small, large)
+
+    def test_fields_projection_skips_deliveries(self):
+        seed_po(self.conn, 100, '2024-01-01 10:00:00', items=2)
+        full = self.count_queries(lambda: self.service.get_po_detail(self.conn, 100))
+
+        statements = []
+        self.conn.set_trace_callback(statements.append)
+        detail = self.service.get_po_detail(self.conn, 100, fields={'items'})
+        self.conn.set_trace_callback(None)
+
+        self.assertEqual(len(statements), full - 1)
+        self.assertTrue(all(i.deliveries == [] for i in detail.items))
+        self.assertEqual(detail.items[0].delivered_quantity, 30)
+
+        header_only = self.service.get_po_detail(self.conn, 100, fields=set())
+        self.assertEqual(header_only.items, [])
+
+        with self.assertRaises(HTTPException):
+            self.service.get_po_detail(self.conn, 100, fields={'bogus'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import unittest
+import sys
+import os
+
+# Add backend to path so we can import app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db import MIGRATIONS_DIR
+from app.services.reconciliation_ledger import (
+    install_ledger,
+    rebuild_reconciliation_ledger,
+    verify_reconciliation_ledger,
+)
+from app.services.dc import validate_dc_items
+from app.services.lot_rollup import install_lot_rollup, rebuild_lot_rollup
+from app.core.exceptions import BusinessRuleViolation
+from scripts.synthetic_db import build_synthetic_db
+
+
+class TestReconciliationLedger(unittest.TestCase):
+    def setUp(self):
+        self.conn = build_synthetic_db(po_count=40)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        with open(MIGRATIONS_DIR / "016_atomic_accounting_triggers.sql", encoding="utf-8") as f:
+            self.conn.executescript(f.read())
+        install_ledger(self.conn, MIGRATIONS_DIR)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def assertLedgerMatchesView(self):
+        self.assertEqual(verify_reconciliation_ledger(self.conn), [])
+
+    def test_rebuild_matches_view(self):
+        rows = rebuild_reconciliation_ledger(self.conn)
+        self.assertEqual(rows, 40 * 4)
+        self.assertLedgerMatchesView()
+
+    def test_triggers_track_writes(self):
+        rebuild_reconciliation_ledger(self.conn)
+        db = self.conn
+        item = db.execute(
+            "SELECT id, po_number, po_item_no FROM purchase_order_items WHERE po_number = 4500000001 AND po_item_no = 10"
+        ).fetchone()
+
+        # New DC + items on a PO that had none
+        db.execute(
+            "INSERT INTO delivery_challans (dc_number, dc_date, po_number) VALUES ('DCX', '2024-01-01', ?)",
+            (item["po_number"],),
+        )
+        db.execute(
+            "INSERT INTO delivery_challan_items (id, dc_number, po_item_id, dispatch_qty, lot_no) "
+            "VALUES ('dcx-1', 'DCX', ?, 3, 1)",
+            (item["id"],),
+        )
+        self.assertLedgerMatchesView()
+
+        # Invoice against that DC, then edit and relink it
+        db.execute(
+            "INSERT INTO gst_invoices (invoice_number, invoice_date, linked_dc_numbers) VALUES ('INVX', '2024-01-02', 'DCX')"
+        )
+        db.execute(
+            "INSERT INTO gst_invoice_items (invoice_number, po_sl_no, description, quantity, rate, taxable_value, "
+            "cgst_amount, sgst_amount, total_amount) VALUES ('INVX', '1', 'X', 3, 1, 3, 0, 0, 3)"
+        )
+        self.assertLedgerMatchesView()
+        db.execute("UPDATE gst_invoice_items SET quantity = 2 WHERE invoice_number = 'INVX'")
+        self.assertLedgerMatchesView()
+
+        # SRV receipt, then deactivate the SRV
+        db.execute(
+            "INSERT INTO srvs (srv_number, srv_date, po_number) VALUES ('SRVX', '2024-01-03', ?)",
+            (str(item["po_number"]),),
+        )
+        db.execute(
+            "INSERT INTO srv_items (srv_number, po_number, po_item_no, received_qty, rejected_qty) "
+            "VALUES ('SRVX', ?, 10, 2, 1)",
+            (str(item["po_number"]),),
+        )
+        row = db.execute(
+            "SELECT total_received_qty, total_rejected_qty FROM reconciliation_ledger_mv WHERE po_item_id = ?",
+            (item["id"],),
+        ).fetchone()
+        self.assertEqual((row[0], row[1]), (2, 1))
+        db.execute("UPDATE srvs SET is_active = 0 WHERE srv_number = 'SRVX'")
+        self.assertLedgerMatchesView()
+
+        # PO re-ingestion updates ordered quantity through the upsert path
+        db.execute(
+            "INSERT INTO purchase_order_items (id, po_number, po_item_no, ord_qty) VALUES ('ignored', ?, 10, 999) "
+            "ON CONFLICT(po_number, po_item_no) DO UPDATE SET ord_qty = excluded.ord_qty",
+            (item["po_number"],),
+        )
+        self.assertLedgerMatchesView()
+
+        # Cascading deletes
+        db.execute("DELETE FROM gst_invoices WHERE invoice_number = 'INVX'")
+        self.assertLedgerMatchesView()
+        db.execute("DELETE FROM delivery_challans WHERE dc_number = 'DCX'")
+        db.execute("DELETE FROM srvs WHERE srv_number = 'SRVX'")
+        self.assertLedgerMatchesView()
+        db.execute("DELETE FROM purchase_orders WHERE po_number = ?", (item["po_number"],))
+        self.assertLedgerMatchesView()
+
+    def test_validate_dc_items_reads_materialized_ledger(self):
+        rebuild_reconciliation_ledger(self.conn)
+        # Lot quantities come from lot_rollup
+        install_lot_rollup(self.conn, MIGRATIONS_DIR)
+        rebuild_lot_rollup(self.conn)
+        item = self.conn.execute(
+            "SELECT poi.id, mv.ordered_quantity, mv.total_delivered_qty "
+            "FROM purchase_order_items poi JOIN reconciliation_ledger_mv mv ON mv.po_item_id = poi.id "
+            "WHERE poi.po_number = 4500000000 AND poi.po_item_no = 10"
+        ).fetchone()
+        remaining = item["ordered_quantity"] - item["total_delivered_qty"]
+
+        statements = []
+        self.conn.set_trace_callback(statements.append)
+        validate_dc_items(
+            [{"po_item_id": item["id"], "lot_no": 2, "dispatch_qty": remaining}], self.conn
+        )
+        self.conn.set_trace_callback(None)
+        self.assertTrue(any("reconciliation_ledger_mv" in s for s in statements))
+        self.assertFalse(any("FROM reconciliation_ledger\n" in s for s in statements))
+
+        with self.assertRaises(BusinessRuleViolation):
+            validate_dc_items(
+                [{"po_item_id": item["id"], "lot_no": 2, "dispatch_qty": remaining + 1}], self.conn
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+import unittest
+import sys
+import os
+import io
+import csv
+import json
+import asyncio
+import importlib.util
+from unittest.mock import patch
+
+# Add backend to path so we can import app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from openpyxl import load_workbook
+
+from app.db import get_db
+from app.routers import reports
+from app.services.excel_service import ExcelService
+from scripts.synthetic_db import build_synthetic_db
+
+DATE_RANGE = {"start_date": "2000-01-01", "end_date": "2100-01-01"}
+
+
+def read_sheet(content):
+    sheet = load_workbook(io.BytesIO(content), read_only=True).active
+    return [list(row) for row in sheet.iter_rows(values_only=True)]
+
+
+async def collect_body(response):
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+
+class TestStreamingExcelExport(unittest.TestCase):
+    def setUp(self):
+        self.conn = build_synthetic_db(po_count=30)
+        app = FastAPI()
+        app.include_router(reports.router, prefix="/api/reports")
+        app.dependency_overrides[get_db] = lambda: self.conn
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_export_matches_json_report(self):
+        for path, key in (
+            ("/api/reports/register/invoice", "invoice_number"),
+            ("/api/reports/register/dc", "dc_number"),
+            ("/api/reports/reconciliation", "po_number"),
+        ):
+            records = self.client.get(path, params=DATE_RANGE).json()
+            exported = self.client.get(path, params={**DATE_RANGE, "export": True})
+            self.assertEqual(exported.status_code, 200, path)
+            self.assertIn("attachment", exported.headers["content-disposition"])
+
+            rows = read_sheet(exported.content)
+            header, body = rows[0], rows[1:]
+            self.assertEqual(header, list(records[0].keys()), path)
+            self.assertEqual(len(body), len(records), path)
+            self.assertEqual([row[header.index(key)] for row in body], [r[key] for r in records], path)
+
+    def test_pending_export(self):
+        exported = self.client.get("/api/reports/pending", params={"export": True})
+        self.assertEqual(exported.status_code, 200)
+        rows = read_sheet(exported.content)
+        self.assertEqual(rows[0][:2], ["po_number", "po_item_no"])
+        pending = self.conn.execute("SELECT COUNT(*) FROM purchase_order_items WHERE pending_qty > 0").fetchone()[0]
+        self.assertEqual(len(rows) - 1, pending)
+
+
+class TestExportFormats(unittest.TestCase):
+    def setUp(self):
+        self.conn = build_synthetic_db(po_count=30)
+        app = FastAPI()
+        app.include_router(reports.router, prefix="/api/reports")
+        app.dependency_overrides[get_db] = lambda: self.conn
+        self.client = TestClient(app)
+        self.records = self.client.get("/api/reports/register/invoice", params=DATE_RANGE).json()
+
+    def tearDown(self):
+        self.conn.close()
+
+    def export(self, fmt, path="/api/reports/register/invoice"):
+        return self.client.get(path, params={**DATE_RANGE, "format": fmt})
+
+    def test_csv(self):
+        response = self.export("csv")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/csv"))
+        self.assertIn(".csv", response.headers["content-disposition"])
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        self.assertEqual(len(rows), len(self.records))
+        self.assertEqual(list(rows[0].keys()), list(self.records[0].keys()))
+        self.assertEqual([r["invoice_number"] for r in rows], [r["invoice_number"] for r in self.records])
+
+    def test_jsonl(self):
+        response = self.export("jsonl")
+        self.assertEqual(response.status_code, 200)
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        self.assertEqual(len(lines), len(self.records))
+        self.assertEqual(lines[0]["invoice_number"], self.records[0]["invoice_number"])
+        self.assertEqual(lines[0]["total_invoice_value"], self.records[0]["total_invoice_value"])
+
+    def test_format_json_and_unknown(self):
+        self.assertEqual(self.export("json").json(), self.records)
+        self.assertEqual(self.export("xml").status_code, 400)
+        pending = self.export("csv", "/api/reports/pending")
+        self.assertEqual(pending.status_code, 200)
+        self.assertTrue(pending.text.startswith("po_number,po_item_no"))
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow not installed")
+    def test_parquet(self):
+        import pyarrow.parquet as pq
+
+        response = self.export("parquet")
+        self.assertEqual(response.status_code, 200)
+        table = pq.read_table(io.BytesIO(response.content))
+        self.assertEqual(table.num_rows, len(self.records))
+        self.assertEqual(table.column("invoice_number").to_pylist(), [r["invoice_number"] for r in self.records])
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow not installed")
+    def test_parquet_numbers_change_type_after_first_chunk(self):
+        import pyarrow.parquet as pq
+        from app.services import report_export
+
+        cursor = self.conn.execute(
+            "SELECT column1 AS qty, column2 AS note FROM (VALUES (0, NULL), (0, NULL), (1.5, 7), (NULL, 'x'))"
+        )
+        spool = io.BytesIO()
+        with patch.object(report_export, "CURSOR_CHUNK_ROWS", 2):
+            report_export._write_parquet(spool, cursor)
+        table = pq.read_table(io.BytesIO(spool.getvalue()))
+        self.assertEqual(table.column("qty").to_pylist(), [0.0, 0.0, 1.5, None])
+        self.assertEqual(table.column("note").to_pylist(), [None, None, "7", "x"])
+
+    @unittest.skipIf(importlib.util.find_spec("pyarrow"), "pyarrow installed")
+    def test_parquet_without_pyarrow(self):
+        response = self.export("parquet")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("pyarrow", response.json()["detail"])
+
+
+class TestWriteRows(unittest.TestCase):
+    def test_generator_larger_than_width_sample(self):
+        rows = ((i, f"item-{i}", None if i % 7 else i * 0.5) for i in range(5000))
+        output = io.BytesIO()
+        ExcelService.write_rows(output, ["n", "label", "value"], rows)
+
+        sheet = load_workbook(io.BytesIO(output.getvalue()), read_only=False).active
+        self.assertEqual(sheet.max_row, 5001)
+        self.assertEqual(sheet.cell(row=5001, column=2).value, "item-4999")
+        self.assertIsNone(sheet.cell(row=3, column=3).value)
+        # Width comes from the sample ("item-199") plus padding
+        self.assertAlmostEqual(sheet.column_dimensions["B"].width, len("item-199") + 2, delta=1)
+
+    def test_generate_response_keeps_all_keys(self):
+        response = ExcelService.generate_response([{"a": 1}, {"a": 2, "b": "x"}], "Legacy")
+        content = asyncio.run(collect_body(response))
+        self.assertEqual(read_sheet(content), [["a", "b"], [1, None], [2, "x"]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+import unittest
+import sys
+import os
+import csv
+import io
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+# Add backend to path so we can import app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from app.db import ConnectionPool
+from app.routers import reports
+from app.services import report_jobs, report_service
+from app.services.report_jobs import CANCELLED, FINISHED, RUNNING, SUCCEEDED, ReportJobManager, set_report_jobs
+from scripts.synthetic_db import build_synthetic_db
+
+# Runs until interrupted
+SLOW_SQL = """
+WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n)
+SELECT SUM(i) AS total FROM n
+"""
+
+
+class TestReportJobs(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        path = Path(self.tmp.name) / "reports.db"
+        build_synthetic_db(str(path), po_count=50).close()
+        self.pool = ConnectionPool(path, max_readers=2)
+        self.managers = []
+
+    def tearDown(self):
+        for manager in self.managers:
+            manager.shutdown(timeout=5)
+        self.pool.close()
+        self.tmp.cleanup()
+
+    def manager(self, **kwargs):
+        kwargs.setdefault("result_dir", Path(self.tmp.name) / f"jobs{len(self.managers)}")
+        manager = ReportJobManager(self.pool, **kwargs)
+        self.managers.append(manager)
+        return manager
+
+    def wait_for(self, manager, job_id, statuses, timeout=10):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            job = manager.get(job_id)
+            if job.status in statuses:
+                return job
+            time.sleep(0.01)
+        self.fail(f"job {job_id} stuck in {manager.get(job_id).status}")
+
+    def test_submit_poll_download(self):
+        manager = self.manager()
+        set_report_jobs(manager)
+        app = FastAPI()
+        app.include_router(reports.router, prefix="/api/reports")
+        client = TestClient(app)
+
+        submitted = client.post(
+            "/api/reports/jobs",
+            json={"report": "reconciliation", "format": "csv", "start_date": "2000-01-01", "end_date": "2100-01-01"},
+        )
+        self.assertEqual(submitted.status_code, 202)
+        job_id = submitted.json()["job_id"]
+        self.wait_for(manager, job_id, FINISHED)
+
+        status = client.get(f"/api/reports/jobs/{job_id}").json()
+        self.assertEqual(status["status"], SUCCEEDED)
+        self.assertEqual(status["filename"], "PO_Reconciliation_2000-01-01_2100-01-01.csv")
+
+        download = client.get(f"/api/reports/jobs/{job_id}/download")
+        self.assertEqual(download.status_code, 200)
+        rows = list(csv.reader(io.StringIO(download.text)))
+        with self.pool.reader() as db:
+            expected = report_service.get_po_reconciliation_by_date("2000-01-01", "2100-01-01", db)
+        self.assertEqual(len(rows) - 1, len(expected))
+        self.assertEqual(status["rows_written"], len(expected))
+
+        self.assertEqual([j["job_id"] for j in client.get("/api/reports/jobs").json()], [job_id])
+        self.assertEqual(client.delete(f"/api/reports/jobs/{job_id}").status_code, 200)
+        self.assertEqual(client.get(f"/api/reports/jobs/{job_id}").status_code, 404)
+        self.assertEqual(client.post("/api/reports/jobs", json={"report": "nope"}).status_code, 422)
+
+    def test_queue_is_bounded_and_queued_jobs_cancel(self):
+        manager = self.manager(workers=0, max_pending=2)
+        first = manager.submit("pending", "csv")
+        manager.submit("pending", "csv")
+        with self.assertRaises(HTTPException) as ctx:
+            manager.submit("pending", "csv")
+        self.assertEqual(ctx.exception.status_code, 429)
+
+        self.assertEqual(manager.cancel(first.job_id).status, CANCELLED)
+        with self.assertRaises(HTTPException) as ctx:
+            manager.result(first.job_id)
+        self.assertEqual(ctx.exception.status_code, 409)
+        manager.submit("pending", "csv")
+
+    def test_cancel_interrupts_running_query(self):
+        report_service.REPORT_QUERIES["slow"] = (SLOW_SQL, 0)
+        self.addCleanup(report_service.REPORT_QUERIES.pop, "slow")
+        manager = self.manager(workers=1)
+
+        job = manager.submit("slow", "csv")
+        self.wait_for(manager, job.job_id, (RUNNING,))
+        time.sleep(0.05)
+        manager.cancel(job.job_id)
+        job = self.wait_for(manager, job.job_id, FINISHED, timeout=5)
+        self.assertEqual(job.status, CANCELLED)
+        self.assertEqual(list(manager.result_dir.iterdir()), [])
+
+        # The worker and its pooled connection are usable again
+        follow_up = manager.submit("pending", "jsonl")
+        self.assertEqual(self.wait_for(manager, follow_up.job_id, FINISHED).status, SUCCEEDED)
+
+    def test_finished_jobs_expire(self):
+        manager = self.manager(retention=0.05)
+        job = manager.submit("pending", "xlsx")
+        self.wait_for(manager, job.job_id, FINISHED)
+        path = manager.get(job.job_id).path
+        self.assertTrue(path.exists())
+        time.sleep(0.1)
+        self.assertEqual(manager.jobs(), [])
+        self.assertFalse(path.exists())
+
+    def test_process_manager_keeps_to_its_own_directory(self):
+        shared = Path(self.tmp.name) / "report_jobs"
+        own = shared / str(os.getpid())
+        other = shared / "other-worker"
+        for directory in (own, other):
+            directory.mkdir(parents=True)
+            (directory / "result.csv").write_text("left by another process")
+        set_report_jobs(None)
+        with patch.object(report_jobs, "RESULT_DIR", shared), \
+                patch.object(report_jobs, "get_pool", return_value=self.pool):
+            manager = report_jobs.get_report_jobs()
+            self.assertEqual(manager.result_dir, own)
+            self.assertEqual(list(own.iterdir()), [])
+            job = manager.submit("reconciliation", "csv", "2000-01-01", "2100-01-01")
+            self.wait_for(manager, job.job_id, FINISHED)
+            self.assertTrue(any(own.iterdir()))
+            report_jobs.shutdown_report_jobs()
+        self.assertFalse(own.exists())
+        self.assertTrue((other / "result.csv").exists())
+        self.assertIsNone(report_jobs._manager)
+
+if __name__ == '__main__':
+    unittest.main()
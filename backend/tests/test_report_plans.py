@@ -0,0 +1,128 @@
+import unittest
+import sys
+import os
+import re
+import sqlite3
+from collections import defaultdict
+
+# Add backend to path so we can import app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db import MIGRATIONS_DIR
+from app.services import report_service
+from app.services.report_service import REPORT_QUERIES
+from scripts.synthetic_db import build_synthetic_db
+
+START, END = "2000-01-01", "2100-01-01"
+
+# Reports that read one whole table by design
+FULL_SCAN_REPORTS = {"pending"}
+
+
+def plan(conn, report):
+    sql, date_ranges = REPORT_QUERIES[report]
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, [START, END] * date_ranges)]
+
+
+def base_table_aliases(conn, sql):
+    """Names a base table is read under in `sql` (the table name and any alias)"""
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    names = set()
+    for table, alias in re.findall(r"(?:FROM|JOIN)\s+(\w+)(?:\s+(\w+))?", sql):
+        if table in tables:
+            names.add(table)
+            if alias and alias.upper() not in ("ON", "WHERE", "JOIN", "LEFT", "GROUP", "ORDER"):
+                names.add(alias)
+    return names
+
+
+class TestReportPlans(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.conn = build_synthetic_db(po_count=300)
+        cls.conn.execute("ANALYZE")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn.close()
+
+    def test_no_correlated_subqueries_or_table_scans(self):
+        for report, (sql, _) in REPORT_QUERIES.items():
+            lines = plan(self.conn, report)
+            self.assertFalse([l for l in lines if "CORRELATED" in l], report)
+            if report in FULL_SCAN_REPORTS:
+                continue
+            scanned = {m.group(1) for l in lines for m in [re.match(r"SCAN (\w+)", l)] if m}
+            self.assertFalse(scanned & base_table_aliases(self.conn, sql), f"{report}: {lines}")
+
+    def test_srv_items_joined_through_po_key_index(self):
+        lines = plan(self.conn, "reconciliation")
+        self.assertTrue(any("idx_srv_items_po_key" in l for l in lines), lines)
+
+
+class TestReportTotals(unittest.TestCase):
+    def setUp(self):
+        self.conn = build_synthetic_db(po_count=60)
+        # A second DC line against an already-dispatched item, and an inactive SRV
+        row = self.conn.execute(
+            "SELECT dc_number, po_item_id, dispatch_qty FROM delivery_challan_items LIMIT 1"
+        ).fetchone()
+        self.conn.execute(
+            "INSERT INTO delivery_challan_items (id, dc_number, po_item_id, dispatch_qty) VALUES ('extra', ?, ?, ?)",
+            (row[0], row[1], row[2]),
+        )
+        self.conn.execute("UPDATE srvs SET is_active = 0 WHERE rowid % 3 = 0")
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_reconciliation_matches_independent_totals(self):
+        dispatched = defaultdict(float)
+        for po_item_id, qty in self.conn.execute("SELECT po_item_id, dispatch_qty FROM delivery_challan_items"):
+            dispatched[po_item_id] += qty or 0
+        accepted, rejected = defaultdict(float), defaultdict(float)
+        for po, item, acc, rej in self.conn.execute(
+            "SELECT si.po_number, si.po_item_no, si.accepted_qty, si.rejected_qty "
+            "FROM srv_items si JOIN srvs s ON s.srv_number = si.srv_number WHERE s.is_active = 1"
+        ):
+            accepted[(int(po), item)] += acc or 0
+            rejected[(int(po), item)] += rej or 0
+        ids = {
+            (po, item): item_id
+            for item_id, po, item in self.conn.execute("SELECT id, po_number, po_item_no FROM purchase_order_items")
+        }
+
+        df = report_service.get_po_reconciliation_by_date(START, END, self.conn)
+        self.assertEqual(len(df), len(ids))
+        for row in df.itertuples():
+            key = (row.po_number, row.po_item_no)
+            self.assertAlmostEqual(row.total_dispatched, dispatched[ids[key]])
+            self.assertAlmostEqual(row.total_accepted, accepted[key])
+            self.assertAlmostEqual(row.total_received, accepted[key] + rejected[key])
+
+    def test_po_register_does_not_multiply_item_totals(self):
+        ordered = defaultdict(float)
+        for po, qty in self.conn.execute("SELECT po_number, ord_qty FROM purchase_order_items"):
+            ordered[po] += qty
+        df = report_service.get_po_register(START, END, self.conn)
+        self.assertEqual(len(df), len(ordered))
+        for row in df.itertuples():
+            self.assertAlmostEqual(row.total_ordered, ordered[row.po_number])
+
+
+class TestPoKeyMigration(unittest.TestCase):
+    def test_existing_rows_get_integer_key(self):
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE srv_items (id INTEGER PRIMARY KEY, po_number VARCHAR(50), po_item_no INTEGER)")
+        conn.execute("INSERT INTO srv_items (po_number, po_item_no) VALUES ('4500000001', 10)")
+        with open(MIGRATIONS_DIR / "027_srv_items_po_key.sql", "r", encoding="utf-8") as f:
+            conn.executescript(f.read())
+        conn.execute("INSERT INTO srv_items (po_number, po_item_no) VALUES ('4500000002', 20)")
+        self.assertEqual(
+            conn.execute("SELECT po_key FROM srv_items ORDER BY id").fetchall(), [(4500000001,), (4500000002,)]
+        )
+        conn.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
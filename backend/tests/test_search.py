@@ -0,0 +1,130 @@
+import unittest
+import sys
+import os
+
+# Add backend to path so we can import app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.db import MIGRATIONS_DIR, get_db
+from app.routers import search
+from app.services.search import build_match_query, rebuild_search_index, search_documents, search_index_current
+from scripts.synthetic_db import build_synthetic_db
+
+
+def apply_search_index(conn):
+    with open(MIGRATIONS_DIR / "028_search_index.sql", "r", encoding="utf-8") as f:
+        conn.executescript(f.read())
+
+
+class TestSearch(unittest.TestCase):
+    def setUp(self):
+        self.conn = build_synthetic_db(po_count=50)
+        apply_search_index(self.conn)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def hits(self, q, limit=20):
+        return [(r["type"], r["number"]) for r in search_documents(self.conn, q, limit)]
+
+    def test_match_query(self):
+        self.assertEqual(build_match_query("dc-00  bhel"), '"dc 00"* AND "bhel"*')
+        self.assertEqual(build_match_query(' "* ( '), "")
+
+    def test_ranked_typed_hits(self):
+        hits = self.hits("4500000004")
+        self.assertEqual(hits[0], ("PO", "4500000004"))
+        self.assertEqual(
+            set(hits[1:]), {("DC", "DC0000004"), ("Invoice", "INV0000004"), ("SRV", "SRV0000004")}
+        )
+
+        # Number prefixes: newest first among equally ranked hits
+        dcs = self.hits("DC000000")
+        self.assertEqual(dcs[0], ("DC", "DC0000008"))
+        self.assertIn(("DC", "DC0000000"), dcs)
+        self.assertEqual(self.hits("INV0000004"), [("Invoice", "INV0000004")])
+        self.assertEqual({t for t, _ in self.hits("SRV000000")}, {"SRV"})
+
+        # Item text finds the PO
+        code = self.conn.execute(
+            "SELECT material_code FROM purchase_order_items WHERE po_number = 4500000007 LIMIT 1"
+        ).fetchone()[0]
+        self.assertEqual(self.hits(code[:6]), [("PO", "4500000007")])
+        self.assertIn(("PO", "4500000007"), self.hits("synthetic 7-2"))
+        self.assertEqual(self.hits(""), [])
+
+    def test_triggers_keep_index_in_sync(self):
+        self.conn.execute(
+            "INSERT INTO delivery_challans (dc_number, dc_date, po_number, consignee_name) "
+            "VALUES ('DCX-1', '2024-01-01', 4500000001, 'Zephyr Works')"
+        )
+        self.assertEqual(self.hits("zephyr"), [("DC", "DCX-1")])
+
+        self.conn.execute("UPDATE delivery_challans SET consignee_name = 'Quasar Ltd' WHERE dc_number = 'DCX-1'")
+        self.assertEqual(self.hits("zephyr"), [])
+        self.assertEqual(self.hits("quasar"), [("DC", "DCX-1")])
+
+        self.conn.execute("DELETE FROM delivery_challans WHERE dc_number = 'DCX-1'")
+        self.assertEqual(self.hits("quasar"), [])
+
+        self.conn.execute(
+            "UPDATE purchase_order_items SET material_description = 'TITANIUM FLANGE' "
+            "WHERE po_number = 4500000002 AND po_item_no = 10"
+        )
+        self.assertEqual(self.hits("titan"), [("PO", "4500000002")])
+        self.conn.execute("DELETE FROM purchase_order_items WHERE po_number = 4500000002 AND po_item_no = 10")
+        self.assertEqual(self.hits("titan"), [])
+
+        self.conn.execute("UPDATE srvs SET srv_number = 'SRV-RENAMED' WHERE srv_number = 'SRV0000000'")
+        self.assertEqual(self.hits("renamed"), [("SRV", "SRV-RENAMED")])
+        self.assertEqual(self.hits("SRV0000000"), [])
+
+        # Trigger-maintained index matches a rebuild from source tables
+        queries = ["4500000002", "synthetic", "bhel", "DC00", "flange", "renamed"]
+        incremental = {q: sorted(self.hits(q, 100)) for q in queries}
+        rebuild_search_index(self.conn, MIGRATIONS_DIR)
+        self.assertEqual({q: sorted(self.hits(q, 100)) for q in queries}, incremental)
+
+    def test_items_index_as_own_rows(self):
+        items = self.conn.execute("SELECT COUNT(*) FROM purchase_order_items").fetchone()[0]
+        self.assertEqual(
+            self.conn.execute("SELECT COUNT(*) FROM search_docs WHERE doc_type = 'POItem'").fetchone()[0], items
+        )
+        # Several matching items of one PO come back as that PO once
+        self.conn.execute(
+            "UPDATE purchase_order_items SET material_description = 'COBALT RING' WHERE po_number = 4500000003"
+        )
+        self.assertEqual(self.hits("cobalt"), [("PO", "4500000003")])
+
+        # Indexes from the per-PO body layout are rebuilt
+        self.conn.execute("DROP TRIGGER search_po_item_insert")
+        self.conn.execute(
+            "CREATE TRIGGER search_po_item_insert AFTER INSERT ON purchase_order_items "
+            "BEGIN SELECT group_concat(material_code) FROM purchase_order_items; END"
+        )
+        self.assertFalse(search_index_current(self.conn))
+        rebuild_search_index(self.conn, MIGRATIONS_DIR)
+        self.assertTrue(search_index_current(self.conn))
+        self.assertEqual(self.hits("cobalt"), [("PO", "4500000003")])
+
+    def test_endpoint(self):
+        app = FastAPI()
+        app.include_router(search.router, prefix="/api/search")
+        app.dependency_overrides[get_db] = lambda: self.conn
+        client = TestClient(app)
+
+        response = client.get("/api/search/", params={"q": "INV0000004"})
+        self.assertEqual(response.status_code, 200)
+        [hit] = response.json()["results"]
+        self.assertEqual(hit["type"], "Invoice")
+        self.assertEqual(hit["type_label"], "GST Invoice")
+        self.assertEqual(hit["number"], "INV0000004")
+        self.assertIsNotNone(hit["date"])
+        self.assertEqual(len(client.get("/api/search/", params={"q": "synthetic", "limit": 3}).json()["results"]), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
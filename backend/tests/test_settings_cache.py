@@ -0,0 +1,225 @@
+import unittest
+import sys
+import os
+import io
+import asyncio
+import tempfile
+import warnings
+from pathlib import Path
+from unittest.mock import patch
+
+# Add backend to path so we can import app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from openpyxl import load_workbook
+
+from app.core.exceptions import ValidationError
+from app.core.write_executor import WriteExecutor
+from app.db import MIGRATIONS_DIR, ConnectionPool, get_db
+from app.routers import settings as settings_router
+from app.services.excel_service import ExcelService, workbook_formats
+from app.services.settings_cache import (
+    clear_settings_cache,
+    get_business_settings,
+    get_default_buyer,
+    update_settings,
+)
+from scripts.synthetic_db import build_synthetic_db
+
+HEADER = {"dc_number": "DC-0001", "dc_date": "2024-01-01", "po_number": 4500000001, "invoice_number": "INV-1"}
+
+
+def apply_settings_version(conn):
+    with open(MIGRATIONS_DIR / "026_settings_version.sql", "r", encoding="utf-8") as f:
+        conn.executescript(f.read())
+
+
+async def collect_body(response):
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+
+def sheet_values(response):
+    sheet = load_workbook(io.BytesIO(asyncio.run(collect_body(response)))).active
+    return {cell.value for row in sheet.iter_rows() for cell in row if cell.value}
+
+
+class TestSettingsCache(unittest.TestCase):
+    def setUp(self):
+        clear_settings_cache()
+        self.conn = build_synthetic_db(po_count=5)
+        apply_settings_version(self.conn)
+        self.conn.execute("INSERT INTO business_settings (key, value) VALUES ('supplier_name', 'ACME')")
+        self.conn.execute(
+            "INSERT INTO buyers (name, gstin, billing_address, place_of_supply, is_default) "
+            "VALUES ('Buyer One', 'GST1', 'Addr', 'Bhopal', 1)"
+        )
+
+    def tearDown(self):
+        self.conn.close()
+
+    def render(self):
+        statements = []
+        self.conn.set_trace_callback(statements.append)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            response = ExcelService.generate_exact_dc_excel(HEADER, [], self.conn)
+        self.conn.set_trace_callback(None)
+        reads = [s for s in statements if "business_settings" in s or "FROM buyers" in s]
+        return sheet_values(response), reads
+
+    def test_repeat_renders_skip_settings_reads(self):
+        values, reads = self.render()
+        self.assertIn("ACME", values)
+        self.assertIn("Buyer One", values)
+        self.assertEqual(len(reads), 2)
+
+        _, reads = self.render()
+        self.assertEqual(reads, [])
+
+    def test_writes_invalidate(self):
+        self.render()
+        self.conn.execute("UPDATE business_settings SET value = 'ACME Two' WHERE key = 'supplier_name'")
+        values, reads = self.render()
+        self.assertIn("ACME Two", values)
+        self.assertEqual(len(reads), 2)
+
+        self.conn.execute("UPDATE buyers SET is_active = 0")
+        self.assertEqual(get_default_buyer(self.conn), {})
+
+    def test_databases_do_not_share_entries(self):
+        other = build_synthetic_db(po_count=1)
+        apply_settings_version(other)
+        try:
+            self.assertEqual(get_business_settings(self.conn), {"supplier_name": "ACME"})
+            self.assertEqual(get_business_settings(other), {})
+        finally:
+            other.close()
+
+    def test_without_migration_reads_through(self):
+        conn = build_synthetic_db(po_count=1)
+        try:
+            conn.execute("INSERT INTO business_settings (key, value) VALUES ('supplier_name', 'X')")
+            self.assertEqual(get_business_settings(conn), {"supplier_name": "X"})
+            conn.execute("UPDATE business_settings SET value = 'Y'")
+            self.assertEqual(get_business_settings(conn), {"supplier_name": "Y"})
+        finally:
+            conn.close()
+
+
+class TestSettingsUpdates(unittest.TestCase):
+    def setUp(self):
+        clear_settings_cache()
+        self.conn = build_synthetic_db(po_count=1)
+        apply_settings_version(self.conn)
+        self.conn.execute("INSERT INTO business_settings (key, value) VALUES ('supplier_name', 'ACME')")
+
+    def tearDown(self):
+        self.conn.close()
+
+    def version(self):
+        return self.conn.execute("SELECT version FROM settings_version").fetchone()[0]
+
+    def test_snapshot_is_read_only(self):
+        settings = get_business_settings(self.conn)
+        with self.assertRaises(TypeError):
+            settings["supplier_name"] = "Changed"
+        self.assertIs(settings, get_business_settings(self.conn))
+
+    def test_batch_upsert(self):
+        before = get_business_settings(self.conn)
+        after = update_settings(self.conn, [("supplier_name", "ACME Two"), ("supplier_gstin", "GST9")])
+        self.assertEqual(dict(after), {"supplier_name": "ACME Two", "supplier_gstin": "GST9"})
+        self.assertEqual(before["supplier_name"], "ACME")
+
+        # Rewriting the same values leaves cached snapshots valid
+        version = self.version()
+        self.assertEqual(update_settings(self.conn, [("supplier_name", "ACME Two")]), after)
+        self.assertEqual(self.version(), version)
+
+    def test_rolled_back_update_is_not_cached(self):
+        self.conn.commit()
+        get_business_settings(self.conn)
+        update_settings(self.conn, [("supplier_name", "Discarded")])
+        self.conn.rollback()
+
+        # A committed write reaching the same version must not see the discarded values
+        self.conn.execute("UPDATE business_settings SET value = 'Kept' WHERE key = 'supplier_name'")
+        self.conn.commit()
+        self.assertEqual(get_business_settings(self.conn)["supplier_name"], "Kept")
+
+    def test_unknown_key_rejects_batch(self):
+        with self.assertRaises(ValidationError) as ctx:
+            update_settings(self.conn, [("supplier_name", "X"), ("not_a_setting", "Y")])
+        self.assertEqual(ctx.exception.details["keys"], ["not_a_setting"])
+        self.assertEqual(dict(get_business_settings(self.conn)), {"supplier_name": "ACME"})
+
+
+class TestSettingsEndpoints(unittest.TestCase):
+    def setUp(self):
+        clear_settings_cache()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pool = ConnectionPool(Path(self.tmp.name) / "settings.db")
+        with self.pool.writer() as conn:
+            with open(MIGRATIONS_DIR / "014_add_settings.sql", "r", encoding="utf-8") as f:
+                conn.executescript(f.read())
+            apply_settings_version(conn)
+        self.executor = WriteExecutor(self.pool)
+
+        def reader():
+            with self.pool.reader() as db:
+                yield db
+
+        app = FastAPI()
+        app.include_router(settings_router.router, prefix="/api/settings")
+        app.dependency_overrides[get_db] = reader
+        self.client = TestClient(app)
+        self.patch = patch("app.routers.settings.get_write_executor", return_value=self.executor)
+        self.patch.start()
+
+    def tearDown(self):
+        self.patch.stop()
+        self.executor.shutdown(timeout=5)
+        self.pool.close()
+        self.tmp.cleanup()
+
+    def test_update_and_read_back(self):
+        response = self.client.post("/api/settings/", json={"key": "supplier_name", "value": "ACME"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["supplier_name"], "ACME")
+
+        response = self.client.post(
+            "/api/settings/batch",
+            json=[{"key": "supplier_name", "value": "ACME Two"}, {"key": "supplier_state", "value": "MP"}],
+        )
+        self.assertEqual(response.status_code, 200)
+        settings = self.client.get("/api/settings/").json()
+        self.assertEqual(settings["supplier_name"], "ACME Two")
+        self.assertEqual(settings["supplier_state"], "MP")
+
+    def test_batch_is_atomic(self):
+        response = self.client.post(
+            "/api/settings/batch",
+            json=[{"key": "supplier_name", "value": "Lost"}, {"key": "bogus", "value": "X"}],
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertNotEqual(self.client.get("/api/settings/").json().get("supplier_name"), "Lost")
+
+
+class TestWorkbookFormats(unittest.TestCase):
+    def test_identical_properties_share_one_format(self):
+        import xlsxwriter
+
+        workbook = xlsxwriter.Workbook(io.BytesIO())
+        formats = workbook_formats(workbook)
+        self.assertIs(formats, workbook_formats(workbook))
+        first = formats.add({"bold": True, "border": 1})
+        self.assertIs(first, formats.add({"border": 1, "bold": True}))
+        self.assertIs(formats.style("cell", "Arial"), formats.style("cell", "Arial"))
+        self.assertIsNot(formats.style("cell", "Arial"), formats.style("cell"))
+        workbook.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,234 @@
+import unittest
+import sys
+import os
+import tempfile
+import threading
+from pathlib import Path
+from unittest.mock import patch
+
+# Add backend to path so we can import app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.write_executor import WriteExecutor
+from app.db import MIGRATIONS_DIR, ConnectionPool
+from app.routers import srv
+from app.services import srv_ingestion
+from app.services.reconciliation_ledger import (
+    install_ledger,
+    rebuild_reconciliation_ledger,
+    verify_reconciliation_ledger,
+)
+from app.services.srv_ingestion import delete_srv, process_srv_file
+from scripts.synthetic_db import build_synthetic_db
+from scripts.synthetic_srv_html import render_srv_html
+
+
+class TestBulkSRVIngestion(unittest.TestCase):
+    def setUp(self):
+        self.conn = build_synthetic_db(po_count=30)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        for name in ("016_atomic_accounting_triggers.sql", "022_srv_bulk_ingest.sql", "032_srv_receipt_totals.sql"):
+            with open(MIGRATIONS_DIR / name, encoding="utf-8") as f:
+                self.conn.executescript(f.read())
+        install_ledger(self.conn, MIGRATIONS_DIR)
+        rebuild_reconciliation_ledger(self.conn)
+        self.conn.commit()
+        self.po_items = [
+            (row[0], row[1])
+            for row in self.conn.execute(
+                "SELECT po_number, po_item_no FROM purchase_order_items ORDER BY 1, 2"
+            )
+        ]
+
+    def tearDown(self):
+        self.conn.close()
+
+    def assertTotalsConsistent(self):
+        # Same definition on every path: active SRVs, 0 when none
+        drift = self.conn.execute("""
+            SELECT poi.po_number, poi.po_item_no FROM purchase_order_items poi
+            WHERE EXISTS (
+                SELECT 1 FROM srv_items WHERE po_number = CAST(poi.po_number AS TEXT) AND po_item_no = poi.po_item_no
+            ) OR poi.rcd_qty IS NOT NULL
+            GROUP BY poi.id
+            HAVING poi.rcd_qty IS NOT (
+                SELECT COALESCE(SUM(si.received_qty), 0) FROM srv_items si JOIN srvs s ON s.srv_number = si.srv_number
+                WHERE si.po_number = CAST(poi.po_number AS TEXT) AND si.po_item_no = poi.po_item_no AND s.is_active = 1)
+               OR poi.rejected_qty IS NOT (
+                SELECT COALESCE(SUM(si.rejected_qty), 0) FROM srv_items si JOIN srvs s ON s.srv_number = si.srv_number
+                WHERE si.po_number = CAST(poi.po_number AS TEXT) AND si.po_item_no = poi.po_item_no AND s.is_active = 1)
+        """).fetchall()
+        self.assertEqual(drift, [])
+        self.assertEqual(verify_reconciliation_ledger(self.conn), [])
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM trigger_guards").fetchone()[0], 0)
+
+    def test_ingest_and_reupload(self):
+        html = render_srv_html(self.po_items, srvs=40, items_per_srv=3).encode()
+
+        ok, messages = process_srv_file(html, "SRV_batch.html", self.conn)
+        self.assertTrue(ok, messages)
+        self.assertEqual(len(messages), 40)
+        self.assertTrue(all(m.endswith("Success") for m in messages))
+        self.assertTotalsConsistent()
+        count = self.conn.execute("SELECT COUNT(*) FROM srv_items").fetchone()[0]
+
+        touched = self.conn.execute(
+            "SELECT COUNT(*) FROM (SELECT DISTINCT po_number, po_item_no FROM srv_items "
+            "WHERE srv_number LIKE '24%')"
+        ).fetchone()[0]
+
+        # Re-upload replaces the same SRVs. Receipt triggers stay quiet, so the
+        # only rows changed are the SRVs themselves, the guard row, and one
+        # PO item plus one ledger row per touched item.
+        before = self.conn.total_changes
+        ok, _ = process_srv_file(html, "SRV_batch.html", self.conn)
+        self.assertTrue(ok)
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM srv_items").fetchone()[0], count)
+        self.assertTotalsConsistent()
+        self.assertEqual(self.conn.total_changes - before, 2 * (40 + 120) + 2 + 2 * touched)
+
+    def test_invalid_srv_is_reported_and_others_ingested(self):
+        items = self.po_items[:3] + [(self.po_items[0][0], 999)]
+        html = render_srv_html(items, srvs=2, items_per_srv=4, first_srv=2500001)
+
+        ok, messages = process_srv_file(html.encode(), "SRV_x.html", self.conn)
+
+        self.assertFalse(ok)
+        self.assertIn("PO item number 999 not found", messages[0])
+        self.assertIsNone(
+            self.conn.execute("SELECT 1 FROM srvs WHERE srv_number = '2500001'").fetchone()
+        )
+        self.assertTotalsConsistent()
+
+    def test_failing_insert_only_skips_that_srv(self):
+        self.conn.execute(
+            "CREATE TRIGGER reject_srv BEFORE INSERT ON srv_items WHEN NEW.srv_number = '2400002' "
+            "BEGIN SELECT RAISE(ABORT, 'rejected by test'); END"
+        )
+        html = render_srv_html(self.po_items, srvs=3, items_per_srv=2).encode()
+
+        ok, messages = process_srv_file(html, "SRV_batch.html", self.conn)
+
+        self.assertTrue(ok)
+        self.assertIn("Failed: rejected by test", messages[1])
+        self.assertEqual(
+            [r[0] for r in self.conn.execute("SELECT srv_number FROM srvs WHERE srv_number LIKE '24%' ORDER BY 1")],
+            ["2400001", "2400003"],
+        )
+        self.assertTotalsConsistent()
+
+    def test_triggers_still_fire_outside_bulk_ingest(self):
+        po_number, po_item_no = self.po_items[0]
+        self.conn.execute(
+            "INSERT INTO srvs (srv_number, srv_date, po_number) VALUES ('M1', '2024-07-01', ?)",
+            (str(po_number),),
+        )
+        self.conn.execute(
+            "INSERT INTO srv_items (srv_number, po_number, po_item_no, received_qty, rejected_qty) "
+            "VALUES ('M1', ?, ?, 5, 1)",
+            (str(po_number), po_item_no),
+        )
+        self.assertTotalsConsistent()
+
+    def test_trigger_and_bulk_totals_agree(self):
+        po_number, po_item_no = self.po_items[1]
+        row = lambda: tuple(self.conn.execute(
+            "SELECT rcd_qty, rejected_qty FROM purchase_order_items WHERE po_number = ? AND po_item_no = ?",
+            (po_number, po_item_no),
+        ).fetchone())
+        self.conn.execute(
+            "INSERT INTO srvs (srv_number, srv_date, po_number, is_active) VALUES ('OLD', '2024-07-01', ?, 0)",
+            (str(po_number),),
+        )
+        self.conn.execute("INSERT INTO srvs (srv_number, srv_date, po_number) VALUES ('M2', '2024-07-02', ?)", (str(po_number),))
+
+        # An item on an inactive SRV does not count
+        insert = "INSERT INTO srv_items (srv_number, po_number, po_item_no, received_qty, rejected_qty) VALUES (?, ?, ?, 4, 1)"
+        self.conn.execute(insert, ("OLD", str(po_number), po_item_no))
+        received, rejected = row()
+        self.conn.execute(insert, ("M2", str(po_number), po_item_no))
+        self.assertEqual(row(), (received + 4, rejected + 1))
+        self.assertTotalsConsistent()
+
+        # Nothing left: 0, not NULL
+        self.conn.execute(
+            "DELETE FROM srv_items WHERE po_number = ? AND po_item_no = ?", (str(po_number), po_item_no)
+        )
+        self.assertEqual(row(), (0, 0))
+        self.assertTotalsConsistent()
+
+    def test_delete_srv_ignores_inactive_srvs(self):
+        po_number, po_item_no = self.po_items[2]
+        row = lambda: tuple(self.conn.execute(
+            "SELECT rcd_qty, rejected_qty FROM purchase_order_items WHERE po_number = ? AND po_item_no = ?",
+            (po_number, po_item_no),
+        ).fetchone())
+        received, rejected = row()
+        self.conn.execute(
+            "INSERT INTO srvs (srv_number, srv_date, po_number, is_active) VALUES ('OLD', '2024-07-01', ?, 0)",
+            (str(po_number),),
+        )
+        self.conn.execute("INSERT INTO srvs (srv_number, srv_date, po_number) VALUES ('M3', '2024-07-02', ?)", (str(po_number),))
+        insert = "INSERT INTO srv_items (srv_number, po_number, po_item_no, received_qty, rejected_qty) VALUES (?, ?, ?, 4, 1)"
+        self.conn.execute(insert, ("OLD", str(po_number), po_item_no))
+        self.conn.execute(insert, ("M3", str(po_number), po_item_no))
+
+        ok, message = delete_srv("M3", self.conn)
+
+        self.assertTrue(ok, message)
+        self.assertEqual(row(), (received, rejected))
+        self.assertTotalsConsistent()
+
+class TestSRVUploadEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        path = Path(self.tmp.name) / "srv.db"
+        conn = build_synthetic_db(str(path), po_count=5)
+        with open(MIGRATIONS_DIR / "023_ingestion_ledger.sql", encoding="utf-8") as f:
+            conn.executescript(f.read())
+        self.po_items = [tuple(r) for r in conn.execute("SELECT po_number, po_item_no FROM purchase_order_items")]
+        conn.commit()
+        conn.close()
+        self.pool = ConnectionPool(path)
+        self.executor = WriteExecutor(self.pool)
+        app = FastAPI()
+        app.include_router(srv.router, prefix="/api/srv")
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        self.executor.shutdown(timeout=5)
+        self.pool.close()
+        self.tmp.cleanup()
+
+    def test_parses_outside_the_writer(self):
+        parse_threads = []
+        original = srv_ingestion.parse_srv_file
+
+        def spy(*args):
+            parse_threads.append(threading.current_thread().name)
+            return original(*args)
+
+        html = render_srv_html(self.po_items, srvs=3, items_per_srv=2).encode()
+        upload = lambda: self.client.post(
+            "/api/srv/upload/batch", files=[("files", ("SRV_1.html", html, "text/html"))]
+        ).json()
+        with patch("app.routers.srv.get_write_executor", return_value=self.executor), patch.object(
+            srv_ingestion, "parse_srv_file", spy
+        ):
+            first = upload()
+            again = upload()
+
+        self.assertEqual(first["successful"], 1, first)
+        self.assertEqual(len(parse_threads), 1)
+        self.assertNotEqual(parse_threads[0], "sqlite-writer")
+        # Unchanged re-upload is answered from the ledger without parsing
+        self.assertIn("Unchanged since", again["results"][0]["messages"][0])
+        with self.pool.reader() as db:
+            self.assertEqual(db.execute("SELECT COUNT(*) FROM srvs WHERE srv_number LIKE '24%'").fetchone()[0], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import io
+import threading
+import unittest
+import sys
+import os
+
+# Add backend to path so we can import app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.srv_scraper import iter_srv_groups, merge_srv_groups, scrape_srv_html
+from scripts.synthetic_srv_html import render_srv_html
+
+HEADER = "<tr><th>SRV NO</th><th>SRV DATE</th><th>PO ITM</th><th>SUB ITM</th><th>PO NO</th><th>RECVD QTY</th><th>REJ QTY</th><th>CHALLAN NO</th><th>TAX INV</th></tr>"
+
+
+def row(*cells):
+    return "<tr>" + "".join(f"<td>{c}</td>" for c in cells) + "</tr>"
+
+
+EDGE_CASES = (
+    "<html><head><script>var t = '<table>';</script></head><body>"
+    "<table><tr><td>BHEL SRV REPORT</td></tr><tr><td>1</td><td>2</td><td>3</td><td>4</td><td>5</td></tr></table>"
+    "<table>" + HEADER
+    + row("2400001", "01/07/2024", "10", "1", "4500000001", "1,200.5", "0", "DC&nbsp;7", "INV &amp; 1")
+    + row("2400001", "01/07/2024", "20", "1", "4500000001", " 5 ", "<!-- x -->1", "<b>DC</b> 8", "-")
+    + row("", "", "", "", "")  # blank row
+    + HEADER  # header repeated mid-table
+    + row("2400002", "2/7/24", "10", "", "004500000002", "3", "", "", "")
+    + row("2400001", "01/07/2024", "30", "2", "4500000001", "4", "0", "Çallan", "")  # SRV 2400001 again
+    + row("2400003", "03/07/2024", "", "1", "4500000003", "1")  # short row, no PO ITM
+    + row("2400004", "04/07/2024", "10")  # fewer than five cells
+    + "</table></body></html>"
+)
+
+
+class TestStreamingParity(unittest.TestCase):
+    def assertParity(self, html):
+        expected = scrape_srv_html(html)
+        self.assertEqual(merge_srv_groups(iter_srv_groups(html)), expected)
+        self.assertEqual(merge_srv_groups(iter_srv_groups(html.encode("utf-8"))), expected)
+        self.assertEqual(merge_srv_groups(iter_srv_groups(io.BytesIO(html.encode("utf-8")))), expected)
+        return expected
+
+    def test_synthetic_export(self):
+        po_items = [(4500000000 + p, i * 10) for p in range(5) for i in range(1, 4)]
+        groups = self.assertParity(render_srv_html(po_items, srvs=300, items_per_srv=3))
+        self.assertEqual(len(groups), 300)
+        self.assertTrue(all(len(g["items"]) == 3 for g in groups))
+
+    def test_edge_cases(self):
+        groups = self.assertParity(EDGE_CASES)
+        self.assertEqual([g["header"]["srv_number"] for g in groups], ["2400001", "2400002", "2400003"])
+        first = groups[0]["items"]
+        self.assertEqual(first[0]["received_qty"], 1200.5)
+        self.assertEqual(first[0]["invoice_no"], "INV & 1")
+        self.assertEqual(first[1]["challan_no"], "DC8")
+        self.assertEqual(first[2]["challan_no"], "Çallan")
+        self.assertEqual(groups[1]["header"]["po_number"], "4500000002")
+
+    def test_interleaved_srv_yields_separate_runs(self):
+        runs = [g["header"]["srv_number"] for g in iter_srv_groups(EDGE_CASES)]
+        self.assertEqual(runs, ["2400001", "2400002", "2400001", "2400003"])
+
+    def test_reads_input_as_groups_are_consumed(self):
+        po_items = [(4500000001, 10)]
+        source = io.BytesIO(render_srv_html(po_items, srvs=3000, items_per_srv=1).encode("utf-8"))
+        threads = threading.active_count()
+        stream = iter_srv_groups(source)
+        self.assertEqual(next(stream)["header"]["srv_number"], "2400001")
+        self.assertLess(source.tell(), len(source.getvalue()))
+        # Parsed in this thread, no helper thread
+        self.assertEqual(threading.active_count(), threads)
+        stream.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
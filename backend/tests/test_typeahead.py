@@ -0,0 +1,94 @@
+import unittest
+import sys
+import os
+
+# Add backend to path so we can import app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.db import MIGRATIONS_DIR, get_db
+from app.routers import search
+from app.services import typeahead
+from app.services.typeahead import TypeaheadIndex
+from scripts.synthetic_db import build_synthetic_db
+
+
+def apply_typeahead_log(conn):
+    with open(MIGRATIONS_DIR / "029_typeahead_log.sql", "r", encoding="utf-8") as f:
+        conn.executescript(f.read())
+
+
+class TestTypeahead(unittest.TestCase):
+    def setUp(self):
+        self.conn = build_synthetic_db(po_count=30)
+        apply_typeahead_log(self.conn)
+        self.index = TypeaheadIndex()
+
+    def tearDown(self):
+        self.conn.close()
+
+    def values(self, q, kinds=typeahead.KINDS, limit=10):
+        return [(s["kind"], s["value"]) for s in self.index.suggest(self.conn, q, kinds, limit)]
+
+    def test_prefix_lookup(self):
+        self.assertEqual(self.values("450000001", limit=3), [("po", "450000001" + str(i)) for i in range(3)])
+        self.assertEqual(self.values("dc000000", ["dc"]), [("dc", f"DC000000{i}") for i in range(0, 10, 2)])
+        self.assertEqual(self.values("inv0000004"), [("invoice", "INV0000004")])
+        self.assertEqual(self.values("SRV0000004"), [("srv", "SRV0000004")])
+        self.assertEqual(self.values("dc", ["po"]), [])
+        self.assertEqual(self.values("  "), [])
+
+        code = self.conn.execute("SELECT material_code FROM purchase_order_items LIMIT 1").fetchone()[0]
+        self.assertIn(("material", code), self.values(code.lower(), ["material"]))
+
+    def test_writes_are_applied_from_log(self):
+        self.values("dc")
+        self.conn.execute(
+            "INSERT INTO delivery_challans (dc_number, dc_date, po_number) VALUES ('DC-Z1', '2024-01-01', 4500000001)"
+        )
+        self.assertEqual(self.values("dc-z"), [("dc", "DC-Z1")])
+        self.conn.execute("UPDATE delivery_challans SET dc_number = 'DC-Z2' WHERE dc_number = 'DC-Z1'")
+        self.assertEqual(self.values("dc-z"), [("dc", "DC-Z2")])
+        self.conn.execute("DELETE FROM delivery_challans WHERE dc_number = 'DC-Z2'")
+        self.assertEqual(self.values("dc-z"), [])
+
+        # A material code stays suggested while any PO item still uses it
+        self.conn.execute("UPDATE purchase_order_items SET material_code = 'QX-100' WHERE po_number IN (4500000001, 4500000002)")
+        self.assertEqual(self.values("qx", ["material"]), [("material", "QX-100")])
+        self.conn.execute("DELETE FROM purchase_order_items WHERE po_number = 4500000001")
+        self.assertEqual(self.values("qx", ["material"]), [("material", "QX-100")])
+        self.conn.execute("DELETE FROM purchase_order_items WHERE po_number = 4500000002")
+        self.assertEqual(self.values("qx", ["material"]), [])
+
+        # Matches a fresh build after the same writes
+        fresh = TypeaheadIndex()
+        fresh.rebuild(self.conn)
+        for kind in typeahead.KINDS:
+            self.assertEqual(fresh._kinds[kind].keys, self.index._kinds[kind].keys, kind)
+
+    def test_rebuilds_when_log_was_pruned(self):
+        self.values("dc")
+        self.conn.execute(
+            "INSERT INTO delivery_challans (dc_number, dc_date, po_number) VALUES ('DC-P1', '2024-01-01', 4500000001)"
+        )
+        self.conn.execute("DELETE FROM typeahead_log")
+        self.conn.execute("INSERT INTO srvs (srv_number, srv_date, po_number) VALUES ('SRV-LATER', '2024-01-01', 4500000001)")
+        self.assertEqual(self.values("dc-p"), [("dc", "DC-P1")])
+        self.assertEqual(self.values("srv-later"), [("srv", "SRV-LATER")])
+
+    def test_endpoint(self):
+        app = FastAPI()
+        app.include_router(search.router, prefix="/api/search")
+        app.dependency_overrides[get_db] = lambda: self.conn
+        client = TestClient(app)
+
+        response = client.get("/api/search/typeahead", params={"q": "4500000002", "kind": ["po", "dc"]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["suggestions"], [{"kind": "po", "value": "4500000002"}])
+        self.assertEqual(client.get("/api/search/typeahead", params={"q": "x", "kind": "nope"}).status_code, 422)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import sys
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+# Add backend to path so we can import app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db import ConnectionPool
+from app.core.write_executor import WriteExecutor
+
+
+def insert(db, value):
+    db.execute("INSERT INTO t (x) VALUES (?)", (value,))
+    return value
+
+
+def insert_then_fail(db, value):
+    db.execute("INSERT INTO t (x) VALUES (?)", (value,))
+    raise ValueError("boom")
+
+
+class TestWriteExecutor(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pool = ConnectionPool(Path(self.tmp.name) / "writer.db", max_readers=2)
+        with self.pool.writer() as conn:
+            conn.execute("CREATE TABLE t (x INTEGER UNIQUE)")
+            conn.commit()
+        self.executor = WriteExecutor(self.pool, window=0.05)
+
+    def tearDown(self):
+        self.executor.shutdown(timeout=5)
+        self.pool.close()
+        self.tmp.cleanup()
+
+    def values(self):
+        with self.pool.reader() as conn:
+            return sorted(r[0] for r in conn.execute("SELECT x FROM t"))
+
+    def test_concurrent_jobs_are_group_committed(self):
+        futures = [self.executor.submit(insert, n) for n in range(20)]
+        self.assertEqual([f.result(timeout=5) for f in futures], list(range(20)))
+        self.assertEqual(self.values(), list(range(20)))
+
+        stats = self.executor.stats()
+        self.assertEqual(stats["jobs"], 20)
+        self.assertLess(stats["batches"], 20)
+
+    def test_failed_job_rolls_back_alone(self):
+        futures = [
+            self.executor.submit(insert, 1),
+            self.executor.submit(insert_then_fail, 2),
+            self.executor.submit(insert, 1),  # UNIQUE violation
+            self.executor.submit(insert, 3),
+        ]
+        self.assertEqual(futures[0].result(timeout=5), 1)
+        with self.assertRaises(ValueError):
+            futures[1].result(timeout=5)
+        with self.assertRaises(Exception):
+            futures[2].result(timeout=5)
+        self.assertEqual(futures[3].result(timeout=5), 3)
+        self.assertEqual(self.values(), [1, 3])
+
+    def test_job_commit_and_rollback_are_scoped_to_the_job(self):
+        def job(db):
+            db.execute("INSERT INTO t (x) VALUES (10)")
+            db.commit()
+            db.execute("INSERT INTO t (x) VALUES (11)")
+            db.rollback()
+            return "done"
+
+        self.assertEqual(self.executor.run(job), "done")
+        self.assertEqual(self.values(), [10])
+
+    def test_readers_do_not_block_on_writer(self):
+        holding, release = threading.Event(), threading.Event()
+
+        def slow_job(db):
+            db.execute("INSERT INTO t (x) VALUES (99)")
+            holding.set()
+            release.wait(5)
+
+        future = self.executor.submit(slow_job)
+        holding.wait(5)
+        # Writer transaction is open; a reader still gets the last committed snapshot
+        self.assertEqual(self.values(), [])
+        release.set()
+        future.result(timeout=5)
+        self.assertEqual(self.values(), [99])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -56,7 +56,9 @@ const createActivityColumns = (router: any): Column<ActivityItem>[] => [
               ? `/po/${item.number}`
               : item.type === "DC"
                 ? `/dc/${item.number}`
-                : `/invoice/${item.number}`;
+                : item.type === "SRV"
+                  ? `/srv/${item.number}`
+                  : `/invoice/${item.number}`;
           router.push(path);
         }}
       >
@@ -66,7 +68,9 @@ const createActivityColumns = (router: any): Column<ActivityItem>[] => [
               ? `po-icon-${item.number}`
               : item.type === "DC"
                 ? `dc-icon-${item.number}`
-                : `inv-icon-${item.number}`
+                : item.type === "SRV"
+                  ? `srv-icon-${item.number}`
+                  : `inv-icon-${item.number}`
           }
           className={cn(
             "p-2 rounded-lg transition-colors border shrink-0",
@@ -92,7 +96,9 @@ const createActivityColumns = (router: any): Column<ActivityItem>[] => [
               ? `po-title-${item.number}`
               : item.type === "DC"
                 ? `dc-title-${item.number}`
-                : `inv-title-${item.number}`
+                : item.type === "SRV"
+                  ? `srv-title-${item.number}`
+                  : `inv-title-${item.number}`
           }
           className="font-semibold text-sm text-slate-900 group-hover:text-blue-700 transition-colors whitespace-nowrap"
         >
@@ -134,7 +134,7 @@ export interface DashboardSummary {
 }
 
 export interface ActivityItem {
-  type: "PO" | "DC" | "Invoice";
+  type: "PO" | "DC" | "Invoice" | "SRV";
   status: string;
   number: string;
   amount?: number;
@@ -0,0 +1,342 @@
+-- Migration: 021_reconciliation_ledger_mv.sql
+-- Purpose: Materialized reconciliation ledger kept current by triggers
+--
+-- The reconciliation_ledger view (016) evaluates four correlated subqueries
+-- for every purchase_order_items row. reconciliation_ledger_mv stores the
+-- same columns physically, keyed by (po_number, po_item_no), and each trigger
+-- below refreshes only the rows touched by the write that fired it.
+-- The view is kept as the cross-check for scripts/rebuild_reconciliation_ledger.py.
+
+CREATE TABLE IF NOT EXISTS reconciliation_ledger_mv (
+    po_number INTEGER NOT NULL,
+    po_item_no INTEGER NOT NULL,
+    po_item_id TEXT NOT NULL,
+    material_code TEXT,
+    material_description TEXT,
+    ordered_quantity DECIMAL(10,2) DEFAULT 0,
+    total_delivered_qty DECIMAL(10,2) DEFAULT 0,
+    total_received_qty DECIMAL(10,2) DEFAULT 0,
+    total_rejected_qty DECIMAL(10,2) DEFAULT 0,
+    total_invoiced_qty DECIMAL(10,2) DEFAULT 0,
+    PRIMARY KEY (po_number, po_item_no)
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_rl_mv_po_item_id ON reconciliation_ledger_mv(po_item_id);
+
+-- Supporting indexes for the per-row refresh subqueries
+CREATE INDEX IF NOT EXISTS idx_dci_po_item_id ON delivery_challan_items(po_item_id);
+CREATE INDEX IF NOT EXISTS idx_srv_items_po_item ON srv_items(po_number, po_item_no);
+CREATE INDEX IF NOT EXISTS idx_gst_invoices_linked_dc ON gst_invoices(linked_dc_numbers);
+
+-- ============================================================
+-- PO items: insert / re-key / delete ledger rows
+-- ============================================================
+
+CREATE TRIGGER IF NOT EXISTS trg_rl_mv_poi_insert
+AFTER INSERT ON purchase_order_items
+BEGIN
+    INSERT OR REPLACE INTO reconciliation_ledger_mv
+        (po_number, po_item_no, po_item_id, material_code, material_description, ordered_quantity)
+    VALUES
+        (NEW.po_number, NEW.po_item_no, NEW.id, NEW.material_code, NEW.material_description,
+         COALESCE(NEW.ord_qty, 0));
+
+    UPDATE reconciliation_ledger_mv
+    SET total_delivered_qty = COALESCE((
+            SELECT SUM(dci.dispatch_qty)
+            FROM delivery_challan_items dci
+            JOIN delivery_challans dc ON dci.dc_number = dc.dc_number
+            WHERE dci.po_item_id = NEW.id
+        ), 0),
+        total_received_qty = COALESCE((
+            SELECT SUM(si.received_qty)
+            FROM srv_items si
+            JOIN srvs s ON si.srv_number = s.srv_number
+            WHERE si.po_number = CAST(NEW.po_number AS TEXT) AND si.po_item_no = NEW.po_item_no
+            AND s.is_active = 1
+        ), 0),
+        total_rejected_qty = COALESCE((
+            SELECT SUM(si.rejected_qty)
+            FROM srv_items si
+            JOIN srvs s ON si.srv_number = s.srv_number
+            WHERE si.po_number = CAST(NEW.po_number AS TEXT) AND si.po_item_no = NEW.po_item_no
+            AND s.is_active = 1
+        ), 0)
+    WHERE po_item_id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_rl_mv_poi_update
+AFTER UPDATE OF id, po_number, po_item_no, material_code, material_description, ord_qty
+ON purchase_order_items
+BEGIN
+    UPDATE reconciliation_ledger_mv
+    SET po_number = NEW.po_number,
+        po_item_no = NEW.po_item_no,
+        po_item_id = NEW.id,
+        material_code = NEW.material_code,
+        material_description = NEW.material_description,
+        ordered_quantity = COALESCE(NEW.ord_qty, 0)
+    WHERE po_item_id = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_rl_mv_poi_delete
+AFTER DELETE ON purchase_order_items
+BEGIN
+    DELETE FROM reconciliation_ledger_mv WHERE po_item_id = OLD.id;
+END;
+
+-- ============================================================
+-- DC items: delivered quantity (and invoiced, which matches on DC lot)
+-- ============================================================
+
+CREATE TRIGGER IF NOT EXISTS trg_rl_mv_dci_insert
+AFTER INSERT ON delivery_challan_items
+BEGIN
+    UPDATE reconciliation_ledger_mv
+    SET total_delivered_qty = COALESCE((
+            SELECT SUM(dci.dispatch_qty)
+            FROM delivery_challan_items dci
+            JOIN delivery_challans dc ON dci.dc_number = dc.dc_number
+            WHERE dci.po_item_id = NEW.po_item_id
+        ), 0),
+        total_invoiced_qty = COALESCE((
+            SELECT SUM(gii.quantity)
+            FROM delivery_challan_items dci
+            JOIN gst_invoices gi ON gi.linked_dc_numbers = dci.dc_number
+            JOIN gst_invoice_items gii ON gii.invoice_number = gi.invoice_number
+            WHERE dci.po_item_id = NEW.po_item_id AND gii.po_sl_no = dci.lot_no
+        ), 0)
+    WHERE po_item_id = NEW.po_item_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_rl_mv_dci_update
+AFTER UPDATE OF dc_number, po_item_id, dispatch_qty, lot_no ON delivery_challan_items
+BEGIN
+    UPDATE reconciliation_ledger_mv
+    SET total_delivered_qty = COALESCE((
+            SELECT SUM(dci.dispatch_qty)
+            FROM delivery_challan_items dci
+            JOIN delivery_challans dc ON dci.dc_number = dc.dc_number
+            WHERE dci.po_item_id = reconciliation_ledger_mv.po_item_id
+        ), 0),
+        total_invoiced_qty = COALESCE((
+            SELECT SUM(gii.quantity)
+            FROM delivery_challan_items dci
+            JOIN gst_invoices gi ON gi.linked_dc_numbers = dci.dc_number
+            JOIN gst_invoice_items gii ON gii.invoice_number = gi.invoice_number
+            WHERE dci.po_item_id = reconciliation_ledger_mv.po_item_id AND gii.po_sl_no = dci.lot_no
+        ), 0)
+    WHERE po_item_id IN (OLD.po_item_id, NEW.po_item_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_rl_mv_dci_delete
+AFTER DELETE ON delivery_challan_items
+BEGIN
+    UPDATE reconciliation_ledger_mv
+    SET total_delivered_qty = COALESCE((
+            SELECT SUM(dci.dispatch_qty)
+            FROM delivery_challan_items dci
+            JOIN delivery_challans dc ON dci.dc_number = dc.dc_number
+            WHERE dci.po_item_id = OLD.po_item_id
+        ), 0),
+        total_invoiced_qty = COALESCE((
+            SELECT SUM(gii.quantity)
+            FROM delivery_challan_items dci
+            JOIN gst_invoices gi ON gi.linked_dc_numbers = dci.dc_number
+            JOIN gst_invoice_items gii ON gii.invoice_number = gi.invoice_number
+            WHERE dci.po_item_id = OLD.po_item_id AND gii.po_sl_no = dci.lot_no
+        ), 0)
+    WHERE po_item_id = OLD.po_item_id;
+END;
+
+-- ============================================================
+-- SRV items: received / rejected quantity from active SRVs
+-- ============================================================
+
+CREATE TRIGGER IF NOT EXISTS trg_rl_mv_srv_items_insert
+AFTER INSERT ON srv_items
+BEGIN
+    UPDATE reconciliation_ledger_mv
+    SET total_received_qty = COALESCE((
+            SELECT SUM(si.received_qty)
+            FROM srv_items si
+            JOIN srvs s ON si.srv_number = s.srv_number
+            WHERE si.po_number = NEW.po_number AND si.po_item_no = NEW.po_item_no
+            AND s.is_active = 1
+        ), 0),
+        total_rejected_qty = COALESCE((
+            SELECT SUM(si.rejected_qty)
+            FROM srv_items si
+            JOIN srvs s ON si.srv_number = s.srv_number
+            WHERE si.po_number = NEW.po_number AND si.po_item_no = NEW.po_item_no
+            AND s.is_active = 1
+        ), 0)
+    WHERE po_number = NEW.po_number AND po_item_no = NEW.po_item_no;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_rl_mv_srv_items_update
+AFTER UPDATE OF srv_number, po_number, po_item_no, received_qty, rejected_qty ON srv_items
+BEGIN
+    UPDATE reconciliation_ledger_mv
+    SET total_received_qty = COALESCE((
+            SELECT SUM(si.received_qty)
+            FROM srv_items si
+            JOIN srvs s ON si.srv_number = s.srv_number
+            WHERE si.po_number = CAST(reconciliation_ledger_mv.po_number AS TEXT)
+            AND si.po_item_no = reconciliation_ledger_mv.po_item_no
+            AND s.is_active = 1
+        ), 0),
+        total_rejected_qty = COALESCE((
+            SELECT SUM(si.rejected_qty)
+            FROM srv_items si
+            JOIN srvs s ON si.srv_number = s.srv_number
+            WHERE si.po_number = CAST(reconciliation_ledger_mv.po_number AS TEXT)
+            AND si.po_item_no = reconciliation_ledger_mv.po_item_no
+            AND s.is_active = 1
+        ), 0)
+    WHERE (po_number = OLD.po_number AND po_item_no = OLD.po_item_no)
+       OR (po_number = NEW.po_number AND po_item_no = NEW.po_item_no);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_rl_mv_srv_items_delete
+AFTER DELETE ON srv_items
+BEGIN
+    UPDATE reconciliation_ledger_mv
+    SET total_received_qty = COALESCE((
+            SELECT SUM(si.received_qty)
+            FROM srv_items si
+            JOIN srvs s ON si.srv_number = s.srv_number
+            WHERE si.po_number = OLD.po_number AND si.po_item_no = OLD.po_item_no
+            AND s.is_active = 1
+        ), 0),
+        total_rejected_qty = COALESCE((
+            SELECT SUM(si.rejected_qty)
+            FROM srv_items si
+            JOIN srvs s ON si.srv_number = s.srv_number
+            WHERE si.po_number = OLD.po_number AND si.po_item_no = OLD.po_item_no
+            AND s.is_active = 1
+        ), 0)
+    WHERE po_number = OLD.po_number AND po_item_no = OLD.po_item_no;
+END;
+
+-- Activating / deactivating an SRV changes every line it carries
+CREATE TRIGGER IF NOT EXISTS trg_rl_mv_srvs_active
+AFTER UPDATE OF is_active ON srvs
+BEGIN
+    UPDATE reconciliation_ledger_mv
+    SET total_received_qty = COALESCE((
+            SELECT SUM(si.received_qty)
+            FROM srv_items si
+            JOIN srvs s ON si.srv_number = s.srv_number
+            WHERE si.po_number = CAST(reconciliation_ledger_mv.po_number AS TEXT)
+            AND si.po_item_no = reconciliation_ledger_mv.po_item_no
+            AND s.is_active = 1
+        ), 0),
+        total_rejected_qty = COALESCE((
+            SELECT SUM(si.rejected_qty)
+            FROM srv_items si
+            JOIN srvs s ON si.srv_number = s.srv_number
+            WHERE si.po_number = CAST(reconciliation_ledger_mv.po_number AS TEXT)
+            AND si.po_item_no = reconciliation_ledger_mv.po_item_no
+            AND s.is_active = 1
+        ), 0)
+    WHERE (po_number, po_item_no) IN (
+        SELECT CAST(po_number AS INTEGER), po_item_no FROM srv_items WHERE srv_number = NEW.srv_number
+    );
+END;
+
+-- ============================================================
+-- Invoices: invoiced quantity for the items on the linked DC
+-- ============================================================
+
+CREATE TRIGGER IF NOT EXISTS trg_rl_mv_invoice_items_insert
+AFTER INSERT ON gst_invoice_items
+BEGIN
+    UPDATE reconciliation_ledger_mv
+    SET total_invoiced_qty = COALESCE((
+            SELECT SUM(gii.quantity)
+            FROM delivery_challan_items dci
+            JOIN gst_invoices gi ON gi.linked_dc_numbers = dci.dc_number
+            JOIN gst_invoice_items gii ON gii.invoice_number = gi.invoice_number
+            WHERE dci.po_item_id = reconciliation_ledger_mv.po_item_id AND gii.po_sl_no = dci.lot_no
+        ), 0)
+    WHERE po_item_id IN (
+        SELECT dci.po_item_id
+        FROM gst_invoices gi
+        JOIN delivery_challan_items dci ON dci.dc_number = gi.linked_dc_numbers
+        WHERE gi.invoice_number = NEW.invoice_number
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_rl_mv_invoice_items_update
+AFTER UPDATE OF invoice_number, po_sl_no, quantity ON gst_invoice_items
+BEGIN
+    UPDATE reconciliation_ledger_mv
+    SET total_invoiced_qty = COALESCE((
+            SELECT SUM(gii.quantity)
+            FROM delivery_challan_items dci
+            JOIN gst_invoices gi ON gi.linked_dc_numbers = dci.dc_number
+            JOIN gst_invoice_items gii ON gii.invoice_number = gi.invoice_number
+            WHERE dci.po_item_id = reconciliation_ledger_mv.po_item_id AND gii.po_sl_no = dci.lot_no
+        ), 0)
+    WHERE po_item_id IN (
+        SELECT dci.po_item_id
+        FROM gst_invoices gi
+        JOIN delivery_challan_items dci ON dci.dc_number = gi.linked_dc_numbers
+        WHERE gi.invoice_number IN (OLD.invoice_number, NEW.invoice_number)
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_rl_mv_invoice_items_delete
+AFTER DELETE ON gst_invoice_items
+BEGIN
+    UPDATE reconciliation_ledger_mv
+    SET total_invoiced_qty = COALESCE((
+            SELECT SUM(gii.quantity)
+            FROM delivery_challan_items dci
+            JOIN gst_invoices gi ON gi.linked_dc_numbers = dci.dc_number
+            JOIN gst_invoice_items gii ON gii.invoice_number = gi.invoice_number
+            WHERE dci.po_item_id = reconciliation_ledger_mv.po_item_id AND gii.po_sl_no = dci.lot_no
+        ), 0)
+    WHERE po_item_id IN (
+        SELECT dci.po_item_id
+        FROM gst_invoices gi
+        JOIN delivery_challan_items dci ON dci.dc_number = gi.linked_dc_numbers
+        WHERE gi.invoice_number = OLD.invoice_number
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_rl_mv_invoice_relink
+AFTER UPDATE OF linked_dc_numbers ON gst_invoices
+BEGIN
+    UPDATE reconciliation_ledger_mv
+    SET total_invoiced_qty = COALESCE((
+            SELECT SUM(gii.quantity)
+            FROM delivery_challan_items dci
+            JOIN gst_invoices gi ON gi.linked_dc_numbers = dci.dc_number
+            JOIN gst_invoice_items gii ON gii.invoice_number = gi.invoice_number
+            WHERE dci.po_item_id = reconciliation_ledger_mv.po_item_id AND gii.po_sl_no = dci.lot_no
+        ), 0)
+    WHERE po_item_id IN (
+        SELECT po_item_id FROM delivery_challan_items
+        WHERE dc_number IN (OLD.linked_dc_numbers, NEW.linked_dc_numbers)
+    );
+END;
+
+-- Cascaded item deletes can no longer see the parent invoice, so refresh
+-- the linked DC's items once the header itself is gone.
+CREATE TRIGGER IF NOT EXISTS trg_rl_mv_invoice_delete
+AFTER DELETE ON gst_invoices
+BEGIN
+    UPDATE reconciliation_ledger_mv
+    SET total_invoiced_qty = COALESCE((
+            SELECT SUM(gii.quantity)
+            FROM delivery_challan_items dci
+            JOIN gst_invoices gi ON gi.linked_dc_numbers = dci.dc_number
+            JOIN gst_invoice_items gii ON gii.invoice_number = gi.invoice_number
+            WHERE dci.po_item_id = reconciliation_ledger_mv.po_item_id AND gii.po_sl_no = dci.lot_no
+        ), 0)
+    WHERE po_item_id IN (
+        SELECT po_item_id FROM delivery_challan_items WHERE dc_number = OLD.linked_dc_numbers
+    );
+END;
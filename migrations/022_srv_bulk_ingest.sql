@@ -0,0 +1,127 @@
+-- Migration: 022_srv_bulk_ingest.sql
+-- Purpose: Let bulk SRV ingestion defer the per-row receipt triggers
+--
+-- The srv_items triggers from 016 (purchase_order_items.rcd_qty / rejected_qty)
+-- and 021 (reconciliation_ledger_mv totals) re-sum srv_items for every row
+-- written. A bulk SRV upload inserts a 'srv_receipts' row into trigger_guards
+-- inside its own transaction, writes all items, recomputes each touched PO
+-- item once, and deletes the guard row before committing. Other connections
+-- never see the guard, so their writes keep firing the triggers as before.
+
+CREATE TABLE IF NOT EXISTS trigger_guards (
+    name TEXT PRIMARY KEY
+);
+
+DROP TRIGGER IF EXISTS trg_srv_items_receipt_sync;
+DROP TRIGGER IF EXISTS trg_srv_items_receipt_sync_update;
+DROP TRIGGER IF EXISTS trg_srv_items_receipt_sync_delete;
+DROP TRIGGER IF EXISTS trg_rl_mv_srv_items_insert;
+DROP TRIGGER IF EXISTS trg_rl_mv_srv_items_update;
+DROP TRIGGER IF EXISTS trg_rl_mv_srv_items_delete;
+
+-- ============================================================
+-- 016: PO item received / rejected quantity
+-- ============================================================
+
+CREATE TRIGGER trg_srv_items_receipt_sync
+AFTER INSERT ON srv_items
+WHEN NOT EXISTS (SELECT 1 FROM trigger_guards WHERE name = 'srv_receipts')
+BEGIN
+    UPDATE purchase_order_items 
+    SET rcd_qty = (SELECT SUM(received_qty) FROM srv_items WHERE po_number = NEW.po_number AND po_item_no = NEW.po_item_no),
+        rejected_qty = (SELECT SUM(rejected_qty) FROM srv_items WHERE po_number = NEW.po_number AND po_item_no = NEW.po_item_no)
+    WHERE po_number = NEW.po_number AND po_item_no = NEW.po_item_no;
+END;
+
+CREATE TRIGGER trg_srv_items_receipt_sync_update
+AFTER UPDATE OF received_qty, rejected_qty ON srv_items
+WHEN NOT EXISTS (SELECT 1 FROM trigger_guards WHERE name = 'srv_receipts')
+BEGIN
+    UPDATE purchase_order_items 
+    SET rcd_qty = (SELECT SUM(received_qty) FROM srv_items WHERE po_number = NEW.po_number AND po_item_no = NEW.po_item_no),
+        rejected_qty = (SELECT SUM(rejected_qty) FROM srv_items WHERE po_number = NEW.po_number AND po_item_no = NEW.po_item_no)
+    WHERE po_number = NEW.po_number AND po_item_no = NEW.po_item_no;
+END;
+
+CREATE TRIGGER trg_srv_items_receipt_sync_delete
+AFTER DELETE ON srv_items
+WHEN NOT EXISTS (SELECT 1 FROM trigger_guards WHERE name = 'srv_receipts')
+BEGIN
+    UPDATE purchase_order_items 
+    SET rcd_qty = (SELECT SUM(received_qty) FROM srv_items WHERE po_number = OLD.po_number AND po_item_no = OLD.po_item_no),
+        rejected_qty = (SELECT SUM(rejected_qty) FROM srv_items WHERE po_number = OLD.po_number AND po_item_no = OLD.po_item_no)
+    WHERE po_number = OLD.po_number AND po_item_no = OLD.po_item_no;
+END;
+
+-- ============================================================
+-- 021: reconciliation_ledger_mv received / rejected totals
+-- ============================================================
+
+CREATE TRIGGER trg_rl_mv_srv_items_insert
+AFTER INSERT ON srv_items
+WHEN NOT EXISTS (SELECT 1 FROM trigger_guards WHERE name = 'srv_receipts')
+BEGIN
+    UPDATE reconciliation_ledger_mv
+    SET total_received_qty = COALESCE((
+            SELECT SUM(si.received_qty)
+            FROM srv_items si
+            JOIN srvs s ON si.srv_number = s.srv_number
+            WHERE si.po_number = NEW.po_number AND si.po_item_no = NEW.po_item_no
+            AND s.is_active = 1
+        ), 0),
+        total_rejected_qty = COALESCE((
+            SELECT SUM(si.rejected_qty)
+            FROM srv_items si
+            JOIN srvs s ON si.srv_number = s.srv_number
+            WHERE si.po_number = NEW.po_number AND si.po_item_no = NEW.po_item_no
+            AND s.is_active = 1
+        ), 0)
+    WHERE po_number = NEW.po_number AND po_item_no = NEW.po_item_no;
+END;
+
+CREATE TRIGGER trg_rl_mv_srv_items_update
+AFTER UPDATE OF srv_number, po_number, po_item_no, received_qty, rejected_qty ON srv_items
+WHEN NOT EXISTS (SELECT 1 FROM trigger_guards WHERE name = 'srv_receipts')
+BEGIN
+    UPDATE reconciliation_ledger_mv
+    SET total_received_qty = COALESCE((
+            SELECT SUM(si.received_qty)
+            FROM srv_items si
+            JOIN srvs s ON si.srv_number = s.srv_number
+            WHERE si.po_number = CAST(reconciliation_ledger_mv.po_number AS TEXT)
+            AND si.po_item_no = reconciliation_ledger_mv.po_item_no
+            AND s.is_active = 1
+        ), 0),
+        total_rejected_qty = COALESCE((
+            SELECT SUM(si.rejected_qty)
+            FROM srv_items si
+            JOIN srvs s ON si.srv_number = s.srv_number
+            WHERE si.po_number = CAST(reconciliation_ledger_mv.po_number AS TEXT)
+            AND si.po_item_no = reconciliation_ledger_mv.po_item_no
+            AND s.is_active = 1
+        ), 0)
+    WHERE (po_number = OLD.po_number AND po_item_no = OLD.po_item_no)
+       OR (po_number = NEW.po_number AND po_item_no = NEW.po_item_no);
+END;
+
+CREATE TRIGGER trg_rl_mv_srv_items_delete
+AFTER DELETE ON srv_items
+WHEN NOT EXISTS (SELECT 1 FROM trigger_guards WHERE name = 'srv_receipts')
+BEGIN
+    UPDATE reconciliation_ledger_mv
+    SET total_received_qty = COALESCE((
+            SELECT SUM(si.received_qty)
+            FROM srv_items si
+            JOIN srvs s ON si.srv_number = s.srv_number
+            WHERE si.po_number = OLD.po_number AND si.po_item_no = OLD.po_item_no
+            AND s.is_active = 1
+        ), 0),
+        total_rejected_qty = COALESCE((
+            SELECT SUM(si.rejected_qty)
+            FROM srv_items si
+            JOIN srvs s ON si.srv_number = s.srv_number
+            WHERE si.po_number = OLD.po_number AND si.po_item_no = OLD.po_item_no
+            AND s.is_active = 1
+        ), 0)
+    WHERE po_number = OLD.po_number AND po_item_no = OLD.po_item_no;
+END;
@@ -0,0 +1,29 @@
+-- Migration: 023_ingestion_ledger.sql
+-- Purpose: Skip re-parsing PO / SRV files that were already ingested unchanged
+--
+-- ingestion_ledger keeps the response of every fully successful upload, keyed
+-- by the SHA-256 of the file and the version of the parser that read it.
+-- ingested_documents records which file last wrote each PO / SRV; a ledger
+-- entry is only reused while every document it produced still exists and
+-- still comes from that file.
+
+CREATE TABLE IF NOT EXISTS ingestion_ledger (
+    kind TEXT NOT NULL,                -- 'po' | 'srv'
+    content_hash TEXT NOT NULL,        -- SHA-256 of the uploaded bytes
+    parser_version TEXT NOT NULL,
+    filename TEXT,
+    outcome TEXT NOT NULL,             -- JSON response returned for the upload
+    document_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (kind, content_hash, parser_version)
+);
+
+CREATE TABLE IF NOT EXISTS ingested_documents (
+    kind TEXT NOT NULL,
+    document_key TEXT NOT NULL,        -- PO number / SRV number
+    content_hash TEXT NOT NULL,
+    ingested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (kind, document_key)
+);
+
+CREATE INDEX IF NOT EXISTS idx_ingested_documents_hash ON ingested_documents(kind, content_hash);
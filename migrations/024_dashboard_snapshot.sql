@@ -0,0 +1,269 @@
+-- Migration: 024_dashboard_snapshot.sql
+-- Purpose: Dashboard summary counters kept current by triggers
+--
+-- /api/dashboard/summary used to aggregate purchase_orders, purchase_order_items,
+-- delivery_challan_items, srv_items and gst_invoices in full on every load.
+-- dashboard_snapshot holds the same figures as running totals: each trigger
+-- below adds the difference made by the write that fired it. Dated figures
+-- are kept per bucket (day / month of created_at) so the endpoint only reads
+-- the current bucket. app/services/dashboard_snapshot.py rebuilds and verifies.
+
+CREATE TABLE IF NOT EXISTS dashboard_snapshot (
+    metric TEXT NOT NULL,
+    bucket TEXT NOT NULL DEFAULT '',   -- '' for all-time figures, else YYYY-MM-DD / YYYY-MM
+    value NUMERIC NOT NULL DEFAULT 0,
+    PRIMARY KEY (metric, bucket)
+);
+
+-- Supporting index for the active-challan probes (see app/services/dc_invoice_links.py)
+CREATE INDEX IF NOT EXISTS idx_invoice_dc_links_dc ON gst_invoice_dc_links(dc_number);
+
+-- ============================================================
+-- Purchase orders: PO value, pending count, POs created per day
+-- ============================================================
+
+CREATE TRIGGER IF NOT EXISTS trg_dash_po_insert
+AFTER INSERT ON purchase_orders
+BEGIN
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    VALUES ('po_value', '', COALESCE(NEW.po_value, 0))
+    ON CONFLICT(metric, bucket) DO UPDATE SET value = value + excluded.value;
+
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    VALUES ('pending_pos', '', CASE WHEN NEW.po_status = 'New' OR NEW.po_status IS NULL THEN 1 ELSE 0 END)
+    ON CONFLICT(metric, bucket) DO UPDATE SET value = value + excluded.value;
+
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    VALUES ('pos_created', COALESCE(date(NEW.created_at), ''), 1)
+    ON CONFLICT(metric, bucket) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_dash_po_update
+AFTER UPDATE OF po_value, po_status, created_at ON purchase_orders
+BEGIN
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    VALUES ('po_value', '', COALESCE(NEW.po_value, 0) - COALESCE(OLD.po_value, 0))
+    ON CONFLICT(metric, bucket) DO UPDATE SET value = value + excluded.value;
+
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    VALUES ('pending_pos', '',
+        CASE WHEN NEW.po_status = 'New' OR NEW.po_status IS NULL THEN 1 ELSE 0 END
+        - CASE WHEN OLD.po_status = 'New' OR OLD.po_status IS NULL THEN 1 ELSE 0 END)
+    ON CONFLICT(metric, bucket) DO UPDATE SET value = value + excluded.value;
+
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    VALUES ('pos_created', COALESCE(date(OLD.created_at), ''), -1)
+    ON CONFLICT(metric, bucket) DO UPDATE SET value = value + excluded.value;
+
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    VALUES ('pos_created', COALESCE(date(NEW.created_at), ''), 1)
+    ON CONFLICT(metric, bucket) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_dash_po_delete
+AFTER DELETE ON purchase_orders
+BEGIN
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    VALUES ('po_value', '', -COALESCE(OLD.po_value, 0))
+    ON CONFLICT(metric, bucket) DO UPDATE SET value = value + excluded.value;
+
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    VALUES ('pending_pos', '', CASE WHEN OLD.po_status = 'New' OR OLD.po_status IS NULL THEN -1 ELSE 0 END)
+    ON CONFLICT(metric, bucket) DO UPDATE SET value = value + excluded.value;
+
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    VALUES ('pos_created', COALESCE(date(OLD.created_at), ''), -1)
+    ON CONFLICT(metric, bucket) DO UPDATE SET value = value + excluded.value;
+END;
+
+-- ============================================================
+-- Quantity totals: ordered / delivered / received
+-- ============================================================
+
+CREATE TRIGGER IF NOT EXISTS trg_dash_poi_insert
+AFTER INSERT ON purchase_order_items
+BEGIN
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    VALUES ('ordered_qty', '', COALESCE(NEW.ord_qty, 0))
+    ON CONFLICT(metric, bucket) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_dash_poi_update
+AFTER UPDATE OF ord_qty ON purchase_order_items
+BEGIN
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    VALUES ('ordered_qty', '', COALESCE(NEW.ord_qty, 0) - COALESCE(OLD.ord_qty, 0))
+    ON CONFLICT(metric, bucket) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_dash_poi_delete
+AFTER DELETE ON purchase_order_items
+BEGIN
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    VALUES ('ordered_qty', '', -COALESCE(OLD.ord_qty, 0))
+    ON CONFLICT(metric, bucket) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_dash_dci_insert
+AFTER INSERT ON delivery_challan_items
+BEGIN
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    VALUES ('delivered_qty', '', COALESCE(NEW.dispatch_qty, 0))
+    ON CONFLICT(metric, bucket) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_dash_dci_update
+AFTER UPDATE OF dispatch_qty ON delivery_challan_items
+BEGIN
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    VALUES ('delivered_qty', '', COALESCE(NEW.dispatch_qty, 0) - COALESCE(OLD.dispatch_qty, 0))
+    ON CONFLICT(metric, bucket) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_dash_dci_delete
+AFTER DELETE ON delivery_challan_items
+BEGIN
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    VALUES ('delivered_qty', '', -COALESCE(OLD.dispatch_qty, 0))
+    ON CONFLICT(metric, bucket) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_dash_srv_items_insert
+AFTER INSERT ON srv_items
+BEGIN
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    VALUES ('received_qty', '', COALESCE(NEW.received_qty, 0))
+    ON CONFLICT(metric, bucket) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_dash_srv_items_update
+AFTER UPDATE OF received_qty ON srv_items
+BEGIN
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    VALUES ('received_qty', '', COALESCE(NEW.received_qty, 0) - COALESCE(OLD.received_qty, 0))
+    ON CONFLICT(metric, bucket) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_dash_srv_items_delete
+AFTER DELETE ON srv_items
+BEGIN
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    VALUES ('received_qty', '', -COALESCE(OLD.received_qty, 0))
+    ON CONFLICT(metric, bucket) DO UPDATE SET value = value + excluded.value;
+END;
+
+-- ============================================================
+-- Invoices: sales per month
+-- ============================================================
+
+CREATE TRIGGER IF NOT EXISTS trg_dash_invoice_insert
+AFTER INSERT ON gst_invoices
+BEGIN
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    VALUES ('invoice_sales', COALESCE(strftime('%Y-%m', NEW.created_at), ''), COALESCE(NEW.total_invoice_value, 0))
+    ON CONFLICT(metric, bucket) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_dash_invoice_update
+AFTER UPDATE OF total_invoice_value, created_at ON gst_invoices
+BEGIN
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    VALUES ('invoice_sales', COALESCE(strftime('%Y-%m', OLD.created_at), ''), -COALESCE(OLD.total_invoice_value, 0))
+    ON CONFLICT(metric, bucket) DO UPDATE SET value = value + excluded.value;
+
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    VALUES ('invoice_sales', COALESCE(strftime('%Y-%m', NEW.created_at), ''), COALESCE(NEW.total_invoice_value, 0))
+    ON CONFLICT(metric, bucket) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_dash_invoice_delete
+AFTER DELETE ON gst_invoices
+BEGIN
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    VALUES ('invoice_sales', COALESCE(strftime('%Y-%m', OLD.created_at), ''), -COALESCE(OLD.total_invoice_value, 0))
+    ON CONFLICT(metric, bucket) DO UPDATE SET value = value + excluded.value;
+END;
+
+-- ============================================================
+-- Active challans: DC numbers with no row in gst_invoice_dc_links.
+-- A DC number becomes active with its first DC row, and stops being
+-- active with its first link or when its last DC row goes.
+-- ============================================================
+
+CREATE TRIGGER IF NOT EXISTS trg_dash_dc_insert
+AFTER INSERT ON delivery_challans
+BEGIN
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    VALUES ('active_challans', '',
+        CASE WHEN (SELECT COUNT(*) FROM delivery_challans WHERE dc_number = NEW.dc_number) = 1
+              AND NOT EXISTS (SELECT 1 FROM gst_invoice_dc_links WHERE dc_number = NEW.dc_number)
+             THEN 1 ELSE 0 END)
+    ON CONFLICT(metric, bucket) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_dash_dc_update
+AFTER UPDATE OF dc_number ON delivery_challans
+WHEN OLD.dc_number IS NOT NEW.dc_number
+BEGIN
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    VALUES ('active_challans', '',
+        CASE WHEN (SELECT COUNT(*) FROM delivery_challans WHERE dc_number = NEW.dc_number) = 1
+              AND NOT EXISTS (SELECT 1 FROM gst_invoice_dc_links WHERE dc_number = NEW.dc_number)
+             THEN 1 ELSE 0 END
+        - CASE WHEN NOT EXISTS (SELECT 1 FROM delivery_challans WHERE dc_number = OLD.dc_number)
+                AND NOT EXISTS (SELECT 1 FROM gst_invoice_dc_links WHERE dc_number = OLD.dc_number)
+               THEN 1 ELSE 0 END)
+    ON CONFLICT(metric, bucket) DO UPDATE SET value = value + excluded.value;
+END;
+
+-- BEFORE, so the links are still there: ON DELETE CASCADE removes them
+-- ahead of any AFTER DELETE trigger on the DC.
+CREATE TRIGGER IF NOT EXISTS trg_dash_dc_delete
+BEFORE DELETE ON delivery_challans
+BEGIN
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    VALUES ('active_challans', '',
+        CASE WHEN (SELECT COUNT(*) FROM delivery_challans WHERE dc_number = OLD.dc_number) = 1
+              AND NOT EXISTS (SELECT 1 FROM gst_invoice_dc_links WHERE dc_number = OLD.dc_number)
+             THEN -1 ELSE 0 END)
+    ON CONFLICT(metric, bucket) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_dash_dc_link_insert
+AFTER INSERT ON gst_invoice_dc_links
+BEGIN
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    VALUES ('active_challans', '',
+        CASE WHEN EXISTS (SELECT 1 FROM delivery_challans WHERE dc_number = NEW.dc_number)
+              AND NOT EXISTS (SELECT 1 FROM gst_invoice_dc_links
+                              WHERE dc_number = NEW.dc_number AND rowid != NEW.rowid)
+             THEN -1 ELSE 0 END)
+    ON CONFLICT(metric, bucket) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_dash_dc_link_update
+AFTER UPDATE OF dc_number ON gst_invoice_dc_links
+WHEN OLD.dc_number IS NOT NEW.dc_number
+BEGIN
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    VALUES ('active_challans', '',
+        CASE WHEN EXISTS (SELECT 1 FROM delivery_challans WHERE dc_number = OLD.dc_number)
+              AND NOT EXISTS (SELECT 1 FROM gst_invoice_dc_links WHERE dc_number = OLD.dc_number)
+             THEN 1 ELSE 0 END
+        - CASE WHEN EXISTS (SELECT 1 FROM delivery_challans WHERE dc_number = NEW.dc_number)
+                AND NOT EXISTS (SELECT 1 FROM gst_invoice_dc_links
+                                WHERE dc_number = NEW.dc_number AND rowid != NEW.rowid)
+               THEN 1 ELSE 0 END)
+    ON CONFLICT(metric, bucket) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_dash_dc_link_delete
+AFTER DELETE ON gst_invoice_dc_links
+BEGIN
+    INSERT INTO dashboard_snapshot (metric, bucket, value)
+    VALUES ('active_challans', '',
+        CASE WHEN EXISTS (SELECT 1 FROM delivery_challans WHERE dc_number = OLD.dc_number)
+              AND NOT EXISTS (SELECT 1 FROM gst_invoice_dc_links WHERE dc_number = OLD.dc_number)
+             THEN 1 ELSE 0 END)
+    ON CONFLICT(metric, bucket) DO UPDATE SET value = value + excluded.value;
+END;
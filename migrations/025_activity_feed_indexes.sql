@@ -0,0 +1,12 @@
+-- Migration: 025_activity_feed_indexes.sql
+-- Purpose: Index every activity feed source on created_at
+--
+-- The dashboard activity feed pages backwards through POs, DCs, invoices and
+-- SRVs by (created_at, rowid). POs, DCs and invoices already have created_at
+-- indexes (add_indexes.sql); SRVs did not. The others are repeated here so
+-- databases that skipped add_indexes.sql still get them.
+
+CREATE INDEX IF NOT EXISTS idx_po_created_at ON purchase_orders(created_at);
+CREATE INDEX IF NOT EXISTS idx_dc_created_at ON delivery_challans(created_at);
+CREATE INDEX IF NOT EXISTS idx_invoices_created_at ON gst_invoices(created_at);
+CREATE INDEX IF NOT EXISTS idx_srvs_created_at ON srvs(created_at);
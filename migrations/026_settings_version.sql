@@ -0,0 +1,65 @@
+-- Migration: 026_settings_version.sql
+-- Purpose: Change counter for business_settings and buyers
+--
+-- Document rendering keeps an in-process copy of the business settings and
+-- the default buyer (app/services/settings_cache.py). These triggers bump
+-- settings_version on every write to either table, so a cached copy is reused
+-- only while its version still matches. `token` is random per database, so
+-- copies from different database files never mix.
+
+-- Same definition as 020_create_buyers_table.sql, for databases without it
+CREATE TABLE IF NOT EXISTS buyers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    gstin TEXT NOT NULL,
+    billing_address TEXT NOT NULL,
+    shipping_address TEXT,
+    place_of_supply TEXT NOT NULL,
+    is_default BOOLEAN DEFAULT 0,
+    is_active BOOLEAN DEFAULT 1,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS settings_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    token TEXT NOT NULL DEFAULT (lower(hex(randomblob(8)))),
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO settings_version (id) VALUES (1);
+
+CREATE TRIGGER IF NOT EXISTS trg_settings_version_settings_insert
+AFTER INSERT ON business_settings
+BEGIN
+    UPDATE settings_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_settings_version_settings_update
+AFTER UPDATE ON business_settings
+BEGIN
+    UPDATE settings_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_settings_version_settings_delete
+AFTER DELETE ON business_settings
+BEGIN
+    UPDATE settings_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_settings_version_buyers_insert
+AFTER INSERT ON buyers
+BEGIN
+    UPDATE settings_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_settings_version_buyers_update
+AFTER UPDATE ON buyers
+BEGIN
+    UPDATE settings_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_settings_version_buyers_delete
+AFTER DELETE ON buyers
+BEGIN
+    UPDATE settings_version SET version = version + 1 WHERE id = 1;
+END;
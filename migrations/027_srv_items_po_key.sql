@@ -0,0 +1,11 @@
+-- Migration: 027_srv_items_po_key.sql
+-- Purpose: Integer PO number key on srv_items for index-backed joins
+--
+-- srv_items.po_number is VARCHAR while every other table keys POs by
+-- INTEGER, so joins had to CAST one side and could not use an index.
+-- po_key is a virtual generated column (no storage, always in sync with
+-- po_number); only the index below materializes it.
+
+ALTER TABLE srv_items ADD COLUMN po_key INTEGER GENERATED ALWAYS AS (CAST(po_number AS INTEGER)) VIRTUAL;
+
+CREATE INDEX IF NOT EXISTS idx_srv_items_po_key ON srv_items(po_key, po_item_no);
@@ -0,0 +1,246 @@
+-- Migration: 028_search_index.sql
+-- Purpose: FTS5 full-text index behind /api/search
+--
+-- One FTS row per document (PO, DC, Invoice, SRV) with three columns:
+--   number  the document number
+--   party   supplier / consignee / buyer
+--   body    everything else worth finding the document by
+-- PO items get rows of their own (doc_type 'POItem': description, material
+-- code and drawing number in body) that search reports as their PO.
+-- search_docs maps (doc_type, doc_key) to the FTS rowid, so triggers
+-- replace a document's row by primary key instead of scanning the index.
+-- Triggers keep both in sync with the source tables; UPDATE triggers only
+-- fire on the indexed columns, so quantity bookkeeping does not touch FTS.
+
+CREATE TABLE IF NOT EXISTS search_docs (
+    id INTEGER PRIMARY KEY,
+    doc_type TEXT NOT NULL,
+    doc_key TEXT NOT NULL,
+    UNIQUE (doc_type, doc_key)
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+    number,
+    party,
+    body,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3 4'
+);
+
+-- Number matches outrank party matches, which outrank body matches
+INSERT INTO search_index (search_index, rank) VALUES ('rank', 'bm25(10.0, 4.0, 1.0)');
+
+-- ---------------------------------------------------------------------------
+-- Purchase orders and their items
+-- ---------------------------------------------------------------------------
+
+CREATE TRIGGER IF NOT EXISTS search_po_insert
+AFTER INSERT ON purchase_orders
+BEGIN
+    INSERT OR IGNORE INTO search_docs (doc_type, doc_key) VALUES ('PO', NEW.po_number);
+    INSERT INTO search_index (rowid, number, party, body)
+    SELECT d.id, NEW.po_number, NEW.supplier_name, NULL
+    FROM search_docs d WHERE d.doc_type = 'PO' AND d.doc_key = NEW.po_number;
+END;
+
+CREATE TRIGGER IF NOT EXISTS search_po_update
+AFTER UPDATE OF po_number, supplier_name ON purchase_orders
+BEGIN
+    DELETE FROM search_index WHERE rowid IN (
+        SELECT id FROM search_docs WHERE doc_type = 'PO' AND doc_key IN (OLD.po_number, NEW.po_number)
+    );
+    DELETE FROM search_docs WHERE doc_type = 'PO' AND doc_key = OLD.po_number;
+    INSERT OR IGNORE INTO search_docs (doc_type, doc_key) VALUES ('PO', NEW.po_number);
+    INSERT INTO search_index (rowid, number, party, body)
+    SELECT d.id, NEW.po_number, NEW.supplier_name, NULL
+    FROM search_docs d WHERE d.doc_type = 'PO' AND d.doc_key = NEW.po_number;
+END;
+
+CREATE TRIGGER IF NOT EXISTS search_po_delete
+AFTER DELETE ON purchase_orders
+BEGIN
+    DELETE FROM search_index WHERE rowid = (
+        SELECT id FROM search_docs WHERE doc_type = 'PO' AND doc_key = OLD.po_number
+    );
+    DELETE FROM search_docs WHERE doc_type = 'PO' AND doc_key = OLD.po_number;
+END;
+
+-- Each item is its own row (doc_type 'POItem', keyed by item id) that search
+-- maps back to its PO, so an item write touches one FTS row and PO ingest
+-- stays linear in item count.
+CREATE TRIGGER IF NOT EXISTS search_po_item_insert
+AFTER INSERT ON purchase_order_items
+BEGIN
+    INSERT OR IGNORE INTO search_docs (doc_type, doc_key) VALUES ('POItem', NEW.id);
+    INSERT INTO search_index (rowid, number, party, body)
+    SELECT d.id, NULL, NULL,
+           COALESCE(NEW.material_description, '') || ' ' || COALESCE(NEW.material_code, '') || ' ' || COALESCE(NEW.drg_no, '')
+    FROM search_docs d WHERE d.doc_type = 'POItem' AND d.doc_key = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS search_po_item_update
+AFTER UPDATE OF id, material_description, material_code, drg_no ON purchase_order_items
+BEGIN
+    DELETE FROM search_index WHERE rowid IN (
+        SELECT id FROM search_docs WHERE doc_type = 'POItem' AND doc_key IN (OLD.id, NEW.id)
+    );
+    DELETE FROM search_docs WHERE doc_type = 'POItem' AND doc_key = OLD.id;
+    INSERT OR IGNORE INTO search_docs (doc_type, doc_key) VALUES ('POItem', NEW.id);
+    INSERT INTO search_index (rowid, number, party, body)
+    SELECT d.id, NULL, NULL,
+           COALESCE(NEW.material_description, '') || ' ' || COALESCE(NEW.material_code, '') || ' ' || COALESCE(NEW.drg_no, '')
+    FROM search_docs d WHERE d.doc_type = 'POItem' AND d.doc_key = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS search_po_item_delete
+AFTER DELETE ON purchase_order_items
+BEGIN
+    DELETE FROM search_index WHERE rowid = (
+        SELECT id FROM search_docs WHERE doc_type = 'POItem' AND doc_key = OLD.id
+    );
+    DELETE FROM search_docs WHERE doc_type = 'POItem' AND doc_key = OLD.id;
+END;
+
+-- ---------------------------------------------------------------------------
+-- Delivery challans
+-- ---------------------------------------------------------------------------
+
+CREATE TRIGGER IF NOT EXISTS search_dc_insert
+AFTER INSERT ON delivery_challans
+BEGIN
+    INSERT OR IGNORE INTO search_docs (doc_type, doc_key) VALUES ('DC', NEW.dc_number);
+    INSERT INTO search_index (rowid, number, party, body)
+    SELECT d.id, NEW.dc_number, NEW.consignee_name, NEW.po_number
+    FROM search_docs d WHERE d.doc_type = 'DC' AND d.doc_key = NEW.dc_number;
+END;
+
+CREATE TRIGGER IF NOT EXISTS search_dc_update
+AFTER UPDATE OF dc_number, consignee_name, po_number ON delivery_challans
+BEGIN
+    DELETE FROM search_index WHERE rowid IN (
+        SELECT id FROM search_docs WHERE doc_type = 'DC' AND doc_key IN (OLD.dc_number, NEW.dc_number)
+    );
+    DELETE FROM search_docs WHERE doc_type = 'DC' AND doc_key = OLD.dc_number;
+    INSERT OR IGNORE INTO search_docs (doc_type, doc_key) VALUES ('DC', NEW.dc_number);
+    INSERT INTO search_index (rowid, number, party, body)
+    SELECT d.id, NEW.dc_number, NEW.consignee_name, NEW.po_number
+    FROM search_docs d WHERE d.doc_type = 'DC' AND d.doc_key = NEW.dc_number;
+END;
+
+CREATE TRIGGER IF NOT EXISTS search_dc_delete
+AFTER DELETE ON delivery_challans
+BEGIN
+    DELETE FROM search_index WHERE rowid = (
+        SELECT id FROM search_docs WHERE doc_type = 'DC' AND doc_key = OLD.dc_number
+    );
+    DELETE FROM search_docs WHERE doc_type = 'DC' AND doc_key = OLD.dc_number;
+END;
+
+-- ---------------------------------------------------------------------------
+-- GST invoices
+-- ---------------------------------------------------------------------------
+
+CREATE TRIGGER IF NOT EXISTS search_invoice_insert
+AFTER INSERT ON gst_invoices
+BEGIN
+    INSERT OR IGNORE INTO search_docs (doc_type, doc_key) VALUES ('Invoice', NEW.invoice_number);
+    INSERT INTO search_index (rowid, number, party, body)
+    SELECT d.id, NEW.invoice_number, NEW.buyer_name,
+           COALESCE(NEW.linked_dc_numbers, '') || ' ' || COALESCE(NEW.po_numbers, '')
+    FROM search_docs d WHERE d.doc_type = 'Invoice' AND d.doc_key = NEW.invoice_number;
+END;
+
+CREATE TRIGGER IF NOT EXISTS search_invoice_update
+AFTER UPDATE OF invoice_number, buyer_name, linked_dc_numbers, po_numbers ON gst_invoices
+BEGIN
+    DELETE FROM search_index WHERE rowid IN (
+        SELECT id FROM search_docs WHERE doc_type = 'Invoice' AND doc_key IN (OLD.invoice_number, NEW.invoice_number)
+    );
+    DELETE FROM search_docs WHERE doc_type = 'Invoice' AND doc_key = OLD.invoice_number;
+    INSERT OR IGNORE INTO search_docs (doc_type, doc_key) VALUES ('Invoice', NEW.invoice_number);
+    INSERT INTO search_index (rowid, number, party, body)
+    SELECT d.id, NEW.invoice_number, NEW.buyer_name,
+           COALESCE(NEW.linked_dc_numbers, '') || ' ' || COALESCE(NEW.po_numbers, '')
+    FROM search_docs d WHERE d.doc_type = 'Invoice' AND d.doc_key = NEW.invoice_number;
+END;
+
+CREATE TRIGGER IF NOT EXISTS search_invoice_delete
+AFTER DELETE ON gst_invoices
+BEGIN
+    DELETE FROM search_index WHERE rowid = (
+        SELECT id FROM search_docs WHERE doc_type = 'Invoice' AND doc_key = OLD.invoice_number
+    );
+    DELETE FROM search_docs WHERE doc_type = 'Invoice' AND doc_key = OLD.invoice_number;
+END;
+
+-- ---------------------------------------------------------------------------
+-- SRVs
+-- ---------------------------------------------------------------------------
+
+CREATE TRIGGER IF NOT EXISTS search_srv_insert
+AFTER INSERT ON srvs
+BEGIN
+    INSERT OR IGNORE INTO search_docs (doc_type, doc_key) VALUES ('SRV', NEW.srv_number);
+    INSERT INTO search_index (rowid, number, party, body)
+    SELECT d.id, NEW.srv_number, NULL, NEW.po_number
+    FROM search_docs d WHERE d.doc_type = 'SRV' AND d.doc_key = NEW.srv_number;
+END;
+
+CREATE TRIGGER IF NOT EXISTS search_srv_update
+AFTER UPDATE OF srv_number, po_number ON srvs
+BEGIN
+    DELETE FROM search_index WHERE rowid IN (
+        SELECT id FROM search_docs WHERE doc_type = 'SRV' AND doc_key IN (OLD.srv_number, NEW.srv_number)
+    );
+    DELETE FROM search_docs WHERE doc_type = 'SRV' AND doc_key = OLD.srv_number;
+    INSERT OR IGNORE INTO search_docs (doc_type, doc_key) VALUES ('SRV', NEW.srv_number);
+    INSERT INTO search_index (rowid, number, party, body)
+    SELECT d.id, NEW.srv_number, NULL, NEW.po_number
+    FROM search_docs d WHERE d.doc_type = 'SRV' AND d.doc_key = NEW.srv_number;
+END;
+
+CREATE TRIGGER IF NOT EXISTS search_srv_delete
+AFTER DELETE ON srvs
+BEGIN
+    DELETE FROM search_index WHERE rowid = (
+        SELECT id FROM search_docs WHERE doc_type = 'SRV' AND doc_key = OLD.srv_number
+    );
+    DELETE FROM search_docs WHERE doc_type = 'SRV' AND doc_key = OLD.srv_number;
+END;
+
+-- ---------------------------------------------------------------------------
+-- Backfill existing documents
+-- ---------------------------------------------------------------------------
+
+INSERT OR IGNORE INTO search_docs (doc_type, doc_key)
+SELECT 'PO', po_number FROM purchase_orders
+UNION ALL SELECT 'POItem', id FROM purchase_order_items
+UNION ALL SELECT 'DC', dc_number FROM delivery_challans
+UNION ALL SELECT 'Invoice', invoice_number FROM gst_invoices
+UNION ALL SELECT 'SRV', srv_number FROM srvs;
+
+INSERT INTO search_index (rowid, number, party, body)
+SELECT d.id, po.po_number, po.supplier_name, NULL
+FROM purchase_orders po
+JOIN search_docs d ON d.doc_type = 'PO' AND d.doc_key = po.po_number;
+
+INSERT INTO search_index (rowid, number, party, body)
+SELECT d.id, NULL, NULL,
+       COALESCE(i.material_description, '') || ' ' || COALESCE(i.material_code, '') || ' ' || COALESCE(i.drg_no, '')
+FROM purchase_order_items i
+JOIN search_docs d ON d.doc_type = 'POItem' AND d.doc_key = i.id;
+
+INSERT INTO search_index (rowid, number, party, body)
+SELECT d.id, dc.dc_number, dc.consignee_name, dc.po_number
+FROM delivery_challans dc
+JOIN search_docs d ON d.doc_type = 'DC' AND d.doc_key = dc.dc_number;
+
+INSERT INTO search_index (rowid, number, party, body)
+SELECT d.id, inv.invoice_number, inv.buyer_name, COALESCE(inv.linked_dc_numbers, '') || ' ' || COALESCE(inv.po_numbers, '')
+FROM gst_invoices inv
+JOIN search_docs d ON d.doc_type = 'Invoice' AND d.doc_key = inv.invoice_number;
+
+INSERT INTO search_index (rowid, number, party, body)
+SELECT d.id, s.srv_number, NULL, s.po_number
+FROM srvs s
+JOIN search_docs d ON d.doc_type = 'SRV' AND d.doc_key = s.srv_number;
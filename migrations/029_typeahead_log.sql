@@ -0,0 +1,144 @@
+-- Migration: 029_typeahead_log.sql
+-- Purpose: Change log behind the in-memory typeahead index
+--
+-- app/services/typeahead.py keeps sorted lists of PO, DC, invoice and SRV
+-- numbers and material codes in memory. These triggers append one row per
+-- value added (delta = 1) or removed (delta = -1), so the index applies just
+-- the rows past the last seq it has seen instead of re-reading the tables.
+-- Material codes repeat across PO items; deltas make the in-memory copy a
+-- count per code. The log keeps the newest 10000 rows; an index that falls
+-- further behind rebuilds from the source tables.
+
+CREATE TABLE IF NOT EXISTS typeahead_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL,
+    delta INTEGER NOT NULL
+);
+
+CREATE TRIGGER IF NOT EXISTS typeahead_log_prune
+AFTER INSERT ON typeahead_log
+WHEN NEW.seq % 1000 = 0
+BEGIN
+    DELETE FROM typeahead_log WHERE seq <= NEW.seq - 10000;
+END;
+
+-- ---------------------------------------------------------------------------
+-- Purchase orders and material codes
+-- ---------------------------------------------------------------------------
+
+CREATE TRIGGER IF NOT EXISTS typeahead_po_insert
+AFTER INSERT ON purchase_orders
+BEGIN
+    INSERT INTO typeahead_log (kind, value, delta) VALUES ('po', CAST(NEW.po_number AS TEXT), 1);
+END;
+
+CREATE TRIGGER IF NOT EXISTS typeahead_po_update
+AFTER UPDATE OF po_number ON purchase_orders
+WHEN OLD.po_number IS NOT NEW.po_number
+BEGIN
+    INSERT INTO typeahead_log (kind, value, delta) VALUES ('po', CAST(OLD.po_number AS TEXT), -1);
+    INSERT INTO typeahead_log (kind, value, delta) VALUES ('po', CAST(NEW.po_number AS TEXT), 1);
+END;
+
+CREATE TRIGGER IF NOT EXISTS typeahead_po_delete
+AFTER DELETE ON purchase_orders
+BEGIN
+    INSERT INTO typeahead_log (kind, value, delta) VALUES ('po', CAST(OLD.po_number AS TEXT), -1);
+END;
+
+CREATE TRIGGER IF NOT EXISTS typeahead_material_insert
+AFTER INSERT ON purchase_order_items
+WHEN COALESCE(NEW.material_code, '') != ''
+BEGIN
+    INSERT INTO typeahead_log (kind, value, delta) VALUES ('material', NEW.material_code, 1);
+END;
+
+CREATE TRIGGER IF NOT EXISTS typeahead_material_update
+AFTER UPDATE OF material_code ON purchase_order_items
+WHEN OLD.material_code IS NOT NEW.material_code
+BEGIN
+    INSERT INTO typeahead_log (kind, value, delta)
+    SELECT 'material', OLD.material_code, -1 WHERE COALESCE(OLD.material_code, '') != '';
+    INSERT INTO typeahead_log (kind, value, delta)
+    SELECT 'material', NEW.material_code, 1 WHERE COALESCE(NEW.material_code, '') != '';
+END;
+
+CREATE TRIGGER IF NOT EXISTS typeahead_material_delete
+AFTER DELETE ON purchase_order_items
+WHEN COALESCE(OLD.material_code, '') != ''
+BEGIN
+    INSERT INTO typeahead_log (kind, value, delta) VALUES ('material', OLD.material_code, -1);
+END;
+
+-- ---------------------------------------------------------------------------
+-- Delivery challans
+-- ---------------------------------------------------------------------------
+
+CREATE TRIGGER IF NOT EXISTS typeahead_dc_insert
+AFTER INSERT ON delivery_challans
+BEGIN
+    INSERT INTO typeahead_log (kind, value, delta) VALUES ('dc', NEW.dc_number, 1);
+END;
+
+CREATE TRIGGER IF NOT EXISTS typeahead_dc_update
+AFTER UPDATE OF dc_number ON delivery_challans
+WHEN OLD.dc_number IS NOT NEW.dc_number
+BEGIN
+    INSERT INTO typeahead_log (kind, value, delta) VALUES ('dc', OLD.dc_number, -1);
+    INSERT INTO typeahead_log (kind, value, delta) VALUES ('dc', NEW.dc_number, 1);
+END;
+
+CREATE TRIGGER IF NOT EXISTS typeahead_dc_delete
+AFTER DELETE ON delivery_challans
+BEGIN
+    INSERT INTO typeahead_log (kind, value, delta) VALUES ('dc', OLD.dc_number, -1);
+END;
+
+-- ---------------------------------------------------------------------------
+-- GST invoices
+-- ---------------------------------------------------------------------------
+
+CREATE TRIGGER IF NOT EXISTS typeahead_invoice_insert
+AFTER INSERT ON gst_invoices
+BEGIN
+    INSERT INTO typeahead_log (kind, value, delta) VALUES ('invoice', NEW.invoice_number, 1);
+END;
+
+CREATE TRIGGER IF NOT EXISTS typeahead_invoice_update
+AFTER UPDATE OF invoice_number ON gst_invoices
+WHEN OLD.invoice_number IS NOT NEW.invoice_number
+BEGIN
+    INSERT INTO typeahead_log (kind, value, delta) VALUES ('invoice', OLD.invoice_number, -1);
+    INSERT INTO typeahead_log (kind, value, delta) VALUES ('invoice', NEW.invoice_number, 1);
+END;
+
+CREATE TRIGGER IF NOT EXISTS typeahead_invoice_delete
+AFTER DELETE ON gst_invoices
+BEGIN
+    INSERT INTO typeahead_log (kind, value, delta) VALUES ('invoice', OLD.invoice_number, -1);
+END;
+
+-- ---------------------------------------------------------------------------
+-- SRVs
+-- ---------------------------------------------------------------------------
+
+CREATE TRIGGER IF NOT EXISTS typeahead_srv_insert
+AFTER INSERT ON srvs
+BEGIN
+    INSERT INTO typeahead_log (kind, value, delta) VALUES ('srv', NEW.srv_number, 1);
+END;
+
+CREATE TRIGGER IF NOT EXISTS typeahead_srv_update
+AFTER UPDATE OF srv_number ON srvs
+WHEN OLD.srv_number IS NOT NEW.srv_number
+BEGIN
+    INSERT INTO typeahead_log (kind, value, delta) VALUES ('srv', OLD.srv_number, -1);
+    INSERT INTO typeahead_log (kind, value, delta) VALUES ('srv', NEW.srv_number, 1);
+END;
+
+CREATE TRIGGER IF NOT EXISTS typeahead_srv_delete
+AFTER DELETE ON srvs
+BEGIN
+    INSERT INTO typeahead_log (kind, value, delta) VALUES ('srv', OLD.srv_number, -1);
+END;
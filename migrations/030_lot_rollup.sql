@@ -0,0 +1,237 @@
+-- Migration: 030_lot_rollup.sql
+-- Purpose: Per-lot reconciliation rollup behind /api/reconciliation
+--
+-- lot_rollup holds one row per (PO item, lot) with ordered, dispatched,
+-- received, rejected and invoiced quantities, so DC entry reads a PO's
+-- remaining quantities with one indexed range scan. Lot 0 collects DC and
+-- SRV lines recorded without a lot number.
+--
+-- Writes to any source table queue the affected PO item ids in
+-- lot_rollup_refresh; the trigger on that table recomputes all lots of the
+-- item and removes the queue row again, so the refresh logic lives in one
+-- place. The srv_items triggers honour the 022 'srv_receipts' guard; bulk SRV
+-- ingestion queues its touched items once before committing.
+-- Existing rows are filled by rebuild_lot_rollup (app/services/lot_rollup.py).
+
+CREATE TABLE IF NOT EXISTS lot_rollup (
+    po_item_id TEXT NOT NULL,
+    lot_no INTEGER NOT NULL,
+    po_number INTEGER NOT NULL,
+    po_item_no INTEGER NOT NULL,
+    ordered_qty DECIMAL(10,2) DEFAULT 0,
+    dispatched_qty DECIMAL(10,2) DEFAULT 0,
+    received_qty DECIMAL(10,2) DEFAULT 0,
+    rejected_qty DECIMAL(10,2) DEFAULT 0,
+    invoiced_qty DECIMAL(10,2) DEFAULT 0,
+    PRIMARY KEY (po_item_id, lot_no)
+);
+
+CREATE INDEX IF NOT EXISTS idx_lot_rollup_po ON lot_rollup(po_number, po_item_no, lot_no);
+
+CREATE TABLE IF NOT EXISTS lot_rollup_refresh (
+    po_item_id TEXT PRIMARY KEY
+);
+
+-- Supporting indexes for the per-item refresh
+CREATE INDEX IF NOT EXISTS idx_pod_lot_no ON purchase_order_deliveries(po_item_id, lot_no);
+CREATE INDEX IF NOT EXISTS idx_dci_lot_no ON delivery_challan_items(po_item_id, lot_no);
+CREATE INDEX IF NOT EXISTS idx_gst_invoices_linked_dc ON gst_invoices(linked_dc_numbers);
+
+CREATE TRIGGER IF NOT EXISTS trg_lot_rollup_refresh
+AFTER INSERT ON lot_rollup_refresh
+BEGIN
+    DELETE FROM lot_rollup WHERE po_item_id = NEW.po_item_id;
+
+    INSERT INTO lot_rollup (
+        po_item_id, lot_no, po_number, po_item_no,
+        ordered_qty, dispatched_qty, received_qty, rejected_qty, invoiced_qty
+    )
+    SELECT poi.id, q.lot_no, poi.po_number, poi.po_item_no,
+           SUM(q.ordered), SUM(q.dispatched), SUM(q.received), SUM(q.rejected), SUM(q.invoiced)
+    FROM purchase_order_items poi
+    JOIN (
+        SELECT COALESCE(d.lot_no, 0) AS lot_no, COALESCE(d.dely_qty, 0) AS ordered,
+               0 AS dispatched, 0 AS received, 0 AS rejected, 0 AS invoiced
+        FROM purchase_order_deliveries d
+        WHERE d.po_item_id = NEW.po_item_id
+        UNION ALL
+        SELECT COALESCE(dci.lot_no, 0), 0, dci.dispatch_qty, 0, 0, 0
+        FROM delivery_challan_items dci
+        JOIN delivery_challans dc ON dc.dc_number = dci.dc_number
+        WHERE dci.po_item_id = NEW.po_item_id
+        UNION ALL
+        SELECT COALESCE(si.lot_no, 0), 0, 0, COALESCE(si.received_qty, 0), COALESCE(si.rejected_qty, 0), 0
+        FROM purchase_order_items i
+        JOIN srv_items si ON si.po_key = i.po_number AND si.po_item_no = i.po_item_no
+        JOIN srvs s ON s.srv_number = si.srv_number
+        WHERE i.id = NEW.po_item_id AND s.is_active = 1
+        UNION ALL
+        SELECT COALESCE(dci.lot_no, 0), 0, 0, 0, 0, gii.quantity
+        FROM delivery_challan_items dci
+        JOIN gst_invoices gi ON gi.linked_dc_numbers = dci.dc_number
+        JOIN gst_invoice_items gii ON gii.invoice_number = gi.invoice_number
+        WHERE dci.po_item_id = NEW.po_item_id AND gii.po_sl_no = dci.lot_no
+    ) q
+    WHERE poi.id = NEW.po_item_id
+    GROUP BY q.lot_no;
+
+    DELETE FROM lot_rollup_refresh WHERE po_item_id = NEW.po_item_id;
+END;
+
+-- ============================================================
+-- PO items and delivery schedule (ordered quantity per lot)
+-- ============================================================
+
+CREATE TRIGGER IF NOT EXISTS trg_lot_rollup_poi_insert
+AFTER INSERT ON purchase_order_items
+BEGIN
+    INSERT OR IGNORE INTO lot_rollup_refresh (po_item_id) VALUES (NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_lot_rollup_poi_update
+AFTER UPDATE OF id, po_number, po_item_no ON purchase_order_items
+BEGIN
+    INSERT OR IGNORE INTO lot_rollup_refresh (po_item_id) VALUES (OLD.id);
+    INSERT OR IGNORE INTO lot_rollup_refresh (po_item_id) VALUES (NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_lot_rollup_poi_delete
+AFTER DELETE ON purchase_order_items
+BEGIN
+    INSERT OR IGNORE INTO lot_rollup_refresh (po_item_id) VALUES (OLD.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_lot_rollup_pod_insert
+AFTER INSERT ON purchase_order_deliveries
+BEGIN
+    INSERT OR IGNORE INTO lot_rollup_refresh (po_item_id) VALUES (NEW.po_item_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_lot_rollup_pod_update
+AFTER UPDATE OF po_item_id, lot_no, dely_qty ON purchase_order_deliveries
+BEGIN
+    INSERT OR IGNORE INTO lot_rollup_refresh (po_item_id) VALUES (OLD.po_item_id);
+    INSERT OR IGNORE INTO lot_rollup_refresh (po_item_id) VALUES (NEW.po_item_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_lot_rollup_pod_delete
+AFTER DELETE ON purchase_order_deliveries
+BEGIN
+    INSERT OR IGNORE INTO lot_rollup_refresh (po_item_id) VALUES (OLD.po_item_id);
+END;
+
+-- ============================================================
+-- DC items: dispatched quantity (and invoiced, which matches on DC lot)
+-- ============================================================
+
+CREATE TRIGGER IF NOT EXISTS trg_lot_rollup_dci_insert
+AFTER INSERT ON delivery_challan_items
+BEGIN
+    INSERT OR IGNORE INTO lot_rollup_refresh (po_item_id) VALUES (NEW.po_item_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_lot_rollup_dci_update
+AFTER UPDATE OF dc_number, po_item_id, dispatch_qty, lot_no ON delivery_challan_items
+BEGIN
+    INSERT OR IGNORE INTO lot_rollup_refresh (po_item_id) VALUES (OLD.po_item_id);
+    INSERT OR IGNORE INTO lot_rollup_refresh (po_item_id) VALUES (NEW.po_item_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_lot_rollup_dci_delete
+AFTER DELETE ON delivery_challan_items
+BEGIN
+    INSERT OR IGNORE INTO lot_rollup_refresh (po_item_id) VALUES (OLD.po_item_id);
+END;
+
+-- ============================================================
+-- SRV items: received / rejected quantity from active SRVs
+-- ============================================================
+
+CREATE TRIGGER IF NOT EXISTS trg_lot_rollup_srv_items_insert
+AFTER INSERT ON srv_items
+WHEN NOT EXISTS (SELECT 1 FROM trigger_guards WHERE name = 'srv_receipts')
+BEGIN
+    INSERT OR IGNORE INTO lot_rollup_refresh (po_item_id)
+    SELECT id FROM purchase_order_items WHERE po_number = NEW.po_key AND po_item_no = NEW.po_item_no;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_lot_rollup_srv_items_update
+AFTER UPDATE OF srv_number, po_number, po_item_no, lot_no, received_qty, rejected_qty ON srv_items
+WHEN NOT EXISTS (SELECT 1 FROM trigger_guards WHERE name = 'srv_receipts')
+BEGIN
+    INSERT OR IGNORE INTO lot_rollup_refresh (po_item_id)
+    SELECT id FROM purchase_order_items
+    WHERE (po_number = OLD.po_key AND po_item_no = OLD.po_item_no)
+       OR (po_number = NEW.po_key AND po_item_no = NEW.po_item_no);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_lot_rollup_srv_items_delete
+AFTER DELETE ON srv_items
+WHEN NOT EXISTS (SELECT 1 FROM trigger_guards WHERE name = 'srv_receipts')
+BEGIN
+    INSERT OR IGNORE INTO lot_rollup_refresh (po_item_id)
+    SELECT id FROM purchase_order_items WHERE po_number = OLD.po_key AND po_item_no = OLD.po_item_no;
+END;
+
+-- Activating / deactivating an SRV changes every line it carries
+CREATE TRIGGER IF NOT EXISTS trg_lot_rollup_srvs_active
+AFTER UPDATE OF is_active ON srvs
+BEGIN
+    INSERT OR IGNORE INTO lot_rollup_refresh (po_item_id)
+    SELECT poi.id
+    FROM srv_items si
+    JOIN purchase_order_items poi ON poi.po_number = si.po_key AND poi.po_item_no = si.po_item_no
+    WHERE si.srv_number = NEW.srv_number;
+END;
+
+-- ============================================================
+-- Invoices: invoiced quantity for the items on the linked DC
+-- ============================================================
+
+CREATE TRIGGER IF NOT EXISTS trg_lot_rollup_invoice_items_insert
+AFTER INSERT ON gst_invoice_items
+BEGIN
+    INSERT OR IGNORE INTO lot_rollup_refresh (po_item_id)
+    SELECT dci.po_item_id
+    FROM gst_invoices gi
+    JOIN delivery_challan_items dci ON dci.dc_number = gi.linked_dc_numbers
+    WHERE gi.invoice_number = NEW.invoice_number;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_lot_rollup_invoice_items_update
+AFTER UPDATE OF invoice_number, po_sl_no, quantity ON gst_invoice_items
+BEGIN
+    INSERT OR IGNORE INTO lot_rollup_refresh (po_item_id)
+    SELECT dci.po_item_id
+    FROM gst_invoices gi
+    JOIN delivery_challan_items dci ON dci.dc_number = gi.linked_dc_numbers
+    WHERE gi.invoice_number IN (OLD.invoice_number, NEW.invoice_number);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_lot_rollup_invoice_items_delete
+AFTER DELETE ON gst_invoice_items
+BEGIN
+    INSERT OR IGNORE INTO lot_rollup_refresh (po_item_id)
+    SELECT dci.po_item_id
+    FROM gst_invoices gi
+    JOIN delivery_challan_items dci ON dci.dc_number = gi.linked_dc_numbers
+    WHERE gi.invoice_number = OLD.invoice_number;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_lot_rollup_invoice_relink
+AFTER UPDATE OF linked_dc_numbers ON gst_invoices
+BEGIN
+    INSERT OR IGNORE INTO lot_rollup_refresh (po_item_id)
+    SELECT po_item_id FROM delivery_challan_items
+    WHERE dc_number IN (OLD.linked_dc_numbers, NEW.linked_dc_numbers);
+END;
+
+-- Cascaded item deletes can no longer see the parent invoice, so refresh
+-- the linked DC's items once the header itself is gone.
+CREATE TRIGGER IF NOT EXISTS trg_lot_rollup_invoice_delete
+AFTER DELETE ON gst_invoices
+BEGIN
+    INSERT OR IGNORE INTO lot_rollup_refresh (po_item_id)
+    SELECT po_item_id FROM delivery_challan_items WHERE dc_number = OLD.linked_dc_numbers;
+END;
+
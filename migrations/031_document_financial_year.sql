@@ -0,0 +1,33 @@
+-- Migration: 031_document_financial_year.sql
+-- Purpose: Generated financial_year on DCs and invoices
+--
+-- 017 indexed a financial_year column that nothing ever filled in.
+-- financial_year is now a virtual generated column ('2024-25' for dates
+-- from 2024-04-01 to 2025-03-31; NULL for dates not in YYYY-MM-DD form).
+-- dc_number and invoice_number are primary keys, so numbers are unique
+-- across all financial years; 017's (number, financial_year) indexes added
+-- nothing to that and are dropped.
+--
+-- Databases that already carry a plain financial_year column have it renamed
+-- to financial_year_legacy first (ensure_document_financial_year in app/db.py).
+
+DROP INDEX IF EXISTS idx_unique_dc_number_fy;
+DROP INDEX IF EXISTS idx_unique_invoice_number_fy;
+
+ALTER TABLE delivery_challans ADD COLUMN financial_year TEXT GENERATED ALWAYS AS (
+    CASE
+        WHEN dc_date NOT GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]*' THEN NULL
+        WHEN CAST(substr(dc_date, 6, 2) AS INTEGER) >= 4
+            THEN substr(dc_date, 1, 4) || '-' || substr(CAST(substr(dc_date, 1, 4) AS INTEGER) + 1, 3, 2)
+        ELSE (CAST(substr(dc_date, 1, 4) AS INTEGER) - 1) || '-' || substr(dc_date, 3, 2)
+    END
+) VIRTUAL;
+
+ALTER TABLE gst_invoices ADD COLUMN financial_year TEXT GENERATED ALWAYS AS (
+    CASE
+        WHEN invoice_date NOT GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]*' THEN NULL
+        WHEN CAST(substr(invoice_date, 6, 2) AS INTEGER) >= 4
+            THEN substr(invoice_date, 1, 4) || '-' || substr(CAST(substr(invoice_date, 1, 4) AS INTEGER) + 1, 3, 2)
+        ELSE (CAST(substr(invoice_date, 1, 4) AS INTEGER) - 1) || '-' || substr(invoice_date, 3, 2)
+    END
+) VIRTUAL;
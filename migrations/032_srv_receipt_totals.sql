@@ -0,0 +1,70 @@
+-- Migration: 032_srv_receipt_totals.sql
+-- Purpose: One definition of purchase_order_items.rcd_qty / rejected_qty
+--
+-- The per-row srv_items triggers (016, re-created behind trigger_guards in
+-- 022) summed every SRV and wrote NULL when none matched, while bulk SRV
+-- ingestion (RECOMPUTE_PO_ITEM_RECEIPTS_SQL) sums active SRVs only and
+-- writes 0. Both now use the bulk definition, the same one as the
+-- reconciliation ledger: active SRVs, 0 when there are none.
+
+CREATE TABLE IF NOT EXISTS trigger_guards (
+    name TEXT PRIMARY KEY
+);
+
+DROP TRIGGER IF EXISTS trg_srv_items_receipt_sync;
+DROP TRIGGER IF EXISTS trg_srv_items_receipt_sync_update;
+DROP TRIGGER IF EXISTS trg_srv_items_receipt_sync_delete;
+
+CREATE TRIGGER IF NOT EXISTS trg_srv_items_receipts_insert
+AFTER INSERT ON srv_items
+WHEN NOT EXISTS (SELECT 1 FROM trigger_guards WHERE name = 'srv_receipts')
+BEGIN
+    UPDATE purchase_order_items
+    SET rcd_qty = COALESCE((
+            SELECT SUM(si.received_qty) FROM srv_items si
+            JOIN srvs s ON si.srv_number = s.srv_number
+            WHERE si.po_number = NEW.po_number AND si.po_item_no = NEW.po_item_no AND s.is_active = 1
+        ), 0),
+        rejected_qty = COALESCE((
+            SELECT SUM(si.rejected_qty) FROM srv_items si
+            JOIN srvs s ON si.srv_number = s.srv_number
+            WHERE si.po_number = NEW.po_number AND si.po_item_no = NEW.po_item_no AND s.is_active = 1
+        ), 0)
+    WHERE po_number = NEW.po_number AND po_item_no = NEW.po_item_no;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_srv_items_receipts_update
+AFTER UPDATE OF received_qty, rejected_qty ON srv_items
+WHEN NOT EXISTS (SELECT 1 FROM trigger_guards WHERE name = 'srv_receipts')
+BEGIN
+    UPDATE purchase_order_items
+    SET rcd_qty = COALESCE((
+            SELECT SUM(si.received_qty) FROM srv_items si
+            JOIN srvs s ON si.srv_number = s.srv_number
+            WHERE si.po_number = NEW.po_number AND si.po_item_no = NEW.po_item_no AND s.is_active = 1
+        ), 0),
+        rejected_qty = COALESCE((
+            SELECT SUM(si.rejected_qty) FROM srv_items si
+            JOIN srvs s ON si.srv_number = s.srv_number
+            WHERE si.po_number = NEW.po_number AND si.po_item_no = NEW.po_item_no AND s.is_active = 1
+        ), 0)
+    WHERE po_number = NEW.po_number AND po_item_no = NEW.po_item_no;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_srv_items_receipts_delete
+AFTER DELETE ON srv_items
+WHEN NOT EXISTS (SELECT 1 FROM trigger_guards WHERE name = 'srv_receipts')
+BEGIN
+    UPDATE purchase_order_items
+    SET rcd_qty = COALESCE((
+            SELECT SUM(si.received_qty) FROM srv_items si
+            JOIN srvs s ON si.srv_number = s.srv_number
+            WHERE si.po_number = OLD.po_number AND si.po_item_no = OLD.po_item_no AND s.is_active = 1
+        ), 0),
+        rejected_qty = COALESCE((
+            SELECT SUM(si.rejected_qty) FROM srv_items si
+            JOIN srvs s ON si.srv_number = s.srv_number
+            WHERE si.po_number = OLD.po_number AND si.po_item_no = OLD.po_item_no AND s.is_active = 1
+        ), 0)
+    WHERE po_number = OLD.po_number AND po_item_no = OLD.po_item_no;
+END;